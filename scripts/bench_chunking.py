@@ -0,0 +1,137 @@
+"""
+超长消息分块索引的基准：整条写入 vs 分块写入的建索引耗时与搜索结果载荷大小
+
+用法：
+    python scripts/bench_chunking.py --synthetic 2000
+    python scripts/bench_chunking.py --corpus long_chat.jsonl --meili-host http://127.0.0.1:7700
+
+- 语料为 JSONL（与索引文档结构相同）；未提供时生成 3000-4000 字的中文"小说章节"与少量短消息
+- 对同一语料分别按整条、按分块（--max-chars/--chunk-chars/--overlap）写入 SQLite FTS5 本地索引，
+  设置 MEILI_HOST（或 --meili-host）时同时在临时索引上测 MeiliSearch，结束后删除临时索引
+- 载荷大小为带高亮的搜索结果折叠分块后序列化为 JSON 的字节数（即 Bot/API 实际拿到的数据量）
+"""
+
+import argparse
+import json
+import os
+import random
+import tempfile
+import time
+from pathlib import Path
+
+from bench_search_backends import _HAN, _load_corpus, _percentiles, _sample_queries
+
+from tg_search.core.chunking import chunk_documents, collapse_chunks
+from tg_search.core.sqlite_fts import SqliteFtsIndex
+
+
+def _synthetic_corpus(count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    base_ts = 1_700_000_000
+    docs = []
+    for i in range(count):
+        if rng.random() < 0.7:
+            sentences = ["".join(rng.choice(_HAN) for _ in range(rng.randint(8, 30))) + "。" for _ in range(rng.randint(150, 220))]
+            text = "\n".join("".join(sentences[j : j + 6]) for j in range(0, len(sentences), 6))
+        else:
+            text = "".join(rng.choice(_HAN) for _ in range(rng.randint(5, 60)))
+        docs.append(
+            {
+                "id": f"1-{i}",
+                "chat": {"id": 1, "type": "channel"},
+                "chat_id": 1,
+                "msg_id": i,
+                "date_ts": base_ts + i * 60,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(base_ts + i * 60)),
+                "text": text,
+                "text_len": len(text),
+            }
+        )
+    return docs
+
+
+def _search_payloads(search, queries: list[str], limit: int) -> dict:
+    samples = []
+    payload_bytes = []
+    params = {
+        "limit": limit,
+        "attributesToHighlight": ["text"],
+        "highlightPreTag": "<mark>",
+        "highlightPostTag": "</mark>",
+    }
+    for q in queries:
+        started = time.perf_counter()
+        result = search(q, **params)
+        hits = collapse_chunks(result.get("hits", []))
+        samples.append((time.perf_counter() - started) * 1000)
+        payload_bytes.append(len(json.dumps(hits, ensure_ascii=False).encode("utf-8")))
+    return {**_percentiles(samples), "avg_payload_bytes": int(sum(payload_bytes) / max(len(payload_bytes), 1))}
+
+
+def bench_sqlite(docs: list[dict], queries: list[str], batch_size: int, limit: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SqliteFtsIndex(Path(tmp) / "bench.sqlite3")
+        started = time.perf_counter()
+        for start in range(0, len(docs), batch_size):
+            index.add_documents(docs[start : start + batch_size], "bench")
+        ingest_sec = time.perf_counter() - started
+        search = _search_payloads(lambda q, **params: index.search(q, "bench", **params), queries, limit)
+        return {"documents": len(docs), "ingest_sec": round(ingest_sec, 2), "size_bytes": index.size_bytes(), **search}
+
+
+def bench_meili(docs: list[dict], queries: list[str], batch_size: int, limit: int, host: str, key: str) -> dict:
+    from tg_search.core.meilisearch import MeiliSearchClient
+
+    meili = MeiliSearchClient(host, key, auto_create_index=False)
+    index_name = f"bench_chunk_{int(time.time() * 1000)}"
+    try:
+        meili.create_index(index_name)
+        started = time.perf_counter()
+        tasks = [meili.add_documents(docs[start : start + batch_size], index_name) for start in range(0, len(docs), batch_size)]
+        for task in tasks:
+            meili.wait_for_task(task.task_uid, timeout_ms=600_000)
+        ingest_sec = time.perf_counter() - started
+        search = _search_payloads(lambda q, **params: meili.search(q, index_name, **params), queries, limit)
+        return {"documents": len(docs), "ingest_sec": round(ingest_sec, 2), **search}
+    finally:
+        meili.delete_index(index_name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark whole-message vs chunked indexing of long messages")
+    parser.add_argument("--corpus", help="JSONL file of index documents")
+    parser.add_argument("--synthetic", type=int, default=2000, help="synthetic corpus size when --corpus is not given")
+    parser.add_argument("--query-count", type=int, default=200)
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--limit", type=int, default=20)
+    parser.add_argument("--max-chars", type=int, default=2000)
+    parser.add_argument("--chunk-chars", type=int, default=1000)
+    parser.add_argument("--overlap", type=int, default=100)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--meili-host", default=os.getenv("MEILI_HOST", ""))
+    parser.add_argument("--meili-key", default=os.getenv("MEILI_MASTER_KEY", ""))
+    args = parser.parse_args()
+
+    docs = _load_corpus(args.corpus) if args.corpus else _synthetic_corpus(args.synthetic, args.seed)
+    chunked = chunk_documents(docs, max_chars=args.max_chars, chunk_chars=args.chunk_chars, overlap=args.overlap)
+    queries = _sample_queries(docs, args.query_count, args.seed)
+
+    report = {
+        "messages": len(docs),
+        "long_messages": sum(1 for doc in docs if len(doc.get("text") or "") > args.max_chars),
+        "queries": len(queries),
+        "sqlite_fts": {
+            "whole": bench_sqlite(docs, queries, args.batch_size, args.limit),
+            "chunked": bench_sqlite(chunked, queries, args.batch_size, args.limit),
+        },
+    }
+    if args.meili_host:
+        report["meilisearch"] = {
+            "whole": bench_meili(docs, queries, args.batch_size, args.limit, args.meili_host, args.meili_key),
+            "chunked": bench_meili(chunked, queries, args.batch_size, args.limit, args.meili_host, args.meili_key),
+        }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
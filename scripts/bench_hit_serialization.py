@@ -0,0 +1,66 @@
+"""
+测量每条命中的解析与序列化开销：MeiliSearch 文档 -> SearchHit -> API JSON
+
+用法：
+    python scripts/bench_hit_serialization.py
+    python scripts/bench_hit_serialization.py --hits 100 --text-repeat 20 --repeat 7
+
+- 每页的逐条工作：SearchService.to_hit 解析命中，再由搜索路由的 `_search_response` 序列化整页
+- 输出每条命中的最佳耗时（微秒）；只用于对比改动前后的量级，不作为单元测试断言（墙钟时间受机器负载影响）
+"""
+
+import argparse
+import json
+import timeit
+
+from tg_search.api.routes.search import _search_response
+from tg_search.services.contracts import SearchPage
+from tg_search.services.search_service import SearchService
+
+
+def _documents(count: int, text_repeat: int) -> list[dict]:
+    return [
+        {
+            "id": f"-100123-{i}",
+            "chat": {"id": -100123, "type": "group", "title": "Test"},
+            "date": "2026-01-01T08:00:00Z",
+            "date_ts": 1767254400,
+            "msg_id": i,
+            "text": "hello world " * text_repeat,
+            "from_user": {"id": 789, "username": "user"},
+            "reactions": {"👍": 2},
+            "reactions_scores": 1.5,
+            "text_len": 12 * text_repeat,
+            "_formatted": {"text": "<mark>hello</mark> world " * text_repeat},
+        }
+        for i in range(count)
+    ]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Measure per-hit parse + serialize cost of a search page")
+    parser.add_argument("--hits", type=int, default=100, help="hits per page")
+    parser.add_argument("--text-repeat", type=int, default=20, help="'hello world ' repetitions per message")
+    parser.add_argument("--number", type=int, default=5, help="pages rendered per timing run")
+    parser.add_argument("--repeat", type=int, default=5, help="timing runs (best is reported)")
+    args = parser.parse_args()
+
+    service = SearchService(object(), cache_enabled=False)
+    documents = _documents(args.hits, args.text_repeat)
+
+    def _render_page() -> bytes:
+        hits = [service.to_hit(document) for document in documents]
+        page = SearchPage(hits=hits, query="hello", processing_time_ms=1, total_hits=len(hits), limit=len(hits), offset=0)
+        return _search_response(page).body
+
+    best = min(timeit.repeat(_render_page, number=args.number, repeat=args.repeat))
+    report = {
+        "hits_per_page": args.hits,
+        "page_bytes": len(_render_page()),
+        "per_hit_us": round(best / args.number / max(args.hits, 1) * 1e6, 2),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,136 @@
+"""
+回放查询日志，对比查询归一化前后的展示缓存命中率
+
+用法：
+    python scripts/bench_query_normalization.py --log queries.txt
+    python scripts/bench_query_normalization.py --synthetic 5000 --interval-sec 30
+
+- 查询日志每行一条查询，或 JSONL（取 `q` 字段）；未提供时按"少数热门查询 + 长尾"的分布生成，
+  并随机加入大小写、首尾空格、全角字符与繁体写法等用户输入差异
+- 按 TTL（--ttl-sec，默认与 CACHE_EXPIRE_SECONDS 一致）模拟 SearchService 展示缓存，查询按 --interval-sec
+  的间隔到达（JSONL 日志带 `ts` 字段时使用实际时间），分别以原始查询与归一化后的查询作为缓存键，
+  输出命中率与实际发往搜索后端的查询数
+"""
+
+import argparse
+import json
+import random
+
+from tg_search.config.settings import CACHE_EXPIRE_SECONDS
+from tg_search.services.query_normalizer import QueryNormalizer
+
+_BASE_QUERIES = [
+    "Hello",
+    "docker compose",
+    "python",
+    "release notes",
+    "MeiliSearch",
+    "周末活动",
+    "电影推荐",
+    "机器学习",
+    "东京旅游",
+    "开会时间",
+    "网络问题",
+    "学习资料",
+    "价格",
+    "下载链接",
+    "iPhone 16",
+]
+_TRADITIONAL = {"电影": "電影", "机器学习": "機器學習", "东京": "東京", "开会时间": "開會時間", "网络问题": "網絡問題", "学习": "學習", "价格": "價格", "链接": "鏈接"}
+
+
+def _full_width(text: str) -> str:
+    return "".join(chr(ord(ch) + 0xFEE0) if "!" <= ch <= "~" else ("　" if ch == " " else ch) for ch in text)
+
+
+def _variant(query: str, rng: random.Random) -> str:
+    roll = rng.random()
+    if roll < 0.45:
+        return query
+    if roll < 0.6:
+        return query.lower() if rng.random() < 0.5 else query.upper()
+    if roll < 0.72:
+        return f" {query}  " if rng.random() < 0.5 else query + " "
+    if roll < 0.84:
+        return _full_width(query)
+    for simplified, traditional in _TRADITIONAL.items():
+        if simplified in query:
+            return query.replace(simplified, traditional)
+    return query.title()
+
+
+def _synthetic_log(count: int, seed: int, interval_sec: float) -> list[tuple[float, str]]:
+    rng = random.Random(seed)
+    # Zipf-like popularity: a few hot queries, then a long tail of one-offs.
+    weights = [1 / (rank + 1) for rank in range(len(_BASE_QUERIES))]
+    log = []
+    for i in range(count):
+        if rng.random() < 0.2:
+            query = f"tail query {i}"
+        else:
+            query = _variant(rng.choices(_BASE_QUERIES, weights)[0], rng)
+        log.append((i * interval_sec, query))
+    return log
+
+
+def _load_log(path: str, interval_sec: float) -> list[tuple[float, str]]:
+    entries = []
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            ts = len(entries) * interval_sec
+            if line.lstrip().startswith("{"):
+                record = json.loads(line)
+                query = str(record.get("q", ""))
+                ts = float(record.get("ts", ts))
+            else:
+                query = line.rstrip("\n")
+            if query.strip():
+                entries.append((ts, query))
+    return entries
+
+
+def replay(entries: list[tuple[float, str]], key, ttl_sec: float) -> dict:
+    expires_at: dict[str, float] = {}
+    hits = 0
+    for ts, query in entries:
+        cache_key = key(query)
+        if expires_at.get(cache_key, float("-inf")) > ts:
+            hits += 1
+            continue
+        expires_at[cache_key] = ts + ttl_sec
+    return {
+        "hit_rate": round(hits / max(len(entries), 1), 4),
+        "backend_queries": len(entries) - hits,
+        "distinct_keys": len({key(query) for _, query in entries}),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Replay a query log and compare cache hit rates with and without query normalization")
+    parser.add_argument("--log", help="query log: one query per line, or JSONL with a `q` field")
+    parser.add_argument("--synthetic", type=int, default=5000, help="synthetic log size when --log is not given")
+    parser.add_argument("--interval-sec", type=float, default=30.0, help="spacing between queries without timestamps")
+    parser.add_argument("--ttl-sec", type=float, default=CACHE_EXPIRE_SECONDS)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    if args.log:
+        entries = _load_log(args.log, args.interval_sec)
+    else:
+        entries = _synthetic_log(args.synthetic, args.seed, args.interval_sec)
+    normalizer = QueryNormalizer()
+    folding = QueryNormalizer(fold_traditional=True)
+    report = {
+        "queries": len(entries),
+        "ttl_sec": args.ttl_sec,
+        "raw": replay(entries, lambda q: q, args.ttl_sec),
+        "normalized": replay(entries, normalizer.normalize_text, args.ttl_sec),
+        "normalized_t2s": replay(entries, folding.normalize_text, args.ttl_sec),
+    }
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,162 @@
+"""
+对比 SQLite FTS5 本地索引与 MeiliSearch 的搜索延迟和索引体积
+
+用法：
+    python scripts/bench_search_backends.py --synthetic 50000
+    python scripts/bench_search_backends.py --corpus export.jsonl --queries queries.txt --meili-host http://127.0.0.1:7700
+
+- 语料为 JSONL，每行一个与索引文档相同结构的消息（至少包含 id/text/date_ts/chat_id/msg_id）；
+  未提供时生成中英混合的合成语料
+- 查询列表每行一条；未提供时从语料中随机截取 1-4 字的中文片段和英文单词
+- 设置 MEILI_HOST（或 --meili-host）时在临时索引 bench_<时间戳> 上跑同一组查询，结束后删除该索引
+"""
+
+import argparse
+import json
+import os
+import random
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from tg_search.core.sqlite_fts import SqliteFtsIndex, tokenize
+
+_HAN = "的一是在不了有和人这中大为上个国我以要他时来用们生到作地于出就分对成会可主发年动同工也能下过子说产种面而方后多定行学法所民得经十三之进着等部度家电力里如水化高自二理起小物现实加量都两体制机当使点从业本去把性好应开它合还因由其些然前外天政四日那社义事平形相全表间样与关各重新线内数正心反你明看原又么利比或但质气第向道命此变条只没结解问意建月公无系军很情者最立代想已通并提直题党程展五果料象员革位入常文总次品式活设及管特件长求老头基资边流路级少图山统接知较将组见计别她手角期根论运农指几九区强放决西被干做必战先回则任取据处理府研质"
+_WORDS = ["meili", "search", "telegram", "python", "sqlite", "release", "deploy", "docker", "bug", "fix", "hello"]
+
+
+def _synthetic_corpus(count: int, seed: int) -> list[dict]:
+    rng = random.Random(seed)
+    base_ts = 1_700_000_000
+    docs = []
+    for i in range(count):
+        parts = []
+        for _ in range(rng.randint(3, 12)):
+            if rng.random() < 0.75:
+                parts.append("".join(rng.choice(_HAN) for _ in range(rng.randint(2, 8))))
+            else:
+                parts.append(rng.choice(_WORDS))
+        chat_id = rng.randint(1, 50)
+        docs.append(
+            {
+                "id": f"{chat_id}-{i}",
+                "chat": {"id": chat_id, "type": "group"},
+                "chat_id": chat_id,
+                "msg_id": i,
+                "date_ts": base_ts + i * 30,
+                "date": time.strftime("%Y-%m-%dT%H:%M:%S+00:00", time.gmtime(base_ts + i * 30)),
+                "text": " ".join(parts),
+                "from_user": {"id": rng.randint(1, 500)},
+                "reactions_scores": 0.0,
+            }
+        )
+    return docs
+
+
+def _load_corpus(path: str) -> list[dict]:
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def _sample_queries(docs: list[dict], count: int, seed: int) -> list[str]:
+    rng = random.Random(seed)
+    queries = []
+    texts = [doc.get("text") or "" for doc in docs if doc.get("text")]
+    while texts and len(queries) < count:
+        tokens = tokenize(rng.choice(texts))
+        if not tokens:
+            continue
+        token = rng.choice(tokens)
+        queries.append(token if len(token) > 2 or not token.isascii() else rng.choice(_WORDS))
+    return queries
+
+
+def _percentiles(samples_ms: list[float]) -> dict:
+    ordered = sorted(samples_ms)
+    pick = lambda q: ordered[min(int(len(ordered) * q), len(ordered) - 1)]  # noqa: E731
+    return {
+        "p50": round(pick(0.50), 2),
+        "p95": round(pick(0.95), 2),
+        "p99": round(pick(0.99), 2),
+        "mean": round(statistics.fmean(ordered), 2),
+    }
+
+
+def _run_queries(search, queries: list[str], limit: int) -> dict:
+    samples = []
+    hits = 0
+    params = {
+        "limit": limit,
+        "attributesToHighlight": ["text"],
+        "highlightPreTag": "<mark>",
+        "highlightPostTag": "</mark>",
+    }
+    for q in queries:
+        started = time.perf_counter()
+        result = search(q, **params)
+        samples.append((time.perf_counter() - started) * 1000)
+        hits += len(result.get("hits", []))
+    return {**_percentiles(samples), "avg_hits": round(hits / max(len(queries), 1), 1)}
+
+
+def bench_sqlite(docs: list[dict], queries: list[str], batch_size: int, limit: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        index = SqliteFtsIndex(Path(tmp) / "bench.sqlite3")
+        started = time.perf_counter()
+        for start in range(0, len(docs), batch_size):
+            index.add_documents(docs[start : start + batch_size], "bench")
+        index.optimize()
+        ingest_sec = time.perf_counter() - started
+        latency = _run_queries(lambda q, **params: index.search(q, "bench", **params), queries, limit)
+        return {"ingest_sec": round(ingest_sec, 2), "size_bytes": index.size_bytes(), **latency}
+
+
+def bench_meili(docs: list[dict], queries: list[str], batch_size: int, limit: int, host: str, key: str) -> dict:
+    from tg_search.core.meilisearch import MeiliSearchClient
+
+    meili = MeiliSearchClient(host, key, auto_create_index=False)
+    index_name = f"bench_{int(time.time())}"
+    size_before = meili.client.get_all_stats().get("databaseSize", 0)
+    try:
+        meili.create_index(index_name)
+        started = time.perf_counter()
+        tasks = [meili.add_documents(docs[start : start + batch_size], index_name) for start in range(0, len(docs), batch_size)]
+        for task in tasks:
+            meili.wait_for_task(task.task_uid, timeout_ms=600_000)
+        ingest_sec = time.perf_counter() - started
+        latency = _run_queries(lambda q, **params: meili.search(q, index_name, **params), queries, limit)
+        size_after = meili.client.get_all_stats().get("databaseSize", 0)
+        return {"ingest_sec": round(ingest_sec, 2), "size_bytes": max(size_after - size_before, 0), **latency}
+    finally:
+        meili.delete_index(index_name)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Benchmark SQLite FTS5 vs MeiliSearch on the same corpus")
+    parser.add_argument("--corpus", help="JSONL file of index documents")
+    parser.add_argument("--synthetic", type=int, default=20000, help="synthetic corpus size when --corpus is not given")
+    parser.add_argument("--queries", help="file with one query per line")
+    parser.add_argument("--query-count", type=int, default=500)
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--meili-host", default=os.getenv("MEILI_HOST", ""))
+    parser.add_argument("--meili-key", default=os.getenv("MEILI_MASTER_KEY", ""))
+    args = parser.parse_args()
+
+    docs = _load_corpus(args.corpus) if args.corpus else _synthetic_corpus(args.synthetic, args.seed)
+    if args.queries:
+        with open(args.queries, encoding="utf-8") as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = _sample_queries(docs, args.query_count, args.seed)
+
+    report = {"documents": len(docs), "queries": len(queries), "sqlite_fts": bench_sqlite(docs, queries, args.batch_size, args.limit)}
+    if args.meili_host:
+        report["meilisearch"] = bench_meili(docs, queries, args.batch_size, args.limit, args.meili_host, args.meili_key)
+    print(json.dumps(report, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
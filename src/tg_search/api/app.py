@@ -140,6 +140,11 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         except Exception as e:
             logger.error(f"Failed to start Bot: {e}")
 
+    # 展示缓存只服务于 Bot，API-only 模式下不预热
+    cache_warmer = app_state.service_container.cache_warmer if app_state.service_container is not None else None
+    if cache_warmer is not None and not app_state.api_only:
+        cache_warmer.start()
+
     logger.info("API server started")
     yield
 
@@ -156,6 +161,9 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
             pass
         logger.info("Bot task cancelled")
 
+    if cache_warmer is not None:
+        await cache_warmer.stop()
+
     if app_state.runtime_control_service is not None:
         try:
             await app_state.runtime_control_service.stop(source="api_lifespan_shutdown")
@@ -291,6 +299,8 @@ def build_app() -> FastAPI:
     # 异常处理器
     @app.exception_handler(MeiliSearchConnectionError)
     async def meili_connection_exception_handler(request: Request, exc: MeiliSearchConnectionError):
+        # 熔断打开时带上下次探测的等待时间
+        retry_after = getattr(exc, "retry_after", None)
         return JSONResponse(
             status_code=503,
             content=ErrorResponse(
@@ -298,6 +308,7 @@ def build_app() -> FastAPI:
                 message="MeiliSearch service unavailable",
                 details=str(exc),
             ).model_dump(mode="json"),
+            headers={"Retry-After": str(max(int(retry_after + 0.999), 1))} if retry_after else None,
         )
 
     @app.exception_handler(MeiliSearchTimeoutError)
@@ -14,9 +14,14 @@ from fastapi import Depends, Header, HTTPException, Request
 if TYPE_CHECKING:
     from tg_search.api.auth_store import AuthStore, AuthToken
     from tg_search.api.state import AppState, ProgressRegistry
+    from tg_search.config.activity_store import ActivityStore
     from tg_search.config.config_store import ConfigStore
+    from tg_search.config.metadata_store import MetadataStore
     from tg_search.core.meilisearch import MeiliSearchClient
+    from tg_search.core.sharding import ShardRouter
+    from tg_search.services.admission import AdmissionController
     from tg_search.services.config_policy_service import ConfigPolicyService
+    from tg_search.services.index_maintenance_service import IndexMaintenanceService
     from tg_search.services.observability_service import ObservabilityService
     from tg_search.services.runtime_control_service import RuntimeControlService
     from tg_search.services.search_service import SearchService
@@ -76,6 +81,11 @@ class MeiliSearchAsync:
         """异步搜索"""
         return await run_sync_in_thread(self._client.search, query, index_name, **kwargs)
 
+    async def multi_search(self, queries: list, federation: Optional[dict] = None) -> dict:
+        """异步批量搜索"""
+        result: dict = await run_sync_in_thread(self._client.multi_search, queries, federation)
+        return result
+
     async def get_index_stats(self, index_name: str = "telegram") -> Any:
         """异步获取索引统计"""
         return await run_sync_in_thread(self._client.get_index_stats, index_name)
@@ -121,6 +131,30 @@ async def get_config_store(request: Request) -> "ConfigStore":
     return app_state.config_store
 
 
+async def get_metadata_store(request: Request) -> Optional["MetadataStore"]:
+    """获取 MetadataStore；未初始化时返回 None（调用方回退到文档内嵌字段）。"""
+    app_state = await get_app_state(request)
+    if app_state.service_container is None:
+        return None
+    return getattr(app_state.service_container, "metadata_store", None)
+
+
+async def get_activity_store(request: Request) -> Optional["ActivityStore"]:
+    """获取会话活动预聚合存储；未启用时返回 None（Dashboard 回退到窗口采样）。"""
+    app_state = await get_app_state(request)
+    if app_state.service_container is None:
+        return None
+    return getattr(app_state.service_container, "activity_store", None)
+
+
+async def get_shard_router(request: Request) -> Optional["ShardRouter"]:
+    """获取月分片路由器；未启用分片时返回 None。"""
+    app_state = await get_app_state(request)
+    if app_state.service_container is None:
+        return None
+    return getattr(app_state.service_container, "shard_router", None)
+
+
 async def get_config_policy_service(request: Request) -> "ConfigPolicyService":
     """获取 ConfigPolicyService。"""
     from tg_search.services.config_policy_service import ConfigPolicyService  # noqa: F401
@@ -141,6 +175,26 @@ async def get_search_service(request: Request) -> "SearchService":
     return app_state.search_service
 
 
+async def get_admission_controller(request: Request) -> Optional["AdmissionController"]:
+    """获取搜索准入控制器（未启用时返回 None）。"""
+    app_state = await get_app_state(request)
+    if app_state.service_container is None:
+        return None
+    return getattr(app_state.service_container, "admission_controller", None)
+
+
+async def get_index_maintenance_service(request: Request) -> "IndexMaintenanceService":
+    """获取 IndexMaintenanceService。"""
+    app_state = await get_app_state(request)
+    if app_state.service_container is not None:
+        service: Optional["IndexMaintenanceService"] = getattr(
+            app_state.service_container, "index_maintenance_service", None
+        )
+        if service is not None:
+            return service
+    raise HTTPException(status_code=503, detail="IndexMaintenanceService not initialized")
+
+
 async def get_observability_service(request: Request) -> "ObservabilityService":
     """获取 ObservabilityService。"""
     from tg_search.services.observability_service import ObservabilityService  # noqa: F401
@@ -109,6 +109,47 @@ class SearchResult(BaseModel):
     total_hits: int
     limit: int
     offset: int
+    next_cursor: Optional[str] = Field(default=None, description="游标分页的下一页 token（无更多结果时为 null）")
+    facet_distribution: Optional[Dict[str, Dict[str, int]]] = Field(
+        default=None, description="分面计数：属性 → 取值 → 命中数，按命中数降序（仅在请求 facets 时返回）"
+    )
+
+
+class SearchBatchQuery(BaseModel):
+    """批量搜索中的单条查询（字段与 GET /search 参数一致）"""
+
+    q: str = Field(..., min_length=1, max_length=500, description="搜索关键词")
+    chat_id: Optional[int] = Field(None, description="限定聊天 ID")
+    chat_type: Optional[Literal["private", "group", "channel"]] = Field(None, description="聊天类型过滤")
+    date_from: Optional[datetime] = Field(None, description="开始时间")
+    date_to: Optional[datetime] = Field(None, description="结束时间")
+    sender_username: Optional[str] = Field(None, description="发送者用户名")
+    sender_id: Optional[int] = Field(None, description="发送者用户 ID")
+    limit: int = Field(default=20, ge=1, le=100, description="返回数量")
+    offset: int = Field(default=0, ge=0, description="偏移量")
+    cursor: Optional[str] = Field(None, description="游标分页 token（非联邦模式）")
+    index_name: str = Field(default="telegram", pattern=r"^telegram[A-Za-z0-9_]*$", description="目标索引")
+    profile: Literal["detail", "list"] = Field(default="detail", description="返回内容：detail 完整消息 / list 高亮摘要")
+    fields: Optional[List[str]] = Field(default=None, description="返回字段（如 id、chat、date、formatted_text）")
+    facets: Optional[List[str]] = Field(
+        default=None, description="分面属性：chat.id / chat.type / from_user.id（非联邦模式）"
+    )
+
+
+class SearchBatchRequest(BaseModel):
+    """POST /search/batch 请求"""
+
+    queries: List[SearchBatchQuery] = Field(..., min_length=1, max_length=20, description="查询列表")
+    federated: bool = Field(default=False, description="是否将所有查询合并为单一排序结果")
+    limit: int = Field(default=20, ge=1, le=100, description="联邦模式下合并结果的返回数量")
+    offset: int = Field(default=0, ge=0, description="联邦模式下合并结果的偏移量")
+
+
+class SearchBatchResult(BaseModel):
+    """POST /search/batch 响应 data（联邦模式下 results 仅含一项合并结果）"""
+
+    results: List[SearchResult]
+    federated: bool = False
 
 
 class SearchStats(BaseModel):
@@ -121,9 +162,46 @@ class SearchStats(BaseModel):
     notes: List[str] = Field(default_factory=list)
 
 
+class TopQueryData(BaseModel):
+    """热门查询条目（归一化后的查询与筛选条件）"""
+
+    q: str
+    filters: Dict[str, Any] = Field(default_factory=dict)
+    count: int
+    cache_hits: int
+    avg_total_hits: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    last_seen_at: datetime
+
+
+class TopQueriesData(BaseModel):
+    """GET /search/top-queries 响应 data"""
+
+    window_hours: float
+    logged: int
+    items: List[TopQueryData] = Field(default_factory=list)
+    last_warm_at: Optional[datetime] = None
+    last_warmed: int = 0
+
+
 # ============ 状态相关 ============
 
 
+class SearchAdmissionStats(BaseModel):
+    """搜索准入控制统计"""
+
+    max_concurrent: int
+    in_flight: int = Field(description="正在执行的搜索数")
+    queued: int = Field(description="排队等待的搜索数")
+    admitted: int = 0
+    queued_total: int = 0
+    rejected_rate_limited: int = Field(default=0, description="因用户限速被拒绝的次数")
+    rejected_overloaded: int = Field(default=0, description="因队列满或排队超时被拒绝的次数")
+    avg_queue_wait_ms: float = 0.0
+
+
 class SystemStatus(BaseModel):
     """系统状态"""
 
@@ -133,6 +211,9 @@ class SystemStatus(BaseModel):
     telegram_connected: bool
     indexed_messages: int
     memory_usage_mb: float
+    meili_circuit: Dict[str, str] = Field(default_factory=dict, description="MeiliSearch 读/写熔断器状态")
+    ingest_buffered: int = Field(default=0, description="熔断期间暂存、等待补写的文档数")
+    search_admission: Optional[SearchAdmissionStats] = Field(default=None, description="搜索准入控制（未启用时为空）")
     notes: List[str] = Field(default_factory=list)
     version: str = "0.2.0"
 
@@ -384,6 +465,11 @@ class StorageStatsData(BaseModel):
     cache_bytes: None = None  # 当前版本固定 null
     media_supported: bool = False
     cache_supported: bool = False
+    # 近似重复检测统计（未启用 DEDUP_ENABLED 时为 null）
+    dedup_messages: Optional[int] = None
+    dedup_duplicates: Optional[int] = None
+    dedup_skipped: Optional[int] = None
+    dedup_saved_bytes: Optional[int] = None
     notes: List[str] = Field(default_factory=list)
 
 
@@ -416,6 +502,72 @@ class MediaCleanupData(BaseModel):
     freed_bytes: int = 0
 
 
+# ============ Index 维护相关 ============
+
+
+class BackfillStatusData(BaseModel):
+    """GET/POST /index/backfill 响应 data"""
+
+    state: Literal["idle", "running", "completed", "failed"]
+    scanned: int = 0
+    updated: int = 0
+    skipped: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+
+class RebuildStatusData(BaseModel):
+    """GET/POST /index/rebuild 响应 data"""
+
+    state: Literal["idle", "running", "completed", "failed"]
+    phase: Optional[Literal["create", "copy", "catch_up", "swap", "cleanup"]] = None
+    index_name: str
+    shadow_index: Optional[str] = None
+    pending_settings: List[str] = Field(default_factory=list, description="启动时暂缓、等待重建生效的设置项")
+    total: int = 0
+    copied: int = 0
+    started_at: Optional[datetime] = None
+    finished_at: Optional[datetime] = None
+    last_error: Optional[str] = None
+
+
+class DeadLetterItemData(BaseModel):
+    """死信文档条目"""
+
+    doc_id: str
+    index_name: str
+    error_code: Optional[str] = None
+    error_message: Optional[str] = None
+    attempts: int = 1
+    created_at: Optional[str] = None
+    updated_at: Optional[str] = None
+    document: Dict[str, Any] = Field(default_factory=dict)
+
+
+class DeadLetterListData(BaseModel):
+    """GET /index/dead-letters 响应 data"""
+
+    total: int
+    items: List[DeadLetterItemData] = Field(default_factory=list)
+
+
+class DeadLetterReplayRequest(BaseModel):
+    """POST /index/dead-letters/replay 请求体"""
+
+    doc_ids: Optional[List[str]] = Field(default=None, max_length=1000, description="指定重放的文档 ID，为空时按最近失败顺序重放")
+    limit: int = Field(default=100, ge=1, le=1000, description="未指定 doc_ids 时最多重放的条数")
+
+
+class DeadLetterReplayData(BaseModel):
+    """POST /index/dead-letters/replay 响应 data"""
+
+    requested: int
+    replayed: int
+    failed: int
+    remaining: int
+
+
 # ============ AI Config 相关 (P1-AI) ============
 
 
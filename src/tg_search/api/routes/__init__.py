@@ -7,7 +7,19 @@ API 路由模块
 from fastapi import APIRouter, Depends
 
 from tg_search.api.deps import verify_bearer_token
-from tg_search.api.routes import ai_config, auth, config, control, dashboard, dialogs, search, status, storage, ws
+from tg_search.api.routes import (
+    ai_config,
+    auth,
+    config,
+    control,
+    dashboard,
+    dialogs,
+    index,
+    search,
+    status,
+    storage,
+    ws,
+)
 
 # 创建主路由器
 api_router = APIRouter(prefix="/api/v1")
@@ -59,6 +71,14 @@ api_router.include_router(
     dependencies=[Depends(verify_bearer_token)],
 )
 
+# Index 维护端点 - Bearer-only
+api_router.include_router(
+    index.router,
+    prefix="/index",
+    tags=["Index"],
+    dependencies=[Depends(verify_bearer_token)],
+)
+
 # AI Config 端点 - Bearer-only（与 SPEC-P1-ai-config AC-1 对齐）
 api_router.include_router(
     ai_config.router,
@@ -8,20 +8,30 @@ Dashboard API 路由 (P2-DB)
 
 from __future__ import annotations
 
-import re
 from collections import Counter
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
 from fastapi import APIRouter, Depends, Query
 
-from tg_search.api.deps import MeiliSearchAsync, get_meili_async
+from tg_search.api.deps import (
+    MeiliSearchAsync,
+    get_activity_store,
+    get_meili_async,
+    get_metadata_store,
+    get_shard_router,
+    run_sync_in_thread,
+)
 from tg_search.api.models import (
     ApiResponse,
     DashboardActivityData,
     DashboardActivityItem,
     DashboardBriefData,
 )
+from tg_search.config.activity_store import ActivityStore, extract_keywords
+from tg_search.config.metadata_store import MetadataStore
+from tg_search.core.chunking import collapse_chunks
+from tg_search.core.sharding import ShardRouter
 
 router = APIRouter()
 
@@ -30,28 +40,6 @@ _MAX_KEYWORDS = 3
 _DEFAULT_MIN_MESSAGES = 20
 _TEMPLATE_ID = "brief.v1"
 _NO_ENOUGH_DATA = "NO_ENOUGH_DATA"
-_TOKEN_RE = re.compile(r"[A-Za-z0-9_]{2,}")
-_STOP_WORDS = {
-    "the",
-    "and",
-    "for",
-    "with",
-    "that",
-    "this",
-    "from",
-    "have",
-    "your",
-    "you",
-    "are",
-    "was",
-    "were",
-    "will",
-    "just",
-    "into",
-    "about",
-    "http",
-    "https",
-}
 
 
 def _to_utc_datetime(value: Any) -> datetime | None:
@@ -76,53 +64,88 @@ def _to_utc_datetime(value: Any) -> datetime | None:
 
 def _extract_keywords(text: str, max_count: int = _MAX_KEYWORDS) -> list[str]:
     """从文本中提取 top keywords（简单规则版，deterministic）。"""
-    if not text:
-        return []
-
-    counter: Counter[str] = Counter()
-    for token in _TOKEN_RE.findall(text.lower()):
-        if token in _STOP_WORDS:
-            continue
-        counter[token] += 1
-    return [word for word, _ in counter.most_common(max_count)]
+    return extract_keywords(text, max_count)
 
 
 async def _load_window_hits(
     meili: MeiliSearchAsync,
     window_hours: int,
+    shard_router: ShardRouter | None = None,
 ) -> tuple[list[dict[str, Any]], int, bool]:
     """
     拉取时间窗口内样本消息。
 
+    启用分片时按时间倒序逐个查询窗口覆盖的分片，直到凑满样本量。
+
     返回: (hits, source_count, sampled)
     """
     now_utc = datetime.now(timezone.utc)
-    start_time = now_utc - timedelta(hours=window_hours)
-    filter_str = f'date >= "{start_time.isoformat().replace("+00:00", "Z")}"'
-
-    result = await meili.search(
-        "",
-        limit=_SAMPLE_SIZE,
-        offset=0,
-        filter=filter_str,
-        sort=["date:desc"],
-        attributesToRetrieve=["id", "chat", "date", "text"],
-    )
+    start_ts = int((now_utc - timedelta(hours=window_hours)).timestamp())
+    search_kwargs: dict[str, Any] = {
+        "offset": 0,
+        "filter": f"date_ts >= {start_ts}",
+        "sort": ["date_ts:desc"],
+        "attributesToRetrieve": ["id", "parent_id", "chat", "date", "text"],
+    }
+
+    index_names = ["telegram"]
+    if shard_router is not None:
+        index_names = await run_sync_in_thread(shard_router.indexes_for_range, start_ts, None)
+
+    hits: list[dict[str, Any]] = []
+    estimated_total = 0
+    for index_name in index_names:
+        result = await meili.search("", index_name, limit=_SAMPLE_SIZE - len(hits), **search_kwargs)
+        hits_raw = result.get("hits", [])
+        index_hits = hits_raw if isinstance(hits_raw, list) else []
+        # 超长消息的分块只计为一条消息
+        hits.extend(collapse_chunks(index_hits))
+        try:
+            estimated_total += int(result.get("estimatedTotalHits", len(index_hits)))
+        except (TypeError, ValueError):
+            estimated_total += len(index_hits)
+        if len(hits) >= _SAMPLE_SIZE:
+            break
 
-    hits_raw = result.get("hits", [])
-    hits = hits_raw if isinstance(hits_raw, list) else []
-    estimated_total = result.get("estimatedTotalHits", len(hits))
-    try:
-        source_count = max(int(estimated_total), len(hits))
-    except (TypeError, ValueError):
-        source_count = len(hits)
+    source_count = max(estimated_total, len(hits))
 
     sampled = source_count > len(hits)
     return hits, source_count, sampled
 
 
-def _aggregate_activity_items(hits: list[dict[str, Any]]) -> list[DashboardActivityItem]:
-    """按 chat 维度聚合 activity。"""
+def _chat_title(chat_id: int, metadata_store: MetadataStore | None, chat: dict[str, Any] | None = None) -> str:
+    """会话标题：优先取自元数据存储，其次是文档内嵌字段。"""
+    meta = metadata_store.get_chat(chat_id) if metadata_store is not None else None
+    if meta is not None:
+        title = meta.title or meta.username
+    else:
+        title = (chat or {}).get("title") or (chat or {}).get("username")
+    return str(title or f"chat_{chat_id}")
+
+
+def _sample_message(text: str) -> str:
+    sample_message = str(text or "")
+    if len(sample_message) > 240:
+        sample_message = sample_message[:240].rstrip() + "..."
+    return sample_message
+
+
+def _sort_items(items: list[DashboardActivityItem]) -> list[DashboardActivityItem]:
+    items.sort(
+        key=lambda x: (
+            -x.message_count,
+            -x.latest_message_time.timestamp(),
+            x.chat_id,
+        )
+    )
+    return items
+
+
+def _aggregate_activity_items(
+    hits: list[dict[str, Any]],
+    metadata_store: MetadataStore | None = None,
+) -> list[DashboardActivityItem]:
+    """按 chat 维度聚合 activity（标题优先取自元数据存储）。"""
     grouped: dict[int, dict[str, Any]] = {}
 
     for hit in hits:
@@ -139,9 +162,10 @@ def _aggregate_activity_items(hits: list[dict[str, Any]]) -> list[DashboardActiv
         dt = _to_utc_datetime(hit.get("date")) or datetime.now(timezone.utc)
         text = str(hit.get("text") or "").strip()
         if chat_id not in grouped:
+            meta = metadata_store.get_chat(chat_id) if metadata_store is not None else None
             grouped[chat_id] = {
-                "chat_title": str(chat.get("title") or chat.get("username") or f"chat_{chat_id}"),
-                "chat_type": str(chat.get("type") or "unknown"),
+                "chat_title": _chat_title(chat_id, metadata_store, chat),
+                "chat_type": str(chat.get("type") or (meta.type if meta is not None else None) or "unknown"),
                 "message_count": 0,
                 "latest_message_time": dt,
                 "latest_text": text,
@@ -161,10 +185,6 @@ def _aggregate_activity_items(hits: list[dict[str, Any]]) -> list[DashboardActiv
     items: list[DashboardActivityItem] = []
     for chat_id, bucket in grouped.items():
         top_keywords = [word for word, _ in bucket["keywords"].most_common(_MAX_KEYWORDS)]
-        sample_message = str(bucket["latest_text"] or "")
-        if len(sample_message) > 240:
-            sample_message = sample_message[:240].rstrip() + "..."
-
         items.append(
             DashboardActivityItem(
                 chat_id=chat_id,
@@ -173,44 +193,100 @@ def _aggregate_activity_items(hits: list[dict[str, Any]]) -> list[DashboardActiv
                 message_count=int(bucket["message_count"]),
                 latest_message_time=bucket["latest_message_time"],
                 top_keywords=top_keywords,
-                sample_message=sample_message,
+                sample_message=_sample_message(bucket["latest_text"]),
             )
         )
 
-    items.sort(
-        key=lambda x: (
-            -x.message_count,
-            -x.latest_message_time.timestamp(),
-            x.chat_id,
+    return _sort_items(items)
+
+
+def _window_activity_items(
+    activity_store: ActivityStore,
+    window_hours: int,
+    metadata_store: MetadataStore | None = None,
+) -> list[DashboardActivityItem] | None:
+    """
+    从预聚合的小时桶读取窗口内 activity（精确计数）。
+
+    窗口起点早于开始记录的时间时返回 None，由调用方回退到采样。
+    """
+    since_ts = datetime.now(timezone.utc).timestamp() - window_hours * 3600
+    if not activity_store.covers(since_ts):
+        return None
+
+    items: list[DashboardActivityItem] = []
+    for chat in activity_store.window(since_ts, max_keywords=_MAX_KEYWORDS):
+        meta = metadata_store.get_chat(chat.chat_id) if metadata_store is not None else None
+        items.append(
+            DashboardActivityItem(
+                chat_id=chat.chat_id,
+                chat_title=_chat_title(chat.chat_id, metadata_store),
+                chat_type=str(chat.chat_type or (meta.type if meta is not None else None) or "unknown"),
+                message_count=chat.message_count,
+                latest_message_time=datetime.fromtimestamp(chat.latest_ts, timezone.utc),
+                top_keywords=chat.top_keywords,
+                sample_message=_sample_message(chat.latest_text),
+            )
         )
-    )
-    return items
+    return _sort_items(items)
+
+
+async def _load_activity(
+    meili: MeiliSearchAsync,
+    window_hours: int,
+    *,
+    metadata_store: MetadataStore | None,
+    shard_router: ShardRouter | None,
+    activity_store: ActivityStore | None,
+) -> tuple[list[DashboardActivityItem], int, bool, int]:
+    """
+    窗口内 activity：优先读预聚合桶，否则拉取样本消息在内存中聚合。
+
+    返回: (items, source_count, sampled, sample_size)
+    """
+    if activity_store is not None:
+        items = await run_sync_in_thread(_window_activity_items, activity_store, window_hours, metadata_store)
+        if items is not None:
+            source_count = sum(item.message_count for item in items)
+            return items, source_count, False, source_count
+
+    hits, source_count, sampled = await _load_window_hits(meili, window_hours=window_hours, shard_router=shard_router)
+    items = _aggregate_activity_items(hits, metadata_store)
+    return items, source_count, sampled, min(source_count, _SAMPLE_SIZE)
 
 
 @router.get(
     "/activity",
     response_model=ApiResponse[DashboardActivityData],
     summary="Dashboard 活动聚合",
-    description="窗口拉取 + API 层内存分组聚合（不依赖 Meili 聚合能力）",
+    description="读取写入时维护的每会话小时桶（精确计数）；未覆盖窗口时回退到窗口采样 + 内存分组聚合",
 )
 async def get_dashboard_activity(
     window_hours: int = Query(24, ge=1, le=168, description="统计窗口（小时）"),
     limit: int = Query(20, ge=1, le=100, description="返回聊天数量"),
     offset: int = Query(0, ge=0, description="聊天偏移"),
     meili: MeiliSearchAsync = Depends(get_meili_async),
+    metadata_store: MetadataStore | None = Depends(get_metadata_store),
+    shard_router: ShardRouter | None = Depends(get_shard_router),
+    activity_store: ActivityStore | None = Depends(get_activity_store),
 ) -> ApiResponse[DashboardActivityData]:
     """
     获取 Dashboard 活动聚合列表。
     """
-    hits, source_count, sampled = await _load_window_hits(meili, window_hours=window_hours)
-    all_items = _aggregate_activity_items(hits)
+    all_items, _, sampled, sample_size = await _load_activity(
+        meili,
+        window_hours,
+        metadata_store=metadata_store,
+        shard_router=shard_router,
+        activity_store=activity_store,
+    )
     items = all_items[offset : offset + limit]
 
     data = DashboardActivityData(
         items=items,
         total=len(all_items),
         sampled=sampled,
-        sample_size=min(source_count, _SAMPLE_SIZE),
+        sample_size=sample_size,
     )
     return ApiResponse(data=data)
 
@@ -225,12 +301,20 @@ async def get_dashboard_brief(
     window_hours: int = Query(24, ge=1, le=168, description="统计窗口（小时）"),
     min_messages: int = Query(_DEFAULT_MIN_MESSAGES, ge=1, le=1_000_000, description="最小消息阈值"),
     meili: MeiliSearchAsync = Depends(get_meili_async),
+    metadata_store: MetadataStore | None = Depends(get_metadata_store),
+    shard_router: ShardRouter | None = Depends(get_shard_router),
+    activity_store: ActivityStore | None = Depends(get_activity_store),
 ) -> ApiResponse[DashboardBriefData]:
     """
     获取 Dashboard 规则摘要。
     """
-    hits, source_count, sampled = await _load_window_hits(meili, window_hours=window_hours)
-    activity_items = _aggregate_activity_items(hits)
+    activity_items, source_count, sampled, sample_size = await _load_activity(
+        meili,
+        window_hours,
+        metadata_store=metadata_store,
+        shard_router=shard_router,
+        activity_store=activity_store,
+    )
 
     if source_count < min_messages or not activity_items:
         return ApiResponse(
@@ -240,7 +324,7 @@ async def get_dashboard_brief(
                 source_count=source_count,
                 reason=_NO_ENOUGH_DATA,
                 sampled=sampled,
-                sample_size=min(source_count, _SAMPLE_SIZE),
+                sample_size=sample_size,
             )
         )
 
@@ -256,6 +340,6 @@ async def get_dashboard_brief(
             source_count=source_count,
             reason=None,
             sampled=sampled,
-            sample_size=min(source_count, _SAMPLE_SIZE),
+            sample_size=sample_size,
         )
     )
@@ -510,21 +510,23 @@ async def delete_sync(
     purge_error: Optional[str] = None
 
     if purge_index and app_state.meili_client is not None:
-        # 删除该 chat 对应的 MeiliSearch 索引
-        # 索引命名约定：telegram 或 telegram_{chat_id}（当前主索引为 "telegram"）
-        index_name = "telegram"  # 如未来按 chat_id 分索引，此处改为 f"telegram_{dialog_id}"
+        # 删除该 chat 对应的 MeiliSearch 文档
+        # 索引命名约定：主索引 "telegram"；启用按月分片时还包括所有 telegram_YYYYMM 分片
         try:
-            # 尝试删除该 dialog 下的所有文档（而非整个索引）
             meili = app_state.meili_client
-            idx = meili.client.index(index_name)
-            # 优先使用 delete-by-filter；若 SDK 不支持则回退为“先查 id 再删”
-            delete_by_filter = getattr(idx, "delete_documents_by_filter", None)
-            if callable(delete_by_filter):
-                delete_by_filter(f"chat.id = {dialog_id}")
-            else:
-                doc_ids = _collect_doc_ids_by_chat_id(idx, dialog_id)
-                if doc_ids:
-                    idx.delete_documents(doc_ids)
+            shard_router = getattr(app_state.service_container, "shard_router", None)
+            index_names = shard_router.all_indexes(refresh=True) if shard_router is not None else ["telegram"]
+            for index_name in index_names:
+                # 尝试删除该 dialog 下的所有文档（而非整个索引）
+                idx = meili.client.index(index_name)
+                # 优先使用 delete-by-filter；若 SDK 不支持则回退为“先查 id 再删”
+                delete_by_filter = getattr(idx, "delete_documents_by_filter", None)
+                if callable(delete_by_filter):
+                    delete_by_filter(f"chat.id = {dialog_id}")
+                else:
+                    doc_ids = _collect_doc_ids_by_chat_id(idx, dialog_id)
+                    if doc_ids:
+                        idx.delete_documents(doc_ids)
             logger.info("[dialogs/delete] purged documents for dialog_id=%d", dialog_id)
         except Exception as exc:
             # ADR-DS-004: 索引删除失败不回滚同步配置删除
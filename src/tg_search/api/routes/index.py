@@ -0,0 +1,135 @@
+"""
+索引维护 API 路由
+
+提供旧文档数值字段（date_ts/chat_id/msg_id）的原地回填任务，
+设置变更后的影子索引重建（复制到 telegram__next 后原子交换），
+以及被 MeiliSearch 拒绝文档（死信）的查看与重放
+"""
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+
+from tg_search.api.deps import get_index_maintenance_service
+from tg_search.api.models import (
+    ApiResponse,
+    BackfillStatusData,
+    DeadLetterListData,
+    DeadLetterReplayData,
+    DeadLetterReplayRequest,
+    RebuildStatusData,
+)
+from tg_search.core.logger import setup_logger
+from tg_search.services.contracts import DomainError
+from tg_search.services.index_maintenance_service import IndexMaintenanceService
+
+logger = setup_logger()
+
+router = APIRouter()
+
+_DOMAIN_ERROR_STATUS: dict[str, int] = {
+    "dead_letter_unavailable": 503,
+    "index_rebuild_pending": 409,
+}
+
+
+def _to_http_error(exc: DomainError) -> HTTPException:
+    status_code = _DOMAIN_ERROR_STATUS.get(exc.code, 400)
+    return HTTPException(
+        status_code=status_code,
+        detail={
+            "error_code": exc.code,
+            "message": exc.message,
+            "detail": exc.detail,
+        },
+    )
+
+
+@router.post(
+    "/backfill",
+    response_model=ApiResponse[BackfillStatusData],
+    summary="启动数值字段回填",
+    description="后台为旧文档补充 date_ts/chat_id/msg_id；任务已在运行时直接返回当前进度",
+)
+async def start_backfill(
+    service: IndexMaintenanceService = Depends(get_index_maintenance_service),
+) -> ApiResponse[BackfillStatusData]:
+    try:
+        snapshot = service.start_numeric_backfill()
+    except DomainError as exc:
+        raise _to_http_error(exc) from exc
+    logger.info("[index.backfill] start requested state=%s", snapshot.state)
+    return ApiResponse(data=BackfillStatusData(**snapshot.model_dump()))
+
+
+@router.get(
+    "/backfill",
+    response_model=ApiResponse[BackfillStatusData],
+    summary="数值字段回填进度",
+    description="获取最近一次回填任务的状态与计数",
+)
+async def get_backfill_status(
+    service: IndexMaintenanceService = Depends(get_index_maintenance_service),
+) -> ApiResponse[BackfillStatusData]:
+    return ApiResponse(data=BackfillStatusData(**service.backfill_status().model_dump()))
+
+
+@router.post(
+    "/rebuild",
+    response_model=ApiResponse[RebuildStatusData],
+    summary="启动影子索引重建",
+    description="按当前 INDEX_CONFIG 重建索引：复制到影子索引后原子交换，期间搜索不受影响；任务已在运行时直接返回当前进度",
+)
+async def start_rebuild(
+    service: IndexMaintenanceService = Depends(get_index_maintenance_service),
+) -> ApiResponse[RebuildStatusData]:
+    snapshot = service.start_rebuild()
+    logger.info("[index.rebuild] start requested state=%s", snapshot.state)
+    return ApiResponse(data=RebuildStatusData(**snapshot.model_dump()))
+
+
+@router.get(
+    "/rebuild",
+    response_model=ApiResponse[RebuildStatusData],
+    summary="影子索引重建进度",
+    description="获取最近一次重建任务的阶段与复制进度，以及等待重建生效的设置项",
+)
+async def get_rebuild_status(
+    service: IndexMaintenanceService = Depends(get_index_maintenance_service),
+) -> ApiResponse[RebuildStatusData]:
+    return ApiResponse(data=RebuildStatusData(**service.rebuild_status().model_dump()))
+
+
+@router.get(
+    "/dead-letters",
+    response_model=ApiResponse[DeadLetterListData],
+    summary="死信文档列表",
+    description="批量写入时被隔离的坏文档（含错误码），按最近失败时间倒序",
+)
+async def list_dead_letters(
+    limit: int = Query(50, ge=1, le=500, description="返回数量"),
+    offset: int = Query(0, ge=0, description="偏移量"),
+    service: IndexMaintenanceService = Depends(get_index_maintenance_service),
+) -> ApiResponse[DeadLetterListData]:
+    try:
+        page = service.list_dead_letters(limit=limit, offset=offset)
+    except DomainError as exc:
+        raise _to_http_error(exc) from exc
+    return ApiResponse(data=DeadLetterListData(**page.model_dump()))
+
+
+@router.post(
+    "/dead-letters/replay",
+    response_model=ApiResponse[DeadLetterReplayData],
+    summary="重放死信文档",
+    description="将死信文档重新写入原索引；成功的条目被移除，再次失败的保留并累计 attempts",
+)
+async def replay_dead_letters(
+    request: DeadLetterReplayRequest | None = None,
+    service: IndexMaintenanceService = Depends(get_index_maintenance_service),
+) -> ApiResponse[DeadLetterReplayData]:
+    request = request or DeadLetterReplayRequest()
+    try:
+        result = await service.replay_dead_letters(request.doc_ids, limit=request.limit)
+    except DomainError as exc:
+        raise _to_http_error(exc) from exc
+    logger.info("[index.dead_letters] replay replayed=%d failed=%d", result.replayed, result.failed)
+    return ApiResponse(data=DeadLetterReplayData(**result.model_dump()))
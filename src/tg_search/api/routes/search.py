@@ -2,22 +2,35 @@
 
 from __future__ import annotations
 
+import contextlib
+import json
+from collections.abc import AsyncIterator
 from datetime import datetime
 from enum import Enum
-from typing import Optional
+from typing import Any, Literal, Optional
 
-from fastapi import APIRouter, Depends, Query
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import Response, StreamingResponse
+from pydantic import BaseModel
+from starlette.background import BackgroundTask
 
-from tg_search.api.deps import get_observability_service, get_search_service
+from tg_search.api.auth_store import AuthToken
+from tg_search.api.deps import (
+    get_admission_controller,
+    get_observability_service,
+    get_search_service,
+    verify_bearer_token,
+)
 from tg_search.api.models import (
     ApiResponse,
-    ChatInfo,
-    MessageModel,
+    SearchBatchRequest,
+    SearchBatchResult,
     SearchResult,
     SearchStats,
-    UserInfo,
+    TopQueriesData,
 )
-from tg_search.services.contracts import SearchHit, SearchQuery
+from tg_search.services.admission import AdmissionController, estimate_export_cost, estimate_search_cost
+from tg_search.services.contracts import DomainError, SearchPage, SearchQuery
 from tg_search.services.observability_service import ObservabilityService
 from tg_search.services.search_service import SearchService
 
@@ -33,30 +46,69 @@ class ChatType(str, Enum):
 router = APIRouter()
 
 
-def _to_message_model(hit: SearchHit) -> MessageModel:
-    return MessageModel(
-        id=hit.id,
-        chat=ChatInfo(
-            id=hit.chat.id,
-            type=hit.chat.type,
-            title=hit.chat.title,
-            username=hit.chat.username,
-        ),
-        date=hit.date,
-        text=hit.text,
-        from_user=(
-            UserInfo(id=hit.from_user.id, username=hit.from_user.username)
-            if hit.from_user is not None
-            else None
-        ),
-        reactions=hit.reactions,
-        reactions_scores=hit.reactions_scores,
-        text_len=hit.text_len,
-        formatted=hit.formatted,
-        formatted_text=hit.formatted_text,
+_DOMAIN_ERROR_STATUS: dict[str, int] = {
+    "search_cursor_invalid": 400,
+    "search_batch_invalid": 400,
+    "search_fields_invalid": 400,
+    "search_facets_invalid": 400,
+    "search_profile_invalid": 400,
+    "search_batch_failed": 502,
+    "search_rate_limited": 429,
+    "search_overloaded": 429,
+    "search_index_rebuilding": 503,
+    "query_log_unavailable": 503,
+}
+
+
+def _to_http_error(exc: DomainError) -> HTTPException:
+    status_code = _DOMAIN_ERROR_STATUS.get(exc.code, 400)
+    headers = None
+    if status_code == 429 and exc.detail:
+        # Admission rejections carry the suggested retry delay (seconds) in `detail`.
+        headers = {"Retry-After": str(max(int(float(exc.detail) + 0.999), 1))}
+    return HTTPException(
+        status_code=status_code,
+        detail={
+            "error_code": exc.code,
+            "message": exc.message,
+            "detail": exc.detail,
+        },
+        headers=headers,
     )
 
 
+def _admit(admission: AdmissionController | None, auth_token: AuthToken, cost: int):
+    if admission is None:
+        return contextlib.nullcontext()
+    return admission.admit(f"api:{auth_token.user_id}", cost=cost)
+
+
+def _parse_fields(fields: str | None) -> list[str] | None:
+    if not fields:
+        return None
+    return [field.strip() for field in fields.split(",") if field.strip()] or None
+
+
+class _SearchBatchPages(BaseModel):
+    """SearchBatchResult 的服务层形态（results 直接为 SearchPage）"""
+
+    results: list[SearchPage]
+    federated: bool = False
+
+
+def _search_response(data: BaseModel) -> Response:
+    """
+    Serialize service-layer search results straight into the `ApiResponse` envelope.
+
+    SearchPage/SearchHit have the same fields, in the same order, as SearchResult/
+    MessageModel, so re-building every hit as an API model (and letting FastAPI
+    validate it once more) would only repeat work. The route keeps its
+    `response_model` for the OpenAPI schema; the shapes are pinned by a unit test.
+    """
+    envelope = ApiResponse[Any](data=data)
+    return Response(content=envelope.model_dump_json(), media_type="application/json")
+
+
 @router.get(
     "",
     response_model=ApiResponse[SearchResult],
@@ -70,32 +122,168 @@ async def search_messages(
     date_from: Optional[datetime] = Query(None, description="开始日期 (ISO8601)"),
     date_to: Optional[datetime] = Query(None, description="结束日期 (ISO8601)"),
     sender_username: Optional[str] = Query(None, description="发送者用户名"),
+    sender_id: Optional[int] = Query(None, description="发送者用户 ID（来自 from_user.id 分面）"),
     limit: int = Query(20, ge=1, le=100, description="返回数量"),
     offset: int = Query(0, ge=0, description="偏移量"),
+    cursor: Optional[str] = Query(
+        None,
+        description="游标分页：首页传 *，之后传上一页返回的 next_cursor（按时间倒序，忽略 offset）",
+    ),
+    profile: Literal["detail", "list"] = Query(
+        "detail",
+        description="返回内容：detail 为完整消息与整段高亮；list 只返回命中附近的高亮摘要（text 即摘要），响应更小",
+    ),
+    fields: Optional[str] = Query(
+        None,
+        description="逗号分隔的返回字段（如 id,chat,date,formatted_text），未请求的字段返回默认值",
+    ),
+    facets: Optional[str] = Query(
+        None,
+        description="逗号分隔的分面属性（chat.id,chat.type,from_user.id），返回 facet_distribution；"
+        "某属性已作为过滤条件时，其分面按去掉该条件的查询计数，便于切换取值",
+    ),
     search_service: SearchService = Depends(get_search_service),
-) -> ApiResponse[SearchResult]:
-    page = await search_service.search(
-        SearchQuery(
-            q=q,
-            chat_id=chat_id,
-            chat_type=chat_type.value if chat_type is not None else None,
-            date_from=date_from,
-            date_to=date_to,
-            sender_username=sender_username,
-            limit=limit,
-            offset=offset,
-        )
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+    auth_token: AuthToken = Depends(verify_bearer_token),
+) -> Response:
+    query = SearchQuery(
+        q=q,
+        chat_id=chat_id,
+        chat_type=chat_type.value if chat_type is not None else None,
+        date_from=date_from,
+        date_to=date_to,
+        sender_username=sender_username,
+        sender_id=sender_id,
+        limit=limit,
+        offset=offset,
+        cursor=cursor or None,
+        profile=profile,
+        fields=_parse_fields(fields),
+        facets=_parse_fields(facets),
     )
+    try:
+        async with _admit(admission, auth_token, estimate_search_cost(query)):
+            page = await search_service.search(query)
+    except DomainError as exc:
+        raise _to_http_error(exc) from exc
+
+    return _search_response(page)
+
+
+@router.post(
+    "/batch",
+    response_model=ApiResponse[SearchBatchResult],
+    summary="批量搜索",
+    description="一次请求执行多条查询（MeiliSearch multi-search）；federated=true 时合并为单一排序结果",
+)
+async def search_batch(
+    body: SearchBatchRequest,
+    search_service: SearchService = Depends(get_search_service),
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+    auth_token: AuthToken = Depends(verify_bearer_token),
+) -> Response:
+    queries = [SearchQuery(**item.model_dump()) for item in body.queries]
+    # One round trip, but every query costs the engine as much as a single search.
+    cost = sum(estimate_search_cost(query) for query in queries)
+    try:
+        async with _admit(admission, auth_token, cost):
+            if body.federated:
+                page = await search_service.search_federated(queries, limit=body.limit, offset=body.offset)
+                pages = [page]
+            else:
+                pages = await search_service.search_many(queries)
+    except DomainError as exc:
+        raise _to_http_error(exc) from exc
+
+    return _search_response(_SearchBatchPages(results=pages, federated=body.federated))
 
-    search_result = SearchResult(
-        hits=[_to_message_model(item) for item in page.hits],
-        query=page.query,
-        processing_time_ms=page.processing_time_ms,
-        total_hits=page.total_hits,
-        limit=page.limit,
-        offset=page.offset,
+
+async def _export_lines(
+    search_service: SearchService,
+    query: SearchQuery,
+    export_format: Literal["ndjson", "sse"],
+    batch_size: int,
+    admitted: contextlib.AsyncExitStack,
+) -> AsyncIterator[str]:
+    exported = 0
+    try:
+        async for hit in search_service.iter_hits(query, batch_size=batch_size):
+            payload = hit.model_dump_json()
+            exported += 1
+            if export_format == "sse":
+                yield f"event: message\ndata: {payload}\n\n"
+            else:
+                yield payload + "\n"
+    except DomainError as exc:
+        # Headers are already sent; report the failure in-band and stop.
+        error = json.dumps({"error_code": exc.code, "message": exc.message}, ensure_ascii=False)
+        yield f"event: error\ndata: {error}\n\n" if export_format == "sse" else error + "\n"
+        return
+    finally:
+        # The admission slot is held for the whole scan.
+        await admitted.aclose()
+    if export_format == "sse":
+        yield f"event: end\ndata: {json.dumps({'exported': exported})}\n\n"
+
+
+@router.get(
+    "/export",
+    summary="导出搜索结果",
+    description="按游标分页遍历所有匹配消息，以 NDJSON 或 SSE 流式返回（内存占用恒定）",
+)
+async def export_messages(
+    q: str = Query(..., min_length=1, max_length=500, description="搜索关键词"),
+    chat_id: Optional[int] = Query(None, description="限定聊天 ID"),
+    chat_type: Optional[ChatType] = Query(None, description="聊天类型: private/group/channel"),
+    date_from: Optional[datetime] = Query(None, description="开始日期 (ISO8601)"),
+    date_to: Optional[datetime] = Query(None, description="结束日期 (ISO8601)"),
+    sender_username: Optional[str] = Query(None, description="发送者用户名"),
+    format: Literal["ndjson", "sse"] = Query("ndjson", description="输出格式: ndjson/sse"),
+    batch_size: int = Query(100, ge=1, le=100, description="每次向 MeiliSearch 拉取的数量"),
+    search_service: SearchService = Depends(get_search_service),
+    admission: Optional[AdmissionController] = Depends(get_admission_controller),
+    auth_token: AuthToken = Depends(verify_bearer_token),
+) -> StreamingResponse:
+    query = SearchQuery(
+        q=q,
+        chat_id=chat_id,
+        chat_type=chat_type.value if chat_type is not None else None,
+        date_from=date_from,
+        date_to=date_to,
+        sender_username=sender_username,
     )
-    return ApiResponse(data=search_result)
+    # Admit before the response starts so rejections are still plain 429s; the stream releases the slot.
+    admitted = contextlib.AsyncExitStack()
+    try:
+        await admitted.enter_async_context(_admit(admission, auth_token, estimate_export_cost(query)))
+    except DomainError as exc:
+        raise _to_http_error(exc) from exc
+    media_type = "text/event-stream" if format == "sse" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_lines(search_service, query, format, batch_size, admitted),
+        media_type=media_type,
+        headers={"Cache-Control": "no-cache"},
+        # Also covers a client that disconnects before the stream starts; closing twice is a no-op.
+        background=BackgroundTask(admitted.aclose),
+    )
+
+
+@router.get(
+    "/top-queries",
+    response_model=ApiResponse[TopQueriesData],
+    summary="热门查询",
+    description="按查询日志统计时间窗口内最常见的搜索（归一化查询 + 筛选条件）及其耗时分位数，附带最近一次缓存预热情况",
+)
+async def get_top_queries(
+    limit: int = Query(20, ge=1, le=200, description="返回数量"),
+    window_hours: float = Query(24, gt=0, le=24 * 90, description="统计窗口（小时）"),
+    search_service: SearchService = Depends(get_search_service),
+) -> ApiResponse[TopQueriesData]:
+    try:
+        report = await search_service.top_queries(limit=limit, window_hours=window_hours)
+    except DomainError as exc:
+        raise _to_http_error(exc) from exc
+    return ApiResponse(data=TopQueriesData(**report.model_dump()))
 
 
 @router.get(
@@ -9,7 +9,7 @@ from typing import List
 from fastapi import APIRouter, Depends
 
 from tg_search.api.deps import get_app_state, get_observability_service
-from tg_search.api.models import ApiResponse, DialogInfo, DialogListResponse, SystemStatus
+from tg_search.api.models import ApiResponse, DialogInfo, DialogListResponse, SearchAdmissionStats, SystemStatus
 from tg_search.api.state import AppState
 from tg_search.core.logger import setup_logger
 from tg_search.services.observability_service import ObservabilityService
@@ -69,6 +69,13 @@ async def get_system_status(
         telegram_connected=snapshot.telegram_connected,
         indexed_messages=snapshot.indexed_messages,
         memory_usage_mb=snapshot.memory_usage_mb,
+        meili_circuit=snapshot.meili_circuit,
+        ingest_buffered=snapshot.ingest_buffered,
+        search_admission=(
+            SearchAdmissionStats(**snapshot.search_admission.model_dump())
+            if snapshot.search_admission is not None
+            else None
+        ),
         notes=snapshot.notes,
     )
 
@@ -44,6 +44,10 @@ async def get_storage_stats(
         index_bytes=snapshot.index_bytes,
         media_supported=snapshot.media_supported,
         cache_supported=snapshot.cache_supported,
+        dedup_messages=snapshot.dedup_messages,
+        dedup_duplicates=snapshot.dedup_duplicates,
+        dedup_skipped=snapshot.dedup_skipped,
+        dedup_saved_bytes=snapshot.dedup_saved_bytes,
         notes=snapshot.notes,
     )
     return ApiResponse(data=data)
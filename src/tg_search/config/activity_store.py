@@ -0,0 +1,406 @@
+"""
+Pre-aggregated chat activity for the dashboard, backed by SQLite.
+
+The ingest pipeline records every message into per-chat hourly buckets (message
+count, latest message) and a per-bucket keyword sketch. The dashboard then reads
+O(chats × hours) rows for a window instead of sampling messages from MeiliSearch
+and tokenizing them on every request.
+
+- Counts are exact: each (chat_id, msg_id) is counted once, so edits and
+  re-downloaded history do not inflate them. The partial hour at the start of a
+  window is counted from the per-message ledger.
+- Keywords use a space-saving top-k sketch per bucket (at most `keyword_capacity`
+  tokens, each with a count and an overestimation bound), so they are approximate.
+- Only the last `retention_hours` are kept; older messages are not recorded.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable
+
+from tg_search.config.config_store import resolve_db_path
+from tg_search.core.logger import setup_logger
+
+logger = setup_logger()
+
+_SQLITE_BUSY_TIMEOUT_SEC = float(os.getenv("CONFIG_STORE_SQLITE_BUSY_TIMEOUT_SEC", "5"))
+# 每写入这么多次清理一次过期桶
+_PRUNE_EVERY = 256
+_HOUR_SEC = 3600
+# 每条消息最多计入的关键词数
+_KEYWORDS_PER_MESSAGE = 30
+# 每个桶保存的最新消息文本长度（Dashboard 展示时截断到 240 字符）
+_LATEST_TEXT_CHARS = 256
+
+TOKEN_RE = re.compile(r"[A-Za-z0-9_]{2,}")
+STOP_WORDS = frozenset(
+    {
+        "the",
+        "and",
+        "for",
+        "with",
+        "that",
+        "this",
+        "from",
+        "have",
+        "your",
+        "you",
+        "are",
+        "was",
+        "were",
+        "will",
+        "just",
+        "into",
+        "about",
+        "http",
+        "https",
+    }
+)
+
+
+def extract_keywords(text: str, max_count: int) -> list[str]:
+    """从文本中提取 top keywords（简单规则版，deterministic）。"""
+    if not text:
+        return []
+
+    counter: Counter[str] = Counter()
+    for token in TOKEN_RE.findall(text.lower()):
+        if token in STOP_WORDS:
+            continue
+        counter[token] += 1
+    return [word for word, _ in counter.most_common(max_count)]
+
+
+def _space_saving_add(sketch: dict[str, list[int]], token: str, capacity: int) -> str | None:
+    # Space-saving: a full sketch evicts its smallest entry; the newcomer inherits that count as its error bound.
+    entry = sketch.get(token)
+    if entry is not None:
+        entry[0] += 1
+        return None
+    if len(sketch) < capacity:
+        sketch[token] = [1, 0]
+        return None
+    victim = min(sketch, key=lambda t: (sketch[t][0], t))
+    floor = sketch.pop(victim)[0]
+    sketch[token] = [floor + 1, floor]
+    return victim
+
+
+@dataclass(slots=True, frozen=True)
+class ChatActivity:
+    """一个会话在统计窗口内的聚合数据。"""
+
+    chat_id: int
+    chat_type: str | None
+    message_count: int
+    latest_ts: int
+    latest_text: str
+    top_keywords: list[str]
+
+
+@dataclass(slots=True)
+class _Bucket:
+    chat_type: str | None = None
+    messages: int = 0
+    latest_ts: int = 0
+    latest_text: str = ""
+    tokens: list[str] = field(default_factory=list)
+
+
+class ActivityStore:
+    """
+    会话活动预聚合（SQLite，与 ConfigStore 共用数据库文件）。
+
+    Notes:
+    - 写入路径（实时消息与历史下载）按 (chat_id, 小时) 累加消息数，并维护每桶关键词 space-saving 草图。
+    - 消息按 (chat_id, msg_id) 去重，编辑版本与重复下载不会重复计数。
+    - 只保留最近 `retention_hours` 小时；`covers()` 判断窗口是否完全落在记录范围内。
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        *,
+        retention_hours: int = 168,
+        keyword_capacity: int = 50,
+    ) -> None:
+        self._db_path = resolve_db_path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._retention_sec = max(int(retention_hours), 1) * _HOUR_SEC
+        self._keyword_capacity = max(int(keyword_capacity), 1)
+        self._lock = threading.RLock()
+        self._writes = 0
+        self._tracking_since = 0.0
+        self._initialize_storage()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    @property
+    def tracking_since(self) -> float:
+        """开始记录的 Unix 时间戳；之前的消息不在聚合中。"""
+        return self._tracking_since
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=_SQLITE_BUSY_TIMEOUT_SEC,
+            isolation_level=None,  # autocommit, explicit BEGIN for writes
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _initialize_storage(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS activity_messages (
+                    chat_id INTEGER NOT NULL,
+                    msg_id INTEGER NOT NULL,
+                    date_ts INTEGER NOT NULL,
+                    PRIMARY KEY (chat_id, msg_id)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_messages_date_ts ON activity_messages(date_ts)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS activity_hourly (
+                    chat_id INTEGER NOT NULL,
+                    hour_ts INTEGER NOT NULL,
+                    chat_type TEXT,
+                    messages INTEGER NOT NULL,
+                    latest_ts INTEGER NOT NULL,
+                    latest_text TEXT NOT NULL,
+                    PRIMARY KEY (chat_id, hour_ts)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_hourly_hour_ts ON activity_hourly(hour_ts)")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS activity_keywords (
+                    chat_id INTEGER NOT NULL,
+                    hour_ts INTEGER NOT NULL,
+                    token TEXT NOT NULL,
+                    count INTEGER NOT NULL,
+                    error INTEGER NOT NULL,
+                    PRIMARY KEY (chat_id, hour_ts, token)
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_activity_keywords_hour_ts ON activity_keywords(hour_ts)")
+            conn.execute("CREATE TABLE IF NOT EXISTS activity_meta (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+            conn.execute("INSERT OR IGNORE INTO activity_meta (key, value) VALUES ('tracking_since', ?)", (time.time(),))
+            row = conn.execute("SELECT value FROM activity_meta WHERE key = 'tracking_since'").fetchone()
+            self._tracking_since = float(row["value"])
+
+    def _cutoff_hour(self, now: float) -> int:
+        # Oldest bucket kept: the hour containing the start of the longest window.
+        return int((now - self._retention_sec) // _HOUR_SEC) * _HOUR_SEC
+
+    def covers(self, since_ts: float) -> bool:
+        """窗口起点之后的消息是否全部被记录（记录开始之前的窗口仍需回退到采样）。"""
+        return since_ts >= self._tracking_since and since_ts >= self._cutoff_hour(time.time())
+
+    def record(self, documents: Iterable[dict[str, Any]]) -> int:
+        """记录一批消息文档（分块之前的整条消息），返回新计入的消息数。"""
+        now = time.time()
+        cutoff = self._cutoff_hour(now)
+        parsed: list[tuple[int, int, int, str | None, str]] = []
+        for doc in documents:
+            try:
+                chat_id = int(doc["chat_id"])
+                msg_id = int(doc["msg_id"])
+                date_ts = int(doc["date_ts"])
+            except (KeyError, TypeError, ValueError):
+                continue
+            if date_ts < cutoff:
+                continue
+            chat = doc.get("chat")
+            chat_type = chat.get("type") if isinstance(chat, dict) else None
+            parsed.append((chat_id, msg_id, date_ts, chat_type, str(doc.get("text") or "")))
+        if not parsed:
+            return 0
+
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                counted = self._apply(conn, parsed)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(conn, cutoff)
+        return counted
+
+    def _apply(self, conn: sqlite3.Connection, parsed: list[tuple[int, int, int, str | None, str]]) -> int:
+        buckets: dict[tuple[int, int], _Bucket] = {}
+        counted = 0
+        for chat_id, msg_id, date_ts, chat_type, text in parsed:
+            inserted = conn.execute(
+                "INSERT OR IGNORE INTO activity_messages (chat_id, msg_id, date_ts) VALUES (?, ?, ?)",
+                (chat_id, msg_id, date_ts),
+            ).rowcount
+            if not inserted:
+                continue
+            counted += 1
+            key = (chat_id, date_ts // _HOUR_SEC * _HOUR_SEC)
+            bucket = buckets.get(key)
+            if bucket is None:
+                bucket = buckets[key] = _Bucket()
+            bucket.chat_type = chat_type or bucket.chat_type
+            bucket.messages += 1
+            if date_ts >= bucket.latest_ts:
+                bucket.latest_ts = date_ts
+                if text.strip():
+                    bucket.latest_text = text.strip()[:_LATEST_TEXT_CHARS]
+            bucket.tokens.extend(extract_keywords(text, _KEYWORDS_PER_MESSAGE))
+
+        for (chat_id, hour_ts), bucket in buckets.items():
+            conn.execute(
+                """
+                INSERT INTO activity_hourly (chat_id, hour_ts, chat_type, messages, latest_ts, latest_text)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(chat_id, hour_ts) DO UPDATE SET
+                    chat_type = COALESCE(excluded.chat_type, activity_hourly.chat_type),
+                    messages = activity_hourly.messages + excluded.messages,
+                    latest_text = CASE
+                        WHEN excluded.latest_ts >= activity_hourly.latest_ts AND excluded.latest_text != ''
+                        THEN excluded.latest_text ELSE activity_hourly.latest_text END,
+                    latest_ts = MAX(activity_hourly.latest_ts, excluded.latest_ts)
+                """,
+                (chat_id, hour_ts, bucket.chat_type, bucket.messages, bucket.latest_ts, bucket.latest_text),
+            )
+            if bucket.tokens:
+                self._update_sketch(conn, chat_id, hour_ts, bucket.tokens)
+        return counted
+
+    def _update_sketch(self, conn: sqlite3.Connection, chat_id: int, hour_ts: int, tokens: list[str]) -> None:
+        rows = conn.execute(
+            "SELECT token, count, error FROM activity_keywords WHERE chat_id = ? AND hour_ts = ?",
+            (chat_id, hour_ts),
+        ).fetchall()
+        sketch = {row["token"]: [int(row["count"]), int(row["error"])] for row in rows}
+        touched: set[str] = set()
+        evicted: set[str] = set()
+        for token in tokens:
+            victim = _space_saving_add(sketch, token, self._keyword_capacity)
+            touched.add(token)
+            if victim is not None:
+                evicted.add(victim)
+        conn.executemany(
+            "DELETE FROM activity_keywords WHERE chat_id = ? AND hour_ts = ? AND token = ?",
+            [(chat_id, hour_ts, token) for token in evicted - sketch.keys()],
+        )
+        conn.executemany(
+            """
+            INSERT INTO activity_keywords (chat_id, hour_ts, token, count, error) VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(chat_id, hour_ts, token) DO UPDATE SET count = excluded.count, error = excluded.error
+            """,
+            [(chat_id, hour_ts, token, *sketch[token]) for token in touched & sketch.keys()],
+        )
+
+    def _prune(self, conn: sqlite3.Connection, cutoff: int) -> None:
+        removed = conn.execute("DELETE FROM activity_hourly WHERE hour_ts < ?", (cutoff,)).rowcount
+        conn.execute("DELETE FROM activity_keywords WHERE hour_ts < ?", (cutoff,))
+        conn.execute("DELETE FROM activity_messages WHERE date_ts < ?", (cutoff,))
+        if removed:
+            logger.info("[ActivityStore] pruned buckets=%d", removed)
+
+    def window(self, since_ts: float, *, max_keywords: int = 3) -> list[ChatActivity]:
+        """返回 `since_ts` 之后每个会话的消息数、最新消息与 top keywords（未排序）。"""
+        since = int(math.ceil(since_ts))
+        first_full_hour = -(-since // _HOUR_SEC) * _HOUR_SEC
+        edge_hour = first_full_hour - _HOUR_SEC if since < first_full_hour else None
+
+        with self._connect() as conn:
+            # 只有一个 MAX() 聚合时 SQLite 的裸列取自最大值所在行，latest_text 与 latest_ts 对应
+            rows = conn.execute(
+                """
+                SELECT chat_id, chat_type, SUM(messages) AS messages,
+                       MAX(latest_ts) AS latest_ts, latest_text
+                FROM activity_hourly
+                WHERE hour_ts >= ?
+                GROUP BY chat_id
+                """,
+                (first_full_hour,),
+            ).fetchall()
+            grouped = {
+                int(row["chat_id"]): [row["chat_type"], int(row["messages"]), int(row["latest_ts"]), row["latest_text"]]
+                for row in rows
+            }
+            if edge_hour is not None:
+                # 窗口起点所在的不完整小时：计数来自逐条消息记录，最新消息取该小时的桶
+                edge_counts = conn.execute(
+                    """
+                    SELECT chat_id, COUNT(*) AS messages FROM activity_messages
+                    WHERE date_ts >= ? AND date_ts < ?
+                    GROUP BY chat_id
+                    """,
+                    (since, first_full_hour),
+                ).fetchall()
+                edge_buckets = {
+                    int(row["chat_id"]): row
+                    for row in conn.execute(
+                        "SELECT chat_id, chat_type, latest_ts, latest_text FROM activity_hourly WHERE hour_ts = ?",
+                        (edge_hour,),
+                    ).fetchall()
+                }
+                for row in edge_counts:
+                    chat_id = int(row["chat_id"])
+                    bucket = edge_buckets.get(chat_id)
+                    entry = grouped.setdefault(chat_id, [None, 0, 0, ""])
+                    entry[1] += int(row["messages"])
+                    if bucket is not None:
+                        entry[0] = entry[0] or bucket["chat_type"]
+                        if int(bucket["latest_ts"]) > entry[2]:
+                            entry[2], entry[3] = int(bucket["latest_ts"]), bucket["latest_text"]
+
+            keywords: dict[int, Counter[str]] = {}
+            for row in conn.execute(
+                """
+                SELECT chat_id, token, SUM(count) AS count FROM activity_keywords
+                WHERE hour_ts >= ?
+                GROUP BY chat_id, token
+                """,
+                (edge_hour if edge_hour is not None else first_full_hour,),
+            ):
+                keywords.setdefault(int(row["chat_id"]), Counter())[row["token"]] = int(row["count"])
+
+        items: list[ChatActivity] = []
+        for chat_id, (chat_type, messages, latest_ts, latest_text) in grouped.items():
+            if messages <= 0:
+                continue
+            counter = keywords.get(chat_id, Counter())
+            top = sorted(counter.items(), key=lambda item: (-item[1], item[0]))[:max_keywords]
+            items.append(
+                ChatActivity(
+                    chat_id=chat_id,
+                    chat_type=chat_type,
+                    message_count=messages,
+                    latest_ts=latest_ts,
+                    latest_text=latest_text or "",
+                    top_keywords=[token for token, _ in top],
+                )
+            )
+        return items
@@ -0,0 +1,109 @@
+"""
+Persistent query table for Bot pagination callbacks, backed by SQLite.
+
+Queries too long to inline in a 64-byte `pb:` callback are stored here under an 8-byte
+content digest. The same query always maps to the same row, so the table grows with
+distinct long queries rather than with page views, and the buttons keep working across
+restarts. Rows not referenced for `retention_days` are pruned.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from tg_search.config.config_store import resolve_db_path
+from tg_search.core.logger import setup_logger
+
+logger = setup_logger()
+
+_SQLITE_BUSY_TIMEOUT_SEC = float(os.getenv("CONFIG_STORE_SQLITE_BUSY_TIMEOUT_SEC", "5"))
+# 每写入这么多次清理一次过期条目
+_PRUNE_EVERY = 256
+
+
+def query_digest(payload: str) -> int:
+    """Signed 64-bit digest of a canonical query payload (fits an SQLite INTEGER key)."""
+    return int.from_bytes(hashlib.blake2b(payload.encode("utf-8"), digest_size=8).digest(), "big", signed=True)
+
+
+class CallbackQueryStore:
+    """
+    分页回调查询表（SQLite，与 ConfigStore 共用数据库文件）。
+
+    Notes:
+    - 以查询内容摘要为主键，重复写入只刷新 used_at。
+    - 超过 `retention_days` 未被引用的查询被清理，对应的旧按钮提示"分页参数已失效"。
+    """
+
+    def __init__(self, db_path: str | Path | None = None, *, retention_days: float = 30) -> None:
+        self._db_path = resolve_db_path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._retention_sec = max(float(retention_days), 0.0) * 86400
+        self._lock = threading.RLock()
+        self._writes = 0
+        self._initialize_storage()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=_SQLITE_BUSY_TIMEOUT_SEC,
+            isolation_level=None,  # autocommit, explicit BEGIN for writes
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _initialize_storage(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS callback_query (
+                    digest INTEGER PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    used_at REAL NOT NULL
+                )
+                """
+            )
+
+    def put(self, payload: str) -> int:
+        """保存查询并返回其摘要。"""
+        digest = query_digest(payload)
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO callback_query (digest, payload, used_at) VALUES (?, ?, ?)
+                ON CONFLICT(digest) DO UPDATE SET used_at = excluded.used_at
+                """,
+                (digest, payload, now),
+            )
+            self._writes += 1
+            if self._retention_sec and self._writes % _PRUNE_EVERY == 0:
+                removed = conn.execute("DELETE FROM callback_query WHERE used_at < ?", (now - self._retention_sec,)).rowcount
+                if removed:
+                    logger.info("[CallbackQueryStore] pruned removed=%d", removed)
+        return digest
+
+    def get(self, digest: int) -> str | None:
+        with self._connect() as conn:
+            row = conn.execute("SELECT payload FROM callback_query WHERE digest = ?", (digest,)).fetchone()
+        return str(row["payload"]) if row is not None else None
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM callback_query").fetchone()[0])
@@ -43,6 +43,13 @@ def _now_iso() -> str:
     return datetime.now(timezone.utc).isoformat()
 
 
+def resolve_db_path(db_path: str | Path | None = None) -> Path:
+    """SQLite 存储文件路径：显式传入优先，否则读取 `CONFIG_DB_PATH`（调用时读取，便于测试覆盖）。"""
+    if db_path:
+        return Path(db_path)
+    return Path(os.environ.get("CONFIG_DB_PATH") or _DEFAULT_DB_PATH)
+
+
 # ============ Pydantic Models ============
 
 
@@ -85,6 +92,28 @@ class PolicySection(BaseModel):
     black_list: list[int] = Field(default_factory=list)
 
 
+class SavedWatch(BaseModel):
+    """关注查询：实时消息命中后由 Bot 推送给 owner。"""
+
+    id: int
+    owner_id: int
+    query: str
+    terms: list[str] = Field(default_factory=list)
+    chat_id: int | None = None
+    chat_type: str | None = None
+    sender_username: str | None = None
+    sender_id: int | None = None
+    enabled: bool = True
+    created_at: str = Field(default_factory=_now_iso)
+
+
+class WatchSection(BaseModel):
+    """关注查询列表。"""
+
+    items: list[SavedWatch] = Field(default_factory=list)
+    next_id: int = 1
+
+
 class GlobalConfig(BaseModel):
     """全局配置文档。"""
 
@@ -95,6 +124,7 @@ class GlobalConfig(BaseModel):
     storage: StorageConfig = Field(default_factory=StorageConfig)
     ai: AiConfig = Field(default_factory=AiConfig)
     policy: PolicySection = Field(default_factory=PolicySection)
+    watches: WatchSection = Field(default_factory=WatchSection)
 
 
 # ============ Cache ============
@@ -155,7 +185,7 @@ class ConfigStore:
 
     @staticmethod
     def _resolve_db_path(index_name: str, db_path: str | None) -> Path:
-        base = Path(db_path or os.getenv("CONFIG_DB_PATH", _DEFAULT_DB_PATH))
+        base = resolve_db_path(db_path)
         if db_path is None and index_name != _INDEX_NAME:
             safe_index = re.sub(r"[^a-zA-Z0-9._-]+", "_", index_name).strip("._")
             if not safe_index:
@@ -293,6 +323,7 @@ class ConfigStore:
         self._write_section_json(conn, "storage", cfg.storage.model_dump())
         self._write_section_json(conn, "ai", cfg.ai.model_dump())
         self._write_section_json(conn, "policy", cfg.policy.model_dump())
+        self._write_section_json(conn, "watches", cfg.watches.model_dump())
         self._write_section_json(conn, "sync_available_cache_ttl_sec", cfg.sync.available_cache_ttl_sec)
 
     def _read_config_from_conn(self, conn: sqlite3.Connection) -> GlobalConfig:
@@ -308,6 +339,7 @@ class ConfigStore:
         raw_storage = self._read_section_json(conn, "storage")
         raw_ai = self._read_section_json(conn, "ai")
         raw_policy = self._read_section_json(conn, "policy")
+        raw_watches = self._read_section_json(conn, "watches")
         raw_sync_ttl = self._read_section_json(conn, "sync_available_cache_ttl_sec")
 
         dialogs: dict[str, DialogSyncState] = {}
@@ -334,6 +366,7 @@ class ConfigStore:
             storage = StorageConfig.model_validate(raw_storage or {})
             ai = AiConfig.model_validate(raw_ai or {})
             policy = PolicySection.model_validate(raw_policy or {})
+            watches = WatchSection.model_validate(raw_watches or {})
             available_ttl = int(raw_sync_ttl) if raw_sync_ttl is not None else 120
             sync = SyncConfig(dialogs=dialogs, available_cache_ttl_sec=available_ttl)
             return GlobalConfig(
@@ -344,6 +377,7 @@ class ConfigStore:
                 storage=storage,
                 ai=ai,
                 policy=policy,
+                watches=watches,
             )
         except Exception as exc:
             logger.warning("[ConfigStore] SQLite document invalid, resetting to defaults. error=%s", exc)
@@ -539,7 +573,7 @@ class ConfigStore:
         写入配置（兼容旧接口）。
 
         Args:
-            patch: section 级 patch（`sync/storage/ai/policy`）或顶级字段 patch。
+            patch: section 级 patch（`sync/storage/ai/policy/watches`）或顶级字段 patch。
             expected_version: 可选 optimistic lock。
         """
         t0 = time.monotonic()
@@ -556,7 +590,7 @@ class ConfigStore:
 
                     merged = current.model_dump()
                     for key, value in patch.items():
-                        if key in ("sync", "storage", "ai", "policy") and isinstance(value, dict):
+                        if key in ("sync", "storage", "ai", "policy", "watches") and isinstance(value, dict):
                             merged[key].update(value)
                         else:
                             merged[key] = value
@@ -599,7 +633,7 @@ class ConfigStore:
 
     def update_section(
         self,
-        section: Literal["sync", "storage", "ai", "policy"],
+        section: Literal["sync", "storage", "ai", "policy", "watches"],
         patch: dict[str, Any],
     ) -> GlobalConfig:
         """Section 级更新辅助函数。"""
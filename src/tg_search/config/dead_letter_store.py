@@ -0,0 +1,199 @@
+"""
+Dead-letter store for documents MeiliSearch rejected, backed by SQLite.
+
+When a batch fails with a payload or document error the batch writer bisects it
+until the offending documents are isolated; those land here with the error code
+so the rest of the batch is still indexed and the rejects can be replayed later.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import sqlite3
+import threading
+from collections.abc import Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from tg_search.config.config_store import resolve_db_path
+from tg_search.core.logger import setup_logger
+
+logger = setup_logger()
+
+_SQLITE_BUSY_TIMEOUT_SEC = float(os.getenv("CONFIG_STORE_SQLITE_BUSY_TIMEOUT_SEC", "5"))
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass(slots=True, frozen=True)
+class DeadLetter:
+    """一条被 MeiliSearch 拒绝的文档。"""
+
+    doc_id: str
+    index_name: str
+    error_code: str | None
+    error_message: str | None
+    document: dict[str, Any]
+    attempts: int = 1
+    created_at: str | None = None
+    updated_at: str | None = None
+
+
+class DeadLetterStore:
+    """
+    死信文档持久化（SQLite，与 ConfigStore 共用数据库文件）。
+
+    Notes:
+    - 以 (index_name, doc_id) 为键：同一文档再次失败时覆盖错误信息并递增 attempts。
+    - 重放成功后由调用方删除对应条目。
+    """
+
+    def __init__(self, db_path: str | Path | None = None) -> None:
+        self._db_path = resolve_db_path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._initialize_storage()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=_SQLITE_BUSY_TIMEOUT_SEC,
+            isolation_level=None,  # autocommit, explicit BEGIN for writes
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _initialize_storage(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dead_letters (
+                    index_name TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    error_code TEXT,
+                    error_message TEXT,
+                    document TEXT NOT NULL,
+                    attempts INTEGER NOT NULL DEFAULT 1,
+                    created_at TEXT NOT NULL,
+                    updated_at TEXT NOT NULL,
+                    PRIMARY KEY (index_name, doc_id)
+                )
+                """
+            )
+
+    @staticmethod
+    def _from_row(row: sqlite3.Row) -> DeadLetter:
+        return DeadLetter(
+            doc_id=row["doc_id"],
+            index_name=row["index_name"],
+            error_code=row["error_code"],
+            error_message=row["error_message"],
+            document=json.loads(row["document"]),
+            attempts=int(row["attempts"]),
+            created_at=row["created_at"],
+            updated_at=row["updated_at"],
+        )
+
+    # ── Reads ──
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM dead_letters").fetchone()[0])
+
+    def list_entries(self, *, limit: int = 50, offset: int = 0) -> list[DeadLetter]:
+        """按最近失败时间倒序列出死信。"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT * FROM dead_letters ORDER BY updated_at DESC, doc_id LIMIT ? OFFSET ?",
+                (max(int(limit), 0), max(int(offset), 0)),
+            ).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    def get_many(self, doc_ids: Iterable[str]) -> list[DeadLetter]:
+        ids = list(dict.fromkeys(doc_ids))
+        if not ids:
+            return []
+        placeholders = ",".join("?" for _ in ids)
+        with self._connect() as conn:
+            rows = conn.execute(f"SELECT * FROM dead_letters WHERE doc_id IN ({placeholders})", ids).fetchall()
+        return [self._from_row(row) for row in rows]
+
+    # ── Writes ──
+
+    def add(
+        self,
+        documents: Iterable[dict[str, Any]],
+        *,
+        index_name: str,
+        error_code: str | None,
+        error_message: str | None,
+    ) -> int:
+        """记录被拒绝的文档，返回写入条数。"""
+        now = _now_iso()
+        rows = [
+            (
+                index_name,
+                str(doc.get("id")),
+                error_code,
+                error_message,
+                json.dumps(doc, ensure_ascii=False, default=str),
+                now,
+                now,
+            )
+            for doc in documents
+        ]
+        if not rows:
+            return 0
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(
+                    "INSERT INTO dead_letters "
+                    "(index_name, doc_id, error_code, error_message, document, created_at, updated_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                    "ON CONFLICT(index_name, doc_id) DO UPDATE SET error_code=excluded.error_code, "
+                    "error_message=excluded.error_message, document=excluded.document, "
+                    "attempts=dead_letters.attempts + 1, updated_at=excluded.updated_at",
+                    rows,
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        logger.warning("[DeadLetterStore] recorded docs=%d index=%s code=%s", len(rows), index_name, error_code)
+        return len(rows)
+
+    def remove(self, entries: Iterable[DeadLetter]) -> int:
+        """删除已成功重放的条目，返回删除条数。"""
+        keys = [(entry.index_name, entry.doc_id) for entry in entries]
+        if not keys:
+            return 0
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                removed = 0
+                for key in keys:
+                    removed += conn.execute(
+                        "DELETE FROM dead_letters WHERE index_name = ? AND doc_id = ?", key
+                    ).rowcount
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return removed
@@ -0,0 +1,245 @@
+"""
+Near-duplicate fingerprint store backed by SQLite.
+
+Every fingerprinted message is assigned a `dup_cluster`: the id of the first message
+seen with (nearly) the same text. Lookups go through the MinHash LSH buckets of each
+cluster's first message, so finding candidates is a handful of primary-key probes
+rather than a scan (a bucket may hold several clusters); candidates are confirmed with the 1-bit sketch similarity.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+
+from tg_search.config.config_store import resolve_db_path
+from tg_search.core.logger import setup_logger
+from tg_search.utils.minhash import TextFingerprint, estimate_similarity, fingerprint
+
+logger = setup_logger()
+
+_SQLITE_BUSY_TIMEOUT_SEC = float(os.getenv("CONFIG_STORE_SQLITE_BUSY_TIMEOUT_SEC", "5"))
+
+_COUNTERS = ("messages", "duplicates", "skipped", "skipped_bytes")
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass(slots=True, frozen=True)
+class DedupDecision:
+    """一条消息的去重结果。"""
+
+    cluster: str
+    # 与已有消息完全相同 / 近似相同
+    exact: bool = False
+    near: bool = False
+    # 精确重复次数超过阈值，调用方不应写入索引
+    skip: bool = False
+
+
+class FingerprintStore:
+    """
+    近似重复指纹持久化（SQLite，与 ConfigStore 共用数据库文件）。
+
+    Notes:
+    - 只为每个簇的首条消息写入 LSH 桶，后续相似消息直接归入该簇，避免簇在多次改写后漂移。
+    - `skip_exact_after > 0` 时，同一文本已存入该数量的副本后，后续精确重复返回 skip。
+    - 每个 doc_id 的结果会记录下来，同一文档重新同步时直接返回原结果，不重复计数。
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        *,
+        min_similarity: float = 0.6,
+        skip_exact_after: int = 0,
+    ) -> None:
+        self._db_path = resolve_db_path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._min_similarity = min_similarity
+        self._skip_exact_after = max(int(skip_exact_after), 0)
+        self._lock = threading.RLock()
+        self._initialize_storage()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=_SQLITE_BUSY_TIMEOUT_SEC,
+            isolation_level=None,  # autocommit, explicit BEGIN for writes
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _initialize_storage(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dup_cluster (
+                    cluster TEXT PRIMARY KEY,
+                    sketch INTEGER NOT NULL,
+                    created_at TEXT NOT NULL
+                )
+                """
+            )
+            legacy = conn.execute(
+                "SELECT sql FROM sqlite_master WHERE type = 'table' AND name = 'dup_bucket'"
+            ).fetchone()
+            if legacy is not None and "PRIMARY KEY (bucket, cluster)" not in str(legacy["sql"]):
+                # Older databases kept a single cluster per bucket; keep those rows under the new key.
+                conn.execute("ALTER TABLE dup_bucket RENAME TO dup_bucket_legacy")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dup_bucket (
+                    bucket INTEGER NOT NULL,
+                    cluster TEXT NOT NULL,
+                    PRIMARY KEY (bucket, cluster)
+                ) WITHOUT ROWID
+                """
+            )
+            if legacy is not None and "PRIMARY KEY (bucket, cluster)" not in str(legacy["sql"]):
+                conn.execute(
+                    "INSERT OR IGNORE INTO dup_bucket (bucket, cluster) SELECT bucket, cluster FROM dup_bucket_legacy"
+                )
+                conn.execute("DROP TABLE dup_bucket_legacy")
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dup_exact (
+                    digest INTEGER PRIMARY KEY,
+                    cluster TEXT NOT NULL,
+                    copies INTEGER NOT NULL DEFAULT 1
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS dup_doc (
+                    doc_id TEXT PRIMARY KEY,
+                    digest INTEGER NOT NULL,
+                    cluster TEXT NOT NULL,
+                    exact INTEGER NOT NULL,
+                    near INTEGER NOT NULL,
+                    skip INTEGER NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS dup_counter (name TEXT PRIMARY KEY, value INTEGER NOT NULL)")
+
+    @staticmethod
+    def _bump(conn: sqlite3.Connection, name: str, amount: int = 1) -> None:
+        conn.execute(
+            "INSERT INTO dup_counter (name, value) VALUES (?, ?) ON CONFLICT(name) DO UPDATE SET value = value + excluded.value",
+            (name, amount),
+        )
+
+    def assign(self, doc_id: str, text: str | None) -> DedupDecision | None:
+        """为消息分配 dup_cluster；文本过短（不计算指纹）时返回 None。"""
+        fp = fingerprint(text)
+        if fp is None:
+            return None
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                seen = conn.execute(
+                    "SELECT digest, cluster, exact, near, skip FROM dup_doc WHERE doc_id = ?", (doc_id,)
+                ).fetchone()
+                if seen is not None and int(seen["digest"]) == fp.digest:
+                    # The same document re-synced (history re-download, restart): keep its first decision.
+                    conn.execute("COMMIT")
+                    return DedupDecision(
+                        cluster=str(seen["cluster"]),
+                        exact=bool(seen["exact"]),
+                        near=bool(seen["near"]),
+                        skip=bool(seen["skip"]),
+                    )
+                decision = self._assign_locked(
+                    conn, doc_id, fp, len((text or "").encode("utf-8")), counted=seen is not None
+                )
+                conn.execute(
+                    "INSERT OR REPLACE INTO dup_doc (doc_id, digest, cluster, exact, near, skip) VALUES (?, ?, ?, ?, ?, ?)",
+                    (doc_id, fp.digest, decision.cluster, int(decision.exact), int(decision.near), int(decision.skip)),
+                )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return decision
+
+    def _assign_locked(
+        self, conn: sqlite3.Connection, doc_id: str, fp: TextFingerprint, text_bytes: int, *, counted: bool = False
+    ) -> DedupDecision:
+        """`counted` 为 True 表示该文档已计入 messages（文本被编辑后重新分配）。"""
+        exact = conn.execute("SELECT cluster, copies FROM dup_exact WHERE digest = ?", (fp.digest,)).fetchone()
+        if exact is not None:
+            cluster = str(exact["cluster"])
+            if cluster == doc_id:
+                # The first copy being re-synced: nothing new to count.
+                return DedupDecision(cluster=cluster)
+            if not counted:
+                self._bump(conn, "messages")
+            if self._skip_exact_after and int(exact["copies"]) >= self._skip_exact_after:
+                self._bump(conn, "skipped")
+                self._bump(conn, "skipped_bytes", text_bytes)
+                return DedupDecision(cluster=cluster, exact=True, skip=True)
+            conn.execute("UPDATE dup_exact SET copies = copies + 1 WHERE digest = ?", (fp.digest,))
+            self._bump(conn, "duplicates")
+            return DedupDecision(cluster=cluster, exact=True)
+
+        if not counted:
+            self._bump(conn, "messages")
+        placeholders = ", ".join("?" for _ in fp.buckets)
+        rows = conn.execute(
+            f"""
+            SELECT DISTINCT c.cluster, c.sketch
+            FROM dup_bucket b JOIN dup_cluster c ON c.cluster = b.cluster
+            WHERE b.bucket IN ({placeholders})
+            """,
+            fp.buckets,
+        ).fetchall()
+        best: tuple[float, str] | None = None
+        for row in rows:
+            similarity = estimate_similarity(fp.sketch, int(row["sketch"]))
+            if similarity >= self._min_similarity and (best is None or similarity > best[0]):
+                best = (similarity, str(row["cluster"]))
+        if best is not None:
+            conn.execute("INSERT INTO dup_exact (digest, cluster) VALUES (?, ?)", (fp.digest, best[1]))
+            self._bump(conn, "duplicates")
+            return DedupDecision(cluster=best[1], near=True)
+
+        conn.execute(
+            "INSERT OR REPLACE INTO dup_cluster (cluster, sketch, created_at) VALUES (?, ?, ?)",
+            (doc_id, fp.sketch, _now_iso()),
+        )
+        conn.executemany(
+            "INSERT OR IGNORE INTO dup_bucket (bucket, cluster) VALUES (?, ?)",
+            [(bucket, doc_id) for bucket in fp.buckets],
+        )
+        conn.execute("INSERT INTO dup_exact (digest, cluster) VALUES (?, ?)", (fp.digest, doc_id))
+        return DedupDecision(cluster=doc_id)
+
+    def stats(self) -> dict[str, int]:
+        """累计计数：messages（计算过指纹的消息）、duplicates、skipped、skipped_bytes、clusters。"""
+        with self._connect() as conn:
+            counters = {
+                str(row["name"]): int(row["value"]) for row in conn.execute("SELECT name, value FROM dup_counter")
+            }
+            clusters = int(conn.execute("SELECT COUNT(*) FROM dup_cluster").fetchone()[0])
+        stats = {name: counters.get(name, 0) for name in _COUNTERS}
+        stats["clusters"] = clusters
+        return stats
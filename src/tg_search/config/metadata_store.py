@@ -0,0 +1,243 @@
+"""
+Chat / sender metadata store backed by SQLite.
+
+Indexed documents only carry `chat.id`/`chat.type` and `from_user.id`; titles and
+usernames live here so they are stored once and a rename takes effect without
+reindexing. Reads are served from an in-memory mirror loaded at startup.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from collections.abc import Iterable
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any
+
+from tg_search.config.config_store import resolve_db_path
+from tg_search.core.logger import setup_logger
+
+logger = setup_logger()
+
+_SQLITE_BUSY_TIMEOUT_SEC = float(os.getenv("CONFIG_STORE_SQLITE_BUSY_TIMEOUT_SEC", "5"))
+_WRITE_WARN_MS = int(os.getenv("CONFIG_STORE_SQLITE_WRITE_WARN_MS", "120"))
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+@dataclass(slots=True, frozen=True)
+class ChatMeta:
+    """会话元数据。"""
+
+    id: int
+    type: str | None = None
+    title: str | None = None
+    username: str | None = None
+
+
+@dataclass(slots=True, frozen=True)
+class UserMeta:
+    """发送者元数据。"""
+
+    id: int
+    username: str | None = None
+
+
+class MetadataStore:
+    """
+    会话/发送者元数据持久化（SQLite，与 ConfigStore 共用数据库文件）。
+
+    Notes:
+    - 全量数据在初始化时加载到内存，读取不访问 SQLite。
+    - 写入仅在内容变化时落盘，并递增 `version` 供搜索缓存失效使用。
+    """
+
+    def __init__(self, db_path: str | Path | None = None) -> None:
+        self._db_path = resolve_db_path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._chats: dict[int, ChatMeta] = {}
+        self._users: dict[int, UserMeta] = {}
+        self._user_ids_by_username: dict[str, set[int]] = {}
+        self._version = 0
+        self._initialize_storage()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    @property
+    def version(self) -> int:
+        """元数据变更计数：任一标题/用户名变化后递增。"""
+        return self._version
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=_SQLITE_BUSY_TIMEOUT_SEC,
+            isolation_level=None,  # autocommit, explicit BEGIN for writes
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _initialize_storage(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS chat_meta (
+                    chat_id INTEGER PRIMARY KEY,
+                    type TEXT,
+                    title TEXT,
+                    username TEXT,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS user_meta (
+                    user_id INTEGER PRIMARY KEY,
+                    username TEXT,
+                    updated_at TEXT NOT NULL
+                )
+                """
+            )
+            for row in conn.execute("SELECT chat_id, type, title, username FROM chat_meta"):
+                self._chats[int(row["chat_id"])] = ChatMeta(
+                    id=int(row["chat_id"]),
+                    type=row["type"],
+                    title=row["title"],
+                    username=row["username"],
+                )
+            for row in conn.execute("SELECT user_id, username FROM user_meta"):
+                user = UserMeta(id=int(row["user_id"]), username=row["username"])
+                self._users[user.id] = user
+                self._index_username(user)
+        logger.info(
+            "[MetadataStore] loaded chats=%d users=%d path=%s",
+            len(self._chats),
+            len(self._users),
+            self._db_path,
+        )
+
+    @staticmethod
+    def _normalize_username(username: str) -> str:
+        return username.lstrip("@").lower()
+
+    def _index_username(self, user: UserMeta) -> None:
+        if user.username:
+            self._user_ids_by_username.setdefault(self._normalize_username(user.username), set()).add(user.id)
+
+    def _unindex_username(self, user: UserMeta) -> None:
+        if not user.username:
+            return
+        key = self._normalize_username(user.username)
+        ids = self._user_ids_by_username.get(key)
+        if ids is not None:
+            ids.discard(user.id)
+            if not ids:
+                self._user_ids_by_username.pop(key, None)
+
+    # ── Reads ──
+
+    def get_chat(self, chat_id: int) -> ChatMeta | None:
+        return self._chats.get(chat_id)
+
+    def get_user(self, user_id: int) -> UserMeta | None:
+        return self._users.get(user_id)
+
+    def find_user_ids(self, username: str) -> list[int]:
+        """按用户名（不区分大小写，可带 @）查找发送者 ID。"""
+        return sorted(self._user_ids_by_username.get(self._normalize_username(username), ()))
+
+    def counts(self) -> dict[str, int]:
+        return {"chats": len(self._chats), "users": len(self._users)}
+
+    # ── Writes ──
+
+    def upsert_chats(self, chats: Iterable[ChatMeta]) -> int:
+        """写入会话元数据，返回实际变化的条数。"""
+        with self._lock:
+            changed = [chat for chat in chats if self._chats.get(chat.id) != chat]
+            if not changed:
+                return 0
+            now = _now_iso()
+            self._write(
+                "INSERT INTO chat_meta (chat_id, type, title, username, updated_at) VALUES (?, ?, ?, ?, ?) "
+                "ON CONFLICT(chat_id) DO UPDATE SET type=excluded.type, title=excluded.title, "
+                "username=excluded.username, updated_at=excluded.updated_at",
+                [(chat.id, chat.type, chat.title, chat.username, now) for chat in changed],
+            )
+            for chat in changed:
+                self._chats[chat.id] = chat
+            self._version += 1
+            return len(changed)
+
+    def upsert_users(self, users: Iterable[UserMeta]) -> int:
+        """写入发送者元数据，返回实际变化的条数。"""
+        with self._lock:
+            changed = [user for user in users if self._users.get(user.id) != user]
+            if not changed:
+                return 0
+            now = _now_iso()
+            self._write(
+                "INSERT INTO user_meta (user_id, username, updated_at) VALUES (?, ?, ?) "
+                "ON CONFLICT(user_id) DO UPDATE SET username=excluded.username, updated_at=excluded.updated_at",
+                [(user.id, user.username, now) for user in changed],
+            )
+            for user in changed:
+                previous = self._users.get(user.id)
+                if previous is not None:
+                    self._unindex_username(previous)
+                self._users[user.id] = user
+                self._index_username(user)
+            self._version += 1
+            return len(changed)
+
+    def record_chat(self, data: dict[str, Any] | None) -> None:
+        """从 `serialize_chat` 结果写入单条会话元数据。"""
+        if not data or data.get("id") is None:
+            return
+        self.upsert_chats(
+            [
+                ChatMeta(
+                    id=int(data["id"]),
+                    type=data.get("type"),
+                    title=data.get("title"),
+                    username=data.get("username"),
+                )
+            ]
+        )
+
+    def record_user(self, data: dict[str, Any] | None) -> None:
+        """从 `serialize_sender` 结果写入单条发送者元数据。"""
+        if not data or data.get("id") is None:
+            return
+        self.upsert_users([UserMeta(id=int(data["id"]), username=data.get("username"))])
+
+    def _write(self, sql: str, rows: list[tuple[Any, ...]]) -> None:
+        started = time.perf_counter()
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany(sql, rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        if elapsed_ms > _WRITE_WARN_MS:
+            logger.warning("[MetadataStore] slow write rows=%d elapsed_ms=%.1f", len(rows), elapsed_ms)
@@ -0,0 +1,185 @@
+"""
+Sampled search query log, backed by SQLite.
+
+Each sampled presentation search records its canonical query payload (the same
+sorted-JSON key the presentation cache uses), latency, hit count and whether it
+was served from cache. The log feeds startup cache warming and the top-queries
+API. Retention is bounded by age and by row count.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from tg_search.config.config_store import resolve_db_path
+from tg_search.core.logger import setup_logger
+
+logger = setup_logger()
+
+_SQLITE_BUSY_TIMEOUT_SEC = float(os.getenv("CONFIG_STORE_SQLITE_BUSY_TIMEOUT_SEC", "5"))
+# 每写入这么多次清理一次过期/超量条目
+_PRUNE_EVERY = 256
+
+
+def _percentile(sorted_values: list[float], pct: float) -> float:
+    # Nearest-rank percentile over an ascending list.
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(pct / 100 * len(sorted_values)), 1)
+    return sorted_values[min(rank, len(sorted_values)) - 1]
+
+
+@dataclass(slots=True, frozen=True)
+class QueryLogStats:
+    """一条查询在统计窗口内的聚合数据。"""
+
+    payload: str
+    q: str
+    count: int
+    cache_hits: int
+    avg_total_hits: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    last_seen_at: float
+
+
+class QueryLogStore:
+    """
+    搜索查询日志（SQLite，与 ConfigStore 共用数据库文件）。
+
+    Notes:
+    - 按采样写入，每条记录一次搜索；聚合在读取时进行。
+    - 超过 `retention_days` 的记录与超出 `max_rows` 的最旧记录定期清理。
+    """
+
+    def __init__(
+        self,
+        db_path: str | Path | None = None,
+        *,
+        retention_days: float = 14,
+        max_rows: int = 100_000,
+    ) -> None:
+        self._db_path = resolve_db_path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._retention_sec = max(float(retention_days), 0.0) * 86400
+        self._max_rows = max(int(max_rows), 0)
+        self._lock = threading.RLock()
+        self._writes = 0
+        self._initialize_storage()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(
+            self._db_path,
+            timeout=_SQLITE_BUSY_TIMEOUT_SEC,
+            isolation_level=None,  # autocommit, explicit BEGIN for writes
+        )
+        conn.row_factory = sqlite3.Row
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _initialize_storage(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS query_log (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    payload TEXT NOT NULL,
+                    q TEXT NOT NULL,
+                    latency_ms REAL NOT NULL,
+                    total_hits INTEGER NOT NULL,
+                    cached INTEGER NOT NULL,
+                    logged_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_query_log_logged_at ON query_log(logged_at)")
+            conn.execute("CREATE INDEX IF NOT EXISTS idx_query_log_payload ON query_log(payload)")
+
+    def record(self, payload: str, q: str, *, latency_ms: float, total_hits: int, cached: bool) -> None:
+        now = time.time()
+        with self._lock, self._connect() as conn:
+            conn.execute(
+                """
+                INSERT INTO query_log (payload, q, latency_ms, total_hits, cached, logged_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (payload, q, float(latency_ms), int(total_hits), int(cached), now),
+            )
+            self._writes += 1
+            if self._writes % _PRUNE_EVERY == 0:
+                self._prune(conn, now)
+
+    def _prune(self, conn: sqlite3.Connection, now: float) -> None:
+        removed = 0
+        if self._retention_sec:
+            removed += conn.execute("DELETE FROM query_log WHERE logged_at < ?", (now - self._retention_sec,)).rowcount
+        if self._max_rows:
+            removed += conn.execute(
+                "DELETE FROM query_log WHERE id <= (SELECT MAX(id) FROM query_log) - ?",
+                (self._max_rows,),
+            ).rowcount
+        if removed:
+            logger.info("[QueryLogStore] pruned removed=%d", removed)
+
+    def top_queries(self, *, limit: int = 20, since: float | None = None) -> list[QueryLogStats]:
+        """按出现次数返回最常见的查询；`since` 为 Unix 时间戳，限定统计窗口。"""
+        since = since if since is not None else 0.0
+        with self._connect() as conn:
+            rows = conn.execute(
+                """
+                SELECT payload, COUNT(*) AS count, SUM(cached) AS cache_hits,
+                       AVG(total_hits) AS avg_total_hits, MAX(logged_at) AS last_seen_at
+                FROM query_log
+                WHERE logged_at >= ?
+                GROUP BY payload
+                ORDER BY count DESC, last_seen_at DESC
+                LIMIT ?
+                """,
+                (since, max(int(limit), 0)),
+            ).fetchall()
+            stats = []
+            for row in rows:
+                samples = conn.execute(
+                    """
+                    SELECT q, latency_ms FROM query_log
+                    WHERE payload = ? AND logged_at >= ?
+                    ORDER BY latency_ms
+                    """,
+                    (row["payload"], since),
+                ).fetchall()
+                latencies = [float(sample["latency_ms"]) for sample in samples]
+                stats.append(
+                    QueryLogStats(
+                        payload=str(row["payload"]),
+                        q=str(samples[0]["q"]) if samples else "",
+                        count=int(row["count"]),
+                        cache_hits=int(row["cache_hits"] or 0),
+                        avg_total_hits=round(float(row["avg_total_hits"] or 0.0), 1),
+                        p50_ms=round(_percentile(latencies, 50), 1),
+                        p95_ms=round(_percentile(latencies, 95), 1),
+                        max_ms=round(latencies[-1], 1) if latencies else 0.0,
+                        last_seen_at=float(row["last_seen_at"]),
+                    )
+                )
+        return stats
+
+    def count(self) -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM query_log").fetchone()[0])
@@ -61,6 +61,12 @@ TOKEN = os.getenv("BOT_TOKEN", "")
 ## MeiliSearch 设置
 MEILI_HOST = os.getenv("MEILI_HOST", "")
 MEILI_PASS = os.getenv("MEILI_MASTER_KEY", "")
+# 多节点读写分离（可选）：`url|role` 逗号分隔，role 为 primary/replica/writer，设置后覆盖 MEILI_HOST
+MEILI_HOSTS = os.getenv("MEILI_HOSTS", "")
+# 只读节点 lastUpdate 落后主节点超过该秒数时移出搜索轮转
+MEILI_REPLICA_MAX_LAG_SEC = float(os.getenv("MEILI_REPLICA_MAX_LAG_SEC", 300))
+# 节点健康/落后探测间隔（秒）
+MEILI_PROBE_INTERVAL_SEC = float(os.getenv("MEILI_PROBE_INTERVAL_SEC", 10))
 # 运行时配置/会话状态 SQLite 文件路径
 CONFIG_DB_PATH = os.getenv("CONFIG_DB_PATH", "session/config_store.sqlite3")
 
@@ -110,6 +116,23 @@ PROXY = os.getenv("PROXY", None)
 ## 性能控制
 # 每次上传消息到Meilisearch的数量
 BATCH_MSG_UNM = int(os.getenv("BATCH_MSG_UNM", 200))
+# 按月分片索引：开启后新消息按 UTC 月份写入 telegram_YYYYMM，搜索时扇出到相关分片
+INDEX_SHARDING = ast.literal_eval(os.getenv("INDEX_SHARDING", "False"))
+# 超过该月数的旧分片视为冻结：设置更新/压缩只作用于热分片（写入仍然允许）
+INDEX_SHARD_FROZEN_AFTER_MONTHS = int(os.getenv("INDEX_SHARD_FROZEN_AFTER_MONTHS", 3))
+# 数值字段回填任务每批读取/更新的文档数量
+INDEX_BACKFILL_BATCH_SIZE = int(os.getenv("INDEX_BACKFILL_BATCH_SIZE", 1000))
+# 启动时只提交有变化的索引设置；会触发全量重建的变更通过影子索引重建 + swap 完成（False 则原地更新）
+INDEX_SETTINGS_REBUILD = ast.literal_eval(os.getenv("INDEX_SETTINGS_REBUILD", "True"))
+# MeiliSearch 熔断器：连续连接失败达到阈值后快速失败，按退避间隔探测恢复
+MEILI_CIRCUIT_BREAKER = ast.literal_eval(os.getenv("MEILI_CIRCUIT_BREAKER", "True"))
+MEILI_BREAKER_READ_FAILURES = int(os.getenv("MEILI_BREAKER_READ_FAILURES", 3))
+MEILI_BREAKER_WRITE_FAILURES = int(os.getenv("MEILI_BREAKER_WRITE_FAILURES", 3))
+MEILI_BREAKER_RESET_SEC = float(os.getenv("MEILI_BREAKER_RESET_SEC", 10))
+# 熔断期间暂存在内存中的待写入文档上限，超出部分进入死信库
+INGEST_BUFFER_MAX_DOCS = int(os.getenv("INGEST_BUFFER_MAX_DOCS", 50000))
+# 批量写入时同时在途（已提交未确认）的 MeiliSearch 任务数，让服务端自动合并相邻任务
+INGEST_MAX_IN_FLIGHT_TASKS = int(os.getenv("INGEST_MAX_IN_FLIGHT_TASKS", 4))
 
 
 # 不记录消息编辑的历史，True 为不记录，False 为记录
@@ -120,8 +143,80 @@ NOT_RECORD_MSG = ast.literal_eval(os.getenv("NOT_RECORD_MSG", "True"))
 # 是否开启搜索记录缓存
 # 如果开启，将会缓存搜索记录，减少 Meilisearch 的请求次数
 SEARCH_CACHE = ast.literal_eval(os.getenv("SEARCH_CACHE", "True"))
-# 缓存过期时间，单位秒，默认 2 小时
+# 缓存最长存活时间，单位秒，默认 2 小时
+# 缓存条目按索引写入代数失效：索引未变化时在此时间内一直有效
 CACHE_EXPIRE_SECONDS = int(os.getenv("CACHE_EXPIRE_SECONDS", 60 * 60 * 2))
+# 索引变化后，旧缓存条目仍可直接返回的宽限时间（秒），同时在后台刷新
+SEARCH_CACHE_STALE_GRACE_SEC = int(os.getenv("SEARCH_CACHE_STALE_GRACE_SEC", 60))
+# 检查 MeiliSearch lastUpdate 的最小间隔（秒），用于感知其他写入方造成的索引变化
+SEARCH_CACHE_GENERATION_CHECK_SEC = float(os.getenv("SEARCH_CACHE_GENERATION_CHECK_SEC", 5))
+# 搜索结果裁剪：Bot / API 列表模式只返回命中位置附近约 N 个词的高亮摘要，而不是整条消息原文 + 整条高亮
+SEARCH_BOT_CROP_LENGTH = int(os.getenv("SEARCH_BOT_CROP_LENGTH", 80))
+SEARCH_LIST_CROP_LENGTH = int(os.getenv("SEARCH_LIST_CROP_LENGTH", 40))
+# 查询日志：按采样比例记录新搜索（归一化查询、筛选条件、耗时、命中数）到 SQLite，用于缓存预热与热门查询统计
+QUERY_LOG_ENABLED = ast.literal_eval(os.getenv("QUERY_LOG_ENABLED", "True"))
+QUERY_LOG_SAMPLE_RATE = float(os.getenv("QUERY_LOG_SAMPLE_RATE", 1.0))
+# 查询日志保留天数 / 最多保留条数，超出部分定期清理
+QUERY_LOG_RETENTION_DAYS = float(os.getenv("QUERY_LOG_RETENTION_DAYS", 14))
+QUERY_LOG_MAX_ROWS = int(os.getenv("QUERY_LOG_MAX_ROWS", 100000))
+# 缓存预热：启动后及索引写入代数变化后，把最常见的 N 条查询预先载入展示缓存（0 关闭）
+CACHE_WARM_TOP_N = int(os.getenv("CACHE_WARM_TOP_N", 20))
+# 检查是否需要预热的间隔（秒），也是两次预热之间的最短间隔
+CACHE_WARM_INTERVAL_SEC = float(os.getenv("CACHE_WARM_INTERVAL_SEC", 300))
+# 预热时相邻两条查询之间的间隔（秒）；消息写入缓冲区非空时暂停预热，避免与消息写入争抢 MeiliSearch
+CACHE_WARM_PACE_SEC = float(os.getenv("CACHE_WARM_PACE_SEC", 1.0))
+
+# 搜索后端：meilisearch（默认）或 sqlite（内置 SQLite FTS5 索引，CJK 按字 bigram 分词，适合单用户小规模部署）
+# sqlite 模式下消息写入与搜索都走本地索引，MeiliSearch 仅用于对话管理/统计等其余功能
+SEARCH_BACKEND = os.getenv("SEARCH_BACKEND", "meilisearch").strip().lower()
+# 热备：使用 MeiliSearch 后端时把消息同步写入本地 SQLite FTS5 索引，MeiliSearch 不可达时搜索自动切换到本地索引
+SQLITE_FTS_STANDBY = ast.literal_eval(os.getenv("SQLITE_FTS_STANDBY", "False"))
+# 本地全文索引 SQLite 文件路径
+SQLITE_FTS_PATH = os.getenv("SQLITE_FTS_PATH", "session/search_fts.sqlite3")
+# 实时消息热数据层：最近 N 小时的新消息（实时消息与历史下载）同时保存在进程内倒排索引，收到即可搜索（0 关闭）
+HOT_TIER_HOURS = float(os.getenv("HOT_TIER_HOURS", 6))
+# 热数据层容量上限：文档条数 / 估算内存（MB），超出时淘汰最旧消息
+HOT_TIER_MAX_DOCS = int(os.getenv("HOT_TIER_MAX_DOCS", 20000))
+HOT_TIER_MAX_MB = int(os.getenv("HOT_TIER_MAX_MB", 64))
+# 本进程是索引的唯一写入方时开启：时间范围完全落在热层内的查询直接由内存回答，不再访问 MeiliSearch
+# 其他进程也向同一索引写入消息时必须关闭，否则这些消息不会出现在近期查询结果中
+HOT_TIER_SOLE_WRITER = ast.literal_eval(os.getenv("HOT_TIER_SOLE_WRITER", "False"))
+# 近似重复检测：写入时为消息计算 MinHash 指纹并附带 dup_cluster 字段（同一簇 = 内容近似相同）
+DEDUP_ENABLED = ast.literal_eval(os.getenv("DEDUP_ENABLED", "False"))
+# 判为近似重复的最低估计相似度（Jaccard，0-1）
+DEDUP_MIN_SIMILARITY = float(os.getenv("DEDUP_MIN_SIMILARITY", 0.6))
+# 同一文本已存入 N 份后，后续完全相同的消息不再写入索引（0 表示全部保留）
+DEDUP_SKIP_EXACT_AFTER = int(os.getenv("DEDUP_SKIP_EXACT_AFTER", 0))
+# 搜索时按 dup_cluster 折叠重复结果（MeiliSearch distinct 参数，需 v1.11+ 且启用 DEDUP_ENABLED）
+SEARCH_COLLAPSE_DUPLICATES = ast.literal_eval(os.getenv("SEARCH_COLLAPSE_DUPLICATES", "False"))
+# 查询归一化：NFKC（全角转半角）、大小写折叠、合并空白，缓存键与实际查询都使用归一化后的查询
+QUERY_NORMALIZE = ast.literal_eval(os.getenv("QUERY_NORMALIZE", "True"))
+# 繁体→简体折叠（默认关闭）：仅当索引端同样做了繁简归一时开启，否则繁体消息将搜不到
+QUERY_FOLD_TRADITIONAL = ast.literal_eval(os.getenv("QUERY_FOLD_TRADITIONAL", "False"))
+# 可选的 OpenCC 字表路径（如 TSCharacters.txt），补充内置的常用字映射
+QUERY_T2S_TABLE = os.getenv("QUERY_T2S_TABLE", "")
+# 超长消息分块索引：文本超过该长度（字符）的消息拆成重叠分块写入，搜索时折叠回一条结果（0 关闭）
+CHUNK_TEXT_OVER_CHARS = int(os.getenv("CHUNK_TEXT_OVER_CHARS", 0))
+# 每个分块的最大长度 / 相邻分块的重叠长度（字符）
+CHUNK_SIZE_CHARS = int(os.getenv("CHUNK_SIZE_CHARS", 1000))
+CHUNK_OVERLAP_CHARS = int(os.getenv("CHUNK_OVERLAP_CHARS", 100))
+# 关注查询（/watch）：实时消息命中后由 Bot 推送；总条数上限，超过后拒绝新增
+WATCH_MAX_RULES = int(os.getenv("WATCH_MAX_RULES", 500))
+# Dashboard 预聚合：写入时按会话/小时累加消息数并维护关键词 top-k 草图（SQLite），Dashboard 直接读取精确计数
+# 关闭或窗口早于开始记录的时间时，Dashboard 回退到按窗口采样消息
+DASHBOARD_AGGREGATES_ENABLED = ast.literal_eval(os.getenv("DASHBOARD_AGGREGATES_ENABLED", "True"))
+# 每个会话每小时保留的关键词数（space-saving 草图容量，越大关键词排名越准）
+DASHBOARD_KEYWORD_CAPACITY = int(os.getenv("DASHBOARD_KEYWORD_CAPACITY", 50))
+# 搜索准入控制（Bot 与 API 共用）：按用户的令牌桶限速 + 全局并发上限与排队
+# 单字中文、深翻页的全量匹配等昂贵查询一次消耗多个令牌；翻页回调排队时优先
+SEARCH_ADMISSION_ENABLED = ast.literal_eval(os.getenv("SEARCH_ADMISSION_ENABLED", "True"))
+# 每个用户每秒补充的令牌数与令牌桶容量（允许的突发搜索次数）
+SEARCH_RATE_PER_SEC = float(os.getenv("SEARCH_RATE_PER_SEC", 1.0))
+SEARCH_RATE_BURST = int(os.getenv("SEARCH_RATE_BURST", 10))
+# 同时执行的搜索数上限，超过后排队；队列满或等待超时返回"繁忙"（API 为 HTTP 429）
+SEARCH_MAX_CONCURRENT = int(os.getenv("SEARCH_MAX_CONCURRENT", 8))
+SEARCH_MAX_QUEUE = int(os.getenv("SEARCH_MAX_QUEUE", 32))
+SEARCH_QUEUE_TIMEOUT_SEC = float(os.getenv("SEARCH_QUEUE_TIMEOUT_SEC", 10))
 
 # 搜索结果设置
 # 分页的最大页数，如果设置过大，可能造成内存过多占用（消息缓存）
@@ -139,6 +234,16 @@ SEARCH_PRESENTATION_MAX_HITS = int(os.getenv("SEARCH_PRESENTATION_MAX_HITS", MAX
 # SearchService callback 短 token TTL（秒）
 # 默认与搜索缓存 TTL 对齐
 SEARCH_CALLBACK_TOKEN_TTL_SEC = int(os.getenv("SEARCH_CALLBACK_TOKEN_TTL_SEC", CACHE_EXPIRE_SECONDS))
+# 分页按钮放不下的长查询保存在 SQLite 查询表中（重启后按钮仍可用），超过该天数未使用的条目被清理
+SEARCH_CALLBACK_RETENTION_DAYS = float(os.getenv("SEARCH_CALLBACK_RETENTION_DAYS", 30))
+
+# 内联查询（在任意会话输入 `@bot 关键词`，需在 BotFather 中 /setinline 开启）
+# 每批结果条数（Telegram 上限 50），下拉时按批次继续从展示缓存中取
+INLINE_RESULTS_PER_PAGE = min(int(os.getenv("INLINE_RESULTS_PER_PAGE", 20)), 50)
+# Telegram 服务端缓存同一查询结果的时间（秒），期间重复查询不会再请求 Bot
+INLINE_CACHE_TIME_SEC = int(os.getenv("INLINE_CACHE_TIME_SEC", 60))
+# 同一用户连续输入的防抖间隔（毫秒），间隔内被后续输入取代的查询不执行搜索
+INLINE_DEBOUNCE_MS = int(os.getenv("INLINE_DEBOUNCE_MS", 350))
 
 
 ## 时区设置
@@ -184,16 +289,34 @@ INDEX_CONFIG = (
         "searchableAttributes": ["text", "id"],
         # Note: Search API uses filters like `chat.id` and `from_user.username`.
         # These must be declared filterable in MeiliSearch, otherwise filtered search will error.
-        "filterableAttributes": ["chat.id", "chat.type", "date", "from_user.id", "from_user.username", "reactions_scores"],
-        "sortableAttributes": ["date", "id"],
+        # 时间与 ID 过滤统一走数值字段 date_ts/chat_id/msg_id；
+        # chat.id 仍保留，用于按会话删除历史文档（回填前的旧文档没有 chat_id）
+        "filterableAttributes": [
+            "chat.id",
+            "chat.type",
+            "chat_id",
+            "date_ts",
+            "msg_id",
+            "from_user.id",
+            "from_user.username",
+            "reactions_scores",
+            # 近似重复簇：distinct 折叠要求该字段可过滤
+            "dup_cluster",
+            # 超长消息分块：按 parent_id 折叠（distinct），编辑后按 parent_id/chunk 删除多余的旧分块
+            "parent_id",
+            "chunk",
+        ],
+        "sortableAttributes": ["date_ts", "msg_id"],
+        # "sort" 放在首位：仅在请求显式携带 sort 参数时生效（游标分页/Dashboard），
+        # 保证按 (date_ts, msg_id) 严格有序，普通搜索的相关性排序不受影响
         "rankingRules": [
+            "sort",
             "words",
             "typo",
             "proximity",
             "attribute",
-            "sort",
             "exactness",
-            "date:desc",
+            "date_ts:desc",
             "reactions_scores:desc",
         ],
         "stopWords": [],
@@ -209,7 +332,11 @@ INDEX_CONFIG = (
             "disableOnWords": [],
             "disableOnAttributes": [],
         },
-        "faceting": {"maxValuesPerFacet": 100, "sortFacetValuesBy": {"*": "alpha"}},
+        # 搜索分面（会话/发送者分布）按命中数截取前 maxValuesPerFacet 项；原地生效，无需重建
+        "faceting": {
+            "maxValuesPerFacet": 100,
+            "sortFacetValuesBy": {"*": "alpha", "chat.id": "count", "chat.type": "count", "from_user.id": "count"},
+        },
         "pagination": {"maxTotalHits": 500},
         "searchCutoffMs": None,
     }
@@ -0,0 +1,400 @@
+"""
+批量写入 MeiliSearch 的容错封装
+
+- 分块以流水线方式提交：最多 N 个任务同时在途，按提交顺序确认，MeiliSearch 可自动合并相邻任务
+- 整批因载荷/文档错误失败时只对失败的任务递归二分，好的文档照常写入，坏文档被隔离到死信库
+- 载荷过大（413）反馈给自适应批量大小：乘性减小，连续成功后加性恢复
+- 连接/超时错误（含熔断打开）在客户端重试后仍失败时，文档暂存到内存缓冲区，下次写入前自动补写；
+  缓冲区满后溢出的文档进入死信库；补写失败的文档放回缓冲区队首，保持先进先出
+- 等待超时的任务结果未知，不计入 indexed：记为 unconfirmed，下次写入前复查，失败的再按内容重写/二分
+- 配置热备索引（SQLite FTS5）时，文档同时写入本地索引，MeiliSearch 不可用期间本地搜索仍能看到新消息
+"""
+
+from __future__ import annotations
+
+import threading
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from tg_search.config.dead_letter_store import DeadLetterStore
+from tg_search.config.settings import INGEST_BUFFER_MAX_DOCS, INGEST_MAX_IN_FLIGHT_TASKS
+from tg_search.core.chunking import chunk_counts
+from tg_search.core.logger import setup_logger
+from tg_search.core.meilisearch import (
+    MeiliSearchAPIError,
+    MeiliSearchClient,
+    MeiliSearchConnectionError,
+    MeiliSearchTimeoutError,
+)
+from tg_search.core.sharding import ShardRouter
+from tg_search.core.sqlite_fts import SqliteFtsIndex
+
+logger = setup_logger()
+
+PAYLOAD_TOO_LARGE = "payload_too_large"
+MEILI_UNAVAILABLE = "meili_unavailable"
+_DRAIN_BATCH_SIZE = 1000
+# 复查等待超时任务时每个任务的等待上限，避免阻塞新的写入
+_RECHECK_TIMEOUT_MS = 1000
+
+# 只与批次内容有关的错误：拆小批次或剔除个别文档后可以成功
+_BISECTABLE_ERROR_CODES = frozenset(
+    {
+        PAYLOAD_TOO_LARGE,
+        "malformed_payload",
+        "bad_request",
+        "missing_document_id",
+        "invalid_document_id",
+        "invalid_document_fields",
+        "invalid_document_geo_field",
+        "invalid_document_geojson_field",
+        "invalid_vectors",
+        "invalid_vector_dimensions",
+        "max_fields_limit_exceeded",
+        "missing_payload",
+        "primary_key_inference_failed",
+    }
+)
+
+
+class AdaptiveBatchSizer:
+    """
+    AIMD 批量大小控制
+
+    收到载荷过大时把批量减半（且不超过失败批次的一半），
+    之后每次满批成功加性增长，直到 `max_size`。
+    """
+
+    def __init__(self, max_size: int, *, min_size: int = 1, step: Optional[int] = None) -> None:
+        self._max_size = max(int(max_size), 1)
+        self._min_size = min(max(int(min_size), 1), self._max_size)
+        self._step = max(int(step) if step is not None else self._max_size // 10, 1)
+        self._current = self._max_size
+        self._lock = threading.Lock()
+
+    @property
+    def current(self) -> int:
+        return self._current
+
+    def on_payload_too_large(self, batch_size: int) -> int:
+        with self._lock:
+            self._current = max(self._min_size, min(self._current, int(batch_size)) // 2)
+            logger.warning(f"[BatchSizer] payload too large at {batch_size} docs, batch size -> {self._current}")
+            return self._current
+
+    def on_success(self, batch_size: int) -> int:
+        with self._lock:
+            if batch_size >= self._current and self._current < self._max_size:
+                self._current = min(self._max_size, self._current + self._step)
+            return self._current
+
+
+@dataclass(slots=True)
+class BatchWriteResult:
+    """一次批量写入的结果统计。"""
+
+    indexed: int = 0
+    dead_lettered: int = 0
+    buffered: int = 0
+    # 任务等待超时、结果未知的文档数；之后的写入会复查这些任务
+    unconfirmed: int = 0
+    indexed_ids: List[str] = field(default_factory=list)
+    rejected_ids: List[str] = field(default_factory=list)
+
+
+class _RejectedBatch(Exception):
+    def __init__(self, error_code: Optional[str], message: str) -> None:
+        super().__init__(message)
+        self.error_code = error_code
+
+
+class _UnconfirmedTask(Exception):
+    """任务在等待时间内没有完成，结果未知"""
+
+
+class BatchWriter:
+    """
+    带二分隔离的文档批量写入
+
+    分块连续提交，在途任务达到 `max_in_flight` 时才等待最早的任务；同一索引的任务按提交顺序执行，
+    所以按顺序确认不会多等。异步任务失败（如单个文档 id 非法导致整批失败）只对该任务的文档二分。
+    MeiliSearch 不可达时文档进入缓冲区而不是丢弃，恢复后按原索引补写。
+    """
+
+    def __init__(
+        self,
+        meili: MeiliSearchClient | SqliteFtsIndex,
+        *,
+        shard_router: Optional[ShardRouter] = None,
+        dead_letters: Optional[DeadLetterStore] = None,
+        sizer: Optional[AdaptiveBatchSizer] = None,
+        task_timeout_ms: int = 60_000,
+        buffer_max_docs: int = INGEST_BUFFER_MAX_DOCS,
+        max_in_flight: int = INGEST_MAX_IN_FLIGHT_TASKS,
+        mirror: Optional[SqliteFtsIndex] = None,
+    ) -> None:
+        self._meili = meili
+        self._mirror = mirror
+        self._shard_router = shard_router
+        self._dead_letters = dead_letters
+        self.sizer = sizer
+        self._task_timeout_ms = max(int(task_timeout_ms), 1000)
+        self._max_in_flight = max(int(max_in_flight), 1)
+        self._buffer: deque[tuple[str, Dict[str, Any]]] = deque()
+        self._buffer_max = max(int(buffer_max_docs), 0)
+        self._buffer_lock = threading.Lock()
+        # 等待超时的任务：(task uid, 索引名, 文档)，按提交顺序复查
+        self._unconfirmed: deque[tuple[int, str, List[Dict[str, Any]]]] = deque()
+        self._unconfirmed_lock = threading.Lock()
+
+    @property
+    def buffered(self) -> int:
+        """缓冲区中等待补写的文档数"""
+        return len(self._buffer)
+
+    @property
+    def unconfirmed(self) -> int:
+        """任务结果未知、等待复查的文档数"""
+        return sum(len(docs) for _, _, docs in self._unconfirmed)
+
+    def _route(self, documents: List[Dict[str, Any]], index_name: Optional[str]) -> Dict[str, List[Dict[str, Any]]]:
+        if index_name is not None:
+            return {index_name: documents}
+        if self._shard_router is not None:
+            return self._shard_router.route(documents)
+        return {"telegram": documents}
+
+    def mirror(
+        self, documents: List[Dict[str, Any]], index_name: Optional[str] = None, *, replace_chunks: bool = False
+    ) -> None:
+        """
+        同步写入热备索引（分片文档写入基础索引名）；失败只记录日志，不影响主写入
+
+        `replace_chunks` 为 True 时（原地编辑）同时删除这些消息旧版本多出的分块。
+        """
+        if self._mirror is None or not documents:
+            return
+        target = index_name or "telegram"
+        if self._shard_router is not None and (index_name is None or self._shard_router.is_shard(index_name)):
+            target = self._shard_router.base_index
+        try:
+            self._mirror.add_documents(documents, target)
+            if replace_chunks:
+                self._mirror.delete_stale_chunks(chunk_counts(documents), target)
+        except Exception as e:
+            logger.warning(f"[BatchWriter] standby index write failed for {len(documents)} docs: {type(e).__name__}: {e}")
+
+    def buffer(self, documents: List[Dict[str, Any]], index_name: Optional[str] = None) -> int:
+        """MeiliSearch 不可用时暂存文档（实时消息路径使用），返回暂存数量"""
+        return sum(self._enqueue(docs, target) for target, docs in self._route(documents, index_name).items())
+
+    def _enqueue(self, docs: List[Dict[str, Any]], index_name: str) -> int:
+        with self._buffer_lock:
+            room = max(self._buffer_max - len(self._buffer), 0)
+            accepted, overflow = docs[:room], docs[room:]
+            self._buffer.extend((index_name, doc) for doc in accepted)
+        if accepted:
+            logger.warning(f"[BatchWriter] MeiliSearch unavailable, buffered {len(accepted)} docs (total {self.buffered})")
+        if overflow:
+            self._dead_letter(
+                overflow,
+                index_name,
+                _RejectedBatch(MEILI_UNAVAILABLE, "ingest buffer full while MeiliSearch unavailable"),
+            )
+        return len(accepted)
+
+    def drain(self) -> BatchWriteResult:
+        """补写缓冲区中的文档；MeiliSearch 仍不可用时停止，剩余文档留在缓冲区"""
+        result = BatchWriteResult()
+        self.recheck(result)
+        while True:
+            with self._buffer_lock:
+                if not self._buffer:
+                    break
+                size = min(self.sizer.current if self.sizer is not None else _DRAIN_BATCH_SIZE, len(self._buffer))
+                batch = [self._buffer.popleft() for _ in range(size)]
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            for index_name, doc in batch:
+                groups.setdefault(index_name, []).append(doc)
+            requeue: List[tuple[str, Dict[str, Any]]] = []
+            for index_name, docs in groups.items():
+                self._write_group(docs, index_name, result, requeue=requeue)
+            if requeue:
+                # 放回队首：仍排在之后缓冲的新文档前面
+                with self._buffer_lock:
+                    self._buffer.extendleft(reversed(requeue))
+                break
+        if result.indexed:
+            logger.info(f"[BatchWriter] drained {result.indexed} buffered docs, {self.buffered} remaining")
+        return result
+
+    def write(self, documents: List[Dict[str, Any]], index_name: Optional[str] = None) -> BatchWriteResult:
+        """
+        写入文档；未指定 index_name 时按分片路由（未启用分片则写入默认索引）
+
+        Raises:
+            MeiliSearchAPIError: 与文档内容无关的 API 错误（鉴权、索引不存在等）
+        """
+        self.mirror(documents, index_name)
+        result = BatchWriteResult()
+        if self._buffer:
+            self.drain()
+        elif self._unconfirmed:
+            self.recheck(result)
+        for target, docs in self._route(documents, index_name).items():
+            self._write_group(docs, target, result)
+        return result
+
+    def recheck(self, result: Optional[BatchWriteResult] = None) -> BatchWriteResult:
+        """
+        复查等待超时的任务：成功的计入 indexed，仍未完成的留待下次，
+        因文档内容失败的按原分块重写（再次失败时二分隔离），连接失败的进入缓冲区
+        """
+        result = result if result is not None else BatchWriteResult()
+        with self._unconfirmed_lock:
+            tasks = list(self._unconfirmed)
+            self._unconfirmed.clear()
+        still_pending: List[tuple[int, str, List[Dict[str, Any]]]] = []
+        for task_uid, index_name, docs in tasks:
+            try:
+                self._settle(task_uid, _RECHECK_TIMEOUT_MS)
+            except _UnconfirmedTask:
+                still_pending.append((task_uid, index_name, docs))
+                continue
+            except MeiliSearchConnectionError:
+                # 复查请求本身失败：任务状态未知，同 id 重写是幂等的
+                self._hold(docs, index_name, result, None)
+                continue
+            except _RejectedBatch:
+                self._write_group(docs, index_name, result)
+                continue
+            except MeiliSearchAPIError as e:
+                # 与文档内容无关的任务失败：保留到死信库，不影响其余任务的复查
+                self._dead_letter(docs, index_name, _RejectedBatch(e.error_code, str(e)))
+                result.dead_lettered += len(docs)
+                result.rejected_ids.extend(str(doc.get("id")) for doc in docs)
+                continue
+            self._confirm(docs, result)
+        if still_pending:
+            with self._unconfirmed_lock:
+                self._unconfirmed.extendleft(reversed(still_pending))
+        return result
+
+    def _confirm(self, docs: List[Dict[str, Any]], result: BatchWriteResult) -> None:
+        result.indexed += len(docs)
+        result.indexed_ids.extend(str(doc.get("id")) for doc in docs)
+        if self.sizer is not None:
+            self.sizer.on_success(len(docs))
+
+    def _write_group(
+        self,
+        docs: List[Dict[str, Any]],
+        index_name: str,
+        result: BatchWriteResult,
+        *,
+        requeue: Optional[List[tuple[str, Dict[str, Any]]]] = None,
+    ) -> None:
+        if self._shard_router is not None and self._shard_router.is_shard(index_name):
+            try:
+                self._shard_router.ensure_shard(index_name)
+            except (MeiliSearchConnectionError, MeiliSearchTimeoutError):
+                self._hold(docs, index_name, result, requeue)
+                return
+        chunk_size = max(self.sizer.current if self.sizer is not None else len(docs), 1)
+        pending = deque(docs[start : start + chunk_size] for start in range(0, len(docs), chunk_size))
+        in_flight: deque[tuple[List[Dict[str, Any]], int]] = deque()
+        while pending or in_flight:
+            while pending and len(in_flight) < self._max_in_flight:
+                chunk = pending.popleft()
+                try:
+                    in_flight.append((chunk, self._submit(chunk, index_name)))
+                except (MeiliSearchConnectionError, MeiliSearchTimeoutError):
+                    self._hold(chunk, index_name, result, requeue)
+                except _RejectedBatch as rejected:
+                    self._bisect(chunk, index_name, rejected, pending, result)
+            if not in_flight:
+                continue
+            chunk, task_uid = in_flight.popleft()
+            try:
+                self._settle(task_uid, self._task_timeout_ms)
+            except _UnconfirmedTask:
+                # 任务仍在排队，结果未知：不重复提交，也不计入 indexed，之后的写入会复查
+                logger.warning(f"[BatchWriter] task {task_uid} still pending after {self._task_timeout_ms}ms")
+                with self._unconfirmed_lock:
+                    self._unconfirmed.append((task_uid, index_name, chunk))
+                result.unconfirmed += len(chunk)
+                continue
+            except (MeiliSearchConnectionError, MeiliSearchTimeoutError):
+                self._hold(chunk, index_name, result, requeue)
+                continue
+            except _RejectedBatch as rejected:
+                self._bisect(chunk, index_name, rejected, pending, result)
+                continue
+            self._confirm(chunk, result)
+
+    def _submit(self, docs: List[Dict[str, Any]], index_name: str) -> int:
+        try:
+            task = self._meili.add_documents(docs, index_name)
+        except MeiliSearchAPIError as e:
+            if e.status_code == 413 or e.error_code in _BISECTABLE_ERROR_CODES:
+                raise _RejectedBatch(PAYLOAD_TOO_LARGE if e.status_code == 413 else e.error_code, str(e)) from e
+            raise
+        return task.task_uid
+
+    def _settle(self, task_uid: int, timeout_ms: int) -> None:
+        try:
+            status = self._meili.wait_for_task(task_uid, timeout_ms)
+        except MeiliSearchTimeoutError as e:
+            raise _UnconfirmedTask(str(e)) from e
+        if status.get("status") == "failed":
+            error = status.get("error") or {}
+            code = error.get("code") if isinstance(error, dict) else None
+            message = error.get("message") if isinstance(error, dict) else str(error)
+            if code in _BISECTABLE_ERROR_CODES:
+                raise _RejectedBatch(code, message or "")
+            raise MeiliSearchAPIError(f"MeiliSearch 任务失败: {message}", error_code=code)
+
+    def _bisect(
+        self,
+        docs: List[Dict[str, Any]],
+        index_name: str,
+        rejected: _RejectedBatch,
+        pending: deque[List[Dict[str, Any]]],
+        result: BatchWriteResult,
+    ) -> None:
+        """失败分块只拆自身：两半放回待提交队列的最前面，单个文档直接进入死信库"""
+        if rejected.error_code == PAYLOAD_TOO_LARGE and self.sizer is not None:
+            self.sizer.on_payload_too_large(len(docs))
+        if len(docs) == 1:
+            self._dead_letter(docs, index_name, rejected)
+            result.dead_lettered += 1
+            result.rejected_ids.append(str(docs[0].get("id")))
+            return
+        logger.info(f"[BatchWriter] bisecting {len(docs)} docs on '{index_name}' ({rejected.error_code})")
+        middle = len(docs) // 2
+        pending.extendleft((docs[middle:], docs[:middle]))
+
+    def _hold(
+        self,
+        docs: List[Dict[str, Any]],
+        index_name: str,
+        result: BatchWriteResult,
+        requeue: Optional[List[tuple[str, Dict[str, Any]]]],
+    ) -> None:
+        if requeue is None:
+            result.buffered += self._enqueue(docs, index_name)
+            return
+        requeue.extend((index_name, doc) for doc in docs)
+        result.buffered += len(docs)
+
+    def _dead_letter(self, docs: List[Dict[str, Any]], index_name: str, rejected: _RejectedBatch) -> None:
+        if self._dead_letters is None:
+            logger.error(f"[BatchWriter] dropped doc {docs[0].get('id')} on '{index_name}': {rejected}")
+            return
+        self._dead_letters.add(
+            docs,
+            index_name=index_name,
+            error_code=rejected.error_code,
+            error_message=str(rejected),
+        )
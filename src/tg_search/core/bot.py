@@ -1,4 +1,6 @@
 import ast
+import asyncio
+import contextlib
 import gc
 from collections.abc import Awaitable
 from typing import Any, cast
@@ -10,6 +12,9 @@ from telethon.tl.types import BotCommand, BotCommandScopeDefault
 from tg_search.config.settings import (
     APP_HASH,
     APP_ID,
+    INLINE_CACHE_TIME_SEC,
+    INLINE_DEBOUNCE_MS,
+    INLINE_RESULTS_PER_PAGE,
     MAX_PAGE,
     OWNER_IDS,
     PROXY,
@@ -19,8 +24,9 @@ from tg_search.config.settings import (
 )
 from tg_search.core.logger import setup_logger
 from tg_search.services import DomainError
+from tg_search.services.admission import estimate_search_cost
 from tg_search.services.container import ServiceContainer, build_service_container
-from tg_search.services.contracts import SearchHit, SearchPage, SearchQuery
+from tg_search.services.contracts import SearchHit, SearchPage, SearchQuery, WatchItem
 from tg_search.utils.formatters import sizeof_fmt
 
 MAX_RESULTS = MAX_PAGE * RESULTS_PER_PAGE
@@ -64,7 +70,11 @@ class BotHandler:
         self.observability_service = self.services.observability_service
         self.search_service = self.services.search_service
         self.runtime_control_service = self.services.runtime_control_service
+        self.watch_service = self.services.watch_service
+        self.admission = self.services.admission_controller
         self.search_results_cache = {}
+        # 每个用户最近一次内联查询的序号，用于防抖
+        self._inline_query_seq: dict[int, int] = {}
         self.main = main
 
     @staticmethod
@@ -77,8 +87,16 @@ class BotHandler:
             return "服务暂不可用，请稍后重试"
         if exc.code == "search_pagination_invalid":
             return "分页参数已失效，请重新搜索"
+        if exc.code == "search_rate_limited":
+            return f"搜索过于频繁，请 {exc.detail or 1} 秒后再试"
+        if exc.code == "search_overloaded":
+            return "搜索服务繁忙，请稍后再试"
         if exc.code == "runtime_api_only_mode":
             return "当前为 API-only 模式，无法启动下载任务"
+        if exc.code == "watch_invalid_query":
+            return "关注格式错误：/watch <关键词> [chat:<会话ID>] [type:group] [from:@用户名]"
+        if exc.code == "watch_limit_exceeded":
+            return "关注数量已达上限，请先 /unwatch 删除不需要的关注"
         if exc.code in {"runtime_start_failed", "runtime_stop_failed", "runtime_cleanup_failed"}:
             return "运行控制失败，请稍后重试"
         return f"操作失败：{exc.message}"
@@ -87,6 +105,9 @@ class BotHandler:
         await cast(Awaitable[Any], self.bot_client.start(bot_token=TOKEN))
         await self.set_commands_list()
         await self.auto_start_download_and_listening()
+        if self.services.cache_warmer is not None:
+            # 通常由 API lifespan 启动；bot-only 模式没有 lifespan，由 Bot 启动（已在运行时不重复启动）
+            self.services.cache_warmer.start()
         self.bot_client.on(events.NewMessage(pattern=r"^/(start|help)$"))(self.start_handler)
         self.bot_client.on(events.NewMessage(pattern=r"^/(start_client)$"))(
             lambda event: self.start_download_and_listening(event)
@@ -97,11 +118,18 @@ class BotHandler:
         self.bot_client.on(events.NewMessage(pattern=r"^/cc$"))(self.clean)
         self.bot_client.on(events.NewMessage(pattern=r"^/about$"))(self.about_handler)
         self.bot_client.on(events.NewMessage(pattern=r"^/ping$"))(self.ping_handler)
+        self.bot_client.on(events.NewMessage(pattern=r"^/watch (.+)"))(self.watch_handler)
+        self.bot_client.on(events.NewMessage(pattern=r"^/watches$"))(self.watches_handler)
+        self.bot_client.on(events.NewMessage(pattern=r"^/unwatch (\d+)$"))(self.unwatch_handler)
+        if self.watch_service is not None:
+            self.watch_service.subscribe(self.notify_watch_match)
         self.bot_client.on(events.NewMessage(func=lambda e: e.is_private and not e.text.startswith("/")))(
             self.message_handler
         )
         callback_query_event: Any = events.CallbackQuery
         self.bot_client.on(callback_query_event)(self.callback_query_handler)
+        inline_query_event: Any = events.InlineQuery
+        self.bot_client.on(inline_query_event)(self.inline_query_handler)
         self.bot_client.on(events.NewMessage(pattern=r"^/(stop_client)$"))(self.stop_download_and_listening)
 
     async def set_commands_list(self):
@@ -112,6 +140,9 @@ class BotHandler:
             BotCommand(command="set_black_list2meili", description="配置Meili黑名单，参数为列表"),
             BotCommand(command="cc", description="清除搜索历史消息缓存"),
             BotCommand(command="search", description="关键词搜索（空格分隔多个词）"),
+            BotCommand(command="watch", description="关注关键词，新消息命中时推送"),
+            BotCommand(command="watches", description="查看关注列表与匹配延迟"),
+            BotCommand(command="unwatch", description="取消关注，参数为关注编号"),
             BotCommand(command="ping", description="检查搜索服务状态"),
             BotCommand(command="about", description="项目信息"),
         ]
@@ -165,15 +196,37 @@ class BotHandler:
         except DomainError as exc:
             self.logger.error(f"Auto start runtime failed: {exc.code}: {exc.message}")
 
+    def _admit(self, event, query: SearchQuery, *, priority: bool = False, on_queued=None):
+        """按发起用户做搜索准入控制；未启用时不做限制"""
+        if self.admission is None:
+            return contextlib.nullcontext()
+        return self.admission.admit(
+            f"bot:{event.sender_id}",
+            cost=estimate_search_cost(query),
+            priority=priority,
+            on_queued=on_queued,
+        )
+
     async def search_handler(self, event, query: str):
         self.logger.info("[BotHandler] search_request q_len=%d", len(query))
         try:
             search_query = SearchQuery(q=query, limit=RESULTS_PER_PAGE, offset=0)
-            page = await self.search_service.search_for_presentation(
-                search_query,
-                page=0,
-                page_size=RESULTS_PER_PAGE,
-            )
+            rendered = await self.search_service.get_rendered_page(search_query, 0, RESULTS_PER_PAGE)
+            if rendered is not None:
+                text, buttons = rendered
+                self.logger.info("[BotHandler] search_rendered_hit q_len=%d", len(query))
+                await self.bot_client.send_message(event.chat_id, text, buttons=buttons)
+                return
+
+            async def _notify_queued(position: int) -> None:
+                await event.reply(f"当前搜索较多，已排队（第 {position} 位），请稍候...")
+
+            async with self._admit(event, search_query, on_queued=_notify_queued):
+                page = await self.search_service.search_for_presentation(
+                    search_query,
+                    page=0,
+                    page_size=RESULTS_PER_PAGE,
+                )
             if page.hits:
                 self.logger.info(
                     "[BotHandler] search_result q_len=%d hits_page=%d total_hits=%d",
@@ -220,12 +273,16 @@ class BotHandler:
 /set_white_list2meili [1,2]- 设置白名单
 /set_black_list2meili []- 设置黑名单
 /search <关键词1> <关键词2>
+/watch <关键词> [chat:<会话ID>] [from:@用户名] - 关注新消息
+/watches - 查看关注列表
+/unwatch <编号> - 取消关注
 /ping - 检查搜索服务是否运行
 /about - 关于本项目
 
 导航：
 • 使用⬅️ 上一页和下一页 ➡️ 按钮浏览搜索结果
 • 每页最多显示10条结果
+• 在任意会话输入 @机器人用户名 关键词 可直接内联搜索
 """)
 
     @set_permission
@@ -299,12 +356,68 @@ class BotHandler:
             f"\nDatabase size: {sizeof_fmt(size)}\n"
             f"Last update: {last_update}\n"
         )
+        admission = snapshot.search_admission
+        if admission is not None:
+            text += (
+                f"Searches: {admission.in_flight}/{admission.max_concurrent} running, {admission.queued} queued, "
+                f"{admission.rejected_rate_limited + admission.rejected_overloaded} rejected\n"
+            )
 
         if snapshot.notes:
             text += "\n".join([f"Note: {note}" for note in snapshot.notes[:2]]) + "\n"
 
         await event.reply(text)
 
+    @set_permission
+    async def watch_handler(self, event):
+        if self.watch_service is None:
+            await event.reply("关注功能未启用。")
+            return
+        try:
+            watch = await self.watch_service.add_watch(event.sender_id, event.pattern_match.group(1))
+            await event.reply(f"已添加关注 #{watch.id}：{watch.query}\n新消息命中时会推送到这里。")
+        except DomainError as exc:
+            await event.reply(self._domain_error_to_text(exc))
+            self.logger.error(f"Watch command failed: {exc.code}: {exc.message}")
+
+    @set_permission
+    async def watches_handler(self, event):
+        if self.watch_service is None:
+            await event.reply("关注功能未启用。")
+            return
+        try:
+            watches = await self.watch_service.list_watches(event.sender_id)
+        except DomainError as exc:
+            await event.reply(self._domain_error_to_text(exc))
+            return
+        stats = self.watch_service.stats()
+        lines = [f"#{watch.id}  {watch.query}" for watch in watches] or ["暂无关注，使用 /watch <关键词> 添加"]
+        lines.append(
+            f"\n已匹配 {stats.evaluated} 条新消息，命中 {stats.matched} 条；"
+            f"单条匹配耗时 p50 {stats.p50_ms:.3f}ms / p95 {stats.p95_ms:.3f}ms"
+        )
+        await event.reply("\n".join(lines))
+
+    @set_permission
+    async def unwatch_handler(self, event):
+        if self.watch_service is None:
+            await event.reply("关注功能未启用。")
+            return
+        watch_id = int(event.pattern_match.group(1))
+        try:
+            removed = await self.watch_service.remove_watch(event.sender_id, watch_id)
+        except DomainError as exc:
+            await event.reply(self._domain_error_to_text(exc))
+            return
+        await event.reply(f"已取消关注 #{watch_id}" if removed else f"未找到关注 #{watch_id}")
+
+    async def notify_watch_match(self, watch: WatchItem, document: dict[str, Any]) -> None:
+        hit = self.search_service.to_hit(document)
+        await self.bot_client.send_message(
+            watch.owner_id,
+            f"🔔 关注 #{watch.id}「{watch.query}」有新消息：\n" + self.format_search_result(hit),
+        )
+
     @set_permission
     async def message_handler(self, event):
         await self.search_handler(event, event.raw_text)
@@ -316,6 +429,14 @@ class BotHandler:
             return chat_part, msg_part
         return "0", "0"
 
+    @staticmethod
+    def _chat_title(hit: SearchHit) -> str:
+        if hit.chat.type == "private":
+            return f"Private: {hit.chat.username}"
+        if hit.chat.type == "channel":
+            return f"Channel: {hit.chat.title}"
+        return f"Group: {hit.chat.title}"
+
     def format_search_result(self, hit: SearchHit) -> str:
         source_text = hit.formatted_text or hit.text
         text = source_text.replace("<mark>", "**").replace("</mark>", "**")
@@ -323,21 +444,16 @@ class BotHandler:
             text = text[:360] + "..."
 
         chat_part, msg_part = self._id_parts(hit.id)
-        chat_type = hit.chat.type
-        if chat_type == "private":
-            chat_title = f"Private: {hit.chat.username}"
+        chat_title = self._chat_title(hit)
+        if hit.chat.type == "private":
             url = f"tg://openmessage?user_id={chat_part}&message_id={msg_part}"
-        elif chat_type == "channel":
-            chat_title = f"Channel: {hit.chat.title}"
-            url = f"https://t.me/c/{chat_part}/{msg_part}"
         else:
-            chat_title = f"Group: {hit.chat.title}"
             url = f"https://t.me/c/{chat_part}/{msg_part}"
 
         date = hit.date.date().isoformat()
         return f"- **{chat_title}**  ({date})\n{text}\n  [🔗Jump]({url})\n" + "—" * 18 + "\n"
 
-    def _build_results_page(
+    async def _build_results_page(
         self,
         page: SearchPage,
         page_number: int,
@@ -352,7 +468,7 @@ class BotHandler:
             buttons.append(
                 Button.inline(
                     "上一页",
-                    data=self.search_service.encode_page_callback(
+                    data=await self.search_service.encode_page_callback(
                         query,
                         page=page_number - 1,
                         page_size=RESULTS_PER_PAGE,
@@ -363,7 +479,7 @@ class BotHandler:
             buttons.append(
                 Button.inline(
                     "下一页",
-                    data=self.search_service.encode_page_callback(
+                    data=await self.search_service.encode_page_callback(
                         query,
                         page=page_number + 1,
                         page_size=RESULTS_PER_PAGE,
@@ -374,39 +490,130 @@ class BotHandler:
         text = f"搜索结果 (第 {page_number + 1} 页):\n{response}"
         return text, buttons or None
 
+    async def _render_results_page(
+        self,
+        page: SearchPage,
+        page_number: int,
+        query: SearchQuery,
+    ) -> tuple[str, list | None]:
+        """渲染结果页，并把渲染结果挂到搜索服务的展示缓存上，翻页回看时无需重新格式化"""
+        rendered = await self._build_results_page(page, page_number, query)
+        if rendered[0]:
+            await self.search_service.store_rendered_page(query, page_number, page.limit, rendered)
+        return rendered
+
     async def send_results_page(self, event, page: SearchPage, page_number: int, query: SearchQuery):
-        text, buttons = self._build_results_page(page, page_number, query)
+        text, buttons = await self._render_results_page(page, page_number, query)
         if not text:
             await event.reply("没有更多结果了。")
             return
         await self.bot_client.send_message(event.chat_id, text, buttons=buttons)
 
     async def edit_results_page(self, event, page: SearchPage, page_number: int, query: SearchQuery):
-        text, buttons = self._build_results_page(page, page_number, query)
+        text, buttons = await self._render_results_page(page, page_number, query)
         if not text:
             await event.reply("没有更多结果了。")
             return
         await event.edit(text, buttons=buttons)
 
+    async def _debounce_inline_query(self, user_id: int) -> bool:
+        """等待防抖间隔；期间同一用户发起了新查询则返回 False（本次查询被取代）"""
+        seq = self._inline_query_seq.get(user_id, 0) + 1
+        self._inline_query_seq[user_id] = seq
+        if INLINE_DEBOUNCE_MS > 0:
+            await asyncio.sleep(INLINE_DEBOUNCE_MS / 1000)
+        if self._inline_query_seq.get(user_id) != seq:
+            return False
+        self._inline_query_seq.pop(user_id, None)
+        return True
+
+    async def _build_inline_article(self, builder, hit: SearchHit):
+        snippet = " ".join(hit.text.split())
+        return await builder.article(
+            title=self._chat_title(hit),
+            description=f"{hit.date.date().isoformat()} {snippet[:100]}",
+            text=self.format_search_result(hit),
+            id=hit.id,
+            link_preview=False,
+        )
+
+    async def inline_query_handler(self, event):
+        """内联查询：结果来自展示缓存，`next_offset` 为下一批的序号，下拉加载时直接命中缓存"""
+        user_id = event.sender_id
+        query_text = (event.text or "").strip()
+        if (OWNER_IDS and user_id not in OWNER_IDS) or not query_text:
+            await event.answer([], cache_time=INLINE_CACHE_TIME_SEC, private=True)
+            return
+        try:
+            page_number = max(int(event.offset or 0), 0)
+        except ValueError:
+            page_number = 0
+        # 只对首批防抖，下拉翻页是用户主动触发的
+        if page_number == 0 and not await self._debounce_inline_query(user_id):
+            self.logger.info("[BotHandler] inline_query_superseded q_len=%d", len(query_text))
+            return
+
+        try:
+            search_query = SearchQuery(q=query_text, limit=INLINE_RESULTS_PER_PAGE, offset=0)
+            async with self._admit(event, search_query, priority=page_number > 0):
+                page = await self.search_service.search_for_presentation(
+                    search_query,
+                    page=page_number,
+                    page_size=INLINE_RESULTS_PER_PAGE,
+                )
+            results = [await self._build_inline_article(event.builder, hit) for hit in page.hits]
+            has_more = page.offset + len(page.hits) < page.total_hits
+            self.logger.info(
+                "[BotHandler] inline_query_result q_len=%d page=%d hits_page=%d total_hits=%d",
+                len(query_text),
+                page_number,
+                len(page.hits),
+                page.total_hits,
+            )
+            await event.answer(
+                results,
+                cache_time=INLINE_CACHE_TIME_SEC,
+                private=True,
+                next_offset=str(page_number + 1) if has_more else None,
+            )
+        except DomainError as exc:
+            await event.answer([], cache_time=0, private=True)
+            self.logger.error(f"Inline query domain error: {exc.code}: {exc.message}")
+        except Exception as e:
+            await event.answer([], cache_time=0, private=True)
+            self.logger.error(f"Inline query error: {e}")
+
     async def callback_query_handler(self, event):
-        data = event.data.decode("utf-8")
-        if not (data.startswith("page:") or data.startswith("page_") or data.startswith("pagek:")):
+        if not self.search_service.is_page_callback(event.data):
             return
 
         try:
-            query, page_number, page_size = self.search_service.decode_page_callback(event.data)
+            query, page_number, page_size = await self.search_service.decode_page_callback(event.data)
             self.logger.info(
                 "[BotHandler] pagination_request q_len=%d page=%d page_size=%d",
                 len(query.q),
                 page_number,
                 page_size,
             )
+            rendered = await self.search_service.get_rendered_page(query, page_number, page_size)
+            if rendered is not None:
+                # 已缓存的页直接替换，省去"正在加载"那一次编辑
+                text, buttons = rendered
+                self.logger.info("[BotHandler] pagination_rendered_hit q_len=%d page=%d", len(query.q), page_number)
+                await event.edit(text, buttons=buttons)
+                return
             await event.edit(f"正在加载第 {page_number + 1} 页...")
-            page = await self.search_service.search_for_presentation(
-                query,
-                page=page_number,
-                page_size=page_size,
-            )
+
+            async def _notify_queued(position: int) -> None:
+                await event.edit(f"正在加载第 {page_number + 1} 页（排队第 {position} 位）...")
+
+            # 翻页回调排队时优先于新搜索
+            async with self._admit(event, query, priority=True, on_queued=_notify_queued):
+                page = await self.search_service.search_for_presentation(
+                    query,
+                    page=page_number,
+                    page_size=page_size,
+                )
             self.logger.info(
                 "[BotHandler] pagination_result q_len=%d page=%d hits_page=%d total_hits=%d",
                 len(query.q),
@@ -0,0 +1,93 @@
+"""
+超长消息分块索引
+
+小说章节、长广告等整条写入时拖慢 MeiliSearch 建索引、放大高亮结果载荷，而 Bot 展示时只截取前 360 字。
+超过阈值的消息拆成相互重叠的分块文档：
+- id 为 `{父文档 id}_{k}`（MeiliSearch 文档 id 只允许字母数字、`-` 与 `_`），`parent_id` 指向原消息 id
+- 其余字段（chat/date_ts/msg_id/from_user/...）与原消息相同，过滤、排序与游标分页不受影响
+- 相邻分块重叠 `overlap` 个字符，跨分块边界的词组仍能命中；切分点优先落在换行或句末标点
+搜索层按 `parent_id` 把分块折叠回一条结果（distinct），以命中的分块作为摘要。
+原地编辑后分块数可能变少，写入方按 `chunk_counts` 删除旧版本多出的分块。
+"""
+
+from __future__ import annotations
+
+from typing import Any, Dict, Iterable, List
+
+_BREAK_CHARS = "\n。！？!?；;…."
+# 切分点只在分块末尾这一比例范围内寻找，避免分块过短
+_BREAK_WINDOW = 0.2
+
+
+def split_text(text: str, chunk_chars: int, overlap: int) -> List[str]:
+    """把文本切成长度不超过 `chunk_chars`、相邻重叠 `overlap` 字符的分块。"""
+    chunk_chars = max(int(chunk_chars), 1)
+    overlap = min(max(int(overlap), 0), chunk_chars // 2)
+    chunks: List[str] = []
+    start = 0
+    while start < len(text):
+        end = min(start + chunk_chars, len(text))
+        if end < len(text):
+            floor = end - max(int(chunk_chars * _BREAK_WINDOW), 1)
+            for pos in range(end - 1, floor, -1):
+                if text[pos] in _BREAK_CHARS:
+                    end = pos + 1
+                    break
+        chunks.append(text[start:end])
+        if end >= len(text):
+            break
+        start = max(end - overlap, start + 1)
+    return chunks
+
+
+def chunk_documents(
+    documents: Iterable[Dict[str, Any]],
+    *,
+    max_chars: int,
+    chunk_chars: int,
+    overlap: int,
+) -> List[Dict[str, Any]]:
+    """`text` 超过 `max_chars` 的文档替换为分块文档；`max_chars <= 0` 时原样返回。"""
+    documents = list(documents)
+    if max_chars <= 0:
+        return documents
+    result: List[Dict[str, Any]] = []
+    for doc in documents:
+        text = doc.get("text")
+        if not isinstance(text, str) or len(text) <= max_chars or doc.get("id") in (None, ""):
+            result.append(doc)
+            continue
+        parent_id = str(doc["id"])
+        for k, chunk in enumerate(split_text(text, chunk_chars, overlap)):
+            result.append({**doc, "id": f"{parent_id}_{k}", "parent_id": parent_id, "chunk": k, "text": chunk})
+    return result
+
+
+def chunk_counts(documents: Iterable[Dict[str, Any]]) -> Dict[str, int]:
+    """`chunk_documents` 输出中每条原消息的分块数（未分块的消息为 0），键为原消息 id。"""
+    counts: Dict[str, int] = {}
+    for doc in documents:
+        parent_id = doc.get("parent_id")
+        if parent_id:
+            counts[str(parent_id)] = counts.get(str(parent_id), 0) + 1
+        elif doc.get("id") not in (None, ""):
+            counts.setdefault(str(doc["id"]), 0)
+    return counts
+
+
+def collapse_chunks(hits: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    把同一消息的分块命中折叠为一条（保留排名最靠前的分块作为摘要），id 还原为原消息 id
+
+    同时按 id 去重，热数据层中的整条消息与索引中的分块不会重复出现。
+    """
+    seen: set[str] = set()
+    collapsed: List[Dict[str, Any]] = []
+    for hit in hits:
+        parent_id = hit.get("parent_id")
+        hit_id = str(parent_id if parent_id else hit.get("id", ""))
+        if hit_id in seen:
+            continue
+        seen.add(hit_id)
+        collapsed.append({**hit, "id": hit_id} if parent_id else hit)
+    return collapsed
@@ -0,0 +1,116 @@
+"""
+熔断器：MeiliSearch 不可用时快速失败
+
+状态机：
+- closed：正常放行，连续失败达到阈值后进入 open
+- open：直接拒绝，直到下一次探测时间
+- half_open：只放行一个探测请求；成功则 closed，失败则回到 open 并把探测间隔翻倍（上限 max_reset_timeout_sec）
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Any, Callable, Dict, Literal
+
+from tg_search.core.logger import setup_logger
+
+logger = setup_logger()
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitBreaker:
+    """单个操作类别（读/写）的熔断器，线程安全。"""
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        failure_threshold: int = 5,
+        reset_timeout_sec: float = 10.0,
+        max_reset_timeout_sec: float = 120.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self._failure_threshold = max(int(failure_threshold), 1)
+        self._base_reset_timeout = max(float(reset_timeout_sec), 0.0)
+        self._max_reset_timeout = max(float(max_reset_timeout_sec), self._base_reset_timeout)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._state: CircuitState = "closed"
+        self._failures = 0
+        self._reset_timeout = self._base_reset_timeout
+        self._next_probe_at = 0.0
+        self._probe_in_flight = False
+        self._opened_count = 0
+
+    @property
+    def state(self) -> CircuitState:
+        with self._lock:
+            return self._current_state()
+
+    def _current_state(self) -> CircuitState:
+        if self._state == "open" and self._clock() >= self._next_probe_at:
+            return "half_open"
+        return self._state
+
+    def allow(self) -> bool:
+        """是否放行本次请求；half_open 时只放行一个探测请求。"""
+        with self._lock:
+            state = self._current_state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._probe_in_flight:
+                self._state = "half_open"
+                self._probe_in_flight = True
+                logger.info(f"[CircuitBreaker] {self.name} probing after {self._reset_timeout:.1f}s")
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            if self._state != "closed":
+                logger.info(f"[CircuitBreaker] {self.name} closed")
+            self._state = "closed"
+            self._failures = 0
+            self._reset_timeout = self._base_reset_timeout
+            self._probe_in_flight = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            if self._state == "half_open":
+                # 探测失败：退避后再探测
+                self._reset_timeout = min(self._reset_timeout * 2 or self._base_reset_timeout, self._max_reset_timeout)
+                self._open()
+                return
+            self._failures += 1
+            if self._state == "closed" and self._failures >= self._failure_threshold:
+                self._open()
+
+    def _open(self) -> None:
+        self._state = "open"
+        self._probe_in_flight = False
+        self._next_probe_at = self._clock() + self._reset_timeout
+        self._opened_count += 1
+        logger.warning(
+            f"[CircuitBreaker] {self.name} opened after {self._failures} failures, next probe in {self._reset_timeout:.1f}s"
+        )
+
+    def retry_after(self) -> float:
+        """距下次探测的秒数（closed 时为 0）。"""
+        with self._lock:
+            if self._state != "open":
+                return 0.0
+            return max(self._next_probe_at - self._clock(), 0.0)
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "state": self._current_state(),
+                "failures": self._failures,
+                "opened_count": self._opened_count,
+                "retry_after_sec": round(max(self._next_probe_at - self._clock(), 0.0), 1)
+                if self._state == "open"
+                else 0.0,
+            }
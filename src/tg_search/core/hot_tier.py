@@ -0,0 +1,206 @@
+"""
+进程内热数据层：最近 N 小时的实时消息
+
+MeiliSearch 在索引压力下新消息可能数秒后才可搜索，而"刚才说了什么"恰恰是最常见的查询。
+实时消息与历史下载的写入路径把消息同时放入这里，SearchService 把热层结果与 MeiliSearch 结果按文档 id 合并去重；
+`sole_writer` 开启（本进程是索引唯一写入方）且查询时间范围完全落在热层覆盖区间内时直接由热层回答，不访问 MeiliSearch。
+
+- 倒排索引：复用 SQLite FTS 的分词（CJK 字符 bigram + 小写单词），候选集求交后按原文做连续子串校验
+- 容量：按消息时间淘汰超过 `max_age_sec` 的文档，再按条数/估算字节数淘汰最旧文档；
+  容量淘汰会推后覆盖区间起点，保证"热层独答"时不会漏掉被挤出的消息
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from tg_search.core.logger import setup_logger
+from tg_search.core.sqlite_fts import highlight, is_cjk, split_segments, tokenize
+
+logger = setup_logger()
+
+HotPredicate = Callable[[Dict[str, Any]], bool]
+
+_DOC_OVERHEAD_BYTES = 512
+_POSTING_BYTES = 64
+
+
+@dataclass(slots=True)
+class _HotDoc:
+    doc: Dict[str, Any]
+    tokens: Tuple[str, ...]
+    text_lower: str
+    date_ts: int
+    size: int
+
+
+class HotTier:
+    """最近消息的内存倒排索引，线程安全（写入来自实时消息线程，查询来自事件循环线程池）。"""
+
+    def __init__(
+        self,
+        *,
+        max_age_sec: float = 6 * 3600,
+        max_docs: int = 20_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        index_name: str = "telegram",
+        sole_writer: bool = False,
+        clock: Callable[[], float] = time.time,
+    ) -> None:
+        self.index_name = index_name
+        # 只有本进程的写入都经过热层时，`covers()` 才能说明区间内没有遗漏的消息
+        self.sole_writer = sole_writer
+        self._max_age_sec = max(float(max_age_sec), 0.0)
+        self._max_docs = max(int(max_docs), 1)
+        self._max_bytes = max(int(max_bytes), 1)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._docs: "OrderedDict[str, _HotDoc]" = OrderedDict()
+        self._postings: Dict[str, Set[str]] = {}
+        self._bytes = 0
+        self._generation = 0
+        self._started_at = clock()
+        # 因容量被挤出的最新一条消息时间：覆盖区间只能从它之后开始
+        self._capacity_evicted_ts: Optional[int] = None
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def covers(self, ts_from: Optional[int]) -> bool:
+        """`ts_from` 之后写入索引的所有消息是否都在热层中（需 `sole_writer`）。"""
+        if ts_from is None or not self.sole_writer:
+            return False
+        now = self._clock()
+        start = max(self._started_at, now - self._max_age_sec)
+        if self._capacity_evicted_ts is not None:
+            start = max(start, self._capacity_evicted_ts + 1)
+        return ts_from >= start
+
+    def add(self, documents: Iterable[Dict[str, Any]]) -> int:
+        """加入（或替换）文档，返回加入数量；没有 id 或 date_ts 的文档被忽略。"""
+        added = 0
+        with self._lock:
+            cutoff = self._clock() - self._max_age_sec
+            for doc in documents:
+                doc_id = doc.get("id")
+                date_ts = doc.get("date_ts")
+                # 历史下载的旧消息直接跳过，不挤占近期消息
+                if doc_id in (None, "") or not isinstance(date_ts, int) or date_ts < cutoff:
+                    continue
+                doc_id = str(doc_id)
+                self._remove_locked(doc_id)
+                text = str(doc.get("text") or "")
+                tokens = tuple(dict.fromkeys(tokenize(text)))
+                size = _DOC_OVERHEAD_BYTES + len(text.encode("utf-8")) + _POSTING_BYTES * len(tokens)
+                self._docs[doc_id] = _HotDoc(doc, tokens, text.lower(), date_ts, size)
+                for token in tokens:
+                    self._postings.setdefault(token, set()).add(doc_id)
+                self._bytes += size
+                added += 1
+            if added:
+                self._generation += 1
+                self._evict_locked()
+        return added
+
+    def remove(self, doc_ids: Iterable[str]) -> int:
+        with self._lock:
+            removed = sum(1 for doc_id in doc_ids if self._remove_locked(str(doc_id)))
+            if removed:
+                self._generation += 1
+            return removed
+
+    def _remove_locked(self, doc_id: str) -> bool:
+        entry = self._docs.pop(doc_id, None)
+        if entry is None:
+            return False
+        for token in entry.tokens:
+            posting = self._postings.get(token)
+            if posting is not None:
+                posting.discard(doc_id)
+                if not posting:
+                    del self._postings[token]
+        self._bytes -= entry.size
+        return True
+
+    def _evict_locked(self) -> None:
+        cutoff = self._clock() - self._max_age_sec
+        expired = [doc_id for doc_id, entry in self._docs.items() if entry.date_ts < cutoff]
+        for doc_id in expired:
+            self._remove_locked(doc_id)
+        evicted = 0
+        while self._docs and (len(self._docs) > self._max_docs or self._bytes > self._max_bytes):
+            doc_id, entry = next(iter(self._docs.items()))
+            self._remove_locked(doc_id)
+            self._capacity_evicted_ts = max(self._capacity_evicted_ts or entry.date_ts, entry.date_ts)
+            evicted += 1
+        if evicted:
+            logger.info(f"[HotTier] evicted {evicted} docs over capacity (docs={len(self._docs)}, bytes={self._bytes})")
+
+    def _candidates_locked(self, q: str) -> Optional[Set[str]]:
+        """按倒排索引求候选集；查询没有可检索片段时返回 None（全部文档）。"""
+        segments = split_segments(q)
+        candidates: Optional[Set[str]] = None
+        for position, segment in enumerate(segments):
+            if is_cjk(segment) and len(segment) > 1:
+                grams = [segment[i : i + 2] for i in range(len(segment) - 1)]
+                matched = set.intersection(*(self._postings.get(gram, set()) for gram in grams))
+            elif is_cjk(segment) or position == len(segments) - 1:
+                prefix = segment.lower()
+                matched = set()
+                for token, posting in self._postings.items():
+                    if token.startswith(prefix):
+                        matched |= posting
+            else:
+                matched = set(self._postings.get(segment.lower(), set()))
+            candidates = matched if candidates is None else candidates & matched
+            if not candidates:
+                return set()
+        return candidates
+
+    def search(
+        self,
+        q: str,
+        *,
+        predicate: Optional[HotPredicate] = None,
+        pre_tag: str = "<mark>",
+        post_tag: str = "</mark>",
+    ) -> List[Dict[str, Any]]:
+        """
+        返回匹配的文档（按 (date_ts, msg_id) 倒序），附带 `_formatted.text` 高亮
+
+        CJK 片段需在原文中连续出现，与 bigram 短语匹配语义一致。
+        """
+        cjk_segments = [segment for segment in split_segments(q) if is_cjk(segment) and len(segment) > 2]
+        with self._lock:
+            self._evict_locked()
+            candidates = self._candidates_locked(q)
+            doc_ids = list(self._docs) if candidates is None else candidates
+            entries = [self._docs[doc_id] for doc_id in doc_ids if doc_id in self._docs]
+        hits: List[Dict[str, Any]] = []
+        for entry in entries:
+            if any(segment not in entry.text_lower for segment in cjk_segments):
+                continue
+            if predicate is not None and not predicate(entry.doc):
+                continue
+            text = entry.doc.get("text")
+            formatted_text = highlight(text, q, pre_tag, post_tag) if isinstance(text, str) else text
+            hits.append({**entry.doc, "_formatted": {**entry.doc, "text": formatted_text}})
+        hits.sort(key=lambda hit: (hit.get("date_ts") or 0, hit.get("msg_id") or 0), reverse=True)
+        return hits
+
+    def snapshot(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "docs": len(self._docs),
+                "bytes": self._bytes,
+                "tokens": len(self._postings),
+                "capacity_evicted_ts": self._capacity_evicted_ts,
+            }
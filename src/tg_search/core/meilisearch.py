@@ -4,9 +4,14 @@ MeiliSearch 客户端封装
 提供对 MeiliSearch 的索引管理和文档操作，包含：
 - 细化的异常处理（区分连接/超时/API错误）
 - 基于 tenacity 的重试机制
+- 写入代数（write generation），供搜索缓存判断索引是否变化
 """
 
-from typing import Dict, List, NoReturn, Optional
+import functools
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, NoReturn, Optional, Tuple, TypeVar
 
 import meilisearch.errors
 import requests.exceptions
@@ -17,12 +22,25 @@ from tenacity import (
     before_sleep_log,
     retry,
     retry_if_exception_type,
+    retry_if_not_exception_type,
     stop_after_attempt,
     wait_exponential,
 )
 
-from tg_search.config.settings import INDEX_CONFIG
+from tg_search.config.settings import (
+    INDEX_CONFIG,
+    INDEX_SETTINGS_REBUILD,
+    MEILI_BREAKER_READ_FAILURES,
+    MEILI_BREAKER_RESET_SEC,
+    MEILI_BREAKER_WRITE_FAILURES,
+    MEILI_CIRCUIT_BREAKER,
+    MEILI_HOSTS,
+    MEILI_PROBE_INTERVAL_SEC,
+    MEILI_REPLICA_MAX_LAG_SEC,
+)
+from tg_search.core.circuit_breaker import CircuitBreaker
 from tg_search.core.logger import setup_logger
+from tg_search.core.replica_pool import MeiliNode, ReplicaPool, parse_hosts
 
 logger = setup_logger()
 
@@ -42,6 +60,14 @@ class MeiliSearchTimeoutError(Exception):
     pass
 
 
+class MeiliSearchCircuitOpenError(MeiliSearchConnectionError):
+    """熔断器打开：未发出请求直接失败"""
+
+    def __init__(self, message: str, retry_after: float = 0.0):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
 class MeiliSearchAPIError(Exception):
     """MeiliSearch API 错误"""
 
@@ -110,10 +136,112 @@ def _handle_meilisearch_exception(e: Exception, operation: str, index_name: Opti
     raise e
 
 
+# ============ 熔断 ============
+
+_F = TypeVar("_F", bound=Callable[..., Any])
+_T = TypeVar("_T")
+
+
+def _guarded(kind: str) -> Callable[[_F], _F]:
+    """
+    按操作类别（read/write）接入熔断器
+
+    只有连接/超时错误计入失败；API 错误说明服务端可达，按成功处理。
+    """
+
+    def decorator(func: _F) -> _F:
+        @functools.wraps(func)
+        def wrapper(self: "MeiliSearchClient", *args: Any, **kwargs: Any) -> Any:
+            breaker = self._breakers.get(kind)
+            if breaker is None:
+                return func(self, *args, **kwargs)
+            if not breaker.allow():
+                retry_after = breaker.retry_after()
+                raise MeiliSearchCircuitOpenError(
+                    f"MeiliSearch 暂不可用（熔断中，{retry_after:.0f}s 后重试）", retry_after=retry_after
+                )
+            try:
+                result = func(self, *args, **kwargs)
+            except (MeiliSearchConnectionError, MeiliSearchTimeoutError):
+                breaker.record_failure()
+                raise
+            except Exception:
+                breaker.record_success()
+                raise
+            breaker.record_success()
+            return result
+
+        return wrapper  # type: ignore[return-value]
+
+    return decorator
+
+
+# ============ 索引设置差异 ============
+
+# 变更后 MeiliSearch 会重建整个索引的设置项；其余设置项（排序规则、同义词、容错等）可在线更新
+REINDEX_SETTING_KEYS = frozenset(
+    {
+        "searchableAttributes",
+        "filterableAttributes",
+        "sortableAttributes",
+        "distinctAttribute",
+        "stopWords",
+        "separatorTokens",
+        "nonSeparatorTokens",
+        "dictionary",
+        "proximityPrecision",
+        "localizedAttributes",
+        "embedders",
+    }
+)
+
+# 顺序无关的列表型设置（MeiliSearch 返回时会重新排序）
+_UNORDERED_SETTING_KEYS = frozenset(
+    {
+        "filterableAttributes",
+        "sortableAttributes",
+        "stopWords",
+        "separatorTokens",
+        "nonSeparatorTokens",
+        "dictionary",
+        "disableOnWords",
+        "disableOnAttributes",
+    }
+)
+
+
+def _setting_matches(key: str, current: object, desired: object) -> bool:
+    if key in _UNORDERED_SETTING_KEYS and isinstance(current, list) and isinstance(desired, list):
+        return sorted(map(str, current)) == sorted(map(str, desired))
+    # 嵌套对象（typoTolerance/pagination 等）只比较期望中出现的子项；同义词需完全一致
+    if key != "synonyms" and isinstance(current, dict) and isinstance(desired, dict):
+        return all(_setting_matches(sub_key, current.get(sub_key), value) for sub_key, value in desired.items())
+    return current == desired
+
+
+def diff_index_settings(current: Dict, desired: Dict) -> Dict:
+    """
+    计算需要提交的设置差异
+
+    Args:
+        current: 索引当前设置（GET /settings 的结果）
+        desired: 期望设置（通常为 INDEX_CONFIG）
+
+    Returns:
+        Dict: 与当前值不同的期望设置项，无差异时为空字典
+    """
+    return {key: value for key, value in desired.items() if not _setting_matches(key, current.get(key), value)}
+
+
+def settings_require_reindex(diff: Dict) -> bool:
+    """差异中是否包含会触发全量重建的设置项"""
+    return any(key in REINDEX_SETTING_KEYS for key in diff)
+
+
 class MeiliSearchClient:
     """MeiliSearch 客户端封装类"""
 
-    def __init__(self, host: str, api_key: str, auto_create_index: bool = True):
+    def __init__(self, host: str, api_key: str, auto_create_index: bool = True, *, hosts: str = MEILI_HOSTS):
         """
         初始化 MeiliSearch 客户端
 
@@ -121,9 +249,41 @@ class MeiliSearchClient:
             host: MeiliSearch 服务器地址
             api_key: API密钥
             auto_create_index: 是否自动创建默认索引（测试时可设为 False）
+            hosts: 多节点配置（`url|role,...`），非空时其中的 primary 取代 host，
+                搜索分流到只读节点，文档写入扇出到 writer 节点
         """
+        nodes = parse_hosts(hosts) if hosts else []
+        if nodes:
+            host = next(url for url, role in nodes if role == "primary")
         self.host = host
         self._api_key = api_key
+        # 本进程内成功提交的写操作计数，搜索缓存据此判断索引是否发生变化
+        self._write_generation = 0
+        self._write_generation_lock = threading.Lock()
+        # 影子索引重建期间对源索引的写操作日志（索引名 -> [(操作, 载荷)]），交换前重放到影子索引；
+        # 写操作的提交与记录在同一把锁内完成，重建可以在锁内取走日志并提交交换，不漏掉任何写入
+        self._write_journals: Dict[str, List[Tuple[str, List]]] = {}
+        self._last_task_uid: Dict[str, int] = {}
+        self._journal_lock = threading.RLock()
+        # 启动时因会触发全量重建而暂缓提交的设置差异（索引名 -> 设置项），由影子索引重建任务消费
+        self._pending_reindex: Dict[str, Dict] = {}
+        # 最近一次提交的设置任务（索引名 -> task uid），依赖新设置的后台任务（如数值字段回填）先等它完成
+        self._settings_tasks: Dict[str, int] = {}
+        # 读/写分别熔断：写入积压不影响搜索的快速失败判断，反之亦然
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        if MEILI_CIRCUIT_BREAKER:
+            self._breakers = {
+                "read": CircuitBreaker(
+                    "meili.read",
+                    failure_threshold=MEILI_BREAKER_READ_FAILURES,
+                    reset_timeout_sec=MEILI_BREAKER_RESET_SEC,
+                ),
+                "write": CircuitBreaker(
+                    "meili.write",
+                    failure_threshold=MEILI_BREAKER_WRITE_FAILURES,
+                    reset_timeout_sec=MEILI_BREAKER_RESET_SEC,
+                ),
+            }
 
         try:
             self.client = Client(host, api_key)
@@ -141,19 +301,176 @@ class MeiliSearchClient:
             logger.error(f"Connection to MeiliSearch timed out: {str(e)}")
             raise MeiliSearchTimeoutError(f"连接超时: {str(e)}") from e
 
+        self._replica_pool: Optional[ReplicaPool] = None
+        if len(nodes) > 1:
+            self._replica_pool = ReplicaPool(
+                [
+                    MeiliNode(url, role, self.client if role == "primary" else Client(url, api_key))
+                    for url, role in nodes
+                ],
+                max_lag_sec=MEILI_REPLICA_MAX_LAG_SEC,
+                probe_interval_sec=MEILI_PROBE_INTERVAL_SEC,
+            )
+            logger.info(f"MeiliSearch read/write split enabled: {[f'{url}|{role}' for url, role in nodes]}")
+
         if auto_create_index:
-            logger.info(self.create_index())
+            logger.info(self.create_index(allow_reindex=not INDEX_SETTINGS_REBUILD))
+
+    def node_states(self) -> List[Dict]:
+        """多节点模式下各节点的角色/健康/延迟/落后秒数（单节点时为空）"""
+        return self._replica_pool.snapshot() if self._replica_pool is not None else []
 
-    def create_index(self, index_name: str = "telegram", primary_key: Optional[str] = "id") -> TaskInfo:
+    def _read(self, operation: Callable[[Client], _T]) -> _T:
         """
-        创建索引
+        在选中的读节点上执行只读请求
+
+        只读节点不可达或缺少索引时将其移出轮转，并改由主节点重试一次。
+        """
+        pool = self._replica_pool
+        if pool is None:
+            return operation(self.client)
+        node = pool.pick_reader()
+        started = time.perf_counter()
+        try:
+            result = operation(node.client)
+        except meilisearch.errors.MeilisearchApiError as e:
+            # 其他 API 错误（如过滤语法）在主节点上同样会失败，直接抛出
+            if node is pool.primary or getattr(e, "code", None) != "index_not_found":
+                raise
+            pool.mark_down(node, e)
+            return operation(self.client)
+        except Exception as e:
+            if node is pool.primary:
+                raise
+            pool.mark_down(node, e)
+            return operation(self.client)
+        pool.record(node, (time.perf_counter() - started) * 1000)
+        return result
+
+    def _fan_out(self, operation_name: str, operation: Callable[[Client], Any]) -> None:
+        """将已在主节点成功的写操作交给 writer 节点的后台队列 best-effort 执行，不阻塞写入路径"""
+        if self._replica_pool is not None:
+            self._replica_pool.fan_out(operation_name, operation)
+
+    def _ensure_index_on(self, client: Client, index_name: str, primary_key: Optional[str], allow_reindex: bool) -> None:
+        try:
+            task = client.create_index(index_name, {"primaryKey": primary_key})
+            client.wait_for_task(task.task_uid)
+        except meilisearch.errors.MeilisearchApiError as e:
+            if getattr(e, "code", None) != "index_already_exists":
+                raise
+        self._sync_settings_on(client, index_name, INDEX_CONFIG, allow_reindex)
+
+    @staticmethod
+    def _sync_settings_on(
+        client: Client, index_name: str, desired: Dict, allow_reindex: bool
+    ) -> Tuple[Optional[TaskInfo], Dict, Dict]:
+        """在指定节点上提交设置差异，返回 (设置任务, 已提交的设置项, 暂缓的需重建设置项)"""
+        index = client.index(index_name)
+        current = index.get_settings()
+        diff = diff_index_settings(current if isinstance(current, dict) else {}, desired)
+        deferred = {key: value for key, value in diff.items() if key in REINDEX_SETTING_KEYS}
+        if deferred and not allow_reindex and index.get_stats().number_of_documents > 0:
+            diff = {key: value for key, value in diff.items() if key not in deferred}
+        else:
+            deferred = {}
+        return (index.update_settings(diff) if diff else None), diff, deferred
+
+    def circuit_states(self) -> Dict[str, Dict]:
+        """各操作类别的熔断器状态（未启用熔断时为空）"""
+        return {kind: breaker.snapshot() for kind, breaker in self._breakers.items()}
+
+    @property
+    def write_generation(self) -> int:
+        """本进程写入代数：每次成功提交文档写入/删除后递增。"""
+        return self._write_generation
+
+    def bump_write_generation(self) -> int:
+        """递增写入代数并返回新值。"""
+        with self._write_generation_lock:
+            self._write_generation += 1
+            return self._write_generation
+
+    def _record_write(self, index_name: str, operation: str, payload: List, task: Any) -> None:
+        # 调用方持有 _journal_lock
+        task_uid = getattr(task, "task_uid", None)
+        if task_uid is not None:
+            self._last_task_uid[index_name] = task_uid
+        journal = self._write_journals.get(index_name)
+        if journal is not None:
+            journal.append((operation, list(payload)))
+
+    def start_write_journal(self, index_name: str) -> Optional[int]:
+        """
+        开始记录本进程对 `index_name` 的文档写操作
+
+        Returns:
+            Optional[int]: 此前最后一个写任务的 uid；等待它完成后再读取源索引，之前的写入都已可见
+        """
+        with self._journal_lock:
+            self._write_journals[index_name] = []
+            return self._last_task_uid.get(index_name)
+
+    def take_write_journal(self, index_name: str, *, stop: bool = False) -> List[Tuple[str, List]]:
+        """取走已记录的写操作（按提交顺序）；`stop` 为 True 时同时停止记录"""
+        with self._journal_lock:
+            if stop:
+                return self._write_journals.pop(index_name, [])
+            entries = self._write_journals.get(index_name, [])
+            if index_name in self._write_journals:
+                self._write_journals[index_name] = []
+            return entries
+
+    def journaled_deletions(self, index_name: str) -> int:
+        """日志中尚未取走的删除文档数（重建按偏移复制时据此回退，避免漏掉文档）"""
+        with self._journal_lock:
+            journal = self._write_journals.get(index_name) or []
+            return sum(len(payload) for operation, payload in journal if operation == "delete")
+
+    @contextmanager
+    def holding_writes(self) -> Iterator[None]:
+        """在当前线程内阻塞本进程的其他文档写操作（用于取走日志并提交索引交换）"""
+        with self._journal_lock:
+            yield
+
+    @_guarded("read")
+    def get_last_update(self) -> Optional[str]:
+        """
+        获取 MeiliSearch 全局 lastUpdate（用于感知其他写入方造成的索引变化）
+
+        Returns:
+            Optional[str]: ISO8601 时间字符串，未知时返回 None
+
+        Raises:
+            MeiliSearchAPIError: API 错误
+            MeiliSearchConnectionError: 连接错误
+            MeiliSearchTimeoutError: 超时错误
+        """
+        try:
+            stats = self.client.get_all_stats()
+            last_update = stats.get("lastUpdate") if isinstance(stats, dict) else None
+            return str(last_update) if last_update else None
+        except Exception as e:
+            _handle_meilisearch_exception(e, "get_last_update")
+
+    def create_index(
+        self,
+        index_name: str = "telegram",
+        primary_key: Optional[str] = "id",
+        *,
+        allow_reindex: bool = True,
+    ) -> Optional[TaskInfo]:
+        """
+        创建索引；索引已存在时仅提交与 INDEX_CONFIG 不同的设置项
 
         Args:
             index_name: 索引名称
             primary_key: 主键字段名
+            allow_reindex: 已存在的非空索引是否允许原地提交会触发全量重建的设置项；
+                为 False 时这些设置项记入 `pending_reindex`，留给影子索引重建
 
         Returns:
-            TaskInfo: 创建任务信息
+            Optional[TaskInfo]: 创建/设置任务信息，设置无变化时为 None
 
         Raises:
             MeiliSearchAPIError: API 错误
@@ -162,27 +479,95 @@ class MeiliSearchClient:
         """
         try:
             result = self.client.create_index(index_name, {"primaryKey": primary_key})
-            self.client.index(index_name).update_settings(INDEX_CONFIG)
+            # 设置差异需要读取索引当前设置，先等创建任务完成
+            self.client.wait_for_task(result.task_uid)
+            self.sync_index_settings(index_name, allow_reindex=allow_reindex)
+            self._fan_out(
+                "create_index", lambda client: self._ensure_index_on(client, index_name, primary_key, allow_reindex)
+            )
             logger.info(f"Successfully send created index TaskInfo '{index_name}'")
             return result
         except meilisearch.errors.MeilisearchApiError as e:
             # 索引已存在不视为错误（检查错误码或错误消息）
             error_code = getattr(e, "code", "")
             if "index_already_exists" in str(e).lower() or error_code == "index_already_exists":
-                logger.info(f"Index '{index_name}' already exists, updating settings")
-                settings_task = self.client.index(index_name).update_settings(INDEX_CONFIG)
-                return settings_task
+                logger.info(f"Index '{index_name}' already exists, syncing settings")
+                self._fan_out(
+                    "create_index", lambda client: self._ensure_index_on(client, index_name, primary_key, allow_reindex)
+                )
+                return self.sync_index_settings(index_name, allow_reindex=allow_reindex)
             _handle_meilisearch_exception(e, "create_index", index_name)
         except Exception as e:
             _handle_meilisearch_exception(e, "create_index", index_name)
 
+    def sync_index_settings(
+        self,
+        index_name: str = "telegram",
+        settings: Optional[Dict] = None,
+        *,
+        allow_reindex: bool = True,
+    ) -> Optional[TaskInfo]:
+        """
+        对比索引当前设置，只提交有变化的设置项
+
+        空索引上的重建代价可以忽略，此时总是完整提交差异。
+
+        Args:
+            index_name: 索引名称
+            settings: 期望设置，默认 INDEX_CONFIG
+            allow_reindex: 是否允许原地提交会触发全量重建的设置项
+
+        Returns:
+            Optional[TaskInfo]: 设置任务信息，没有可提交的差异时为 None
+
+        Raises:
+            MeiliSearchAPIError: API 错误
+            MeiliSearchConnectionError: 连接错误
+            MeiliSearchTimeoutError: 超时错误
+        """
+        desired = INDEX_CONFIG if settings is None else settings
+        try:
+            result, applied, deferred = self._sync_settings_on(self.client, index_name, desired, allow_reindex)
+            self._pending_reindex.pop(index_name, None)
+            if deferred:
+                self._pending_reindex[index_name] = deferred
+                logger.warning(
+                    f"Settings {sorted(deferred)} of index '{index_name}' require a full reindex; "
+                    "deferred to shadow index rebuild"
+                )
+            if result is None:
+                if not deferred:
+                    logger.info(f"Settings of index '{index_name}' are up to date")
+                return None
+
+            self._settings_tasks[index_name] = result.task_uid
+            logger.info(f"Updated settings {sorted(applied)} of index '{index_name}'")
+            return result
+        except meilisearch.errors.MeilisearchApiError as e:
+            _handle_meilisearch_exception(e, "sync_index_settings", index_name)
+        except Exception as e:
+            _handle_meilisearch_exception(e, "sync_index_settings", index_name)
+
+    def pending_reindex(self, index_name: str = "telegram") -> Dict:
+        """启动时暂缓提交、等待影子索引重建的设置差异"""
+        return dict(self._pending_reindex.get(index_name, {}))
+
+    def clear_pending_reindex(self, index_name: str = "telegram") -> None:
+        """影子索引重建完成后清除暂缓的设置差异"""
+        self._pending_reindex.pop(index_name, None)
+
+    def settings_task(self, index_name: str = "telegram") -> Optional[int]:
+        """本进程最近一次向该索引提交的设置任务 uid，未提交过时为 None"""
+        return self._settings_tasks.get(index_name)
+
     @retry(
         stop=stop_after_attempt(3),
         wait=wait_exponential(multiplier=1, min=1, max=10),
-        retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS),
+        retry=retry_if_exception_type(RETRYABLE_EXCEPTIONS) & retry_if_not_exception_type(MeiliSearchCircuitOpenError),
         before_sleep=before_sleep_log(logger, 25),  # NOTICE level
         reraise=True,
     )
+    @_guarded("write")
     def add_documents(self, documents: List[Dict], index_name: str = "telegram") -> TaskInfo:
         """
         添加文档（带重试机制）
@@ -203,7 +588,11 @@ class MeiliSearchClient:
         """
         try:
             index = self.client.index(index_name)
-            result = index.add_documents(documents)
+            with self._journal_lock:
+                result = index.add_documents(documents)
+                self._record_write(index_name, "add", documents, result)
+            self._fan_out("add_documents", lambda client: client.index(index_name).add_documents(documents))
+            self.bump_write_generation()
             logger.info(f"Successfully added {len(documents)} documents to index '{index_name}'")
             return result
         except meilisearch.errors.MeilisearchApiError as e:
@@ -211,6 +600,7 @@ class MeiliSearchClient:
         except Exception as e:
             _handle_meilisearch_exception(e, "add_documents", index_name)
 
+    @_guarded("read")
     def search(self, query: str | None, index_name: str = "telegram", **kwargs) -> Dict:
         """
         搜索文档
@@ -229,10 +619,9 @@ class MeiliSearchClient:
             MeiliSearchTimeoutError: 超时错误
         """
         try:
-            index = self.client.index(index_name)
             # MeiliSearch uses empty query for "match all"; allow callers to pass None.
             q = query or ""
-            result = index.search(q, kwargs)
+            result = self._read(lambda client: client.index(index_name).search(q, kwargs))
             logger.info(f"Search performed in index '{index_name}' with query '{query}'")
             return result
         except meilisearch.errors.MeilisearchApiError as e:
@@ -242,6 +631,59 @@ class MeiliSearchClient:
         except Exception as e:
             _handle_meilisearch_exception(e, "search", index_name)
 
+    @_guarded("read")
+    def multi_search(self, queries: List[Dict], federation: Optional[Dict] = None) -> Dict:
+        """
+        批量搜索：一次请求执行多条查询（/multi-search）
+
+        Args:
+            queries: 查询列表，每项需包含 indexUid 与 q 及其他搜索参数
+            federation: 联邦搜索参数（如 {"limit": 20, "offset": 0}）；
+                提供时各查询结果按相关性合并为单一结果集
+
+        Returns:
+            Dict: 非联邦模式为 {"results": [...]}，联邦模式为合并后的单一结果
+
+        Raises:
+            MeiliSearchAPIError: API 错误
+            MeiliSearchConnectionError: 连接错误
+            MeiliSearchTimeoutError: 超时错误
+        """
+        try:
+            result = self._read(lambda client: client.multi_search(queries, federation=federation))
+            logger.info(f"Multi-search performed with {len(queries)} queries (federated={federation is not None})")
+            return result
+        except meilisearch.errors.MeilisearchApiError as e:
+            _handle_meilisearch_exception(e, "multi_search")
+        except Exception as e:
+            _handle_meilisearch_exception(e, "multi_search")
+
+    @_guarded("read")
+    def list_index_names(self) -> List[str]:
+        """
+        列出所有索引名称
+
+        Returns:
+            List[str]: 索引 uid 列表
+
+        Raises:
+            MeiliSearchAPIError: API 错误
+            MeiliSearchConnectionError: 连接错误
+            MeiliSearchTimeoutError: 超时错误
+        """
+        try:
+            names: List[str] = []
+            offset = 0
+            while True:
+                page = self.client.get_indexes({"limit": 100, "offset": offset})
+                results = page.get("results", []) if isinstance(page, dict) else []
+                names.extend(index.uid for index in results)
+                if len(results) < 100:
+                    return names
+                offset += 100
+        except Exception as e:
+            _handle_meilisearch_exception(e, "list_index_names")
+
     def delete_index(self, index_name: str) -> TaskInfo:
         """
         删除索引
@@ -259,6 +701,7 @@ class MeiliSearchClient:
         """
         try:
             result = self.client.delete_index(index_name)
+            self._fan_out("delete_index", lambda client: client.delete_index(index_name))
             logger.info(f"Successfully deleted index '{index_name}'")
             return result
         except meilisearch.errors.MeilisearchApiError as e:
@@ -266,6 +709,33 @@ class MeiliSearchClient:
         except Exception as e:
             _handle_meilisearch_exception(e, "delete_index", index_name)
 
+    def swap_indexes(self, index_a: str, index_b: str) -> TaskInfo:
+        """
+        原子交换两个索引的文档与设置（索引名保持不变）
+
+        Args:
+            index_a: 索引名称
+            index_b: 索引名称
+
+        Returns:
+            TaskInfo: 交换任务信息
+
+        Raises:
+            MeiliSearchAPIError: API 错误
+            MeiliSearchConnectionError: 连接错误
+            MeiliSearchTimeoutError: 超时错误
+        """
+        try:
+            result = self.client.swap_indexes([{"indexes": [index_a, index_b]}])
+            self._fan_out("swap_indexes", lambda client: client.swap_indexes([{"indexes": [index_a, index_b]}]))
+            logger.info(f"Successfully enqueued swap of indexes '{index_a}' <-> '{index_b}'")
+            return result
+        except meilisearch.errors.MeilisearchApiError as e:
+            _handle_meilisearch_exception(e, "swap_indexes", index_a)
+        except Exception as e:
+            _handle_meilisearch_exception(e, "swap_indexes", index_a)
+
+    @_guarded("read")
     def get_index_stats(self, index_name: str) -> IndexStats:
         """
         获取索引统计信息
@@ -291,6 +761,135 @@ class MeiliSearchClient:
         except Exception as e:
             _handle_meilisearch_exception(e, "get_index_stats", index_name)
 
+    @_guarded("read")
+    def get_documents(
+        self,
+        index_name: str = "telegram",
+        *,
+        filter: Optional[str] = None,
+        fields: Optional[List[str]] = None,
+        limit: int = 1000,
+        offset: int = 0,
+    ) -> List[Dict]:
+        """
+        按条件批量拉取原始文档（不经过搜索排序，适合全量扫描）
+
+        Args:
+            index_name: 索引名称
+            filter: 过滤表达式（字段需为 filterable）
+            fields: 需要返回的字段列表
+            limit: 每批数量
+            offset: 偏移量
+
+        Returns:
+            List[Dict]: 文档列表
+
+        Raises:
+            MeiliSearchAPIError: API 错误
+            MeiliSearchConnectionError: 连接错误
+            MeiliSearchTimeoutError: 超时错误
+        """
+        parameters: Dict = {"limit": limit, "offset": offset}
+        if filter:
+            parameters["filter"] = filter
+        if fields:
+            parameters["fields"] = fields
+        try:
+            result = self.client.index(index_name).get_documents(parameters)
+            return [dict(doc) for doc in result.results]
+        except meilisearch.errors.MeilisearchApiError as e:
+            _handle_meilisearch_exception(e, "get_documents", index_name)
+        except Exception as e:
+            _handle_meilisearch_exception(e, "get_documents", index_name)
+
+    @_guarded("write")
+    def merge_documents(self, documents: List[Dict], index_name: str = "telegram") -> TaskInfo:
+        """
+        局部更新文档：仅合并传入字段，文档其余字段保持不变
+
+        Args:
+            documents: 包含主键及待合并字段的文档列表
+            index_name: 索引名称
+
+        Returns:
+            TaskInfo: 更新任务信息
+
+        Raises:
+            MeiliSearchAPIError: API 错误
+            MeiliSearchConnectionError: 连接错误
+            MeiliSearchTimeoutError: 超时错误
+        """
+        try:
+            with self._journal_lock:
+                result = self.client.index(index_name).update_documents(documents)
+                self._record_write(index_name, "merge", documents, result)
+            self._fan_out("merge_documents", lambda client: client.index(index_name).update_documents(documents))
+            self.bump_write_generation()
+            logger.info(f"Successfully merged {len(documents)} documents into index '{index_name}'")
+            return result
+        except meilisearch.errors.MeilisearchApiError as e:
+            _handle_meilisearch_exception(e, "merge_documents", index_name)
+        except Exception as e:
+            _handle_meilisearch_exception(e, "merge_documents", index_name)
+
+    def wait_for_task(self, task_uid: int, timeout_ms: int = 60_000) -> Dict:
+        """
+        等待异步任务完成
+
+        Args:
+            task_uid: 任务 ID
+            timeout_ms: 最长等待时间（毫秒）
+
+        Returns:
+            Dict: 任务状态（status/error 等）
+
+        Raises:
+            MeiliSearchAPIError: API 错误
+            MeiliSearchConnectionError: 连接错误
+            MeiliSearchTimeoutError: 超时错误
+        """
+        try:
+            task = self.client.wait_for_task(task_uid, timeout_in_ms=timeout_ms)
+            return {"uid": task.uid, "status": task.status, "error": task.error}
+        except meilisearch.errors.MeilisearchTimeoutError as e:
+            raise MeiliSearchTimeoutError(f"等待任务 {task_uid} 超时: {str(e)}") from e
+        except Exception as e:
+            _handle_meilisearch_exception(e, "wait_for_task")
+
+    @_guarded("write")
+    def delete_stale_chunks(self, chunk_counts: Dict[str, int], index_name: str = "telegram") -> Optional[TaskInfo]:
+        """
+        删除分块文档中序号不小于新分块数的旧分块（新版本未分块时删除该消息的全部分块）
+
+        Args:
+            chunk_counts: 原消息 id -> 新写入的分块数
+            index_name: 索引名称
+
+        Returns:
+            Optional[TaskInfo]: 删除任务信息；没有需要检查的消息时为 None
+        """
+        if not chunk_counts:
+            return None
+        clauses = [
+            f'(parent_id = "{parent_id}" AND chunk >= {count})' if count else f'parent_id = "{parent_id}"'
+            for parent_id, count in chunk_counts.items()
+        ]
+        stale_filter = " OR ".join(clauses)
+        try:
+            index = self.client.index(index_name)
+            with self._journal_lock:
+                result = index.delete_documents(filter=stale_filter)
+                self._record_write(index_name, "delete_chunks", [dict(chunk_counts)], result)
+            self._fan_out(
+                "delete_stale_chunks", lambda client: client.index(index_name).delete_documents(filter=stale_filter)
+            )
+            self.bump_write_generation()
+            return result
+        except meilisearch.errors.MeilisearchApiError as e:
+            _handle_meilisearch_exception(e, "delete_stale_chunks", index_name)
+        except Exception as e:
+            _handle_meilisearch_exception(e, "delete_stale_chunks", index_name)
+
     def update_documents(self, documents: List[Dict], index_name: str = "telegram") -> TaskInfo:
         """
         更新文档（带重试机制）
@@ -304,6 +903,7 @@ class MeiliSearchClient:
         """
         return self.add_documents(documents, index_name)
 
+    @_guarded("write")
     def delete_documents(self, document_ids: List[str], index_name: str = "telegram") -> TaskInfo:
         """
         删除文档
@@ -317,7 +917,11 @@ class MeiliSearchClient:
         """
         try:
             index = self.client.index(index_name)
-            result = index.delete_documents(document_ids)
+            with self._journal_lock:
+                result = index.delete_documents(document_ids)
+                self._record_write(index_name, "delete", document_ids, result)
+            self._fan_out("delete_documents", lambda client: client.index(index_name).delete_documents(document_ids))
+            self.bump_write_generation()
             logger.info(f"Successfully deleted {len(document_ids)} documents from index '{index_name}'")
             return result
         except meilisearch.errors.MeilisearchApiError as e:
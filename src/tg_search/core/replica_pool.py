@@ -0,0 +1,257 @@
+"""
+多节点 MeiliSearch 读写分离
+
+`MEILI_HOSTS` 形如 `http://a:7700|primary,http://b:7700|replica,http://c:7700|writer`：
+- primary：唯一主节点，所有写入与一致性读取（文档扫描、统计）都走这里
+- writer：额外的可写节点，写操作在主节点成功后排入该节点的队列，由后台线程按顺序 best-effort 执行，
+  慢或不可达的 writer 节点不会拖慢写入路径
+- replica：只读副本（通常由 dump/snapshot 灌入），只承担搜索流量
+
+搜索在健康的只读节点（replica/writer）间按延迟做 power-of-two-choices 选择；
+后台线程定期探测各节点 `lastUpdate`，落后主节点超过 `max_lag_sec` 或不可达的节点移出轮转，
+没有可用只读节点时回落到主节点。
+"""
+
+from __future__ import annotations
+
+import queue
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Literal, Optional, Sequence, Tuple
+
+from tg_search.core.logger import setup_logger
+
+logger = setup_logger()
+
+NodeRole = Literal["primary", "replica", "writer"]
+_ROLES: Tuple[str, ...] = ("primary", "replica", "writer")
+
+
+def parse_hosts(spec: str) -> List[Tuple[str, NodeRole]]:
+    """
+    解析 `MEILI_HOSTS`
+
+    Args:
+        spec: 逗号分隔的 `url|role` 列表，省略 role 时视为 replica
+
+    Returns:
+        List[Tuple[str, NodeRole]]: (url, role) 列表
+
+    Raises:
+        ValueError: 角色非法或主节点数量不为 1
+    """
+    nodes: List[Tuple[str, NodeRole]] = []
+    for raw in spec.split(","):
+        item = raw.strip()
+        if not item:
+            continue
+        url, _, role = item.partition("|")
+        role = (role or "replica").strip().lower()
+        if role not in _ROLES:
+            raise ValueError(f"MEILI_HOSTS: unknown role '{role}' for {url}")
+        nodes.append((url.strip().rstrip("/"), role))  # type: ignore[arg-type]
+    if nodes and sum(1 for _, role in nodes if role == "primary") != 1:
+        raise ValueError("MEILI_HOSTS: exactly one primary host is required")
+    return nodes
+
+
+def _parse_last_update(value: Any) -> Optional[float]:
+    if not value:
+        return None
+    try:
+        return datetime.fromisoformat(str(value).replace("Z", "+00:00")).timestamp()
+    except ValueError:
+        return None
+
+
+@dataclass(slots=True)
+class MeiliNode:
+    """单个 MeiliSearch 节点及其健康/延迟状态。"""
+
+    host: str
+    role: NodeRole
+    client: Any
+    healthy: bool = True
+    ewma_ms: Optional[float] = None
+    lag_sec: Optional[float] = None
+    last_update: Optional[float] = None
+    last_error: Optional[str] = None
+
+    @property
+    def readable(self) -> bool:
+        return self.role in ("replica", "writer")
+
+
+class ReplicaPool:
+    """读节点选择与健康探测。"""
+
+    def __init__(
+        self,
+        nodes: Sequence[MeiliNode],
+        *,
+        max_lag_sec: float = 300.0,
+        probe_interval_sec: float = 10.0,
+        ewma_alpha: float = 0.3,
+        rng: Optional[random.Random] = None,
+        clock: Callable[[], float] = time.monotonic,
+        fan_out_queue_max: int = 10_000,
+    ) -> None:
+        primaries = [node for node in nodes if node.role == "primary"]
+        if len(primaries) != 1:
+            raise ValueError("ReplicaPool requires exactly one primary node")
+        self.primary = primaries[0]
+        self._nodes = list(nodes)
+        self._max_lag_sec = max(float(max_lag_sec), 0.0)
+        self._probe_interval_sec = max(float(probe_interval_sec), 0.0)
+        self._alpha = min(max(float(ewma_alpha), 0.01), 1.0)
+        self._rng = rng or random.Random()
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._probed_at: Optional[float] = None
+        self._probe_thread: Optional[threading.Thread] = None
+        # writer 节点 host -> 待扇出的写操作队列（各自一个后台线程，保持提交顺序）
+        self._fan_out_queue_max = max(int(fan_out_queue_max), 1)
+        self._write_queues: Dict[str, queue.Queue[Tuple[str, Callable[[Any], Any]]]] = {}
+
+    @property
+    def nodes(self) -> List[MeiliNode]:
+        return list(self._nodes)
+
+    def writers(self) -> List[MeiliNode]:
+        """除主节点外需要扇出写入的节点。"""
+        return [node for node in self._nodes if node.role == "writer"]
+
+    def pick_reader(self) -> MeiliNode:
+        """在健康的只读节点中按延迟选择（power of two choices），没有时回落到主节点。"""
+        self._maybe_probe()
+        with self._lock:
+            candidates = [node for node in self._nodes if node.readable and node.healthy]
+            if not candidates:
+                return self.primary
+            if len(candidates) == 1:
+                return candidates[0]
+            first, second = self._rng.sample(candidates, 2)
+            # 尚无延迟样本的节点优先，尽快获得测量值
+            return min((first, second), key=lambda node: -1.0 if node.ewma_ms is None else node.ewma_ms)
+
+    def record(self, node: MeiliNode, elapsed_ms: float) -> None:
+        with self._lock:
+            node.ewma_ms = elapsed_ms if node.ewma_ms is None else (
+                self._alpha * elapsed_ms + (1 - self._alpha) * node.ewma_ms
+            )
+
+    def mark_down(self, node: MeiliNode, error: Exception) -> None:
+        """请求失败时立即移出轮转，由下一次探测恢复。"""
+        with self._lock:
+            if node.healthy:
+                logger.warning(f"[ReplicaPool] {node.host} ({node.role}) out of rotation: {error}")
+            node.healthy = False
+            node.last_error = str(error)
+
+    # ── Write fan-out ──
+
+    def fan_out(self, operation_name: str, operation: Callable[[Any], Any]) -> None:
+        """将主节点已成功的写操作排入每个 writer 节点的队列；队列满时丢弃并记录日志"""
+        for node in self.writers():
+            try:
+                self._write_queue(node).put_nowait((operation_name, operation))
+            except queue.Full:
+                logger.warning(f"[{operation_name}] fan-out queue of {node.host} is full, write dropped")
+
+    def _write_queue(self, node: MeiliNode) -> queue.Queue[Tuple[str, Callable[[Any], Any]]]:
+        with self._lock:
+            pending = self._write_queues.get(node.host)
+            if pending is None:
+                pending = queue.Queue(maxsize=self._fan_out_queue_max)
+                self._write_queues[node.host] = pending
+                threading.Thread(
+                    target=self._replicate, args=(node, pending), name=f"meili-fan-out-{node.host}", daemon=True
+                ).start()
+            return pending
+
+    @staticmethod
+    def _replicate(node: MeiliNode, pending: queue.Queue[Tuple[str, Callable[[Any], Any]]]) -> None:
+        while True:
+            operation_name, operation = pending.get()
+            try:
+                operation(node.client)
+            except Exception as e:
+                logger.warning(f"[{operation_name}] fan-out to {node.host} failed: {e}")
+            finally:
+                pending.task_done()
+
+    def join_writes(self) -> None:
+        """阻塞直到已排队的扇出写操作全部执行完"""
+        with self._lock:
+            queues = list(self._write_queues.values())
+        for pending in queues:
+            pending.join()
+
+    # ── Health probing ──
+
+    def _maybe_probe(self) -> None:
+        now = self._clock()
+        with self._lock:
+            due = self._probed_at is None or now - self._probed_at >= self._probe_interval_sec
+            running = self._probe_thread is not None and self._probe_thread.is_alive()
+            if not due or running:
+                return
+            self._probed_at = now
+            self._probe_thread = threading.Thread(target=self.probe, name="meili-replica-probe", daemon=True)
+            self._probe_thread.start()
+
+    def probe(self) -> None:
+        """探测所有节点：可达性与 `lastUpdate`，据此计算只读节点落后主节点的秒数。"""
+        results: Dict[int, Tuple[Optional[float], Optional[str]]] = {}
+        for node in self._nodes:
+            try:
+                stats = node.client.get_all_stats()
+                last_update = _parse_last_update(stats.get("lastUpdate") if isinstance(stats, dict) else None)
+                results[id(node)] = (last_update, None)
+            except Exception as exc:
+                results[id(node)] = (None, f"{type(exc).__name__}: {exc}")
+
+        with self._lock:
+            primary_update, primary_error = results[id(self.primary)]
+            self.primary.healthy = primary_error is None
+            self.primary.last_error = primary_error
+            if primary_update is not None:
+                self.primary.last_update = primary_update
+            reference = self.primary.last_update
+            for node in self._nodes:
+                if node is self.primary:
+                    continue
+                last_update, error = results[id(node)]
+                node.last_error = error
+                if error is not None:
+                    node.healthy = False
+                    continue
+                node.last_update = last_update
+                if reference is None or last_update is None:
+                    node.lag_sec = None if reference is None else float("inf")
+                else:
+                    node.lag_sec = max(reference - last_update, 0.0)
+                was_healthy = node.healthy
+                node.healthy = node.lag_sec is None or node.lag_sec <= self._max_lag_sec
+                if was_healthy != node.healthy:
+                    logger.info(
+                        f"[ReplicaPool] {node.host} {'back in' if node.healthy else 'out of'} rotation "
+                        f"(lag_sec={node.lag_sec})"
+                    )
+
+    def snapshot(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [
+                {
+                    "host": node.host,
+                    "role": node.role,
+                    "healthy": node.healthy,
+                    "ewma_ms": None if node.ewma_ms is None else round(node.ewma_ms, 1),
+                    "lag_sec": node.lag_sec,
+                    "last_error": node.last_error,
+                }
+                for node in self._nodes
+            ]
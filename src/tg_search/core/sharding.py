@@ -0,0 +1,180 @@
+"""
+按月分片的消息索引路由
+
+分片命名为 `telegram_YYYYMM`（按消息 UTC 时间所在月份），提供：
+- 写入路由：按 date_ts 将文档分组到对应分片，首次写入时自动建索引
+- 查询裁剪：根据 date_from/date_to 只选择有交集的分片
+- 冻结判定：超过指定月数的旧分片不再应用设置更新/压缩
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+import time
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+from tg_search.core.logger import setup_logger
+from tg_search.core.meilisearch import MeiliSearchAPIError, MeiliSearchClient
+
+logger = setup_logger()
+
+_SHARD_PATTERN_TEMPLATE = r"^{base}_(\d{{4}})(\d{{2}})$"
+
+
+def _month_index(year: int, month: int) -> int:
+    return year * 12 + (month - 1)
+
+
+def shard_name(base_index: str, date_ts: int) -> str:
+    """返回 date_ts（epoch 秒）所属的分片名。"""
+    dt = datetime.fromtimestamp(int(date_ts), tz=timezone.utc)
+    return f"{base_index}_{dt.year:04d}{dt.month:02d}"
+
+
+class ShardRouter:
+    """
+    月分片路由器
+
+    Notes:
+    - 基础索引（如 `telegram`）视为遗留分片：启用分片前写入的文档仍在其中，查询时一并扇出。
+    - 分片列表从 MeiliSearch 读取并缓存 `refresh_interval_sec` 秒，新分片在本进程写入时即时加入。
+    """
+
+    def __init__(
+        self,
+        meili: MeiliSearchClient,
+        *,
+        base_index: str = "telegram",
+        frozen_after_months: int = 3,
+        refresh_interval_sec: float = 60.0,
+    ) -> None:
+        self._meili = meili
+        self._base_index = base_index
+        self._pattern = re.compile(_SHARD_PATTERN_TEMPLATE.format(base=re.escape(base_index)))
+        self._frozen_after_months = max(int(frozen_after_months), 1)
+        self._refresh_interval_sec = max(float(refresh_interval_sec), 0.0)
+        self._shards: set[str] = set()
+        self._base_exists = False
+        self._loaded_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def base_index(self) -> str:
+        return self._base_index
+
+    def shard_month(self, index_name: str) -> Optional[int]:
+        """返回分片对应的月份序号（year*12+month-1），非分片返回 None。"""
+        match = self._pattern.match(index_name)
+        if match is None:
+            return None
+        year, month = int(match.group(1)), int(match.group(2))
+        if not 1 <= month <= 12:
+            return None
+        return _month_index(year, month)
+
+    def is_shard(self, index_name: str) -> bool:
+        return self.shard_month(index_name) is not None
+
+    def is_frozen(self, index_name: str, now: Optional[datetime] = None) -> bool:
+        """超过冻结月数的分片视为冻结；基础索引不冻结。"""
+        month = self.shard_month(index_name)
+        if month is None:
+            return False
+        now = now or datetime.now(timezone.utc)
+        return _month_index(now.year, now.month) - month >= self._frozen_after_months
+
+    # ── Shard registry ──
+
+    def _refresh(self, force: bool = False) -> None:
+        now = time.monotonic()
+        if not force and self._loaded_at is not None and now - self._loaded_at < self._refresh_interval_sec:
+            return
+        names = self._meili.list_index_names()
+        with self._lock:
+            self._shards = {name for name in names if self.is_shard(name)}
+            self._base_exists = self._base_index in names
+            self._loaded_at = now
+
+    def all_indexes(self, *, refresh: bool = False) -> List[str]:
+        """所有消息索引：分片按时间倒序，基础索引（若存在）排在最后。"""
+        self._refresh(force=refresh)
+        with self._lock:
+            ordered = sorted(self._shards, key=lambda name: self.shard_month(name) or 0, reverse=True)
+            if self._base_exists:
+                ordered.append(self._base_index)
+        return ordered
+
+    def hot_indexes(self, *, refresh: bool = False) -> List[str]:
+        """未冻结的消息索引（设置更新/压缩只作用于这些索引）。"""
+        return [name for name in self.all_indexes(refresh=refresh) if not self.is_frozen(name)]
+
+    def indexes_for_range(
+        self,
+        ts_from: Optional[int] = None,
+        ts_to: Optional[int] = None,
+    ) -> List[str]:
+        """按 epoch 时间范围裁剪分片（按时间倒序）；基础索引无法裁剪，始终保留。"""
+        low = _month_of(ts_from) if ts_from is not None else None
+        high = _month_of(ts_to) if ts_to is not None else None
+        selected: List[str] = []
+        for name in self.all_indexes():
+            month = self.shard_month(name)
+            if month is not None and ((low is not None and month < low) or (high is not None and month > high)):
+                continue
+            selected.append(name)
+        return selected
+
+    # ── Ingest ──
+
+    def ensure_shard(self, index_name: str) -> None:
+        """首次写入分片前创建索引并应用 INDEX_CONFIG。"""
+        with self._lock:
+            if index_name in self._shards:
+                return
+        try:
+            self._meili.create_index(index_name, allow_reindex=True)
+        except MeiliSearchAPIError as e:
+            logger.warning(f"[ShardRouter] create shard '{index_name}' failed: {e}")
+            raise
+        with self._lock:
+            self._shards.add(index_name)
+        logger.info(f"[ShardRouter] shard '{index_name}' ready")
+
+    def route(self, documents: Iterable[Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+        """按 date_ts 将文档分组到分片；缺少 date_ts 的文档写入基础索引。"""
+        grouped: Dict[str, List[Dict[str, Any]]] = {}
+        for doc in documents:
+            date_ts = doc.get("date_ts")
+            index_name = shard_name(self._base_index, date_ts) if isinstance(date_ts, int) else self._base_index
+            grouped.setdefault(index_name, []).append(doc)
+        return grouped
+
+    def add_documents(self, documents: List[Dict[str, Any]]) -> List[Any]:
+        """路由并写入文档，返回各分片的 TaskInfo 列表。"""
+        tasks = []
+        for index_name, docs in self.route(documents).items():
+            if index_name != self._base_index:
+                self.ensure_shard(index_name)
+            tasks.append(self._meili.add_documents(docs, index_name))
+        return tasks
+
+    def apply_settings_to_hot_shards(self) -> List[str]:
+        """
+        仅对未冻结分片同步 INDEX_CONFIG 的差异，返回被同步的索引名。
+
+        分片没有影子索引重建；热分片只含最近几个月的消息，需要重建的设置项直接原地提交。
+        """
+        updated = []
+        for index_name in self.hot_indexes(refresh=True):
+            self._meili.create_index(index_name, allow_reindex=True)
+            updated.append(index_name)
+        logger.info(f"[ShardRouter] settings applied to hot shards: {updated}")
+        return updated
+
+
+def _month_of(date_ts: int) -> int:
+    value = datetime.fromtimestamp(int(date_ts), tz=timezone.utc)
+    return _month_index(value.year, value.month)
@@ -0,0 +1,796 @@
+"""
+内置 SQLite FTS5 全文索引：单用户小规模部署的搜索后端，或 MeiliSearch 不可用时的热备
+
+- 分词：CJK（汉字/假名/谚文）按字符 bigram 切分，其余按 Unicode 单词小写化；
+  分词结果写入 FTS5（unicode61）外部内容表，原始文档以 JSON 保存在普通表中
+- 查询：CJK 片段转为 bigram 短语（保证连续匹配），单字 CJK 与最后一个单词按前缀匹配，各片段 AND 连接
+- 对外提供与 `MeiliSearchClient` 相同的 search/multi_search/add_documents/wait_for_task 接口，
+  支持 SearchService 生成的 filter/sort 子集、distinct、facets、高亮与 limit/offset 分页，
+  因此 SearchService 与 BatchWriter 无需区分后端
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from tg_search.core.logger import setup_logger
+from tg_search.core.meilisearch import MeiliSearchAPIError
+
+logger = setup_logger()
+
+_SQLITE_BUSY_TIMEOUT_SEC = float(os.getenv("CONFIG_STORE_SQLITE_BUSY_TIMEOUT_SEC", "5"))
+
+_CJK = "\u1100-\u11ff\u3040-\u30ff\u3130-\u318f\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff"
+_SEGMENT_RE = re.compile(rf"[{_CJK}]+|[^\W{_CJK}]+")
+_CJK_RE = re.compile(rf"[{_CJK}]")
+# 裁剪计数单位：CJK 每字算一个词，其余按连续字母数字算一个词
+_CROP_WORD_RE = re.compile(rf"[{_CJK}]|[^\W{_CJK}]+")
+# facets 每个属性最多返回的取值数（MeiliSearch faceting.maxValuesPerFacet 默认值）
+_MAX_VALUES_PER_FACET = 100
+
+# filter/sort 中可用的字段 → fts_docs 列
+_FIELD_COLUMNS: Dict[str, str] = {
+    "id": "d.doc_id",
+    "chat_id": "d.chat_id",
+    "chat.id": "d.chat_id",
+    "chat.type": "d.chat_type",
+    "date_ts": "d.date_ts",
+    "msg_id": "d.msg_id",
+    "from_user.id": "d.from_user_id",
+    "from_user.username": "d.from_username",
+    "reactions_scores": "d.reactions_scores",
+}
+
+# `_row_values` 前七项对应的列（tokens/document 之前）
+_ROW_COLUMNS = (
+    "d.chat_id",
+    "d.chat_type",
+    "d.date_ts",
+    "d.msg_id",
+    "d.from_user_id",
+    "d.from_username",
+    "d.reactions_scores",
+)
+
+
+def split_segments(text: str) -> List[str]:
+    """切分为 CJK 连续片段与其余单词片段（标点、空白丢弃）。"""
+    return _SEGMENT_RE.findall(text or "")
+
+
+def is_cjk(segment: str) -> bool:
+    return bool(_CJK_RE.match(segment))
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    文档分词：CJK 连续片段输出重叠 bigram 并以末字单字收尾，其余片段输出小写单词
+
+    末字单字保证任意 CJK 字符都是某个 token 的首字符，单字查询可用前缀匹配命中。
+    """
+    tokens: List[str] = []
+    for segment in split_segments(text):
+        if is_cjk(segment):
+            tokens.extend(segment[i : i + 2] for i in range(len(segment) - 1))
+            tokens.append(segment[-1])
+        else:
+            tokens.append(segment.lower())
+    return tokens
+
+
+def _quote(token: str) -> str:
+    return '"' + token.replace('"', '""') + '"'
+
+
+def build_match_query(q: str) -> Optional[str]:
+    """把用户查询转成 FTS5 MATCH 表达式；没有可检索片段时返回 None（匹配全部）。"""
+    segments = split_segments(q)
+    clauses: List[str] = []
+    for position, segment in enumerate(segments):
+        if is_cjk(segment):
+            if len(segment) == 1:
+                clauses.append(f"{_quote(segment)}*")
+            else:
+                clauses.append(_quote(" ".join(segment[i : i + 2] for i in range(len(segment) - 1))))
+        elif position == len(segments) - 1:
+            clauses.append(f"{_quote(segment.lower())}*")
+        else:
+            clauses.append(_quote(segment.lower()))
+    return " AND ".join(clauses) if clauses else None
+
+
+def highlight(text: str, q: str, pre_tag: str = "<mark>", post_tag: str = "</mark>") -> str:
+    """按查询片段（大小写不敏感）为原文加高亮标签，重叠区间合并。"""
+    if not text:
+        return text
+    haystack = text.lower()
+    if len(haystack) != len(text):
+        haystack = text
+    spans: List[Tuple[int, int]] = []
+    for segment in split_segments(q):
+        needle = segment.lower() if haystack is not text else segment
+        start = haystack.find(needle)
+        while start != -1:
+            spans.append((start, start + len(needle)))
+            start = haystack.find(needle, start + len(needle))
+    if not spans:
+        return text
+    spans.sort()
+    merged = [spans[0]]
+    for start, end in spans[1:]:
+        if start <= merged[-1][1]:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    parts: List[str] = []
+    cursor = 0
+    for start, end in merged:
+        parts.append(text[cursor:start])
+        parts.append(f"{pre_tag}{text[start:end]}{post_tag}")
+        cursor = end
+    parts.append(text[cursor:])
+    return "".join(parts)
+
+
+def crop(text: str, q: str, crop_length: int, marker: str = "…") -> str:
+    """截取首个命中附近约 `crop_length` 个词的片段（与 MeiliSearch cropLength 语义近似），两端被截断时加 marker。"""
+    words = list(_CROP_WORD_RE.finditer(text or ""))
+    if crop_length <= 0 or len(words) <= crop_length:
+        return text
+    haystack = text.lower() if len(text.lower()) == len(text) else text
+    positions = [haystack.find(segment.lower() if haystack is not text else segment) for segment in split_segments(q)]
+    first_match = min((pos for pos in positions if pos != -1), default=None)
+    start = 0
+    if first_match is not None:
+        center = next((i for i, word in enumerate(words) if word.end() > first_match), 0)
+        start = max(0, min(center - crop_length // 2, len(words) - crop_length))
+    end = start + crop_length
+    snippet = text[words[start].start() : words[end - 1].end()]
+    return f"{marker if start > 0 else ''}{snippet}{marker if end < len(words) else ''}"
+
+
+def format_hit(doc: Dict[str, Any], q: Optional[str], params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    按 attributesToRetrieve / attributesToHighlight / attributesToCrop 生成与 MeiliSearch 一致的命中结构
+
+    `_formatted` 包含返回的字段以及被高亮、裁剪的字段（即使后者未在 attributesToRetrieve 中）。
+    """
+    retrieve = params.get("attributesToRetrieve")
+    hit = {key: value for key, value in doc.items() if key in retrieve} if retrieve and "*" not in retrieve else doc
+    highlighted = params.get("attributesToHighlight") or []
+    cropped = params.get("attributesToCrop") or []
+    if not highlighted and not cropped:
+        return hit
+    formatted = dict(hit)
+    pre_tag = params.get("highlightPreTag", "<em>")
+    post_tag = params.get("highlightPostTag", "</em>")
+    crop_length = int(params.get("cropLength", 10))
+    marker = params.get("cropMarker", "…")
+    for key, value in doc.items():
+        if not isinstance(value, str):
+            continue
+        crop_it = "*" in cropped or key in cropped
+        highlight_it = "*" in highlighted or key in highlighted
+        if crop_it:
+            value = crop(value, q or "", crop_length, marker)
+        if highlight_it:
+            value = highlight(value, q or "", pre_tag, post_tag)
+        if crop_it or highlight_it:
+            formatted[key] = value
+    return {**hit, "_formatted": formatted}
+
+
+def _invalid_filter(message: str) -> MeiliSearchAPIError:
+    return MeiliSearchAPIError(f"invalid filter: {message}", status_code=400, error_code="invalid_search_filter")
+
+
+_FILTER_TOKEN_RE = re.compile(
+    r'\s*(?:(?P<punct>[()\[\],])|(?P<op>>=|<=|!=|=|<|>)|"(?P<str>(?:[^"\\]|\\.)*)"|(?P<word>[^\s()\[\],=<>!"]+))'
+)
+
+
+class _FilterParser:
+    """MeiliSearch filter 表达式子集 → SQL：比较、IN/NOT IN、EXISTS、TO 区间、AND/OR/NOT 与括号。"""
+
+    def __init__(self, expression: str) -> None:
+        self._tokens = self._tokenize(expression)
+        self._pos = 0
+        self.args: List[Any] = []
+
+    @staticmethod
+    def _tokenize(expression: str) -> List[Tuple[str, str]]:
+        tokens: List[Tuple[str, str]] = []
+        pos = 0
+        expression = expression.rstrip()
+        while pos < len(expression):
+            match = _FILTER_TOKEN_RE.match(expression, pos)
+            if match is None or match.end() == pos:
+                raise _invalid_filter(f"unexpected character at {pos}")
+            kind = match.lastgroup or ""
+            value = match.group(kind)
+            tokens.append((kind, value.replace('\\"', '"') if kind == "str" else value))
+            pos = match.end()
+        return tokens
+
+    def parse(self) -> str:
+        sql = self._or()
+        if self._pos != len(self._tokens):
+            raise _invalid_filter(f"unexpected token '{self._tokens[self._pos][1]}'")
+        return sql
+
+    def _peek(self) -> Optional[Tuple[str, str]]:
+        return self._tokens[self._pos] if self._pos < len(self._tokens) else None
+
+    def _next(self) -> Tuple[str, str]:
+        token = self._peek()
+        if token is None:
+            raise _invalid_filter("unexpected end of expression")
+        self._pos += 1
+        return token
+
+    def _keyword(self, keyword: str) -> bool:
+        token = self._peek()
+        if token is not None and token[0] == "word" and token[1].upper() == keyword:
+            self._pos += 1
+            return True
+        return False
+
+    def _expect(self, punct: str) -> None:
+        if self._next() != ("punct", punct):
+            raise _invalid_filter(f"expected '{punct}'")
+
+    def _or(self) -> str:
+        parts = [self._and()]
+        while self._keyword("OR"):
+            parts.append(self._and())
+        return parts[0] if len(parts) == 1 else "(" + " OR ".join(parts) + ")"
+
+    def _and(self) -> str:
+        parts = [self._not()]
+        while self._keyword("AND"):
+            parts.append(self._not())
+        return parts[0] if len(parts) == 1 else "(" + " AND ".join(parts) + ")"
+
+    def _not(self) -> str:
+        if self._keyword("NOT"):
+            return f"NOT ({self._not()})"
+        return self._condition()
+
+    def _value(self) -> Any:
+        kind, raw = self._next()
+        if kind == "str":
+            return raw
+        if kind != "word":
+            raise _invalid_filter(f"expected a value, got '{raw}'")
+        for cast in (int, float):
+            try:
+                return cast(raw)
+            except ValueError:
+                continue
+        return raw
+
+    def _bind(self, value: Any) -> str:
+        self.args.append(value)
+        return "?"
+
+    def _list(self) -> str:
+        self._expect("[")
+        placeholders = [self._bind(self._value())]
+        while self._peek() == ("punct", ","):
+            self._pos += 1
+            placeholders.append(self._bind(self._value()))
+        self._expect("]")
+        return ", ".join(placeholders)
+
+    def _condition(self) -> str:
+        kind, raw = self._next()
+        if (kind, raw) == ("punct", "("):
+            sql = self._or()
+            self._expect(")")
+            return sql
+        if kind not in ("word", "str"):
+            raise _invalid_filter(f"unexpected token '{raw}'")
+        column = _FIELD_COLUMNS.get(raw)
+        if column is None:
+            raise _invalid_filter(f"attribute '{raw}' is not filterable")
+
+        if self._keyword("EXISTS"):
+            return f"{column} IS NOT NULL"
+        if self._keyword("NOT"):
+            if self._keyword("EXISTS"):
+                return f"{column} IS NULL"
+            if self._keyword("IN"):
+                return f"({column} IS NULL OR {column} NOT IN ({self._list()}))"
+            raise _invalid_filter("expected EXISTS or IN after NOT")
+        if self._keyword("IN"):
+            return f"{column} IN ({self._list()})"
+
+        token = self._peek()
+        if token is not None and token[0] == "op":
+            self._pos += 1
+            operator = token[1]
+            placeholder = self._bind(self._value())
+            if operator == "!=":
+                # MeiliSearch 的 != 同样匹配缺少该字段的文档
+                return f"({column} IS NULL OR {column} != {placeholder})"
+            return f"{column} {operator} {placeholder}"
+
+        low = self._bind(self._value())
+        if not self._keyword("TO"):
+            raise _invalid_filter(f"expected an operator after '{raw}'")
+        high = self._bind(self._value())
+        return f"{column} BETWEEN {low} AND {high}"
+
+
+def compile_filter(expression: Any) -> Tuple[Optional[str], List[Any]]:
+    """
+    编译 filter：字符串表达式，或 MeiliSearch 数组形式（外层 AND，内层数组 OR）
+
+    Raises:
+        MeiliSearchAPIError: 语法错误或字段不可过滤（error_code=invalid_search_filter）
+    """
+    if not expression:
+        return None, []
+    if isinstance(expression, str):
+        parser = _FilterParser(expression)
+        return parser.parse(), parser.args
+    clauses: List[str] = []
+    args: List[Any] = []
+    for item in expression:
+        if isinstance(item, (list, tuple)):
+            compiled = [compile_filter(part) for part in item]
+            parts = [sql for sql, _ in compiled if sql]
+            if parts:
+                clauses.append("(" + " OR ".join(parts) + ")")
+                for _, part_args in compiled:
+                    args.extend(part_args)
+        else:
+            sql, part_args = compile_filter(item)
+            if sql:
+                clauses.append(sql)
+                args.extend(part_args)
+    return (" AND ".join(clauses) if clauses else None), args
+
+
+def _parse_sort(sort: Optional[Sequence[str]]) -> List[Tuple[str, bool]]:
+    """`sort` 参数解析为 (列名, 是否降序) 列表。"""
+    terms: List[Tuple[str, bool]] = []
+    for item in sort or ():
+        field, _, direction = str(item).partition(":")
+        column = _FIELD_COLUMNS.get(field)
+        if column is None or direction.lower() not in ("asc", "desc"):
+            raise MeiliSearchAPIError(f"invalid sort: {item}", status_code=400, error_code="invalid_search_sort")
+        terms.append((column, direction.lower() == "desc"))
+    return terms
+
+
+def _compile_sort(sort: Optional[Sequence[str]]) -> Optional[str]:
+    terms = _parse_sort(sort)
+    if not terms:
+        return None
+    return ", ".join(f"{column} {'DESC' if descending else 'ASC'}" for column, descending in terms)
+
+
+def _distinct_key(attribute: Optional[str]) -> Optional[str]:
+    """`distinct` 属性的分组表达式；没有该字段的文档各自成组（与 MeiliSearch 一致）。"""
+    if not attribute:
+        return None
+    if not re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*(\.[A-Za-z_][A-Za-z0-9_]*)*", str(attribute)):
+        raise MeiliSearchAPIError(
+            f"invalid distinct: {attribute}", status_code=400, error_code="invalid_search_distinct"
+        )
+    return f"COALESCE(json_extract(d.document, '$.{attribute}'), 'row:' || d.row_id)"
+
+
+def _to_int(value: Any) -> Optional[int]:
+    try:
+        return int(value) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass(slots=True, frozen=True)
+class LocalTask:
+    """本地写入同步完成，任务信息只为兼容 BatchWriter 的 task_uid 约定。"""
+
+    task_uid: int
+    index_uid: str
+
+
+class SqliteFtsIndex:
+    """
+    SQLite FTS5 搜索索引，接口与 `MeiliSearchClient` 的搜索/写入部分兼容。
+
+    Notes:
+    - 以 (index_name, doc_id) 为键覆盖写入，与 MeiliSearch 的文档替换语义一致。
+    - 写入在单个事务内完成：批次中任一文档缺少 id 时整批拒绝，交由 BatchWriter 二分隔离。
+    """
+
+    def __init__(self, db_path: str | Path) -> None:
+        self._db_path = Path(db_path)
+        self._db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.RLock()
+        self._task_seq = 0
+        self._write_generation = 0
+        self._last_update: Optional[str] = None
+        self._initialize_storage()
+
+    @property
+    def db_path(self) -> Path:
+        return self._db_path
+
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(self._db_path, timeout=_SQLITE_BUSY_TIMEOUT_SEC, isolation_level=None)
+        try:
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            yield conn
+        finally:
+            conn.close()
+
+    def _initialize_storage(self) -> None:
+        with self._lock, self._connect() as conn:
+            conn.executescript(
+                """
+                CREATE TABLE IF NOT EXISTS fts_docs (
+                    row_id INTEGER PRIMARY KEY,
+                    index_name TEXT NOT NULL,
+                    doc_id TEXT NOT NULL,
+                    chat_id INTEGER,
+                    chat_type TEXT,
+                    date_ts INTEGER,
+                    msg_id INTEGER,
+                    from_user_id INTEGER,
+                    from_username TEXT,
+                    reactions_scores REAL,
+                    tokens TEXT NOT NULL,
+                    document TEXT NOT NULL,
+                    UNIQUE (index_name, doc_id)
+                );
+                CREATE INDEX IF NOT EXISTS idx_fts_docs_time ON fts_docs (index_name, date_ts DESC, msg_id DESC);
+                CREATE INDEX IF NOT EXISTS idx_fts_docs_chat ON fts_docs (index_name, chat_id, date_ts DESC);
+                CREATE VIRTUAL TABLE IF NOT EXISTS fts_text USING fts5(
+                    tokens,
+                    content='fts_docs',
+                    content_rowid='row_id',
+                    tokenize='unicode61 remove_diacritics 2'
+                );
+                """
+            )
+            row = conn.execute("SELECT MAX(row_id) FROM fts_docs").fetchone()
+            if row and row[0] is not None:
+                self._last_update = datetime.fromtimestamp(self._db_path.stat().st_mtime, timezone.utc).isoformat()
+
+    # ── MeiliSearchClient-compatible surface ──
+
+    @property
+    def write_generation(self) -> int:
+        return self._write_generation
+
+    def get_last_update(self) -> Optional[str]:
+        return self._last_update
+
+    def _mark_written(self) -> None:
+        self._write_generation += 1
+        self._last_update = datetime.now(timezone.utc).isoformat()
+
+    def _next_task(self, index_name: str) -> LocalTask:
+        self._task_seq += 1
+        return LocalTask(task_uid=self._task_seq, index_uid=index_name)
+
+    @staticmethod
+    def _row_values(doc: Dict[str, Any]) -> Tuple[Any, ...]:
+        raw_chat, raw_from_user = doc.get("chat"), doc.get("from_user")
+        chat: Dict[str, Any] = raw_chat if isinstance(raw_chat, dict) else {}
+        from_user: Dict[str, Any] = raw_from_user if isinstance(raw_from_user, dict) else {}
+        scores = doc.get("reactions_scores")
+        return (
+            _to_int(doc.get("chat_id")) if doc.get("chat_id") is not None else _to_int(chat.get("id")),
+            chat.get("type"),
+            _to_int(doc.get("date_ts")),
+            _to_int(doc.get("msg_id")),
+            _to_int(from_user.get("id")),
+            from_user.get("username"),
+            float(scores) if isinstance(scores, (int, float)) else None,
+            " ".join(tokenize(str(doc.get("text") or ""))),
+            json.dumps(doc, ensure_ascii=False, default=str),
+        )
+
+    @classmethod
+    def _sort_value(cls, doc: Dict[str, Any], column: str) -> Tuple[bool, Any]:
+        value = str(doc.get("id")) if column == "d.doc_id" else cls._row_values(doc)[_ROW_COLUMNS.index(column)]
+        return value is not None, value
+
+    def add_documents(self, documents: List[Dict[str, Any]], index_name: str = "telegram") -> LocalTask:
+        """
+        写入（覆盖）文档
+
+        Raises:
+            MeiliSearchAPIError: 文档缺少 id（error_code=missing_document_id），整批不写入
+        """
+        for doc in documents:
+            if doc.get("id") in (None, ""):
+                raise MeiliSearchAPIError(
+                    "document is missing an `id` field", status_code=400, error_code="missing_document_id"
+                )
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for doc in documents:
+                    self._upsert(conn, index_name, str(doc["id"]), self._row_values(doc))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._mark_written()
+            return self._next_task(index_name)
+
+    @staticmethod
+    def _upsert(conn: sqlite3.Connection, index_name: str, doc_id: str, values: Tuple[Any, ...]) -> None:
+        existing = conn.execute(
+            "SELECT row_id, tokens FROM fts_docs WHERE index_name = ? AND doc_id = ?",
+            (index_name, doc_id),
+        ).fetchone()
+        if existing is not None:
+            row_id = existing[0]
+            conn.execute("INSERT INTO fts_text(fts_text, rowid, tokens) VALUES ('delete', ?, ?)", existing)
+            conn.execute(
+                """
+                UPDATE fts_docs SET chat_id = ?, chat_type = ?, date_ts = ?, msg_id = ?, from_user_id = ?,
+                    from_username = ?, reactions_scores = ?, tokens = ?, document = ?
+                WHERE row_id = ?
+                """,
+                (*values, row_id),
+            )
+        else:
+            row_id = conn.execute(
+                """
+                INSERT INTO fts_docs (index_name, doc_id, chat_id, chat_type, date_ts, msg_id, from_user_id,
+                    from_username, reactions_scores, tokens, document)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (index_name, doc_id, *values),
+            ).lastrowid
+        conn.execute("INSERT INTO fts_text(rowid, tokens) VALUES (?, ?)", (row_id, values[-2]))
+
+    def update_documents(self, documents: List[Dict[str, Any]], index_name: str = "telegram") -> LocalTask:
+        return self.add_documents(documents, index_name)
+
+    def wait_for_task(self, task_uid: int, timeout_ms: int = 60_000) -> Dict[str, Any]:
+        return {"uid": task_uid, "status": "succeeded", "error": None}
+
+    def delete_documents(self, document_ids: List[str], index_name: str = "telegram") -> LocalTask:
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                for doc_id in document_ids:
+                    existing = conn.execute(
+                        "SELECT row_id, tokens FROM fts_docs WHERE index_name = ? AND doc_id = ?",
+                        (index_name, str(doc_id)),
+                    ).fetchone()
+                    if existing is None:
+                        continue
+                    conn.execute("INSERT INTO fts_text(fts_text, rowid, tokens) VALUES ('delete', ?, ?)", existing)
+                    conn.execute("DELETE FROM fts_docs WHERE row_id = ?", (existing[0],))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._mark_written()
+            return self._next_task(index_name)
+
+    def delete_stale_chunks(self, chunk_counts: Dict[str, int], index_name: str = "telegram") -> Optional[LocalTask]:
+        """删除 `{原消息 id}_{k}` 中 k 不小于新分块数的旧分块，语义同 `MeiliSearchClient.delete_stale_chunks`"""
+        if not chunk_counts:
+            return None
+        with self._connect() as conn:
+            stale = [
+                doc_id
+                for parent_id, count in chunk_counts.items()
+                for (doc_id,) in conn.execute(
+                    "SELECT doc_id FROM fts_docs WHERE index_name = ? AND doc_id GLOB ?",
+                    (index_name, f"{parent_id}_[0-9]*"),
+                )
+                if doc_id[len(parent_id) + 1 :].isdigit() and int(doc_id[len(parent_id) + 1 :]) >= count
+            ]
+        return self.delete_documents(stale, index_name)
+
+    def delete_index(self, index_name: str) -> LocalTask:
+        with self._lock, self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute(
+                    """
+                    INSERT INTO fts_text(fts_text, rowid, tokens)
+                    SELECT 'delete', row_id, tokens FROM fts_docs WHERE index_name = ?
+                    """,
+                    (index_name,),
+                )
+                conn.execute("DELETE FROM fts_docs WHERE index_name = ?", (index_name,))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._mark_written()
+            logger.info(f"[SqliteFts] deleted index '{index_name}'")
+            return self._next_task(index_name)
+
+    def list_index_names(self) -> List[str]:
+        with self._connect() as conn:
+            return [row[0] for row in conn.execute("SELECT DISTINCT index_name FROM fts_docs ORDER BY index_name")]
+
+    def count(self, index_name: str = "telegram") -> int:
+        with self._connect() as conn:
+            return int(conn.execute("SELECT COUNT(*) FROM fts_docs WHERE index_name = ?", (index_name,)).fetchone()[0])
+
+    def size_bytes(self) -> int:
+        """数据库文件（含 WAL）占用的字节数。"""
+        paths = [self._db_path, self._db_path.with_name(self._db_path.name + "-wal")]
+        return sum(path.stat().st_size for path in paths if path.exists())
+
+    def optimize(self) -> None:
+        """合并 FTS5 段并截断 WAL，适合批量导入之后调用。"""
+        with self._lock, self._connect() as conn:
+            conn.execute("INSERT INTO fts_text(fts_text) VALUES ('optimize')")
+            conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+
+    # ── Search ──
+
+    @staticmethod
+    def _match_clause(q: Optional[str], index_name: str, params: Dict[str, Any]) -> Tuple[str, str, str, List[Any]]:
+        """查询与 filter 编译为 (FROM 子句, 排序得分表达式, WHERE 子句, 参数)。"""
+        match = build_match_query(q or "")
+        where = ["d.index_name = ?"]
+        args: List[Any] = [index_name]
+        if match is not None:
+            source = "fts_text CROSS JOIN fts_docs d ON d.row_id = fts_text.rowid"
+            where.append("fts_text MATCH ?")
+            args.append(match)
+            rank = "bm25(fts_text)"
+        else:
+            source = "fts_docs d"
+            rank = "0.0"
+        filter_sql, filter_args = compile_filter(params.get("filter"))
+        if filter_sql:
+            where.append(filter_sql)
+            args.extend(filter_args)
+        return source, rank, " AND ".join(where), args
+
+    def _query(
+        self, conn: sqlite3.Connection, q: Optional[str], index_name: str, params: Dict[str, Any], limit: int, offset: int
+    ) -> Tuple[List[Tuple[float, Dict[str, Any]]], int]:
+        source, rank, where_sql, args = self._match_clause(q, index_name, params)
+        order = _compile_sort(params.get("sort")) or f"{rank}, d.date_ts DESC, d.msg_id DESC"
+        distinct = _distinct_key(params.get("distinct"))
+
+        try:
+            if distinct is None:
+                total = int(conn.execute(f"SELECT COUNT(*) FROM {source} WHERE {where_sql}", args).fetchone()[0])
+                rows = conn.execute(
+                    f"SELECT {rank}, d.document FROM {source} WHERE {where_sql} ORDER BY {order} LIMIT ? OFFSET ?",
+                    (*args, limit, offset),
+                ).fetchall()
+            else:
+                # distinct：每个取值只保留排序最靠前的一条，分页与总数都按折叠后的结果计算
+                count_sql = f"SELECT COUNT(DISTINCT {distinct}) FROM {source} WHERE {where_sql}"
+                total = int(conn.execute(count_sql, args).fetchone()[0])
+                # bm25() is not allowed inside window functions: rank in a subquery, then order on its columns.
+                ranked_order = order.replace(rank, "score").replace("d.", "")
+                rows = conn.execute(
+                    f"""
+                    SELECT score, document FROM (
+                        SELECT score, document, ROW_NUMBER() OVER (ORDER BY {ranked_order}) AS position,
+                            ROW_NUMBER() OVER (PARTITION BY group_key ORDER BY {ranked_order}) AS group_rank
+                        FROM (SELECT {rank} AS score, d.*, {distinct} AS group_key FROM {source} WHERE {where_sql})
+                    )
+                    WHERE group_rank = 1 ORDER BY position LIMIT ? OFFSET ?
+                    """,
+                    (*args, limit, offset),
+                ).fetchall()
+        except sqlite3.OperationalError as e:
+            raise MeiliSearchAPIError(f"SQLite FTS query failed: {e}", status_code=400, error_code="invalid_search_q") from e
+        return [(float(score), json.loads(document)) for score, document in rows], total
+
+    def _facet_distribution(
+        self, conn: sqlite3.Connection, q: Optional[str], index_name: str, params: Dict[str, Any]
+    ) -> Dict[str, Dict[str, int]]:
+        """`facets` 参数：每个属性按命中数降序取前 maxValuesPerFacet 个取值（与 sortFacetValuesBy=count 一致）。"""
+        source, _, where_sql, args = self._match_clause(q, index_name, params)
+        distribution: Dict[str, Dict[str, int]] = {}
+        for attribute in params.get("facets") or []:
+            column = _FIELD_COLUMNS.get(attribute)
+            if column is None:
+                raise MeiliSearchAPIError(
+                    f"invalid facet: attribute '{attribute}' is not filterable",
+                    status_code=400,
+                    error_code="invalid_search_facets",
+                )
+            rows = conn.execute(
+                f"SELECT {column}, COUNT(*) AS hits FROM {source} WHERE {where_sql} AND {column} IS NOT NULL "
+                f"GROUP BY {column} ORDER BY hits DESC, {column} LIMIT ?",
+                (*args, _MAX_VALUES_PER_FACET),
+            ).fetchall()
+            distribution[attribute] = {str(value): int(count) for value, count in rows}
+        return distribution
+
+    def search(self, query: Optional[str], index_name: str = "telegram", **kwargs: Any) -> Dict[str, Any]:
+        """
+        搜索文档，返回与 MeiliSearch 相同结构的结果（hits/estimatedTotalHits/processingTimeMs）
+
+        Raises:
+            MeiliSearchAPIError: filter/sort 非法
+        """
+        started_at = time.perf_counter()
+        limit = int(kwargs.get("limit", 20))
+        offset = int(kwargs.get("offset", 0))
+        facets = None
+        with self._connect() as conn:
+            rows, total = self._query(conn, query, index_name, kwargs, limit, offset)
+            if kwargs.get("facets"):
+                facets = self._facet_distribution(conn, query, index_name, kwargs)
+        hits = [format_hit(doc, query, kwargs) for _, doc in rows]
+        result = {
+            "hits": hits,
+            "query": query or "",
+            "limit": limit,
+            "offset": offset,
+            "estimatedTotalHits": total,
+            "processingTimeMs": int((time.perf_counter() - started_at) * 1000),
+        }
+        if facets is not None:
+            result["facetDistribution"] = facets
+        return result
+
+    def multi_search(self, queries: List[Dict[str, Any]], federation: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """批量搜索；提供 federation 时按 bm25 得分（或显式 sort）合并后统一分页。"""
+        if federation is None:
+            results = []
+            for item in queries:
+                params = {key: value for key, value in item.items() if key not in ("indexUid", "q")}
+                result = self.search(item.get("q"), item.get("indexUid", "telegram"), **params)
+                results.append({"indexUid": item.get("indexUid", "telegram"), **result})
+            return {"results": results}
+
+        started_at = time.perf_counter()
+        limit = int(federation.get("limit", 20))
+        offset = int(federation.get("offset", 0))
+        merged: List[Tuple[float, Dict[str, Any], Dict[str, Any]]] = []
+        sort_terms: List[Tuple[str, bool]] = []
+        total = 0
+        with self._connect() as conn:
+            for item in queries:
+                params = {key: value for key, value in item.items() if key not in ("indexUid", "q", "limit", "offset")}
+                rows, count = self._query(conn, item.get("q"), item.get("indexUid", "telegram"), params, limit + offset, 0)
+                total += count
+                sort_terms = sort_terms or _parse_sort(params.get("sort"))
+                for score, doc in rows:
+                    merged.append((score, doc, format_hit(doc, item.get("q"), params)))
+        # 与单条查询的顺序一致：先按时间倒序打底，再叠加 bm25 或显式 sort（稳定排序，末项先排）
+        merged.sort(
+            key=lambda entry: (_to_int(entry[1].get("date_ts")) or 0, _to_int(entry[1].get("msg_id")) or 0),
+            reverse=True,
+        )
+        if not sort_terms:
+            merged.sort(key=lambda entry: entry[0])
+        for column, descending in reversed(sort_terms):
+            # NULL 视为最小值，与 SQLite 的排序一致
+            merged.sort(key=lambda entry: self._sort_value(entry[1], column), reverse=descending)
+        return {
+            "hits": [hit for _, _, hit in merged[offset : offset + limit]],
+            "limit": limit,
+            "offset": offset,
+            "estimatedTotalHits": total,
+            "processingTimeMs": int((time.perf_counter() - started_at) * 1000),
+        }
+
@@ -13,7 +13,7 @@ import os
 import time
 import tracemalloc
 from collections.abc import Awaitable, Callable
-from typing import Any, cast
+from typing import TYPE_CHECKING, Any, cast
 
 import pytz
 from telethon import TelegramClient, events
@@ -36,10 +36,16 @@ from telethon.errors import (
 from telethon.sessions import StringSession
 from telethon.tl.types import Channel, Chat, Message, ReactionCount, ReactionCustomEmoji, ReactionEmoji, User
 
+from tg_search.config.activity_store import ActivityStore
+from tg_search.config.fingerprint_store import FingerprintStore
+from tg_search.config.metadata_store import ChatMeta, MetadataStore
 from tg_search.config.settings import (
     APP_HASH,
     APP_ID,
     BATCH_MSG_UNM,
+    CHUNK_OVERLAP_CHARS,
+    CHUNK_SIZE_CHARS,
+    CHUNK_TEXT_OVER_CHARS,
     NOT_RECORD_MSG,
     PROXY,
     SESSION_STRING,
@@ -47,12 +53,20 @@ from tg_search.config.settings import (
     TIME_ZONE,
     IPv6,
 )
+from tg_search.core.batch_writer import AdaptiveBatchSizer, BatchWriter
+from tg_search.core.chunking import chunk_counts, chunk_documents
+from tg_search.core.hot_tier import HotTier
 from tg_search.core.logger import setup_logger
+from tg_search.core.meilisearch import MeiliSearchConnectionError, MeiliSearchTimeoutError
+from tg_search.core.sharding import ShardRouter
 from tg_search.utils.message_tracker import (
     update_latest_msg_config4_meili,
 )
 from tg_search.utils.permissions import is_allowed
 
+if TYPE_CHECKING:
+    from tg_search.services.watch_service import WatchService
+
 tz = pytz.timezone(TIME_ZONE)
 logger = setup_logger()
 
@@ -174,16 +188,26 @@ async def serialize_reactions(message: Message):
     return reactions_dict if reactions_dict else None
 
 
-async def serialize_message(message: Any, not_edited: bool = True) -> dict | None:
+async def serialize_message(
+    message: Any,
+    not_edited: bool = True,
+    metadata_store: MetadataStore | None = None,
+    fingerprint_store: FingerprintStore | None = None,
+) -> dict | None:
     """
     序列化 Telegram 消息为字典
 
+    文档中只保留 chat.id/chat.type 与 from_user.id；标题、用户名写入 metadata_store，
+    由搜索层在读取时关联，避免在每条文档中重复存储。
+
     Args:
         message: Telethon Message 对象
         not_edited: 是否为原始消息（非编辑版本）
+        metadata_store: 会话/发送者元数据存储（可选）
+        fingerprint_store: 近似重复指纹存储（可选）；提供时文档带 dup_cluster 字段
 
     Returns:
-        序列化后的消息字典，失败返回 None
+        序列化后的消息字典，失败或按去重策略跳过时返回 None
     """
     try:
         chat_future = cast(Awaitable[Any], message.get_chat())
@@ -196,20 +220,40 @@ async def serialize_message(message: Any, not_edited: bool = True) -> dict | Non
         if chat_id is None or msg_id is None or msg_date is None:
             return None
 
+        chat_meta = await serialize_chat(chat)
+        sender_meta = await serialize_sender(sender)
+        if metadata_store is not None:
+            metadata_store.record_chat(chat_meta)
+            metadata_store.record_user(sender_meta)
+
         reactions = await serialize_reactions(message)
         edit_date = getattr(message, "edit_date", None)
         edit_ts = int(edit_date.timestamp()) if edit_date else 0
         text = getattr(message, "text", None) or getattr(message, "caption", None)
-        return {
-            "id": f"{chat_id}-{msg_id}" if not_edited else f"{chat_id}-{msg_id}-{edit_ts}",
-            "chat": await serialize_chat(chat),
+        doc_id = f"{chat_id}-{msg_id}" if not_edited else f"{chat_id}-{msg_id}-{edit_ts}"
+        document = {
+            "id": doc_id,
+            "chat": {"id": chat_meta["id"], "type": chat_meta["type"]} if chat_meta else None,
             "date": msg_date.astimezone(tz).isoformat(),
+            # 数值型字段：过滤/排序/游标分页均基于整数比较，避免 ISO 字符串比较
+            "date_ts": int(msg_date.timestamp()),
+            "chat_id": int(chat_id),
+            "msg_id": int(msg_id),
             "text": text,
-            "from_user": await serialize_sender(sender),
+            "from_user": {"id": sender_meta["id"]} if sender_meta else None,
             "reactions": reactions,
             "reactions_scores": await calculate_reaction_score(reactions),
             "text_len": len(text or ""),
         }
+        if fingerprint_store is not None:
+            # SQLite 事务（BEGIN IMMEDIATE）可能等锁，放到线程里避免阻塞事件循环
+            decision = await asyncio.to_thread(fingerprint_store.assign, doc_id, text)
+            if decision is not None and decision.skip:
+                logger.debug(f"Skipping exact duplicate {doc_id} of {decision.cluster}")
+                return None
+            # 没有指纹的短消息自成一簇，distinct 折叠时不会被合并
+            document["dup_cluster"] = decision.cluster if decision is not None else doc_id
+        return document
     except NETWORK_ERRORS as e:
         logger.warning(f"Network error serializing message {message.id}: {type(e).__name__}: {str(e)}")
         return None
@@ -228,10 +272,24 @@ class TelegramUserBot:
         *,
         policy_loader: Callable[[], Awaitable[tuple[list[int], list[int]]]] | None = None,
         policy_ttl_sec: int = 10,
+        metadata_store: MetadataStore | None = None,
+        shard_router: ShardRouter | None = None,
+        batch_writer: BatchWriter | None = None,
+        hot_tier: HotTier | None = None,
+        watch_service: "WatchService | None" = None,
+        fingerprint_store: FingerprintStore | None = None,
+        activity_store: ActivityStore | None = None,
     ):
         """
         初始化 Telegram 客户端
         :param meili_client: MeiliSearch 客户端
+        :param metadata_store: 会话/发送者元数据存储
+        :param shard_router: 月分片路由器（启用分片时按消息日期写入对应分片）
+        :param batch_writer: 历史消息批量写入器（失败批次二分隔离 + 自适应批量大小）
+        :param hot_tier: 实时消息热数据层（写入后立即可搜索）
+        :param watch_service: 关注查询匹配服务（实时新消息命中后推送通知）
+        :param fingerprint_store: 近似重复指纹存储（启用去重时为文档分配 dup_cluster）
+        :param activity_store: Dashboard 会话活动预聚合（写入时累加每小时消息数与关键词）
         """
         # Telegram API 认证信息
         self.api_id = APP_ID
@@ -242,6 +300,17 @@ class TelegramUserBot:
             self.session = "session/user_bot_session"
 
         self.meili = meili_client
+        self.metadata_store = metadata_store
+        self.shard_router = shard_router
+        self.hot_tier = hot_tier
+        self.watch_service = watch_service
+        self.fingerprint_store = fingerprint_store
+        self.activity_store = activity_store
+        self.batch_writer = batch_writer or BatchWriter(
+            meili_client,
+            shard_router=shard_router,
+            sizer=AdaptiveBatchSizer(BATCH_MSG_UNM),
+        )
         self.white_list: list[int] = []
         self.black_list: list[int] = []
         self._policy_loader = policy_loader
@@ -285,6 +354,7 @@ class TelegramUserBot:
         try:
             await cast(Awaitable[Any], self.client.start())
             await self.refresh_policy(force=True)
+            await self.refresh_dialog_metadata()
             logger.info("Bot started successfully")
             self.register_handlers()
         except FloodWaitError as e:
@@ -361,6 +431,28 @@ class TelegramUserBot:
         except Exception as e:
             logger.warning(f"Failed to refresh policy: {type(e).__name__}: {e}")
 
+    async def refresh_dialog_metadata(self) -> None:
+        """从 Telegram 会话列表刷新会话标题/用户名（改名后无需重建索引）。"""
+        if self.metadata_store is None:
+            return
+        try:
+            chats: list[ChatMeta] = []
+            async for dialog in self.client.iter_dialogs():
+                data = await serialize_chat(getattr(dialog, "entity", None))
+                if data is not None and data.get("id") is not None:
+                    chats.append(
+                        ChatMeta(
+                            id=int(data["id"]),
+                            type=data.get("type"),
+                            title=data.get("title"),
+                            username=data.get("username"),
+                        )
+                    )
+            changed = self.metadata_store.upsert_chats(chats)
+            logger.info("Dialog metadata refreshed: dialogs=%d changed=%d", len(chats), changed)
+        except Exception as e:
+            logger.warning(f"Failed to refresh dialog metadata: {type(e).__name__}: {e}")
+
     async def is_allowed_peer(self, peer_id: int | None) -> bool:
         if peer_id is None:
             return False
@@ -386,10 +478,14 @@ class TelegramUserBot:
     async def _cache_message(self, message: Any, not_edited: bool = True):
         """缓存消息到 MeiliSearch"""
         try:
-            serialized = await serialize_message(message, not_edited)
+            serialized = await serialize_message(message, not_edited, self.metadata_store, self.fingerprint_store)
             if serialized:
-                result = await asyncio.to_thread(self.meili.add_documents, [serialized])
+                # 原地编辑（沿用原文档 id）时，旧版本可能比新版本多出分块
+                replace_chunks = not_edited and getattr(message, "edit_date", None) is not None
+                result = await asyncio.to_thread(self._write_documents, [serialized], replace_chunks=replace_chunks)
                 logger.info(result)
+                if not_edited and self.watch_service is not None:
+                    await self.watch_service.evaluate(serialized)
         except NETWORK_ERRORS as e:
             logger.warning(f"Network error caching message {message.id}: {type(e).__name__}")
         except Exception as e:
@@ -454,14 +550,16 @@ class TelegramUserBot:
                 if dialog_id is not None:
                     last_seen_msg_id = int(message.id)
 
-                serialized = await serialize_message(message)
+                serialized = await serialize_message(
+                    message, metadata_store=self.metadata_store, fingerprint_store=self.fingerprint_store
+                )
                 if serialized is not None:
                     messages.append(serialized)
 
                 total_messages += 1
 
-                # 批量处理
-                if len(messages) >= batch_size:
+                # 批量处理（载荷过大时自适应批量大小会临时调小）
+                if len(messages) >= self._effective_batch_size(batch_size):
                     if last_seen_msg_id is not None:
                         await _flush_latest_msg_id(last_seen_msg_id)
                     await self._process_message_batch(messages)
@@ -520,16 +618,81 @@ class TelegramUserBot:
             logger.error(f"Error downloading history: {type(e).__name__}: {str(e)}")
             raise
 
+    @staticmethod
+    def _chunk(documents: list[dict]) -> list[dict]:
+        """超长消息拆成分块文档（CHUNK_TEXT_OVER_CHARS 为 0 时原样返回）。"""
+        return chunk_documents(
+            documents,
+            max_chars=CHUNK_TEXT_OVER_CHARS,
+            chunk_chars=CHUNK_SIZE_CHARS,
+            overlap=CHUNK_OVERLAP_CHARS,
+        )
+
+    def _record_activity(self, documents: list[dict]) -> None:
+        """累加 Dashboard 预聚合（整条消息，分块之前）；失败不影响消息写入。"""
+        if self.activity_store is None:
+            return
+        try:
+            self.activity_store.record(documents)
+        except Exception as e:
+            logger.warning(f"Error recording dashboard activity: {type(e).__name__}: {str(e)}")
+
+    def _write_documents(self, documents: list[dict], *, replace_chunks: bool = False) -> Any:
+        """
+        写入文档：启用分片时按日期路由到 telegram_YYYYMM，否则写入默认索引；MeiliSearch 不可用时暂存。
+
+        `replace_chunks` 为 True 时（原地编辑）按 parent_id 删除旧版本多出的分块。
+        """
+        if self.hot_tier is not None:
+            # 热数据层保存整条消息，只有持久索引按分块写入
+            self.hot_tier.add(documents)
+        self._record_activity(documents)
+        documents = self._chunk(documents)
+        replace_chunks = replace_chunks and CHUNK_TEXT_OVER_CHARS > 0
+        self.batch_writer.mirror(documents, replace_chunks=replace_chunks)
+        if self.batch_writer.buffered:
+            self.batch_writer.drain()
+        try:
+            if self.shard_router is not None:
+                result = self.shard_router.add_documents(documents)
+            else:
+                result = self.meili.add_documents(documents)
+        except (MeiliSearchConnectionError, MeiliSearchTimeoutError):
+            return f"buffered {self.batch_writer.buffer(documents)} documents while MeiliSearch is unavailable"
+        if replace_chunks:
+            self._delete_stale_chunks(documents)
+        return result
+
+    def _delete_stale_chunks(self, documents: list[dict]) -> None:
+        """删除编辑前多出的分块（排在新分块写入之后执行）；失败只记录日志，旧分块在下次编辑时再清理。"""
+        groups = self.shard_router.route(documents) if self.shard_router is not None else {"telegram": documents}
+        for index_name, docs in groups.items():
+            try:
+                self.meili.delete_stale_chunks(chunk_counts(docs), index_name)
+            except Exception as e:
+                logger.warning(f"Error deleting stale chunks on '{index_name}': {type(e).__name__}: {str(e)}")
+
+    def _effective_batch_size(self, batch_size: int) -> int:
+        sizer = self.batch_writer.sizer
+        return min(batch_size, sizer.current) if sizer is not None else batch_size
+
     async def _process_message_batch(self, messages: list):
-        """批量处理消息"""
+        """批量处理消息：整批被拒绝时二分隔离坏文档，其余照常写入"""
         # 过滤掉 None 值
         valid_messages = [m for m in messages if m is not None]
         if not valid_messages:
             return
 
         try:
-            await asyncio.to_thread(self.meili.add_documents, valid_messages)
-            logger.info(f"Processing batch of {len(valid_messages)} messages")
+            if self.hot_tier is not None:
+                # 近期的历史消息同样先进入热数据层，MeiliSearch 建好索引前即可搜索
+                await asyncio.to_thread(self.hot_tier.add, valid_messages)
+            await asyncio.to_thread(self._record_activity, valid_messages)
+            result = await asyncio.to_thread(self.batch_writer.write, self._chunk(valid_messages))
+            logger.info(
+                f"Processing batch of {len(valid_messages)} messages "
+                f"(indexed={result.indexed}, unconfirmed={result.unconfirmed}, dead_lettered={result.dead_lettered})"
+            )
         except NETWORK_ERRORS as e:
             logger.warning(f"Network error processing batch: {type(e).__name__}")
         except Exception as e:
@@ -144,14 +144,24 @@ async def main(
     service_container = services or build_service_container()
     meili = service_container.meili_client
     policy_service = service_container.config_policy_service
+    if service_container.index_maintenance_service.start_maintenance():
+        logger.info("Index settings changed; shadow index rebuild started in background")
 
     async def _load_policy_lists() -> tuple[list[int], list[int]]:
         return await policy_service.get_policy_lists(refresh=True)
 
+    local_search = service_container.local_search
     user_bot_client = TelegramUserBot(
-        meili,
+        service_container.search_index if local_search else meili,
         policy_loader=_load_policy_lists,
         policy_ttl_sec=POLICY_REFRESH_TTL_SEC,
+        metadata_store=service_container.metadata_store,
+        shard_router=None if local_search else service_container.shard_router,
+        batch_writer=service_container.batch_writer,
+        hot_tier=service_container.hot_tier,
+        watch_service=service_container.watch_service,
+        fingerprint_store=service_container.fingerprint_store,
+        activity_store=service_container.activity_store,
     )
     unsubscribe_policy = policy_service.subscribe(
         lambda policy: user_bot_client.apply_policy_snapshot(policy.white_list, policy.black_list)
@@ -1,8 +1,11 @@
 """Service-layer exports."""
 
+from tg_search.services.admission import AdmissionController
+from tg_search.services.cache_warmer import CacheWarmer
 from tg_search.services.config_policy_service import ConfigPolicyService
 from tg_search.services.container import ServiceContainer, build_service_container
 from tg_search.services.contracts import (
+    BackfillSnapshot,
     DomainError,
     IndexSnapshot,
     PolicyChangeResult,
@@ -16,15 +19,21 @@ from tg_search.services.contracts import (
     StorageSnapshot,
     SystemSnapshot,
 )
+from tg_search.services.index_maintenance_service import IndexMaintenanceService
 from tg_search.services.observability_service import ObservabilityService
 from tg_search.services.runtime_control_service import RuntimeControlService
 from tg_search.services.search_service import SearchService
+from tg_search.services.watch_service import WatchService
 
 __all__ = [
+    "AdmissionController",
+    "CacheWarmer",
     "ConfigPolicyService",
+    "IndexMaintenanceService",
     "ObservabilityService",
     "RuntimeControlService",
     "SearchService",
+    "WatchService",
     "ServiceContainer",
     "build_service_container",
     "DomainError",
@@ -39,4 +48,5 @@ __all__ = [
     "ProgressSnapshot",
     "RuntimeActionResult",
     "RuntimeStatus",
+    "BackfillSnapshot",
 ]
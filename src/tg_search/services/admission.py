@@ -0,0 +1,225 @@
+"""
+搜索准入控制：SearchService 之前的按用户令牌桶限流与公平排队
+
+- 令牌桶：每个调用方（`bot:<user_id>` / `api:<user_id>`）独立计费，按查询代价扣减
+- 并发槽：全局并发上限，槽满时按优先级与调用方已占用槽数排队，排队有长度与超时上限
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+
+from tg_search.core.logger import setup_logger
+from tg_search.core.sqlite_fts import is_cjk
+from tg_search.services.contracts import AdmissionStats, DomainError, SearchQuery
+
+logger = setup_logger()
+
+QueuedCallback = Callable[[int], Awaitable[None]]
+
+# 代价上限：单次请求最多消耗这么多令牌
+_MAX_COST = 8
+# 匹配全部（空查询 / `*`）时每跳过这么多条结果多计 1 点代价
+_MATCH_ALL_OFFSET_STEP = 200
+# 闲置多久的令牌桶可以回收（此时桶必然已满）
+_BUCKET_IDLE_SEC = 600
+
+
+def estimate_search_cost(query: SearchQuery) -> int:
+    """
+    估算一次搜索的相对代价（令牌数）。
+
+    - 只有单个 CJK 字符的查询会命中中文索引的大部分文档并逐条高亮：代价 4
+    - 匹配全部（`*` / 空查询）时 offset 越深扫描越多：每跳过 200 条 +1；游标翻页不跳过，保持低代价
+    - 请求 facets：+1，未命中缓存的分布统计是一次额外（不取结果）的请求
+    """
+    terms = query.q.split()
+    cost = 1
+    if terms and all(len(term) == 1 and is_cjk(term) for term in terms):
+        cost = 4
+    if query.q.strip() in ("", "*") and query.cursor is None:
+        cost += query.offset // _MATCH_ALL_OFFSET_STEP
+    if query.facets:
+        cost += 1
+    return min(cost, _MAX_COST)
+
+
+def estimate_export_cost(query: SearchQuery) -> int:
+    """
+    估算一次流式导出的代价：导出会翻完全部匹配结果，并在整个流期间占用并发槽。
+
+    限定了会话或日期范围的导出在搜索代价上 +2；不限范围的导出直接按上限计费。
+    """
+    if query.chat_id is not None or query.date_from is not None or query.date_to is not None:
+        return min(estimate_search_cost(query) + 2, _MAX_COST)
+    return _MAX_COST
+
+
+@dataclass(slots=True)
+class _TokenBucket:
+    tokens: float
+    updated_at: float
+
+
+@dataclass(slots=True)
+class _Waiter:
+    future: asyncio.Future[None]
+    principal: str
+
+
+class AdmissionController:
+    """
+    按调用方的令牌桶 + 有上限的并发搜索槽。
+
+    调用方是不透明字符串，如 `bot:<user_id>`、`api:<user_id>`。
+    槽位占满时请求进入优先队列，排序键为（优先级，该调用方正在执行的搜索数，到达顺序），
+    翻页回调优先，单个高频用户也无法饿死其他用户。
+    """
+
+    def __init__(
+        self,
+        *,
+        rate_per_sec: float,
+        burst: int,
+        max_concurrent: int,
+        max_queue: int,
+        queue_timeout_sec: float,
+    ) -> None:
+        self._rate_per_sec = max(float(rate_per_sec), 0.01)
+        self._burst = max(int(burst), 1)
+        self._max_concurrent = max(int(max_concurrent), 1)
+        self._max_queue = max(int(max_queue), 0)
+        self._queue_timeout_sec = max(float(queue_timeout_sec), 0.0)
+        self._buckets: dict[str, _TokenBucket] = {}
+        self._in_flight = 0
+        self._in_flight_by: dict[str, int] = {}
+        self._waiters: list[tuple[int, int, int, _Waiter]] = []
+        self._seq = itertools.count()
+        self._admitted = 0
+        self._queued_total = 0
+        self._rejected_rate_limited = 0
+        self._rejected_overloaded = 0
+        self._queue_wait_ms_total = 0.0
+
+    @property
+    def queued(self) -> int:
+        return sum(1 for *_, waiter in self._waiters if not waiter.future.done())
+
+    def _take_tokens(self, principal: str, cost: int) -> None:
+        now = time.monotonic()
+        if len(self._buckets) > 1024:
+            idle = [key for key, bucket in self._buckets.items() if now - bucket.updated_at > _BUCKET_IDLE_SEC]
+            for key in idle:
+                self._buckets.pop(key, None)
+        bucket = self._buckets.get(principal)
+        if bucket is None:
+            bucket = self._buckets[principal] = _TokenBucket(tokens=float(self._burst), updated_at=now)
+        bucket.tokens = min(float(self._burst), bucket.tokens + (now - bucket.updated_at) * self._rate_per_sec)
+        bucket.updated_at = now
+        cost = min(max(int(cost), 1), self._burst)
+        if bucket.tokens < cost:
+            self._rejected_rate_limited += 1
+            retry_after = (cost - bucket.tokens) / self._rate_per_sec
+            logger.info(f"[Admission] rate limited principal={principal} cost={cost} retry_after_sec={retry_after:.1f}")
+            raise DomainError("search_rate_limited", "too many searches", detail=f"{max(retry_after, 0.1):.1f}")
+        bucket.tokens -= cost
+
+    def _occupy(self, principal: str) -> None:
+        self._in_flight_by[principal] = self._in_flight_by.get(principal, 0) + 1
+
+    def _release(self, principal: str) -> None:
+        remaining = self._in_flight_by.get(principal, 1) - 1
+        if remaining > 0:
+            self._in_flight_by[principal] = remaining
+        else:
+            self._in_flight_by.pop(principal, None)
+        # 槽位直接交给下一个仍在等待的请求，避免被新到的请求抢走
+        while self._waiters:
+            *_, waiter = heapq.heappop(self._waiters)
+            if not waiter.future.done():
+                self._occupy(waiter.principal)
+                waiter.future.set_result(None)
+                return
+        self._in_flight -= 1
+
+    async def _acquire_slot(self, principal: str, priority: bool, on_queued: QueuedCallback | None) -> None:
+        if self._in_flight < self._max_concurrent and self.queued == 0:
+            self._in_flight += 1
+            self._occupy(principal)
+            return
+        position = self.queued
+        if position >= self._max_queue:
+            self._rejected_overloaded += 1
+            logger.warning(
+                f"[Admission] overloaded principal={principal} in_flight={self._in_flight} queued={position}"
+            )
+            raise DomainError("search_overloaded", "search queue is full", detail=f"{self._queue_timeout_sec:.1f}")
+
+        waiter = _Waiter(future=asyncio.get_running_loop().create_future(), principal=principal)
+        entry = (0 if priority else 1, self._in_flight_by.get(principal, 0), next(self._seq), waiter)
+        heapq.heappush(self._waiters, entry)
+        self._queued_total += 1
+        started = time.monotonic()
+        try:
+            if on_queued is not None:
+                await on_queued(position + 1)
+            await asyncio.wait_for(asyncio.shield(waiter.future), timeout=self._queue_timeout_sec)
+        except BaseException as exc:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # 放弃等待的同时槽位恰好交到手上：转交给下一个等待者
+                self._release(principal)
+            else:
+                waiter.future.cancel()
+            if isinstance(exc, asyncio.TimeoutError):
+                self._rejected_overloaded += 1
+                logger.warning(
+                    f"[Admission] queue timeout principal={principal} waited_sec={time.monotonic() - started:.1f}"
+                )
+                raise DomainError(
+                    "search_overloaded", "timed out waiting for a search slot", detail=f"{self._queue_timeout_sec:.1f}"
+                ) from exc
+            raise
+        finally:
+            self._queue_wait_ms_total += (time.monotonic() - started) * 1000
+
+    @asynccontextmanager
+    async def admit(
+        self,
+        principal: str,
+        *,
+        cost: int = 1,
+        priority: bool = False,
+        on_queued: QueuedCallback | None = None,
+    ) -> AsyncIterator[None]:
+        """
+        在准入控制下执行 with 块内的搜索。
+
+        令牌桶耗尽时抛出 `DomainError("search_rate_limited")`，队列已满或排队超时抛出
+        `DomainError("search_overloaded")`；`detail` 为建议的重试间隔（秒）。
+        需要排队时会 await 一次 `on_queued(position)`。
+        """
+        self._take_tokens(principal, cost)
+        await self._acquire_slot(principal, priority, on_queued)
+        self._admitted += 1
+        try:
+            yield
+        finally:
+            self._release(principal)
+
+    def stats(self) -> AdmissionStats:
+        return AdmissionStats(
+            max_concurrent=self._max_concurrent,
+            in_flight=self._in_flight,
+            queued=self.queued,
+            admitted=self._admitted,
+            queued_total=self._queued_total,
+            rejected_rate_limited=self._rejected_rate_limited,
+            rejected_overloaded=self._rejected_overloaded,
+            avg_queue_wait_ms=round(self._queue_wait_ms_total / self._queued_total, 2) if self._queued_total else 0.0,
+        )
@@ -0,0 +1,95 @@
+"""
+Background warming of the presentation cache from the query log.
+
+After a restart the presentation cache is empty, so the first users of the most
+common queries pay the full MeiliSearch latency. The warmer loads the top-N
+logged queries at startup, and again whenever the index write generation moves
+(new messages make cached pages stale). It paces its queries and backs off while
+the batch writer has buffered documents, so it does not compete with ingest.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from tg_search.core.batch_writer import BatchWriter
+from tg_search.core.logger import setup_logger
+from tg_search.services.search_service import IndexGeneration, SearchService
+
+logger = setup_logger()
+
+
+class CacheWarmer:
+    """Pre-populate the presentation cache with the most frequent logged queries."""
+
+    def __init__(
+        self,
+        search_service: SearchService,
+        *,
+        top_n: int,
+        interval_sec: float,
+        pace_sec: float = 0.0,
+        batch_writer: BatchWriter | None = None,
+    ) -> None:
+        self._search_service = search_service
+        self._top_n = max(int(top_n), 0)
+        self._interval_sec = max(float(interval_sec), 1.0)
+        self._pace_sec = max(float(pace_sec), 0.0)
+        self._batch_writer = batch_writer
+        self._warmed_generation: IndexGeneration | None = None
+        self._task: asyncio.Task[None] | None = None
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    def start(self) -> None:
+        """Start the warming loop in the background; a running loop is left untouched."""
+        if self.running or self._top_n <= 0:
+            return
+        self._task = asyncio.create_task(self.run())
+        logger.info("[CacheWarmer] started top_n=%d interval_sec=%.0f", self._top_n, self._interval_sec)
+
+    async def stop(self) -> None:
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def _ingest_busy(self) -> bool:
+        return self._batch_writer is not None and self._batch_writer.buffered > 0
+
+    async def warm_once(self) -> int | None:
+        """
+        Warm the cache if the index generation changed since the last complete run.
+
+        Returns the number of queries loaded, or None when nothing needed doing
+        (generation unchanged) or ingest was busy.
+        """
+        generation = await self._search_service.cache_generation()
+        if generation == self._warmed_generation:
+            return None
+        if self._ingest_busy():
+            logger.info("[CacheWarmer] deferred reason=ingest_busy")
+            return None
+        warmed = await self._search_service.warm_cache(
+            self._top_n,
+            pace_sec=self._pace_sec,
+            should_pause=self._ingest_busy,
+        )
+        # A run cut short by ingest is retried on the next tick.
+        if not self._ingest_busy():
+            self._warmed_generation = generation
+        return warmed
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.warm_once()
+            except Exception as exc:
+                logger.warning("[CacheWarmer] warm_failed error=%s: %s", type(exc).__name__, exc)
+            await asyncio.sleep(self._interval_sec)
@@ -0,0 +1,182 @@
+"""
+Compact binary codec for Bot pagination callbacks (`pb:` payloads).
+
+Telegram limits callback data to 64 bytes. The JSON+base64 `page:` format overflows
+on almost any CJK query, so the query is packed instead:
+
+    b"pb:" | flags:u8 | page:varint | page_size:varint | fields... | query
+
+- `flags` marks which optional filters follow, in bit order:
+  chat_id (zigzag varint), chat_type (one-byte dictionary code),
+  date_from / date_to (zigzag varint epoch seconds),
+  sender_username / index_name (varint length + UTF-8).
+- The query text is the UTF-8 tail, so it needs no length prefix.
+- With `_F_DIGEST` set, the body is an 8-byte digest that references the full query
+  in `CallbackQueryStore`. The bot uses that form when the query is too long to
+  inline. Such payloads survive restarts, unlike the old in-memory `pagek:` tokens.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from datetime import datetime, timezone
+
+PREFIX = b"pb:"
+MAX_CALLBACK_BYTES = 64
+
+_F_CHAT_ID = 1 << 0
+_F_CHAT_TYPE = 1 << 1
+_F_DATE_FROM = 1 << 2
+_F_DATE_TO = 1 << 3
+_F_SENDER = 1 << 4
+_F_INDEX = 1 << 5
+_F_DIGEST = 1 << 6
+
+_CHAT_TYPES = ("private", "group", "channel")
+_DEFAULT_INDEX = "telegram"
+
+
+@dataclass(slots=True)
+class PageCallback:
+    """Decoded pagination callback; `digest` is set instead of the query fields for stored queries."""
+
+    page: int
+    page_size: int
+    q: str = ""
+    chat_id: int | None = None
+    chat_type: str | None = None
+    date_from_ts: int | None = None
+    date_to_ts: int | None = None
+    sender_username: str | None = None
+    index_name: str = _DEFAULT_INDEX
+    digest: int | None = None
+
+    @staticmethod
+    def to_datetime(ts: int | None) -> datetime | None:
+        return datetime.fromtimestamp(ts, timezone.utc) if ts is not None else None
+
+
+def _put_varint(out: bytearray, value: int) -> None:
+    if value < 0:
+        raise ValueError("varint must be non-negative")
+    while True:
+        byte = value & 0x7F
+        value >>= 7
+        if value:
+            out.append(byte | 0x80)
+        else:
+            out.append(byte)
+            return
+
+
+def _put_zigzag(out: bytearray, value: int) -> None:
+    _put_varint(out, value * 2 if value >= 0 else -value * 2 - 1)
+
+
+def _put_text(out: bytearray, text: str) -> None:
+    raw = text.encode("utf-8")
+    _put_varint(out, len(raw))
+    out.extend(raw)
+
+
+class _Reader:
+    __slots__ = ("_data", "_pos")
+
+    def __init__(self, data: bytes) -> None:
+        self._data = data
+        self._pos = 0
+
+    def varint(self) -> int:
+        value = 0
+        shift = 0
+        while True:
+            if self._pos >= len(self._data) or shift > 63:
+                raise ValueError("truncated varint")
+            byte = self._data[self._pos]
+            self._pos += 1
+            value |= (byte & 0x7F) << shift
+            if not byte & 0x80:
+                return value
+            shift += 7
+
+    def zigzag(self) -> int:
+        value = self.varint()
+        return value // 2 if value % 2 == 0 else -(value + 1) // 2
+
+    def take(self, size: int) -> bytes:
+        if self._pos + size > len(self._data):
+            raise ValueError("truncated field")
+        chunk = self._data[self._pos : self._pos + size]
+        self._pos += size
+        return chunk
+
+    def text(self) -> str:
+        return self.take(self.varint()).decode("utf-8")
+
+    def rest(self) -> bytes:
+        chunk = self._data[self._pos :]
+        self._pos = len(self._data)
+        return chunk
+
+
+def encode(callback: PageCallback) -> bytes:
+    out = bytearray(PREFIX)
+    flags = 0
+    body = bytearray()
+    if callback.digest is not None:
+        flags |= _F_DIGEST
+        body.extend(callback.digest.to_bytes(8, "big", signed=True))
+    else:
+        if callback.chat_id is not None:
+            flags |= _F_CHAT_ID
+            _put_zigzag(body, callback.chat_id)
+        if callback.chat_type is not None:
+            flags |= _F_CHAT_TYPE
+            body.append(_CHAT_TYPES.index(callback.chat_type))
+        if callback.date_from_ts is not None:
+            flags |= _F_DATE_FROM
+            _put_zigzag(body, callback.date_from_ts)
+        if callback.date_to_ts is not None:
+            flags |= _F_DATE_TO
+            _put_zigzag(body, callback.date_to_ts)
+        if callback.sender_username is not None:
+            flags |= _F_SENDER
+            _put_text(body, callback.sender_username)
+        if callback.index_name != _DEFAULT_INDEX:
+            flags |= _F_INDEX
+            _put_text(body, callback.index_name)
+        body.extend(callback.q.encode("utf-8"))
+    out.append(flags)
+    _put_varint(out, callback.page)
+    _put_varint(out, callback.page_size)
+    out.extend(body)
+    return bytes(out)
+
+
+def decode(data: bytes) -> PageCallback:
+    """Decode a `pb:` payload; raises ValueError on malformed input."""
+    if not data.startswith(PREFIX) or len(data) <= len(PREFIX):
+        raise ValueError("not a pb: payload")
+    reader = _Reader(data[len(PREFIX) :])
+    flags = reader.take(1)[0]
+    callback = PageCallback(page=reader.varint(), page_size=reader.varint())
+    if flags & _F_DIGEST:
+        callback.digest = int.from_bytes(reader.take(8), "big", signed=True)
+        return callback
+    if flags & _F_CHAT_ID:
+        callback.chat_id = reader.zigzag()
+    if flags & _F_CHAT_TYPE:
+        code = reader.take(1)[0]
+        if code >= len(_CHAT_TYPES):
+            raise ValueError("unknown chat type code")
+        callback.chat_type = _CHAT_TYPES[code]
+    if flags & _F_DATE_FROM:
+        callback.date_from_ts = reader.zigzag()
+    if flags & _F_DATE_TO:
+        callback.date_to_ts = reader.zigzag()
+    if flags & _F_SENDER:
+        callback.sender_username = reader.text()
+    if flags & _F_INDEX:
+        callback.index_name = reader.text()
+    callback.q = reader.rest().decode("utf-8")
+    return callback
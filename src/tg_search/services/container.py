@@ -6,18 +6,65 @@ from collections.abc import Callable
 from dataclasses import dataclass
 from typing import Any, Sequence
 
+from tg_search.config.activity_store import ActivityStore
+from tg_search.config.callback_store import CallbackQueryStore
 from tg_search.config.config_store import ConfigStore
+from tg_search.config.dead_letter_store import DeadLetterStore
+from tg_search.config.fingerprint_store import FingerprintStore
+from tg_search.config.metadata_store import MetadataStore
+from tg_search.config.query_log_store import QueryLogStore
 from tg_search.config.settings import (
+    BATCH_MSG_UNM,
+    CACHE_WARM_INTERVAL_SEC,
+    CACHE_WARM_PACE_SEC,
+    CACHE_WARM_TOP_N,
+    DASHBOARD_AGGREGATES_ENABLED,
+    DASHBOARD_KEYWORD_CAPACITY,
+    DEDUP_ENABLED,
+    DEDUP_MIN_SIMILARITY,
+    DEDUP_SKIP_EXACT_AFTER,
+    HOT_TIER_HOURS,
+    HOT_TIER_MAX_DOCS,
+    HOT_TIER_MAX_MB,
+    HOT_TIER_SOLE_WRITER,
+    INDEX_SHARD_FROZEN_AFTER_MONTHS,
+    INDEX_SHARDING,
     MEILI_HOST,
     MEILI_PASS,
     OBS_SNAPSHOT_TIMEOUT_SEC,
     OBS_SNAPSHOT_WARN_MS,
+    QUERY_LOG_ENABLED,
+    QUERY_LOG_MAX_ROWS,
+    QUERY_LOG_RETENTION_DAYS,
+    SEARCH_ADMISSION_ENABLED,
+    SEARCH_BACKEND,
+    SEARCH_CACHE,
+    SEARCH_CALLBACK_RETENTION_DAYS,
+    SEARCH_COLLAPSE_DUPLICATES,
+    SEARCH_MAX_CONCURRENT,
+    SEARCH_MAX_QUEUE,
+    SEARCH_QUEUE_TIMEOUT_SEC,
+    SEARCH_RATE_BURST,
+    SEARCH_RATE_PER_SEC,
+    SQLITE_FTS_PATH,
+    SQLITE_FTS_STANDBY,
 )
+from tg_search.core.batch_writer import AdaptiveBatchSizer, BatchWriter
+from tg_search.core.hot_tier import HotTier
+from tg_search.core.logger import setup_logger
 from tg_search.core.meilisearch import MeiliSearchClient
+from tg_search.core.sharding import ShardRouter
+from tg_search.core.sqlite_fts import SqliteFtsIndex
+from tg_search.services.admission import AdmissionController
+from tg_search.services.cache_warmer import CacheWarmer
 from tg_search.services.config_policy_service import ConfigPolicyService
+from tg_search.services.index_maintenance_service import IndexMaintenanceService
 from tg_search.services.observability_service import ObservabilityService
 from tg_search.services.runtime_control_service import RuntimeControlService
 from tg_search.services.search_service import SearchService
+from tg_search.services.watch_service import WatchService
+
+logger = setup_logger()
 
 
 @dataclass(slots=True)
@@ -26,10 +73,25 @@ class ServiceContainer:
 
     meili_client: MeiliSearchClient
     config_store: ConfigStore
+    metadata_store: MetadataStore
     config_policy_service: ConfigPolicyService
     observability_service: ObservabilityService
     runtime_control_service: RuntimeControlService
     search_service: SearchService
+    index_maintenance_service: IndexMaintenanceService
+    dead_letter_store: DeadLetterStore
+    batch_writer: BatchWriter
+    shard_router: ShardRouter | None = None
+    search_index: SqliteFtsIndex | None = None
+    # True when message ingest and search run on the local SQLite index instead of MeiliSearch.
+    local_search: bool = False
+    hot_tier: HotTier | None = None
+    watch_service: WatchService | None = None
+    fingerprint_store: FingerprintStore | None = None
+    admission_controller: AdmissionController | None = None
+    query_log_store: QueryLogStore | None = None
+    cache_warmer: CacheWarmer | None = None
+    activity_store: ActivityStore | None = None
 
 
 def build_service_container(
@@ -47,6 +109,15 @@ def build_service_container(
     runtime_on_ready_getter: Callable[[], Any | None] | None = None,
     runtime_cleanup: Callable[[], Any] | None = None,
     scheduler_ready_callback_getter: Callable[[], Any | None] | None = None,
+    index_sharding: bool = INDEX_SHARDING,
+    search_backend: str = SEARCH_BACKEND,
+    sqlite_fts_standby: bool = SQLITE_FTS_STANDBY,
+    sqlite_fts_path: str = SQLITE_FTS_PATH,
+    hot_tier_hours: float = HOT_TIER_HOURS,
+    dedup_enabled: bool = DEDUP_ENABLED,
+    admission_enabled: bool = SEARCH_ADMISSION_ENABLED,
+    query_log_enabled: bool = QUERY_LOG_ENABLED,
+    dashboard_aggregates_enabled: bool = DASHBOARD_AGGREGATES_ENABLED,
 ) -> ServiceContainer:
     """Build a fully wired service container."""
     client = meili_client or MeiliSearchClient(meili_host or MEILI_HOST, meili_key or MEILI_PASS)
@@ -55,18 +126,120 @@ def build_service_container(
         index_name=config_index_name,
         db_path=config_db_path,
     )
+    metadata_store = MetadataStore(config_store.db_path)
+    shard_router = None
+    if index_sharding:
+        shard_router = ShardRouter(client, frozen_after_months=INDEX_SHARD_FROZEN_AFTER_MONTHS)
+        try:
+            # Frozen shards keep their settings; only hot shards are re-configured at startup.
+            shard_router.apply_settings_to_hot_shards()
+        except Exception as exc:
+            logger.warning("[ServiceContainer] apply settings to hot shards failed: %s", exc)
+    dead_letter_store = DeadLetterStore(config_store.db_path)
+    fingerprint_store = None
+    if dedup_enabled:
+        fingerprint_store = FingerprintStore(
+            config_store.db_path,
+            min_similarity=DEDUP_MIN_SIMILARITY,
+            skip_exact_after=DEDUP_SKIP_EXACT_AFTER,
+        )
+    local_search = search_backend == "sqlite"
+    # The SQLite index is either the primary backend (local_index) or MeiliSearch's standby.
+    local_index = SqliteFtsIndex(sqlite_fts_path) if local_search else None
+    search_index = local_index
+    if local_index is None and sqlite_fts_standby:
+        search_index = SqliteFtsIndex(sqlite_fts_path)
+    if local_index is not None:
+        # Local backend: messages go straight into the SQLite index; monthly shards do not apply.
+        batch_writer = BatchWriter(local_index, dead_letters=dead_letter_store, sizer=AdaptiveBatchSizer(BATCH_MSG_UNM))
+    else:
+        batch_writer = BatchWriter(
+            client,
+            shard_router=shard_router,
+            dead_letters=dead_letter_store,
+            sizer=AdaptiveBatchSizer(BATCH_MSG_UNM),
+            mirror=search_index,
+        )
     config_policy_service = ConfigPolicyService(
         config_store,
         bootstrap_white_list=bootstrap_white_list,
         bootstrap_black_list=bootstrap_black_list,
     )
+    admission_controller = None
+    if admission_enabled:
+        admission_controller = AdmissionController(
+            rate_per_sec=SEARCH_RATE_PER_SEC,
+            burst=SEARCH_RATE_BURST,
+            max_concurrent=SEARCH_MAX_CONCURRENT,
+            max_queue=SEARCH_MAX_QUEUE,
+            queue_timeout_sec=SEARCH_QUEUE_TIMEOUT_SEC,
+        )
     observability_service = ObservabilityService(
         client,
         progress_registry=progress_registry,
         snapshot_timeout_sec=OBS_SNAPSHOT_TIMEOUT_SEC,
         slow_snapshot_warn_ms=OBS_SNAPSHOT_WARN_MS,
+        shard_router=shard_router,
+        batch_writer=batch_writer,
+        fingerprint_store=fingerprint_store,
+        admission_controller=admission_controller,
+    )
+    hot_tier = None
+    if hot_tier_hours > 0 and not local_search:
+        # The local index is searchable as soon as it is written, so only Meili needs the hot tier.
+        hot_tier = HotTier(
+            max_age_sec=hot_tier_hours * 3600,
+            max_docs=HOT_TIER_MAX_DOCS,
+            max_bytes=HOT_TIER_MAX_MB * 1024 * 1024,
+            sole_writer=HOT_TIER_SOLE_WRITER,
+        )
+    callback_store = CallbackQueryStore(config_store.db_path, retention_days=SEARCH_CALLBACK_RETENTION_DAYS)
+    query_log_store = None
+    if query_log_enabled:
+        query_log_store = QueryLogStore(
+            config_store.db_path,
+            retention_days=QUERY_LOG_RETENTION_DAYS,
+            max_rows=QUERY_LOG_MAX_ROWS,
+        )
+    if local_index is not None:
+        search_service = SearchService(
+            local_index,
+            metadata_store=metadata_store,
+            callback_store=callback_store,
+            query_log=query_log_store,
+        )
+    else:
+        search_service = SearchService(
+            client,
+            metadata_store=metadata_store,
+            callback_store=callback_store,
+            query_log=query_log_store,
+            shard_router=shard_router,
+            standby=search_index,
+            hot_tier=hot_tier,
+            # Documents only carry dup_cluster when fingerprinting is on.
+            collapse_duplicates=SEARCH_COLLAPSE_DUPLICATES and dedup_enabled,
+        )
+    if search_index is not None:
+        logger.info("[ServiceContainer] sqlite fts index=%s mode=%s", search_index.db_path, "primary" if local_search else "standby")
+    cache_warmer = None
+    if query_log_store is not None and SEARCH_CACHE and CACHE_WARM_TOP_N > 0:
+        cache_warmer = CacheWarmer(
+            search_service,
+            top_n=CACHE_WARM_TOP_N,
+            interval_sec=CACHE_WARM_INTERVAL_SEC,
+            pace_sec=CACHE_WARM_PACE_SEC,
+            batch_writer=batch_writer,
+        )
+    watch_service = WatchService(config_store, metadata_store=metadata_store)
+    activity_store = None
+    if dashboard_aggregates_enabled:
+        activity_store = ActivityStore(config_store.db_path, keyword_capacity=DASHBOARD_KEYWORD_CAPACITY)
+    index_maintenance_service = IndexMaintenanceService(
+        client,
+        batch_writer=batch_writer,
+        dead_letters=dead_letter_store,
     )
-    search_service = SearchService(client)
 
     container_ref: ServiceContainer | None = None
 
@@ -109,10 +282,24 @@ def build_service_container(
     container = ServiceContainer(
         meili_client=client,
         config_store=config_store,
+        metadata_store=metadata_store,
         config_policy_service=config_policy_service,
         observability_service=observability_service,
         runtime_control_service=runtime_control_service,
         search_service=search_service,
+        index_maintenance_service=index_maintenance_service,
+        dead_letter_store=dead_letter_store,
+        batch_writer=batch_writer,
+        shard_router=shard_router,
+        search_index=search_index,
+        local_search=local_search,
+        hot_tier=hot_tier,
+        watch_service=watch_service,
+        fingerprint_store=fingerprint_store,
+        admission_controller=admission_controller,
+        query_log_store=query_log_store,
+        cache_warmer=cache_warmer,
+        activity_store=activity_store,
     )
     container_ref = container
     return container
@@ -46,9 +46,18 @@ class SearchQuery(BaseModel):
     date_from: Optional[datetime] = None
     date_to: Optional[datetime] = None
     sender_username: Optional[str] = None
+    sender_id: Optional[int] = None
     limit: int = Field(default=20, ge=1, le=100)
     offset: int = Field(default=0, ge=0)
     index_name: str = "telegram"
+    # Keyset pagination: None = offset mode, "*" = first cursor page, otherwise a `next_cursor` token.
+    cursor: Optional[str] = None
+    # Payload shape (see services.search_profiles); presentation pages always use "bot".
+    profile: Literal["detail", "list", "bot"] = "detail"
+    # Narrow the returned fields further (API `fields=`); None keeps the profile's set.
+    fields: Optional[list[str]] = None
+    # Facet attributes to count (see search_service.FACET_ATTRIBUTES); None skips facets.
+    facets: Optional[list[str]] = None
 
 
 class SearchChat(BaseModel):
@@ -91,6 +100,9 @@ class SearchPage(BaseModel):
     total_hits: int
     limit: int
     offset: int
+    next_cursor: Optional[str] = None
+    # attribute -> value -> matching documents; only set when the query asked for facets.
+    facet_distribution: Optional[dict[str, dict[str, int]]] = None
 
 class IndexSnapshot(BaseModel):
     """Canonical Meili index snapshot."""
@@ -104,6 +116,19 @@ class IndexSnapshot(BaseModel):
     errors: list[str] = Field(default_factory=list)
 
 
+class AdmissionStats(BaseModel):
+    """Search admission control: concurrency slots, queue depth and rejection counters."""
+
+    max_concurrent: int
+    in_flight: int
+    queued: int
+    admitted: int
+    queued_total: int
+    rejected_rate_limited: int
+    rejected_overloaded: int
+    avg_queue_wait_ms: float
+
+
 class SystemSnapshot(BaseModel):
     """Runtime/system snapshot used by API `/status` and Bot `/ping`."""
 
@@ -113,6 +138,9 @@ class SystemSnapshot(BaseModel):
     bot_running: bool = False
     indexed_messages: int = 0
     memory_usage_mb: float = 0.0
+    meili_circuit: dict[str, str] = Field(default_factory=dict)
+    ingest_buffered: int = 0
+    search_admission: AdmissionStats | None = None
     notes: list[str] = Field(default_factory=list)
     errors: list[str] = Field(default_factory=list)
 
@@ -124,6 +152,11 @@ class StorageSnapshot(BaseModel):
     index_bytes: int | None = None
     media_supported: bool = False
     cache_supported: bool = False
+    # Near-duplicate detection counters (None when fingerprinting is disabled).
+    dedup_messages: int | None = None
+    dedup_duplicates: int | None = None
+    dedup_skipped: int | None = None
+    dedup_saved_bytes: int | None = None
     notes: list[str] = Field(default_factory=list)
     errors: list[str] = Field(default_factory=list)
 
@@ -135,6 +168,112 @@ class ProgressSnapshot(BaseModel):
     active_count: int = 0
     notes: list[str] = Field(default_factory=list)
 
+
+class BackfillSnapshot(BaseModel):
+    """Progress of the in-place numeric field backfill job."""
+
+    state: Literal["idle", "running", "completed", "failed"] = "idle"
+    scanned: int = 0
+    updated: int = 0
+    skipped: int = 0
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    last_error: str | None = None
+
+
+class RebuildSnapshot(BaseModel):
+    """Progress of the shadow-index rebuild (copy into `<index>__next`, then swap)."""
+
+    state: Literal["idle", "running", "completed", "failed"] = "idle"
+    phase: Literal["create", "copy", "catch_up", "swap", "cleanup"] | None = None
+    index_name: str = "telegram"
+    shadow_index: str | None = None
+    pending_settings: list[str] = Field(default_factory=list)
+    total: int = 0
+    copied: int = 0
+    started_at: datetime | None = None
+    finished_at: datetime | None = None
+    last_error: str | None = None
+
+
+class DeadLetterItem(BaseModel):
+    """A document MeiliSearch rejected, isolated from its batch."""
+
+    doc_id: str
+    index_name: str
+    error_code: str | None = None
+    error_message: str | None = None
+    attempts: int = 1
+    created_at: str | None = None
+    updated_at: str | None = None
+    document: dict[str, Any] = Field(default_factory=dict)
+
+
+class DeadLetterPage(BaseModel):
+    """A page of dead-lettered documents."""
+
+    total: int
+    items: list[DeadLetterItem] = Field(default_factory=list)
+
+
+class DeadLetterReplayResult(BaseModel):
+    """Outcome of re-submitting dead-lettered documents."""
+
+    requested: int
+    replayed: int
+    failed: int
+    remaining: int
+
+
+class WatchItem(BaseModel):
+    """A saved-search watch evaluated against live messages."""
+
+    id: int
+    owner_id: int
+    query: str
+    chat_id: int | None = None
+    chat_type: str | None = None
+    sender_username: str | None = None
+    sender_id: int | None = None
+    enabled: bool = True
+    created_at: str
+
+
+class WatchStats(BaseModel):
+    """Live-ingest matching counters and per-message latency percentiles."""
+
+    watches: int
+    evaluated: int
+    matched: int
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+
+
+class TopQueryItem(BaseModel):
+    """Aggregated query-log stats for one normalized query and filter set."""
+
+    q: str
+    filters: dict[str, Any] = Field(default_factory=dict)
+    count: int
+    cache_hits: int
+    avg_total_hits: float
+    p50_ms: float
+    p95_ms: float
+    max_ms: float
+    last_seen_at: datetime
+
+
+class TopQueriesReport(BaseModel):
+    """Most frequent presentation searches within a time window, plus cache warming state."""
+
+    window_hours: float
+    logged: int
+    items: list[TopQueryItem] = Field(default_factory=list)
+    last_warm_at: datetime | None = None
+    last_warmed: int = 0
+
+
 RuntimeState = Literal["stopped", "starting", "running", "stopping"]
 
 class RuntimeActionResult(BaseModel):
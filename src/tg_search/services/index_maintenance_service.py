@@ -0,0 +1,429 @@
+"""Index maintenance jobs (numeric field backfill, shadow-index rebuild, dead-letter replay)."""
+
+from __future__ import annotations
+
+import asyncio
+import re
+import time
+from collections.abc import Callable
+from datetime import datetime, timezone
+from typing import Any
+
+from tg_search.config.dead_letter_store import DeadLetter, DeadLetterStore
+from tg_search.config.settings import INDEX_BACKFILL_BATCH_SIZE
+from tg_search.core.batch_writer import BatchWriter
+from tg_search.core.logger import setup_logger
+from tg_search.core.meilisearch import MeiliSearchClient, MeiliSearchTimeoutError
+from tg_search.services.contracts import (
+    BackfillSnapshot,
+    DeadLetterItem,
+    DeadLetterPage,
+    DeadLetterReplayResult,
+    DomainError,
+    RebuildSnapshot,
+)
+
+logger = setup_logger()
+
+# `{chat_id}-{msg_id}` or edited-history `{chat_id}-{msg_id}-{edit_ts}`.
+_DOC_ID_PATTERN = re.compile(r"^(-?\d+)-(\d+)(?:-\d+)?$")
+_BACKFILL_FILTER = "date_ts NOT EXISTS OR chat_id NOT EXISTS OR msg_id NOT EXISTS"
+_BACKFILL_FIELDS = ["id", "date", "chat"]
+_SHADOW_SUFFIX = "__next"
+# Unlocked journal replays before the final one, which runs while writes are held.
+_CATCH_UP_ROUNDS = 3
+
+
+class IndexMaintenanceService:
+    """Run background maintenance jobs against the message index without re-downloading history."""
+
+    def __init__(
+        self,
+        meili_client: MeiliSearchClient,
+        *,
+        index_name: str = "telegram",
+        batch_size: int = INDEX_BACKFILL_BATCH_SIZE,
+        task_timeout_ms: int = 120_000,
+        batch_writer: BatchWriter | None = None,
+        dead_letters: DeadLetterStore | None = None,
+    ) -> None:
+        self._meili = meili_client
+        self._batch_writer = batch_writer
+        self._dead_letters = dead_letters
+        self._index_name = index_name
+        self._batch_size = max(int(batch_size), 1)
+        self._task_timeout_ms = max(int(task_timeout_ms), 1000)
+        self._backfill = BackfillSnapshot()
+        self._backfill_task: asyncio.Task[BackfillSnapshot] | None = None
+        self._rebuild = RebuildSnapshot(index_name=index_name)
+        self._rebuild_task: asyncio.Task[RebuildSnapshot] | None = None
+
+    @staticmethod
+    def derive_numeric_fields(doc: dict[str, Any]) -> dict[str, Any] | None:
+        """Build the partial update for one legacy document, or None when it cannot be derived."""
+        match = _DOC_ID_PATTERN.match(str(doc.get("id", "")))
+        if match is None:
+            return None
+
+        raw_date = doc.get("date")
+        if not isinstance(raw_date, str) or not raw_date:
+            return None
+        try:
+            date = datetime.fromisoformat(raw_date.replace("Z", "+00:00"))
+        except ValueError:
+            return None
+        if date.tzinfo is None:
+            date = date.replace(tzinfo=timezone.utc)
+
+        chat = doc.get("chat")
+        chat_id = chat.get("id") if isinstance(chat, dict) else None
+        try:
+            chat_id = int(chat_id) if chat_id is not None else int(match.group(1))
+        except (TypeError, ValueError):
+            return None
+
+        return {
+            "id": doc["id"],
+            "date_ts": int(date.timestamp()),
+            "chat_id": chat_id,
+            "msg_id": int(match.group(2)),
+        }
+
+    @classmethod
+    def _with_numeric_fields(cls, doc: dict[str, Any]) -> dict[str, Any]:
+        patch = cls.derive_numeric_fields(doc) if "date_ts" not in doc else None
+        return doc if patch is None else {**doc, **patch}
+
+    def backfill_status(self) -> BackfillSnapshot:
+        return self._backfill.model_copy()
+
+    def start_numeric_backfill(self) -> BackfillSnapshot:
+        """Start the backfill job in the background; a running job is left untouched."""
+        if self._backfill_task is not None and not self._backfill_task.done():
+            return self.backfill_status()
+        if self._meili.pending_reindex(self._index_name):
+            # The fields are not filterable yet; the rebuild derives them while copying.
+            raise DomainError("index_rebuild_pending", "numeric fields are filled in by the pending index rebuild")
+        self._backfill_task = asyncio.create_task(self.run_numeric_backfill())
+        return self.backfill_status()
+
+    async def run_numeric_backfill(self) -> BackfillSnapshot:
+        """
+        Add `date_ts`/`chat_id`/`msg_id` to documents indexed before those fields existed.
+
+        Scans with a `NOT EXISTS` filter and merges the derived fields in place. Each batch
+        waits for its update task, so patched documents drop out of the next scan and an
+        interrupted job simply resumes from whatever is still missing.
+        """
+        self._backfill = BackfillSnapshot(state="running", started_at=datetime.now(timezone.utc))
+        started_at = time.monotonic()
+        # Documents we cannot patch keep matching the filter; step over them.
+        offset = 0
+        try:
+            await self._wait_for_settings()
+            while True:
+                docs = await asyncio.to_thread(
+                    self._meili.get_documents,
+                    self._index_name,
+                    filter=_BACKFILL_FILTER,
+                    fields=_BACKFILL_FIELDS,
+                    limit=self._batch_size,
+                    offset=offset,
+                )
+                if not docs:
+                    break
+
+                patches = [patch for patch in map(self.derive_numeric_fields, docs) if patch is not None]
+                skipped = len(docs) - len(patches)
+                if patches:
+                    task = await asyncio.to_thread(self._meili.merge_documents, patches, self._index_name)
+                    result = await asyncio.to_thread(self._meili.wait_for_task, task.task_uid, self._task_timeout_ms)
+                    if result.get("status") != "succeeded":
+                        raise RuntimeError(f"backfill update task {task.task_uid} {result.get('status')}: {result.get('error')}")
+
+                offset += skipped
+                self._backfill.scanned += len(docs)
+                self._backfill.updated += len(patches)
+                self._backfill.skipped += skipped
+                if len(docs) < self._batch_size:
+                    break
+        except Exception as exc:
+            self._backfill.state = "failed"
+            self._backfill.last_error = str(exc)
+            self._backfill.finished_at = datetime.now(timezone.utc)
+            logger.error(
+                "[IndexMaintenance] numeric_backfill failed index=%s updated=%d error=%s",
+                self._index_name,
+                self._backfill.updated,
+                exc,
+            )
+            return self.backfill_status()
+
+        self._backfill.state = "completed"
+        self._backfill.finished_at = datetime.now(timezone.utc)
+        logger.info(
+            "[IndexMaintenance] numeric_backfill completed index=%s scanned=%d updated=%d skipped=%d duration_ms=%.1f",
+            self._index_name,
+            self._backfill.scanned,
+            self._backfill.updated,
+            self._backfill.skipped,
+            (time.monotonic() - started_at) * 1000,
+        )
+        return self.backfill_status()
+
+    async def _wait_for_settings(self) -> None:
+        # The scan filters on the numeric fields, so their settings task must have finished;
+        # applying settings in place on a large index can outlast any single wait.
+        task_uid = self._meili.settings_task(self._index_name)
+        while task_uid is not None:
+            try:
+                await asyncio.to_thread(self._meili.wait_for_task, task_uid, self._task_timeout_ms)
+                return
+            except MeiliSearchTimeoutError:
+                logger.info("[IndexMaintenance] numeric_backfill waiting for settings task=%s", task_uid)
+
+    def start_maintenance(self) -> bool:
+        """
+        Start the job the index needs after startup: the rebuild when settings were deferred,
+        otherwise the backfill (which completes after one empty scan when nothing is missing).
+        Returns True when a rebuild was started.
+        """
+        if self.start_rebuild_if_pending():
+            return True
+        self.start_numeric_backfill()
+        return False
+
+    # ── Shadow-index rebuild ──
+
+    def rebuild_status(self) -> RebuildSnapshot:
+        snapshot = self._rebuild.model_copy()
+        snapshot.pending_settings = sorted(self._meili.pending_reindex(self._index_name))
+        return snapshot
+
+    def start_rebuild(self) -> RebuildSnapshot:
+        """Start the rebuild in the background; a running job is left untouched."""
+        if self._rebuild_task is not None and not self._rebuild_task.done():
+            return self.rebuild_status()
+        self._rebuild_task = asyncio.create_task(self.run_rebuild())
+        return self.rebuild_status()
+
+    def start_rebuild_if_pending(self) -> bool:
+        """Kick off a rebuild when startup deferred settings that need a full reindex."""
+        if not self._meili.pending_reindex(self._index_name):
+            return False
+        self.start_rebuild()
+        return True
+
+    async def _wait(self, task: Any, what: str) -> None:
+        result = await asyncio.to_thread(self._meili.wait_for_task, task.task_uid, self._task_timeout_ms)
+        if result.get("status") != "succeeded":
+            raise RuntimeError(f"{what} task {task.task_uid} {result.get('status')}: {result.get('error')}")
+
+    def _replay_journal(self, entries: list[tuple[str, list]], shadow: str) -> list[Any]:
+        """Re-apply writes journaled on the live index to the shadow, in submission order."""
+        operations: dict[str, Callable[[list, str], Any]] = {
+            "add": self._meili.add_documents,
+            "merge": self._meili.merge_documents,
+            "delete": self._meili.delete_documents,
+            "delete_chunks": lambda payload, index_name: self._meili.delete_stale_chunks(payload[0], index_name),
+        }
+        return [operations[operation](payload, shadow) for operation, payload in entries]
+
+    def _final_catch_up_and_swap(self, shadow: str) -> tuple[list[Any], Any]:
+        # Runs in one thread holding the client's write lock: the last journaled writes are
+        # enqueued on the shadow and the swap right after them, so every other write lands
+        # either before the swap (and is in the journal) or after it (on the new index).
+        with self._meili.holding_writes():
+            entries = self._meili.take_write_journal(self._index_name, stop=True)
+            return self._replay_journal(entries, shadow), self._meili.swap_indexes(self._index_name, shadow)
+
+    async def _copy(self, shadow: str) -> None:
+        # Keep one add task in flight: enqueue batch N, then wait for batch N-1.
+        in_flight = None
+        offset = 0
+        deletions = 0
+        while True:
+            docs = await asyncio.to_thread(
+                self._meili.get_documents,
+                self._index_name,
+                limit=self._batch_size,
+                offset=offset,
+            )
+            if not docs:
+                break
+            # Documents indexed before the numeric fields existed get them on the way over.
+            docs = [self._with_numeric_fields(doc) for doc in docs]
+            task = await asyncio.to_thread(self._meili.add_documents, docs, shadow)
+            if in_flight is not None:
+                await self._wait(in_flight, "rebuild copy")
+            in_flight = task
+            # Deletions on the live index shift later documents to lower offsets; step back by
+            # every deletion journaled so far (re-copying a few documents is harmless).
+            journaled = await asyncio.to_thread(self._meili.journaled_deletions, self._index_name)
+            offset = max(offset + len(docs) - (journaled - deletions), 0)
+            deletions = journaled
+            self._rebuild.copied += len(docs)
+            if len(docs) < self._batch_size:
+                break
+        if in_flight is not None:
+            await self._wait(in_flight, "rebuild copy")
+
+    async def run_rebuild(self) -> RebuildSnapshot:
+        """
+        Rebuild the index with the current INDEX_CONFIG without taking search offline.
+
+        Creates `<index>__next` with the full settings applied up front (documents are then
+        indexed once, with the final settings), copies every document from the live index,
+        swaps the two indexes atomically and drops the old data. Searches keep hitting the
+        live index until the swap.
+
+        Writes made by this process while the rebuild runs (live messages, history downloads,
+        edits, deletions, backfills) are journaled by the client and replayed onto the shadow
+        in order, the last batch together with the swap while other writes wait. Writes from
+        other processes to the same index during a rebuild are not carried over.
+        """
+        shadow = f"{self._index_name}{_SHADOW_SUFFIX}"
+        self._rebuild = RebuildSnapshot(
+            state="running",
+            index_name=self._index_name,
+            shadow_index=shadow,
+            started_at=datetime.now(timezone.utc),
+        )
+        started_at = time.monotonic()
+        try:
+            self._rebuild.phase = "create"
+            existing = await asyncio.to_thread(self._meili.list_index_names)
+            if shadow in existing:
+                # Leftover from an interrupted run: start from scratch.
+                await self._wait(await asyncio.to_thread(self._meili.delete_index, shadow), "rebuild drop stale shadow")
+            stats = await asyncio.to_thread(self._meili.get_index_stats, self._index_name)
+            self._rebuild.total = int(getattr(stats, "number_of_documents", 0) or 0)
+            # The shadow is empty, so every setting (including reindexing ones) is applied before the copy.
+            create_task = await asyncio.to_thread(self._meili.create_index, shadow, allow_reindex=True)
+            if create_task is not None:
+                await self._wait(create_task, "rebuild create shadow")
+
+            self._rebuild.phase = "copy"
+            last_write = await asyncio.to_thread(self._meili.start_write_journal, self._index_name)
+            if last_write is not None:
+                # Writes enqueued before journaling started must be visible to the copy; their outcome is not ours.
+                await asyncio.to_thread(self._meili.wait_for_task, last_write, self._task_timeout_ms)
+            await self._copy(shadow)
+
+            self._rebuild.phase = "catch_up"
+            replayed = 0
+            for _ in range(_CATCH_UP_ROUNDS):
+                entries = await asyncio.to_thread(self._meili.take_write_journal, self._index_name)
+                if not entries:
+                    break
+                for task in await asyncio.to_thread(self._replay_journal, entries, shadow):
+                    await self._wait(task, "rebuild catch_up")
+                replayed += len(entries)
+
+            self._rebuild.phase = "swap"
+            tasks, swap_task = await asyncio.to_thread(self._final_catch_up_and_swap, shadow)
+            for task in tasks:
+                await self._wait(task, "rebuild catch_up")
+            await self._wait(swap_task, "rebuild swap")
+            replayed += len(tasks)
+            self._meili.clear_pending_reindex(self._index_name)
+            self._meili.bump_write_generation()
+
+            self._rebuild.phase = "cleanup"
+            await self._wait(await asyncio.to_thread(self._meili.delete_index, shadow), "rebuild drop old index")
+        except Exception as exc:
+            await asyncio.to_thread(self._meili.take_write_journal, self._index_name, stop=True)
+            self._rebuild.state = "failed"
+            self._rebuild.last_error = str(exc)
+            self._rebuild.finished_at = datetime.now(timezone.utc)
+            logger.error(
+                "[IndexMaintenance] rebuild failed index=%s phase=%s copied=%d error=%s",
+                self._index_name,
+                self._rebuild.phase,
+                self._rebuild.copied,
+                exc,
+            )
+            return self.rebuild_status()
+
+        self._rebuild.state = "completed"
+        self._rebuild.phase = None
+        self._rebuild.finished_at = datetime.now(timezone.utc)
+        logger.info(
+            "[IndexMaintenance] rebuild completed index=%s copied=%d replayed_writes=%d total=%d duration_ms=%.1f",
+            self._index_name,
+            self._rebuild.copied,
+            replayed,
+            self._rebuild.total,
+            (time.monotonic() - started_at) * 1000,
+        )
+        return self.rebuild_status()
+
+    # ── Dead letters ──
+
+    def _require_dead_letters(self) -> tuple[DeadLetterStore, BatchWriter]:
+        if self._dead_letters is None or self._batch_writer is None:
+            raise DomainError("dead_letter_unavailable", "dead-letter store is not configured")
+        return self._dead_letters, self._batch_writer
+
+    @staticmethod
+    def _to_item(entry: DeadLetter) -> DeadLetterItem:
+        return DeadLetterItem(
+            doc_id=entry.doc_id,
+            index_name=entry.index_name,
+            error_code=entry.error_code,
+            error_message=entry.error_message,
+            attempts=entry.attempts,
+            created_at=entry.created_at,
+            updated_at=entry.updated_at,
+            document=entry.document,
+        )
+
+    def list_dead_letters(self, *, limit: int = 50, offset: int = 0) -> DeadLetterPage:
+        store, _ = self._require_dead_letters()
+        return DeadLetterPage(
+            total=store.count(),
+            items=[self._to_item(entry) for entry in store.list_entries(limit=limit, offset=offset)],
+        )
+
+    async def replay_dead_letters(self, doc_ids: list[str] | None = None, *, limit: int = 100) -> DeadLetterReplayResult:
+        """
+        Re-submit dead-lettered documents to the index they failed on.
+
+        Documents confirmed as indexed are removed from the store; ones rejected again stay
+        (with `attempts` incremented) so a fix to the document or the index settings can
+        be retried later, and ones only buffered or still unconfirmed stay for the next replay.
+        """
+        store, writer = self._require_dead_letters()
+        if doc_ids:
+            entries = await asyncio.to_thread(store.get_many, doc_ids)
+        else:
+            entries = await asyncio.to_thread(store.list_entries, limit=limit)
+
+        by_index: dict[str, list[DeadLetter]] = {}
+        for entry in entries:
+            by_index.setdefault(entry.index_name, []).append(entry)
+
+        replayed: list[DeadLetter] = []
+        for index_name, group in by_index.items():
+            try:
+                result = await asyncio.to_thread(writer.write, [entry.document for entry in group], index_name)
+            except Exception as exc:
+                logger.warning("[IndexMaintenance] dead_letter replay failed index=%s error=%s", index_name, exc)
+                continue
+            indexed = set(result.indexed_ids)
+            replayed.extend(entry for entry in group if entry.doc_id in indexed)
+
+        await asyncio.to_thread(store.remove, replayed)
+        remaining = await asyncio.to_thread(store.count)
+        logger.info(
+            "[IndexMaintenance] dead_letter replay requested=%d replayed=%d remaining=%d",
+            len(entries),
+            len(replayed),
+            remaining,
+        )
+        return DeadLetterReplayResult(
+            requested=len(entries),
+            replayed=len(replayed),
+            failed=len(entries) - len(replayed),
+            remaining=remaining,
+        )
@@ -9,8 +9,12 @@ import uuid
 from datetime import datetime, timezone
 from typing import Any, Protocol
 
+from tg_search.config.fingerprint_store import FingerprintStore
+from tg_search.core.batch_writer import BatchWriter
 from tg_search.core.logger import setup_logger
 from tg_search.core.meilisearch import MeiliSearchClient
+from tg_search.core.sharding import ShardRouter
+from tg_search.services.admission import AdmissionController
 from tg_search.services.contracts import IndexSnapshot, ProgressSnapshot, StorageSnapshot, SystemSnapshot
 
 logger = setup_logger()
@@ -34,8 +38,16 @@ class ObservabilityService:
         progress_registry: ProgressRegistryLike | None = None,
         snapshot_timeout_sec: float = 0.8,
         slow_snapshot_warn_ms: int = 800,
+        shard_router: ShardRouter | None = None,
+        batch_writer: BatchWriter | None = None,
+        fingerprint_store: FingerprintStore | None = None,
+        admission_controller: AdmissionController | None = None,
     ) -> None:
         self._meili = meili_client
+        self._batch_writer = batch_writer
+        self._fingerprint_store = fingerprint_store
+        self._admission_controller = admission_controller
+        self._shard_router = shard_router
         self._index_name = index_name
         self._progress_registry = progress_registry
         self._snapshot_timeout_sec = max(snapshot_timeout_sec, 0.1)
@@ -84,6 +96,23 @@ class ObservabilityService:
             return payload
         return {}
 
+    def _sum_shard_payloads(self, all_stats: dict[str, Any]) -> tuple[dict[str, Any], int]:
+        """Aggregate per-index stats over the base index and all of its month shards."""
+        indexes = all_stats.get("indexes")
+        router = self._shard_router
+        if router is None or not isinstance(indexes, dict):
+            return {}, 0
+        total = 0
+        indexing = False
+        count = 0
+        for name, payload in indexes.items():
+            if not isinstance(payload, dict) or not (name == router.base_index or router.is_shard(name)):
+                continue
+            count += 1
+            total += int(payload.get("numberOfDocuments") or 0)
+            indexing = indexing or bool(payload.get("isIndexing", False))
+        return {"numberOfDocuments": total, "isIndexing": indexing}, count
+
     async def _run_meili_call(self, label: str, func: Any, *args: Any) -> tuple[Any | None, str | None]:
         try:
             result = await asyncio.wait_for(asyncio.to_thread(func, *args), timeout=self._snapshot_timeout_sec)
@@ -168,7 +197,12 @@ class ObservabilityService:
         total_documents = 0
         is_indexing = False
 
-        if index_stats is not None:
+        sharded_payload, shard_count = self._sum_shard_payloads(all_stats)
+        if shard_count:
+            total_documents = int(sharded_payload["numberOfDocuments"])
+            is_indexing = bool(sharded_payload["isIndexing"])
+            notes.append(f"document count aggregated over {shard_count} sharded indexes")
+        elif index_stats is not None:
             total_documents = int(getattr(index_stats, "number_of_documents", 0) or 0)
             is_indexing = bool(getattr(index_stats, "is_indexing", False))
         else:
@@ -219,6 +253,24 @@ class ObservabilityService:
         notes.extend(memory_notes)
         errors = list(index.errors)
 
+        circuit_states = getattr(self._meili, "circuit_states", None)
+        meili_circuit = (
+            {kind: str(state.get("state")) for kind, state in circuit_states().items()} if callable(circuit_states) else {}
+        )
+        open_kinds = sorted(kind for kind, state in meili_circuit.items() if state != "closed")
+        if open_kinds:
+            notes.append(f"MeiliSearch circuit breaker not closed: {', '.join(open_kinds)}")
+        node_states = getattr(self._meili, "node_states", None)
+        for node in node_states() if callable(node_states) else []:
+            if not node.get("healthy", True):
+                notes.append(f"MeiliSearch {node['role']} {node['host']} out of rotation (lag_sec={node.get('lag_sec')})")
+        ingest_buffered = self._batch_writer.buffered if self._batch_writer is not None else 0
+        if ingest_buffered:
+            notes.append(f"{ingest_buffered} documents buffered until MeiliSearch recovers")
+        search_admission = self._admission_controller.stats() if self._admission_controller is not None else None
+        if search_admission is not None and search_admission.queued:
+            notes.append(f"{search_admission.queued} searches queued for a free slot")
+
         snapshot = SystemSnapshot(
             uptime_seconds=max(float(uptime_seconds), 0.0),
             meili_connected=index.meili_connected,
@@ -226,6 +278,9 @@ class ObservabilityService:
             bot_running=bot_running,
             indexed_messages=index.total_documents,
             memory_usage_mb=memory_usage_mb,
+            meili_circuit=meili_circuit,
+            ingest_buffered=ingest_buffered,
+            search_admission=search_admission,
             notes=notes,
             errors=errors,
         )
@@ -257,6 +312,19 @@ class ObservabilityService:
             notes=notes,
             errors=list(index.errors),
         )
+        if self._fingerprint_store is not None:
+            dedup, error = await self._run_meili_call("dedup_stats", self._fingerprint_store.stats)
+            if dedup is None:
+                snapshot.errors.append(error or "dedup_stats unavailable")
+            else:
+                snapshot.dedup_messages = dedup["messages"]
+                snapshot.dedup_duplicates = dedup["duplicates"]
+                snapshot.dedup_skipped = dedup["skipped"]
+                snapshot.dedup_saved_bytes = dedup["skipped_bytes"]
+                snapshot.notes.append(
+                    f"near-duplicates: {dedup['duplicates']} of {dedup['messages']} fingerprinted messages "
+                    f"in {dedup['clusters']} clusters; {dedup['skipped']} exact copies not stored"
+                )
 
         self._log_snapshot(
             trace_id=trace_id,
@@ -0,0 +1,104 @@
+"""
+查询归一化：在查缓存和搜索之前统一查询写法
+
+"Hello"、"hello "、全角 "ｈｅｌｌｏ" 以及（可选）同一 CJK 词的繁简写法都归一到同一形式，
+从而共享一条展示缓存和一次 MeiliSearch 查询，而不是各自往返一次。
+"""
+
+from __future__ import annotations
+
+import unicodedata
+from pathlib import Path
+
+from tg_search.core.logger import setup_logger
+from tg_search.services.contracts import SearchQuery
+
+logger = setup_logger()
+
+# 常用繁体字 → 简体字（一对一且无歧义的部分）；完整映射可通过 QUERY_T2S_TABLE 加载 OpenCC 字表
+_BUILTIN_T2S_PAIRS = (
+    "這这 個个 們们 來来 時时 會会 為为 對对 說说 國国 學学 後后 見见 開开 關关 長长 問问 間间 電电 話话 "
+    "還还 進进 過过 發发 現现 動动 點点 麼么 樣样 體体 讓让 給给 從从 經经 當当 機机 與与 頭头 實实 種种 "
+    "東东 應应 無无 馬马 車车 書书 門门 雲云 買买 賣卖 錢钱 區区 醫医 氣气 愛爱 聽听 寫写 讀读 難难 號号 "
+    "辦办 場场 報报 變变 鐘钟 網网 絡络 視视 頻频 戲戏 遊游 樂乐 灣湾 臺台 萬万 億亿 歲岁 華华 雙双 錄录 "
+    "圖图 並并 係系 幾几 邊边 處处 術术 業业 專专 題题 價价 創创 傳传 線线 級级 組组 織织 紅红 綠绿 藍蓝 "
+    "黃黄 鳥鸟 魚鱼 龍龙 風风 飛飞 貓猫 語语 親亲 鄉乡 壓压 產产 廠厂 廣广 標标 準准 選选 擇择 壞坏 舊旧 "
+    "紀纪 記记 計计 認认 識识 護护 驗验 險险 載载 軟软 韓韩 顯显 飯饭 館馆 條条 務务 員员 質质 費费 貴贵 "
+    "節节 聯联 隊队 陽阳 陰阴 雞鸡 離离 靈灵 響响 顧顾 驚惊"
+)
+
+
+def _builtin_t2s() -> dict[int, str]:
+    return {ord(pair[0]): pair[1] for pair in _BUILTIN_T2S_PAIRS.split()}
+
+
+def load_t2s_table(path: str | Path) -> dict[int, str]:
+    """
+    加载 OpenCC 格式的字表（每行 `繁<TAB>简[ 其他候选]`）。
+
+    只使用单字条目，多个候选时取第一个。
+    """
+    table: dict[int, str] = {}
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            source, _, targets = line.strip().partition("\t")
+            target = targets.split(" ", 1)[0]
+            if len(source) == 1 and len(target) == 1:
+                table[ord(source)] = target
+    return table
+
+
+class QueryNormalizer:
+    """
+    搜索输入的规范形式，缓存键与后端查询共用。
+
+    文本依次经过 Unicode NFKC（全角 → 半角、兼容字符）、大小写折叠、空白合并，
+    再可选地做繁体 → 简体映射。过滤条件同样规范化：发送者用户名去掉首尾空白和开头的 `@`。
+
+    Notes:
+        繁简折叠只有在索引对文档做了同样折叠时才有效（MeiliSearch 的中文归一化会做，本地 SQLite 索引不会），
+        因此默认关闭。
+    """
+
+    def __init__(
+        self,
+        *,
+        enabled: bool = True,
+        fold_traditional: bool = False,
+        t2s_table_path: str | Path | None = None,
+    ) -> None:
+        self._enabled = enabled
+        self._t2s: dict[int, str] | None = None
+        if fold_traditional:
+            self._t2s = _builtin_t2s()
+            if t2s_table_path:
+                try:
+                    self._t2s.update(load_t2s_table(t2s_table_path))
+                except OSError as exc:
+                    logger.warning(f"[QueryNormalizer] failed to load t2s table {t2s_table_path}: {exc}")
+            logger.info(f"[QueryNormalizer] t2s fold enabled with {len(self._t2s)} entries")
+
+    @property
+    def enabled(self) -> bool:
+        return self._enabled
+
+    def normalize_text(self, text: str) -> str:
+        if not self._enabled:
+            return text
+        folded = unicodedata.normalize("NFKC", text).casefold()
+        if self._t2s is not None:
+            folded = folded.translate(self._t2s)
+        return " ".join(folded.split())
+
+    def normalize(self, query: SearchQuery) -> SearchQuery:
+        if not self._enabled:
+            return query
+        update: dict[str, object] = {}
+        q = self.normalize_text(query.q)
+        if q and q != query.q:
+            update["q"] = q
+        if query.sender_username is not None:
+            username = query.sender_username.strip().lstrip("@")
+            if username and username != query.sender_username:
+                update["sender_username"] = username
+        return query.model_copy(update=update) if update else query
@@ -0,0 +1,97 @@
+"""
+Search profiles: how much of each document a search returns.
+
+A search used to fetch every attribute and highlight the whole `text`, so each long
+message crossed the wire twice (raw and `_formatted`). The Bot then threw most of it
+away by cutting to 360 characters. A profile maps to MeiliSearch
+`attributesToRetrieve` / `attributesToCrop` / `cropLength`:
+
+- `detail`: every attribute, `text` highlighted in full (previous behavior, export)
+- `list`:   small attributes only; `text` comes back as a highlighted snippet
+- `bot`:    like `list` without reactions, snippet sized for a Bot result line
+
+`fields` (API `fields=`) narrows the returned attributes further. The attributes
+SearchService itself needs (ids, ordering keys, chunk parents) are always kept.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from tg_search.config.settings import SEARCH_BOT_CROP_LENGTH, SEARCH_LIST_CROP_LENGTH
+from tg_search.services.contracts import DomainError
+
+CROP_MARKER = "…"
+
+# Needed for hit ids, cursors, hot-tier merging and chunk collapsing whatever the caller asked for.
+_CORE_ATTRIBUTES = ("id", "chat", "date", "date_ts", "msg_id", "parent_id")
+
+# API field name -> document attributes it needs; `formatted*` come from `_formatted`.
+FIELD_ATTRIBUTES: dict[str, tuple[str, ...]] = {
+    "id": (),
+    "chat": (),
+    "date": (),
+    "text": ("text",),
+    "from_user": ("from_user",),
+    "reactions": ("reactions",),
+    "reactions_scores": ("reactions_scores",),
+    "text_len": ("text_len",),
+    "formatted": (),
+    "formatted_text": (),
+}
+_TEXT_FIELDS = frozenset({"text", "formatted", "formatted_text"})
+
+
+@dataclass(slots=True, frozen=True)
+class SearchProfile:
+    # None retrieves every displayed attribute.
+    attributes: tuple[str, ...] | None
+    # Words kept around the first match in `_formatted.text`; None returns it whole.
+    crop_length: int | None = None
+
+
+PROFILES: dict[str, SearchProfile] = {
+    "detail": SearchProfile(attributes=None),
+    "list": SearchProfile(
+        attributes=_CORE_ATTRIBUTES + ("from_user", "text_len", "reactions", "reactions_scores"),
+        crop_length=SEARCH_LIST_CROP_LENGTH,
+    ),
+    "bot": SearchProfile(
+        attributes=_CORE_ATTRIBUTES + ("from_user", "text_len"),
+        crop_length=SEARCH_BOT_CROP_LENGTH,
+    ),
+}
+
+
+def profile_params(profile: str, fields: list[str] | None = None) -> dict[str, Any]:
+    """
+    Return the search parameters for `profile` and optional `fields`.
+
+    `attributesToHighlight` is always `["text"]` upstream. When `fields` asks for no
+    text at all, it comes back here as an empty list so `_formatted.text` is skipped too.
+    """
+    spec = PROFILES.get(profile)
+    if spec is None:
+        raise DomainError("search_profile_invalid", f"unknown search profile: {profile}")
+
+    params: dict[str, Any] = {}
+    attributes = spec.attributes
+    if fields is not None:
+        unknown = sorted(set(fields) - FIELD_ATTRIBUTES.keys())
+        if unknown:
+            raise DomainError("search_fields_invalid", "unknown search fields", detail=",".join(unknown))
+        requested = [attribute for field in fields for attribute in FIELD_ATTRIBUTES[field]]
+        if attributes is not None and "text" not in fields:
+            # Narrow within the profile; asking for `text` explicitly brings back the raw value.
+            requested = [attribute for attribute in requested if attribute in attributes]
+        attributes = tuple(dict.fromkeys(_CORE_ATTRIBUTES + tuple(requested)))
+        if _TEXT_FIELDS.isdisjoint(fields):
+            params["attributesToHighlight"] = []
+    if attributes is not None:
+        params["attributesToRetrieve"] = list(attributes)
+    if spec.crop_length and params.get("attributesToHighlight") != []:
+        params["attributesToCrop"] = ["text"]
+        params["cropLength"] = spec.crop_length
+        params["cropMarker"] = CROP_MARKER
+    return params
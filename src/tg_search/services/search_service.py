@@ -5,30 +5,116 @@ from __future__ import annotations
 import asyncio
 import base64
 import json
+import random
+import sqlite3
 import time
 import uuid
-from dataclasses import dataclass
-from datetime import datetime
-from typing import Any
+from collections.abc import AsyncIterator, Callable
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Protocol
 
+import pytz  # type: ignore[import-untyped]
+
+from tg_search.config.callback_store import CallbackQueryStore
+from tg_search.config.metadata_store import MetadataStore
+from tg_search.config.query_log_store import QueryLogStore
 from tg_search.config.settings import (
     CACHE_EXPIRE_SECONDS,
+    CHUNK_TEXT_OVER_CHARS,
+    QUERY_FOLD_TRADITIONAL,
+    QUERY_LOG_SAMPLE_RATE,
+    QUERY_NORMALIZE,
+    QUERY_T2S_TABLE,
     RESULTS_PER_PAGE,
     SEARCH_CACHE,
+    SEARCH_CACHE_GENERATION_CHECK_SEC,
+    SEARCH_CACHE_STALE_GRACE_SEC,
     SEARCH_CALLBACK_TOKEN_TTL_SEC,
+    SEARCH_COLLAPSE_DUPLICATES,
     SEARCH_PRESENTATION_MAX_HITS,
+    TIME_ZONE,
 )
+from tg_search.core.chunking import collapse_chunks
+from tg_search.core.hot_tier import HotTier
 from tg_search.core.logger import setup_logger
-from tg_search.core.meilisearch import MeiliSearchClient
-from tg_search.services.contracts import DomainError, SearchChat, SearchHit, SearchPage, SearchQuery, SearchUser
+from tg_search.core.meilisearch import MeiliSearchConnectionError, MeiliSearchTimeoutError
+from tg_search.core.sharding import ShardRouter
+from tg_search.core.sqlite_fts import SqliteFtsIndex, format_hit
+from tg_search.services import callback_codec
+from tg_search.services.callback_codec import PageCallback
+from tg_search.services.contracts import (
+    DomainError,
+    SearchChat,
+    SearchHit,
+    SearchPage,
+    SearchQuery,
+    SearchUser,
+    TopQueriesReport,
+    TopQueryItem,
+)
+from tg_search.services.query_normalizer import QueryNormalizer
+from tg_search.services.search_profiles import profile_params
 
 logger = setup_logger()
 
+CURSOR_START = "*"
+_CURSOR_SORT = ["date_ts:desc", "msg_id:desc"]
+_HIGHLIGHT_PRE_TAG = "<mark>"
+_HIGHLIGHT_POST_TAG = "</mark>"
+_INDEX_TZ = pytz.timezone(TIME_ZONE)
+# Cache warming considers queries logged within this window.
+_WARM_WINDOW_SEC = 7 * 86400
+# Attributes a search can return `facet_distribution` for (all in `filterableAttributes`).
+FACET_ATTRIBUTES = ("chat.id", "chat.type", "from_user.id")
+# Facet -> the query filters on the same attribute. A facet is counted without its own
+# filter, so after refining to one value the others stay selectable (and the counts
+# cached for the unrefined query are reused).
+_FACET_FILTER_FIELDS: dict[str, tuple[str, ...]] = {
+    "chat.id": ("chat_id",),
+    "chat.type": ("chat_type",),
+    "from_user.id": ("sender_id", "sender_username"),
+}
+_FACET_CACHE_MAX_ENTRIES = 1024
+# Relevance pages check at most this many (newest) hot-tier hits against the index.
+_HOT_MERGE_MAX = 200
+
+
+IndexGeneration = tuple[int, str | None]
+
+
+def _parse_iso_datetime(value: Any) -> datetime:
+    text = str(value)
+    # `fromisoformat` only accepts a trailing "Z" from Python 3.11 on.
+    if text.endswith("Z"):
+        text = text[:-1] + "+00:00"
+    return datetime.fromisoformat(text)
+
 
 @dataclass(slots=True)
 class _PresentationCacheEntry:
     page: SearchPage
     expires_at: float
+    generation: IndexGeneration
+    stale_since: float | None = None
+    # Renderer output per (page, page_size), e.g. the Bot's page text and buttons.
+    # Lives and dies with the entry, so any invalidation of the page drops it too.
+    rendered: dict[tuple[int, int], tuple[float, Any]] = field(default_factory=dict)
+
+    def is_expired(self) -> bool:
+        return time.monotonic() >= self.expires_at
+
+    def mark_stale(self) -> float:
+        if self.stale_since is None:
+            self.stale_since = time.monotonic()
+        return self.stale_since
+
+
+@dataclass(slots=True)
+class _FacetCacheEntry:
+    values: dict[str, int]
+    expires_at: float
+    generation: IndexGeneration
 
     def is_expired(self) -> bool:
         return time.monotonic() >= self.expires_at
@@ -43,30 +129,85 @@ class _CallbackQueryEntry:
         return time.monotonic() >= self.expires_at
 
 
+class SearchBackend(Protocol):
+    """Search surface shared by MeiliSearchClient and SqliteFtsIndex."""
+
+    def search(self, query: str | None, index_name: str = "telegram", **kwargs: Any) -> dict[str, Any]:
+        ...
+
+    def multi_search(
+        self, queries: list[dict[str, Any]], federation: dict[str, Any] | None = None
+    ) -> dict[str, Any]:
+        ...
+
+
 class SearchService:
     """Single source of truth for search filters, parsing, pagination and cache."""
 
     def __init__(
         self,
-        meili: MeiliSearchClient,
+        meili: SearchBackend,
         *,
         cache_enabled: bool = SEARCH_CACHE,
         cache_ttl_sec: int = CACHE_EXPIRE_SECONDS,
         max_presentation_hits: int = SEARCH_PRESENTATION_MAX_HITS,
         callback_token_ttl_sec: int = SEARCH_CALLBACK_TOKEN_TTL_SEC,
+        cache_stale_grace_sec: int = SEARCH_CACHE_STALE_GRACE_SEC,
+        generation_check_interval_sec: float = SEARCH_CACHE_GENERATION_CHECK_SEC,
+        metadata_store: MetadataStore | None = None,
+        shard_router: ShardRouter | None = None,
+        standby: SqliteFtsIndex | None = None,
+        hot_tier: HotTier | None = None,
+        collapse_duplicates: bool = SEARCH_COLLAPSE_DUPLICATES,
+        collapse_chunked_messages: bool = CHUNK_TEXT_OVER_CHARS > 0,
+        callback_store: CallbackQueryStore | None = None,
+        query_normalizer: QueryNormalizer | None = None,
+        query_log: QueryLogStore | None = None,
+        query_log_sample_rate: float = QUERY_LOG_SAMPLE_RATE,
     ) -> None:
         self._meili = meili
+        # Cache keys and backend queries both use the normalized query.
+        self._normalizer = query_normalizer or QueryNormalizer(
+            enabled=QUERY_NORMALIZE,
+            fold_traditional=QUERY_FOLD_TRADITIONAL,
+            t2s_table_path=QUERY_T2S_TABLE or None,
+        )
+        self._callback_store = callback_store
+        self._query_log = query_log
+        self._query_log_sample_rate = min(max(float(query_log_sample_rate), 0.0), 1.0)
+        self._last_warm_at: datetime | None = None
+        self._last_warmed = 0
+        # Collapse near-duplicate copies (same `dup_cluster`) into one hit; MeiliSearch only. Chunks carry
+        # their parent's cluster, so otherwise chunks of one long message collapse on `parent_id`, keeping
+        # offset/limit and total_hits in messages rather than chunks.
+        if collapse_duplicates and not isinstance(meili, SqliteFtsIndex):
+            self._distinct_attribute: str | None = "dup_cluster"
+        else:
+            self._distinct_attribute = "parent_id" if collapse_chunked_messages else None
+        self._standby = standby
+        self._hot_tier = hot_tier
+        self._metadata_store = metadata_store
+        self._shard_router = shard_router
         self._cache_enabled = cache_enabled
         self._cache_ttl_sec = max(int(cache_ttl_sec), 1)
         self._max_presentation_hits = max(int(max_presentation_hits), RESULTS_PER_PAGE)
         self._callback_token_ttl_sec = max(int(callback_token_ttl_sec), 1)
+        self._cache_stale_grace_sec = max(int(cache_stale_grace_sec), 0)
+        self._generation_check_interval_sec = max(float(generation_check_interval_sec), 0.0)
         self._presentation_cache: dict[str, _PresentationCacheEntry] = {}
         self._callback_query_cache: dict[str, _CallbackQueryEntry] = {}
+        # (base query key, facet attribute) -> value counts; see `_facet_distribution`.
+        self._facet_cache: dict[tuple[str, str], _FacetCacheEntry] = {}
         self._cache_lock = asyncio.Lock()
+        self._remote_last_update: str | None = None
+        self._remote_checked_at: float | None = None
+        self._refreshing_keys: set[str] = set()
+        self._refresh_tasks: set[asyncio.Task[None]] = set()
         logger.info(
-            "[SearchService] initialized cache_enabled=%s cache_ttl_sec=%d max_presentation_hits=%d callback_token_ttl_sec=%d",
+            "[SearchService] initialized cache_enabled=%s cache_ttl_sec=%d stale_grace_sec=%d max_presentation_hits=%d callback_token_ttl_sec=%d",
             self._cache_enabled,
             self._cache_ttl_sec,
+            self._cache_stale_grace_sec,
             self._max_presentation_hits,
             self._callback_token_ttl_sec,
         )
@@ -74,41 +215,117 @@ class SearchService:
     def clear_cache(self) -> None:
         presentation_entries = len(self._presentation_cache)
         callback_entries = len(self._callback_query_cache)
+        facet_entries = len(self._facet_cache)
         self._presentation_cache.clear()
         self._callback_query_cache.clear()
+        self._facet_cache.clear()
         logger.info(
-            "[SearchService] clear_cache presentation_entries=%d callback_entries=%d",
+            "[SearchService] clear_cache presentation_entries=%d callback_entries=%d facet_entries=%d",
             presentation_entries,
             callback_entries,
+            facet_entries,
         )
 
+    def _reindex_pending(self, index_name: str) -> bool:
+        # Until the shadow rebuild swaps in, the live index lacks the numeric filterable/sortable fields.
+        pending_reindex = getattr(self._meili, "pending_reindex", None)
+        return bool(pending_reindex is not None and pending_reindex(index_name))
+
     def _build_filter(self, query: SearchQuery) -> str | None:
         conditions: list[str] = []
+        legacy = self._reindex_pending(query.index_name)
         if query.chat_id is not None:
-            conditions.append(f"chat.id = {query.chat_id}")
+            conditions.append(f"chat.id = {query.chat_id}" if legacy else f"chat_id = {query.chat_id}")
         if query.chat_type is not None:
             conditions.append(f'chat.type = "{query.chat_type}"')
         if query.date_from is not None:
-            conditions.append(f'date >= "{query.date_from.isoformat()}"')
+            if legacy:
+                conditions.append(f'date >= "{self._to_index_iso(query.date_from)}"')
+            else:
+                conditions.append(f"date_ts >= {self._to_epoch(query.date_from)}")
         if query.date_to is not None:
-            conditions.append(f'date <= "{query.date_to.isoformat()}"')
+            if legacy:
+                conditions.append(f'date <= "{self._to_index_iso(query.date_to)}"')
+            else:
+                conditions.append(f"date_ts <= {self._to_epoch(query.date_to)}")
         if query.sender_username is not None:
             safe = query.sender_username.replace('"', '\\"')
-            conditions.append(f'from_user.username = "{safe}"')
+            username_filter = f'from_user.username = "{safe}"'
+            # New documents only carry from_user.id; legacy ones still embed the username.
+            user_ids = self._metadata_store.find_user_ids(query.sender_username) if self._metadata_store else []
+            if user_ids:
+                id_list = ", ".join(str(user_id) for user_id in user_ids)
+                conditions.append(f"({username_filter} OR from_user.id IN [{id_list}])")
+            else:
+                conditions.append(username_filter)
+        if query.sender_id is not None:
+            conditions.append(f"from_user.id = {query.sender_id}")
 
         return " AND ".join(conditions) if conditions else None
 
     @staticmethod
-    def _parse_hit(hit: dict[str, Any]) -> SearchHit:
+    def _to_epoch(value: datetime) -> int:
+        # Naive datetimes are read in the indexing TIME_ZONE, matching the old ISO-string comparison.
+        if value.tzinfo is None:
+            value = _INDEX_TZ.localize(value)
+        return int(value.timestamp())
+
+    @staticmethod
+    def _to_index_iso(value: datetime) -> str:
+        # Documents store `date` as an ISO string in the indexing TIME_ZONE.
+        if value.tzinfo is None:
+            value = _INDEX_TZ.localize(value)
+        return value.astimezone(_INDEX_TZ).isoformat()
+
+    @staticmethod
+    def encode_cursor(date_ts: int, msg_id: int) -> str:
+        """Encode the last seen `(date_ts, msg_id)` key as an opaque continuation token."""
+        packed = json.dumps({"t": int(date_ts), "m": int(msg_id)}, separators=(",", ":")).encode("utf-8")
+        return base64.urlsafe_b64encode(packed).decode("ascii").rstrip("=")
+
+    @staticmethod
+    def decode_cursor(token: str) -> tuple[int, int]:
+        padding = "=" * ((4 - len(token) % 4) % 4)
+        try:
+            payload = json.loads(base64.urlsafe_b64decode(token + padding).decode("utf-8"))
+            return int(payload["t"]), int(payload["m"])
+        except Exception as exc:
+            raise DomainError("search_cursor_invalid", "invalid search cursor", detail=str(exc)) from exc
+
+    def _build_cursor_filter(self, cursor: str) -> str:
+        # Documents without numeric keys cannot be ordered reliably, so cursor scans skip them.
+        if cursor == CURSOR_START:
+            return "date_ts EXISTS"
+        date_ts, msg_id = self.decode_cursor(cursor)
+        return f"(date_ts < {date_ts} OR (date_ts = {date_ts} AND msg_id < {msg_id}))"
+
+    @classmethod
+    def _next_cursor(cls, raw_hits: list[dict[str, Any]], limit: int) -> str | None:
+        if len(raw_hits) < limit:
+            return None
+        last = raw_hits[-1]
+        try:
+            return cls.encode_cursor(int(last["date_ts"]), int(last["msg_id"]))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+    def to_hit(self, document: dict[str, Any]) -> SearchHit:
+        """Normalize a raw index document (e.g. a live message) into a SearchHit."""
+        return self._parse_hit(document)
+
+    def _parse_hit(self, hit: dict[str, Any]) -> SearchHit:
+        """
+        Build a SearchHit from an index document.
+
+        Runs for every hit on every page: the nested payload is assembled as plain
+        dicts and validated in a single `model_validate` call rather than one model
+        construction per level.
+        """
         chat_data = hit.get("chat") or {}
         from_user_data = hit.get("from_user")
-        date_str = hit.get("date", "")
+        date_str = hit.get("date")
         try:
-            date_value = (
-                datetime.fromisoformat(str(date_str).replace("Z", "+00:00"))
-                if date_str
-                else datetime.utcnow()
-            )
+            date_value = _parse_iso_datetime(date_str) if date_str else datetime.utcnow()
         except (ValueError, TypeError):
             date_value = datetime.utcnow()
 
@@ -116,69 +333,349 @@ class SearchService:
         formatted_text = None
         if isinstance(formatted, dict):
             formatted_text = formatted.get("text")
+        else:
+            formatted = None
+        text = hit.get("text")
+        if text is None and formatted_text is not None:
+            # Cropping profiles skip the raw text; the snippet stands in for it.
+            text = formatted_text.replace(_HIGHLIGHT_PRE_TAG, "").replace(_HIGHLIGHT_POST_TAG, "")
 
+        # Titles/usernames come from the metadata store; embedded copies only exist on legacy documents.
+        chat_id = chat_data.get("id", 0)
+        chat_meta = self._metadata_store.get_chat(chat_id) if self._metadata_store else None
         from_user = None
         if isinstance(from_user_data, dict):
-            from_user = SearchUser(
-                id=from_user_data.get("id", 0),
-                username=from_user_data.get("username"),
-            )
+            user_id = from_user_data.get("id", 0)
+            user_meta = self._metadata_store.get_user(user_id) if self._metadata_store else None
+            from_user = {
+                "id": user_id,
+                "username": user_meta.username if user_meta else from_user_data.get("username"),
+            }
 
-        return SearchHit(
-            id=hit.get("id", ""),
-            chat=SearchChat(
-                id=chat_data.get("id", 0),
-                type=chat_data.get("type", "unknown"),
-                title=chat_data.get("title"),
-                username=chat_data.get("username"),
-            ),
-            date=date_value,
-            text=hit.get("text") or "",
-            from_user=from_user,
-            reactions=hit.get("reactions") or {},
-            reactions_scores=hit.get("reactions_scores") or 0.0,
-            text_len=hit.get("text_len") or len(hit.get("text") or ""),
-            formatted=formatted if isinstance(formatted, dict) else None,
-            formatted_text=formatted_text,
+        return SearchHit.model_validate(
+            {
+                "id": hit.get("id", ""),
+                "chat": {
+                    "id": chat_id,
+                    "type": chat_data.get("type") or (chat_meta.type if chat_meta else None) or "unknown",
+                    "title": chat_meta.title if chat_meta else chat_data.get("title"),
+                    "username": chat_meta.username if chat_meta else chat_data.get("username"),
+                },
+                "date": date_value,
+                "text": text or "",
+                "from_user": from_user,
+                "reactions": hit.get("reactions") or {},
+                "reactions_scores": hit.get("reactions_scores") or 0.0,
+                "text_len": hit.get("text_len") or len(text or ""),
+                "formatted": formatted,
+                "formatted_text": formatted_text,
+            }
         )
 
-    async def search(self, query: SearchQuery) -> SearchPage:
-        started_at = time.monotonic()
+    def _build_search_params(self, query: SearchQuery) -> dict[str, Any]:
         search_params: dict[str, Any] = {
             "limit": query.limit,
             "offset": query.offset,
             "attributesToHighlight": ["text"],
-            "highlightPreTag": "<mark>",
-            "highlightPostTag": "</mark>",
+            "highlightPreTag": _HIGHLIGHT_PRE_TAG,
+            "highlightPostTag": _HIGHLIGHT_POST_TAG,
         }
+        search_params.update(profile_params(query.profile, query.fields))
+        if self._distinct_attribute is not None:
+            search_params["distinct"] = self._distinct_attribute
 
         filter_str = self._build_filter(query)
+        if query.cursor is not None:
+            if self._reindex_pending(query.index_name):
+                raise DomainError(
+                    "search_index_rebuilding",
+                    "cursor pagination is unavailable until the index rebuild completes",
+                )
+            # Keyset mode: strict (date_ts, msg_id) order, never deep offsets.
+            cursor_filter = self._build_cursor_filter(query.cursor)
+            filter_str = f"{filter_str} AND {cursor_filter}" if filter_str else cursor_filter
+            search_params["offset"] = 0
+            search_params["sort"] = list(_CURSOR_SORT)
         if filter_str:
             search_params["filter"] = filter_str
+        return search_params
 
-        result = await asyncio.to_thread(
-            self._meili.search,
-            query.q,
-            query.index_name,
-            **search_params,
-        )
-        hits = [self._parse_hit(hit) for hit in result.get("hits", [])]
-        page = SearchPage(
+    def _build_page(self, query: SearchQuery, search_params: dict[str, Any], result: dict[str, Any]) -> SearchPage:
+        raw_hits = result.get("hits", [])
+        # The backend's distinct already keeps one chunk per message; this restores the parent id and
+        # drops hot-tier copies of messages whose chunks are indexed.
+        hits = [self._parse_hit(hit) for hit in collapse_chunks(raw_hits)]
+        return SearchPage(
             hits=hits,
             query=query.q,
             processing_time_ms=int(result.get("processingTimeMs", 0)),
             total_hits=int(result.get("estimatedTotalHits", len(hits))),
             limit=query.limit,
-            offset=query.offset,
+            offset=search_params["offset"],
+            next_cursor=self._next_cursor(raw_hits, query.limit) if query.cursor is not None else None,
         )
+
+    async def _resolve_shards(self, query: SearchQuery) -> list[str] | None:
+        """Return the pruned shard list for a query on the sharded base index, else None."""
+        router = self._shard_router
+        if router is None or query.index_name != router.base_index:
+            return None
+        ts_from = self._to_epoch(query.date_from) if query.date_from is not None else None
+        ts_to = self._to_epoch(query.date_to) if query.date_to is not None else None
+        if query.cursor is not None and query.cursor != CURSOR_START:
+            cursor_ts, _ = self.decode_cursor(query.cursor)
+            ts_to = cursor_ts if ts_to is None else min(ts_to, cursor_ts)
+        return await asyncio.to_thread(router.indexes_for_range, ts_from, ts_to)
+
+    async def _search_shards(self, query: SearchQuery, search_params: dict[str, Any], shards: list[str]) -> dict[str, Any]:
+        if not shards:
+            return {"hits": [], "processingTimeMs": 0, "estimatedTotalHits": 0}
+        if len(shards) == 1:
+            return await asyncio.to_thread(self._meili.search, query.q, shards[0], **search_params)
+
+        if query.cursor is None:
+            # Relevance order: let Meili merge the shards and apply pagination once.
+            per_shard = {key: value for key, value in search_params.items() if key not in ("limit", "offset")}
+            return await asyncio.to_thread(
+                self._meili.multi_search,
+                [{"indexUid": shard, "q": query.q, **per_shard} for shard in shards],
+                {"limit": search_params["limit"], "offset": search_params["offset"]},
+            )
+
+        # Cursor mode sorts by time and shards are disjoint month ranges, so walking them
+        # newest-first and concatenating preserves the (date_ts, msg_id) order.
+        hits: list[dict[str, Any]] = []
+        total_hits = 0
+        processing_ms = 0
+        for shard in shards:
+            remaining = search_params["limit"] - len(hits)
+            result = await asyncio.to_thread(self._meili.search, query.q, shard, **{**search_params, "limit": remaining})
+            shard_hits = result.get("hits", [])
+            hits.extend(shard_hits)
+            total_hits += int(result.get("estimatedTotalHits", len(shard_hits)))
+            processing_ms += int(result.get("processingTimeMs", 0))
+            if len(hits) >= search_params["limit"]:
+                break
+        return {"hits": hits, "processingTimeMs": processing_ms, "estimatedTotalHits": total_hits}
+
+    def _fail_over(
+        self, operation: str, exc: MeiliSearchConnectionError | MeiliSearchTimeoutError
+    ) -> SqliteFtsIndex:
+        """Return the local standby index for `operation`, or re-raise when none is configured."""
+        if self._standby is None:
+            raise exc
+        logger.warning(
+            "[SearchService] standby_failover operation=%s error=%s: %s",
+            operation,
+            type(exc).__name__,
+            exc,
+        )
+        return self._standby
+
+    def _hot_predicate(self, query: SearchQuery) -> Callable[[dict[str, Any]], bool]:
+        """Evaluate the same conditions as `_build_filter`/`_build_cursor_filter` on an in-memory document."""
+        ts_from = self._to_epoch(query.date_from) if query.date_from is not None else None
+        ts_to = self._to_epoch(query.date_to) if query.date_to is not None else None
+        cursor_key = None
+        if query.cursor is not None and query.cursor != CURSOR_START:
+            cursor_key = self.decode_cursor(query.cursor)
+        username = query.sender_username
+        user_ids = set(self._metadata_store.find_user_ids(username)) if username and self._metadata_store else set()
+
+        def _matches(doc: dict[str, Any]) -> bool:
+            chat = doc.get("chat") or {}
+            date_ts = int(doc["date_ts"])
+            if query.chat_id is not None and doc.get("chat_id", chat.get("id")) != query.chat_id:
+                return False
+            if query.chat_type is not None and chat.get("type") != query.chat_type:
+                return False
+            if (ts_from is not None and date_ts < ts_from) or (ts_to is not None and date_ts > ts_to):
+                return False
+            if username is not None or query.sender_id is not None:
+                sender = doc.get("from_user") or {}
+                if username is not None and sender.get("username") != username and sender.get("id") not in user_ids:
+                    return False
+                if query.sender_id is not None and sender.get("id") != query.sender_id:
+                    return False
+            return cursor_key is None or (date_ts, int(doc.get("msg_id") or 0)) < cursor_key
+
+        return _matches
+
+    def _hot_only(self, query: SearchQuery) -> bool:
+        """Whether every document written in the query's time range is held by the hot tier (sole-writer tiers only)."""
+        tier = self._hot_tier
+        return (
+            tier is not None
+            and query.index_name == tier.index_name
+            and query.date_from is not None
+            and tier.covers(self._to_epoch(query.date_from))
+        )
+
+    def _search_hot_tier(self, query: SearchQuery, search_params: dict[str, Any]) -> list[dict[str, Any]] | None:
+        tier = self._hot_tier
+        if tier is None or query.index_name != tier.index_name:
+            return None
+        hits = tier.search(
+            query.q,
+            predicate=self._hot_predicate(query),
+            pre_tag=search_params["highlightPreTag"],
+            post_tag=search_params["highlightPostTag"],
+        )
+        if "attributesToRetrieve" in search_params or "attributesToCrop" in search_params:
+            # Give live hits the same shape as index hits for this profile.
+            hits = [
+                format_hit({key: value for key, value in hit.items() if key != "_formatted"}, query.q, search_params)
+                for hit in hits
+            ]
+        return hits
+
+    async def _unindexed_hot_hits(
+        self, query: SearchQuery, hot_hits: list[dict[str, Any]], shards: list[str] | None
+    ) -> list[dict[str, Any]]:
+        """
+        Return the hot-tier hits MeiliSearch cannot return yet (still queued for indexing), newest first.
+
+        Relevance pages put these ahead of Meili's ranking, so they must be exactly the
+        documents missing from the index; otherwise a message would appear twice across
+        pages and be counted twice in the total.
+        """
+        candidates = hot_hits[:_HOT_MERGE_MAX]
+        msg_ids: dict[int, list[int]] = {}
+        for hit in candidates:
+            try:
+                chat_id = int(hit.get("chat_id") or (hit.get("chat") or {})["id"])
+                msg_ids.setdefault(chat_id, []).append(int(hit["msg_id"]))
+            except (KeyError, TypeError, ValueError):
+                continue
+        indexed: set[str] = set()
+        if msg_ids:
+            params = {
+                "filter": " OR ".join(
+                    f"(chat_id = {chat_id} AND msg_id IN [{', '.join(map(str, ids))}])" for chat_id, ids in msg_ids.items()
+                ),
+                # Chunks and edited versions share (chat_id, msg_id), so leave room beyond one row per hit.
+                "limit": 1000,
+                "attributesToRetrieve": ["id", "parent_id"],
+                "attributesToHighlight": [],
+            }
+            index_names = [query.index_name]
+            if shards is not None and self._shard_router is not None:
+                oldest = min(int(hit["date_ts"]) for hit in candidates)
+                index_names = await asyncio.to_thread(self._shard_router.indexes_for_range, oldest, None)
+            for index_name in index_names:
+                result = await asyncio.to_thread(self._meili.search, "", index_name, **params)
+                indexed.update(str(hit.get("parent_id") or hit.get("id")) for hit in result.get("hits", []))
+        return [hit for hit in candidates if str(hit.get("id")) not in indexed]
+
+    @staticmethod
+    def _params_after_fresh(search_params: dict[str, Any], fresh: int) -> dict[str, Any]:
+        """Meili offset/limit for a relevance page of `fresh` unindexed hits followed by Meili's ranking."""
+        offset, limit = search_params["offset"], search_params["limit"]
+        shown = max(min(fresh - offset, limit), 0)
+        return {**search_params, "offset": max(offset - fresh, 0), "limit": limit - shown}
+
+    @staticmethod
+    def _merge_hot_hits(
+        query: SearchQuery, search_params: dict[str, Any], result: dict[str, Any], hot_hits: list[dict[str, Any]]
+    ) -> dict[str, Any]:
+        """Keyset pages: merge live hits into Meili's (date_ts, msg_id) order."""
+        hits = result.get("hits", [])
+        seen = {hit.get("id") for hit in hits}
+        fresh = [hit for hit in hot_hits if hit.get("id") not in seen]
+        if not fresh:
+            return result
+        # Both sides are in (date_ts, msg_id) order, so a keyed merge keeps the cursor exact.
+        merged = sorted(
+            hits + fresh,
+            key=lambda hit: (int(hit.get("date_ts") or 0), int(hit.get("msg_id") or 0)),
+            reverse=True,
+        )[: search_params["limit"]]
+        total = int(result.get("estimatedTotalHits", len(hits))) + len(fresh)
+        return {**result, "hits": merged, "estimatedTotalHits": total}
+
+    @staticmethod
+    def _prepend_fresh(search_params: dict[str, Any], result: dict[str, Any], fresh: list[dict[str, Any]]) -> dict[str, Any]:
+        """Relevance pages: unindexed hits come first, then Meili's ranking shifted past them."""
+        offset = search_params["offset"]
+        shown = fresh[offset : offset + search_params["limit"]]
+        total = int(result.get("estimatedTotalHits", len(result.get("hits", [])))) + len(fresh)
+        return {**result, "hits": shown + result.get("hits", []), "estimatedTotalHits": total}
+
+    async def search(self, query: SearchQuery) -> SearchPage:
+        query = self._normalizer.normalize(query)
+        if not query.facets:
+            return await self._search_page(query)
+        self._validate_facets(query.facets)
+        # Facet counts ignore pagination, so they come from their own (cached) request.
+        page, distribution = await asyncio.gather(self._search_page(query), self._facet_distribution(query))
+        page.facet_distribution = distribution
+        return page
+
+    async def _search_page(self, query: SearchQuery) -> SearchPage:
+        started_at = time.monotonic()
+        search_params = self._build_search_params(query)
+        hot_hits = self._search_hot_tier(query, search_params)
+        if hot_hits is not None and self._hot_only(query):
+            start = search_params["offset"]
+            result = {
+                "hits": hot_hits[start : start + search_params["limit"]],
+                "processingTimeMs": 0,
+                "estimatedTotalHits": len(hot_hits),
+            }
+            page = self._build_page(query, search_params, result)
+            logger.info(
+                "[SearchService] search q_len=%d index=%s hot_only=True limit=%d offset=%d hits=%d total_hits=%d duration_ms=%.1f",
+                len(query.q),
+                query.index_name,
+                query.limit,
+                page.offset,
+                len(page.hits),
+                page.total_hits,
+                (time.monotonic() - started_at) * 1000,
+            )
+            return page
+
+        fresh: list[dict[str, Any]] = []
+        try:
+            shards = await self._resolve_shards(query)
+            meili_params = search_params
+            if hot_hits and query.cursor is None and not self._reindex_pending(query.index_name):
+                fresh = await self._unindexed_hot_hits(query, hot_hits, shards)
+                meili_params = self._params_after_fresh(search_params, len(fresh))
+            if shards is None:
+                result = await asyncio.to_thread(
+                    self._meili.search,
+                    query.q,
+                    query.index_name,
+                    **meili_params,
+                )
+            else:
+                result = await self._search_shards(query, meili_params, shards)
+        except (MeiliSearchConnectionError, MeiliSearchTimeoutError) as exc:
+            # The standby mirrors shards into the base index, so it is queried unsharded.
+            standby = self._fail_over("search", exc)
+            shards = None
+            # Live writes are mirrored to the standby synchronously, so it already holds the hot hits.
+            fresh = []
+            hot_hits = hot_hits if query.cursor is not None else None
+            result = await asyncio.to_thread(standby.search, query.q, query.index_name, **search_params)
+        if query.cursor is not None:
+            if hot_hits:
+                result = self._merge_hot_hits(query, search_params, result, hot_hits)
+        elif fresh:
+            result = self._prepend_fresh(search_params, result, fresh)
+        page = self._build_page(query, search_params, result)
         duration_ms = (time.monotonic() - started_at) * 1000
         logger.info(
-            "[SearchService] search q_len=%d index=%s filter_enabled=%s limit=%d offset=%d hits=%d total_hits=%d duration_ms=%.1f meili_processing_ms=%d",
+            "[SearchService] search q_len=%d index=%s shards=%s hot_hits=%s filter_enabled=%s cursor_mode=%s limit=%d offset=%d hits=%d total_hits=%d duration_ms=%.1f meili_processing_ms=%d",
             len(query.q),
             query.index_name,
-            filter_str is not None,
+            len(shards) if shards is not None else "-",
+            len(hot_hits) if hot_hits is not None else "-",
+            "filter" in search_params,
+            query.cursor is not None,
             query.limit,
-            query.offset,
+            page.offset,
             len(page.hits),
             page.total_hits,
             duration_ms,
@@ -186,50 +683,392 @@ class SearchService:
         )
         return page
 
+    async def search_many(self, queries: list[SearchQuery]) -> list[SearchPage]:
+        """
+        Run independent searches in a single Meili `/multi-search` round-trip.
+
+        Pages are returned in the same order as `queries`, each with exactly the
+        semantics of `search()` (filters, cursor mode, highlighting).
+        """
+        if not queries:
+            return []
+        queries = [self._normalizer.normalize(query) for query in queries]
+        for query in queries:
+            if query.facets:
+                self._validate_facets(query.facets)
+        if self._shard_router is not None and any(query.index_name == self._shard_router.base_index for query in queries):
+            # Each sharded query is itself a fan-out, which multi-search cannot nest.
+            return list(await asyncio.gather(*(self.search(query) for query in queries)))
+        started_at = time.monotonic()
+        params_list = [self._build_search_params(query) for query in queries]
+        multi_queries = [
+            {"indexUid": query.index_name, "q": query.q, **params}
+            for query, params in zip(queries, params_list, strict=True)
+        ]
+        try:
+            result = await asyncio.to_thread(self._meili.multi_search, multi_queries)
+        except (MeiliSearchConnectionError, MeiliSearchTimeoutError) as exc:
+            result = await asyncio.to_thread(self._fail_over("search_many", exc).multi_search, multi_queries)
+        results = result.get("results", [])
+        if len(results) != len(queries):
+            raise DomainError(
+                "search_batch_failed",
+                "multi-search returned an unexpected number of results",
+                detail=f"expected={len(queries)} received={len(results)}",
+            )
+        pages = [
+            self._build_page(query, params, item)
+            for query, params, item in zip(queries, params_list, results, strict=True)
+        ]
+        faceted = [(page, query) for page, query in zip(pages, queries) if query.facets]
+        if faceted:
+            distributions = await asyncio.gather(*(self._facet_distribution(query) for _, query in faceted))
+            for (page, _), distribution in zip(faceted, distributions):
+                page.facet_distribution = distribution
+        logger.info(
+            "[SearchService] search_many queries=%d hits=%d duration_ms=%.1f",
+            len(queries),
+            sum(len(page.hits) for page in pages),
+            (time.monotonic() - started_at) * 1000,
+        )
+        return pages
+
+    async def search_federated(self, queries: list[SearchQuery], *, limit: int = 20, offset: int = 0) -> SearchPage:
+        """
+        Merge several queries (typically over different indexes) into one ranked page.
+
+        Per-query `limit`/`offset` are ignored; the merged page is cut by
+        `limit`/`offset`. Cursor mode is not supported across a federation.
+        """
+        if not queries:
+            raise DomainError("search_batch_invalid", "federated search requires at least one query")
+        if any(query.cursor is not None for query in queries):
+            raise DomainError("search_batch_invalid", "cursor pagination is not supported in federated search")
+        if any(query.facets for query in queries):
+            raise DomainError("search_batch_invalid", "facets are not supported in federated search")
+        queries = [self._normalizer.normalize(query) for query in queries]
+        started_at = time.monotonic()
+        multi_queries = []
+        for query in queries:
+            params = self._build_search_params(query)
+            params.pop("limit", None)
+            params.pop("offset", None)
+            multi_queries.append({"indexUid": query.index_name, "q": query.q, **params})
+        federation = {"limit": limit, "offset": offset}
+        try:
+            result = await asyncio.to_thread(self._meili.multi_search, multi_queries, federation)
+        except (MeiliSearchConnectionError, MeiliSearchTimeoutError) as exc:
+            standby = self._fail_over("search_federated", exc)
+            result = await asyncio.to_thread(standby.multi_search, multi_queries, federation)
+        merged_query = queries[0].model_copy(update={"limit": limit, "offset": offset})
+        page = self._build_page(merged_query, {"offset": offset}, result)
+        page.query = " | ".join(dict.fromkeys(query.q for query in queries))
+        logger.info(
+            "[SearchService] search_federated queries=%d hits=%d total_hits=%d duration_ms=%.1f",
+            len(queries),
+            len(page.hits),
+            page.total_hits,
+            (time.monotonic() - started_at) * 1000,
+        )
+        return page
+
     @staticmethod
-    def _presentation_cache_key(query: SearchQuery) -> str:
+    def _validate_facets(facets: list[str]) -> None:
+        unknown = sorted(set(facets) - set(FACET_ATTRIBUTES))
+        if unknown:
+            raise DomainError("search_facets_invalid", "unknown facet attributes", detail=",".join(unknown))
+
+    async def _facet_distribution(self, query: SearchQuery) -> dict[str, dict[str, int]]:
+        """
+        Count matches per value of each `query.facets` attribute.
+
+        Each attribute is counted on its base query: `query` without the attribute's own
+        filter (`_FACET_FILTER_FIELDS`). Counts are cached per (base query, attribute)
+        for the cache TTL and index generation, so paging, switching profile, or turning
+        a facet value into a filter reuses them instead of asking MeiliSearch again.
+        """
+        facets = list(dict.fromkeys(query.facets or ()))
+        generation: IndexGeneration = await self._current_generation() if self._cache_enabled else (0, None)
+        distribution: dict[str, dict[str, int]] = {}
+        missing: dict[str, tuple[SearchQuery, list[str]]] = {}
+        async with self._cache_lock:
+            for attribute in facets:
+                base = query.model_copy(update=dict.fromkeys(_FACET_FILTER_FIELDS[attribute]))
+                key = self._presentation_cache_key(base)
+                entry = self._facet_cache.get((key, attribute)) if self._cache_enabled else None
+                if entry is not None and not entry.is_expired() and entry.generation == generation:
+                    distribution[attribute] = entry.values
+                else:
+                    missing.setdefault(key, (base, []))[1].append(attribute)
+
+        if missing:
+            loaded = await asyncio.gather(*(self._load_facets(base, attributes) for base, attributes in missing.values()))
+            async with self._cache_lock:
+                if len(self._facet_cache) >= _FACET_CACHE_MAX_ENTRIES:
+                    self._facet_cache.clear()
+                expires_at = time.monotonic() + self._cache_ttl_sec
+                for (key, (_, attributes)), counts in zip(missing.items(), loaded, strict=True):
+                    for attribute in attributes:
+                        values = counts.get(attribute, {})
+                        distribution[attribute] = values
+                        if self._cache_enabled:
+                            self._facet_cache[(key, attribute)] = _FacetCacheEntry(values, expires_at, generation)
+
+        loaded_count = sum(len(attributes) for _, attributes in missing.values())
+        logger.info(
+            "[SearchService] facets attributes=%s cached=%d loaded=%d requests=%d",
+            ",".join(facets),
+            len(facets) - loaded_count,
+            loaded_count,
+            len(missing),
+        )
+        return {attribute: distribution[attribute] for attribute in facets}
+
+    async def _load_facets(self, query: SearchQuery, attributes: list[str]) -> dict[str, dict[str, int]]:
+        """Fetch `facetDistribution` for `attributes` with a hit-less (`limit=0`) search."""
+        params: dict[str, Any] = {"limit": 0, "facets": attributes}
+        if self._distinct_attribute is not None:
+            params["distinct"] = self._distinct_attribute
+        filter_str = self._build_filter(query)
+        if filter_str:
+            params["filter"] = filter_str
+        try:
+            shards = await self._resolve_shards(query)
+            if shards is None:
+                results = [await asyncio.to_thread(self._meili.search, query.q, query.index_name, **params)]
+            elif shards:
+                multi = await asyncio.to_thread(
+                    self._meili.multi_search,
+                    [{"indexUid": shard, "q": query.q, **params} for shard in shards],
+                )
+                results = multi.get("results", [])
+            else:
+                results = []
+        except (MeiliSearchConnectionError, MeiliSearchTimeoutError) as exc:
+            standby = self._fail_over("facets", exc)
+            results = [await asyncio.to_thread(standby.search, query.q, query.index_name, **params)]
+
+        # Shards hold disjoint months, so their counts add up.
+        merged: dict[str, dict[str, int]] = {}
+        for result in results:
+            for attribute, values in (result.get("facetDistribution") or {}).items():
+                bucket = merged.setdefault(attribute, {})
+                for value, count in values.items():
+                    bucket[str(value)] = bucket.get(str(value), 0) + int(count)
+        return {
+            attribute: dict(sorted(values.items(), key=lambda item: (-item[1], item[0])))
+            for attribute, values in merged.items()
+        }
+
+    async def iter_hits(self, query: SearchQuery, batch_size: int = 100) -> AsyncIterator[SearchHit]:
+        """
+        Yield every hit matching `query` in `(date_ts, msg_id)` descending order.
+
+        Pages through the index with keyset cursors, so memory stays bounded by
+        `batch_size` and the `pagination.maxTotalHits` cap does not apply.
+        """
+        cursor: str | None = CURSOR_START
+        page_query = query.model_copy(
+            update={"limit": max(1, min(int(batch_size), 100)), "offset": 0, "facets": None}
+        )
+        while cursor is not None:
+            page = await self.search(page_query.model_copy(update={"cursor": cursor}))
+            for hit in page.hits:
+                yield hit
+            cursor = page.next_cursor
+
+    @classmethod
+    def _presentation_cache_key(cls, query: SearchQuery) -> str:
+        # Dates as epoch seconds: the same instant keys the same entry however it was
+        # written, and the key doubles as the stored payload of `pb:` digest callbacks.
         payload = {
             "q": query.q,
             "chat_id": query.chat_id,
             "chat_type": query.chat_type,
-            "date_from": query.date_from.isoformat() if query.date_from else None,
-            "date_to": query.date_to.isoformat() if query.date_to else None,
+            "date_from": cls._to_epoch(query.date_from) if query.date_from else None,
+            "date_to": cls._to_epoch(query.date_to) if query.date_to else None,
             "sender_username": query.sender_username,
             "index_name": query.index_name,
         }
+        if query.sender_id is not None:
+            # Only set by API refinements; left out otherwise so existing keys stay stable.
+            payload["sender_id"] = query.sender_id
         return json.dumps(payload, sort_keys=True, separators=(",", ":"))
 
-    async def _get_cached_or_load_presentation(self, query: SearchQuery) -> SearchPage:
+    async def _current_generation(self) -> IndexGeneration:
+        """
+        Return the index write generation used to validate cache entries.
+
+        Local writes bump `MeiliSearchClient.write_generation` immediately; Meili's
+        `lastUpdate` is polled at most every `generation_check_interval_sec` to
+        pick up documents indexed asynchronously or written by other processes.
+        """
+        local_generation = int(getattr(self._meili, "write_generation", 0) or 0)
+        if self._hot_tier is not None:
+            local_generation += self._hot_tier.generation
+        if self._metadata_store is not None:
+            # Cached pages embed joined titles, so a metadata change must invalidate them too.
+            local_generation += self._metadata_store.version
+        get_last_update = getattr(self._meili, "get_last_update", None)
+        if not callable(get_last_update):
+            return local_generation, None
+
+        now = time.monotonic()
+        checked_at = self._remote_checked_at
+        if checked_at is None or now - checked_at >= self._generation_check_interval_sec:
+            self._remote_checked_at = now
+            try:
+                self._remote_last_update = await asyncio.to_thread(get_last_update)
+            except Exception as exc:
+                logger.warning(
+                    "[SearchService] generation_check_failed error=%s: %s",
+                    type(exc).__name__,
+                    exc,
+                )
+        return local_generation, self._remote_last_update
+
+    async def _load_presentation(self, query: SearchQuery) -> SearchPage:
+        return await self.search(
+            query.model_copy(
+                update={
+                    "limit": self._max_presentation_hits,
+                    "offset": 0,
+                    "cursor": None,
+                    # Presentation pages only ever render a snippet per hit.
+                    "profile": "bot",
+                    "fields": None,
+                    "facets": None,
+                }
+            )
+        )
+
+    async def _store_presentation(self, key: str, page: SearchPage, generation: IndexGeneration) -> None:
+        async with self._cache_lock:
+            self._presentation_cache[key] = _PresentationCacheEntry(
+                page=page,
+                expires_at=time.monotonic() + self._cache_ttl_sec,
+                generation=generation,
+            )
+
+    def _schedule_refresh(self, key: str, query: SearchQuery, generation: IndexGeneration) -> None:
+        if key in self._refreshing_keys:
+            return
+        self._refreshing_keys.add(key)
+        task = asyncio.create_task(self._refresh_presentation(key, query, generation))
+        self._refresh_tasks.add(task)
+        task.add_done_callback(self._refresh_tasks.discard)
+
+    async def _refresh_presentation(self, key: str, query: SearchQuery, generation: IndexGeneration) -> None:
+        key_hash = hash(key)
+        try:
+            page = await self._load_presentation(query)
+            await self._store_presentation(key, page, generation)
+            logger.info("[SearchService] presentation_cache_refreshed key_hash=%d", key_hash)
+        except Exception as exc:
+            logger.warning(
+                "[SearchService] presentation_cache_refresh_failed key_hash=%d error=%s: %s",
+                key_hash,
+                type(exc).__name__,
+                exc,
+            )
+        finally:
+            self._refreshing_keys.discard(key)
+
+    async def _get_cached_or_load_presentation(self, query: SearchQuery) -> tuple[SearchPage, bool]:
+        """Return the full presentation page for `query` and whether it came from the cache."""
         key = self._presentation_cache_key(query)
         key_hash = hash(key)
+        generation: IndexGeneration = (0, None)
+        # Any entry we had, however old, beats an error while MeiliSearch is unreachable.
+        fallback: _PresentationCacheEntry | None = None
         if self._cache_enabled:
+            generation = await self._current_generation()
             async with self._cache_lock:
                 entry = self._presentation_cache.get(key)
-                if entry is not None and not entry.is_expired():
-                    logger.info("[SearchService] presentation_cache_hit key_hash=%d", key_hash)
-                    return entry.page
+                fallback = entry
                 if entry is not None and entry.is_expired():
                     self._presentation_cache.pop(key, None)
                     logger.info("[SearchService] presentation_cache_expired key_hash=%d", key_hash)
+                elif entry is not None and entry.generation == generation:
+                    logger.info("[SearchService] presentation_cache_hit key_hash=%d", key_hash)
+                    return entry.page, True
+                elif entry is not None:
+                    stale_for = time.monotonic() - entry.mark_stale()
+                    if self._cache_stale_grace_sec > 0 and stale_for <= self._cache_stale_grace_sec:
+                        logger.info(
+                            "[SearchService] presentation_cache_stale_hit key_hash=%d stale_for_sec=%.1f",
+                            key_hash,
+                            stale_for,
+                        )
+                        self._schedule_refresh(key, query, generation)
+                        return entry.page, True
+                    self._presentation_cache.pop(key, None)
+                    logger.info(
+                        "[SearchService] presentation_cache_stale_evicted key_hash=%d stale_for_sec=%.1f",
+                        key_hash,
+                        stale_for,
+                    )
 
         logger.info("[SearchService] presentation_cache_miss key_hash=%d", key_hash)
 
-        loaded_page = await self.search(
-            query.model_copy(
-                update={
-                    "limit": self._max_presentation_hits,
-                    "offset": 0,
-                }
+        try:
+            loaded_page = await self._load_presentation(query)
+        except (MeiliSearchConnectionError, MeiliSearchTimeoutError) as exc:
+            if fallback is None:
+                raise
+            logger.warning(
+                "[SearchService] presentation_cache_fallback key_hash=%d error=%s: %s",
+                key_hash,
+                type(exc).__name__,
+                exc,
             )
-        )
+            return fallback.page, True
 
         if self._cache_enabled:
-            async with self._cache_lock:
-                self._presentation_cache[key] = _PresentationCacheEntry(
-                    page=loaded_page,
-                    expires_at=time.monotonic() + self._cache_ttl_sec,
-                )
-        return loaded_page
+            # Store under the generation observed *before* loading so that writes
+            # racing with this load mark the entry stale on the next lookup.
+            await self._store_presentation(key, loaded_page, generation)
+        return loaded_page, False
+
+    async def _fresh_presentation_entry(self, query: SearchQuery) -> _PresentationCacheEntry | None:
+        if not self._cache_enabled:
+            return None
+        generation = await self._current_generation()
+        entry = self._presentation_cache.get(self._presentation_cache_key(self._normalizer.normalize(query)))
+        if entry is None or entry.is_expired() or entry.generation != generation:
+            return None
+        return entry
+
+    async def get_rendered_page(self, query: SearchQuery, page: int, page_size: int = RESULTS_PER_PAGE) -> Any | None:
+        """
+        Return what `store_rendered_page` attached to the cached presentation page, if still valid.
+
+        Only fresh entries qualify (same index generation, not expired); a stale or
+        missing entry returns None so callers fall back to `search_for_presentation`.
+        Rendered pages may embed pagination callback tokens, so they also expire
+        with `callback_token_ttl_sec`.
+        """
+        entry = await self._fresh_presentation_entry(query)
+        if entry is None:
+            return None
+        cached = entry.rendered.get((page, page_size))
+        if cached is None:
+            return None
+        rendered_at, rendered = cached
+        if time.monotonic() - rendered_at >= self._callback_token_ttl_sec:
+            entry.rendered.pop((page, page_size), None)
+            return None
+        logger.info("[SearchService] rendered_page_hit page=%d page_size=%d", page, page_size)
+        if page == 0:
+            # A first page served here never reaches search_for_presentation; log it as a cache hit.
+            await self._log_query(self._normalizer.normalize(query), entry.page.total_hits, True, time.monotonic())
+        return rendered
+
+    async def store_rendered_page(self, query: SearchQuery, page: int, page_size: int, rendered: Any) -> None:
+        """Attach renderer output to the cached presentation page; no-op when the page is not cached."""
+        entry = await self._fresh_presentation_entry(query)
+        if entry is not None:
+            entry.rendered[(page, page_size)] = (time.monotonic(), rendered)
 
     async def search_for_presentation(
         self,
@@ -242,7 +1081,12 @@ class SearchService:
         if page_size <= 0:
             raise DomainError("search_invalid_page_size", "page_size must be > 0")
 
-        source_page = await self._get_cached_or_load_presentation(query)
+        query = self._normalizer.normalize(query)
+        started_at = time.monotonic()
+        source_page, cached = await self._get_cached_or_load_presentation(query)
+        if page == 0:
+            # Only new searches count towards the query log; page turns would skew it.
+            await self._log_query(query, source_page.total_hits, cached, started_at)
         start = page * page_size
         end = start + page_size
         hits_window = source_page.hits[: self._max_presentation_hits]
@@ -257,29 +1101,140 @@ class SearchService:
             offset=start,
         )
 
-    def encode_page_callback(self, query: SearchQuery, page: int, page_size: int = RESULTS_PER_PAGE) -> bytes:
-        self._cleanup_callback_query_cache()
-        payload: dict[str, Any] = {
-            "q": query.q,
-            "p": page,
-            "s": page_size,
-            "index": query.index_name,
-        }
-        if query.chat_id is not None:
-            payload["cid"] = query.chat_id
-        if query.chat_type is not None:
-            payload["ct"] = query.chat_type
-        if query.date_from is not None:
-            payload["df"] = query.date_from.isoformat()
-        if query.date_to is not None:
-            payload["dt"] = query.date_to.isoformat()
-        if query.sender_username is not None:
-            payload["su"] = query.sender_username
+    async def _log_query(self, query: SearchQuery, total_hits: int, cached: bool, started_at: float) -> None:
+        if self._query_log is None or random.random() >= self._query_log_sample_rate:
+            return
+        latency_ms = (time.monotonic() - started_at) * 1000
+        try:
+            await asyncio.to_thread(
+                self._query_log.record,
+                self._presentation_cache_key(query),
+                query.q,
+                latency_ms=latency_ms,
+                total_hits=total_hits,
+                cached=cached,
+            )
+        except sqlite3.Error as exc:
+            logger.warning("[SearchService] query_log_record_failed error=%s: %s", type(exc).__name__, exc)
+
+    async def cache_generation(self) -> IndexGeneration:
+        """Current index write generation; changes whenever cached pages may be outdated."""
+        return await self._current_generation()
+
+    async def warm_cache(
+        self,
+        limit: int,
+        *,
+        pace_sec: float = 0.0,
+        should_pause: Callable[[], bool] | None = None,
+    ) -> int:
+        """
+        Load the `limit` most frequent logged queries into the presentation cache.
+
+        Queries that already have a fresh entry are skipped, so warming after a write
+        generation change only reloads what went stale. `pace_sec` spaces out backend
+        queries and `should_pause` (e.g. "ingest is busy") stops the run early.
+        Returns the number of queries loaded.
+        """
+        if not self._cache_enabled or self._query_log is None or limit <= 0:
+            return 0
+        try:
+            top = await asyncio.to_thread(self._query_log.top_queries, limit=limit, since=time.time() - _WARM_WINDOW_SEC)
+        except sqlite3.Error as exc:
+            logger.warning("[SearchService] cache_warm_failed error=%s: %s", type(exc).__name__, exc)
+            return 0
+
+        started_at = time.monotonic()
+        warmed = 0
+        for stats in top:
+            if should_pause is not None and should_pause():
+                logger.info("[SearchService] cache_warm_paused warmed=%d", warmed)
+                break
+            try:
+                query = self._normalizer.normalize(self._query_from_fields(json.loads(stats.payload)))
+                key = self._presentation_cache_key(query)
+                generation = await self._current_generation()
+                entry = self._presentation_cache.get(key)
+                if entry is not None and not entry.is_expired() and entry.generation == generation:
+                    continue
+                # Load directly: a stale entry would otherwise be served from its grace period.
+                await self._store_presentation(key, await self._load_presentation(query), generation)
+            except Exception as exc:
+                logger.warning("[SearchService] cache_warm_query_failed error=%s: %s", type(exc).__name__, exc)
+                continue
+            warmed += 1
+            if pace_sec > 0:
+                await asyncio.sleep(pace_sec)
+
+        self._last_warm_at = datetime.now(timezone.utc)
+        self._last_warmed = warmed
+        logger.info(
+            "[SearchService] cache_warmed candidates=%d warmed=%d elapsed_ms=%.1f",
+            len(top),
+            warmed,
+            (time.monotonic() - started_at) * 1000,
+        )
+        return warmed
+
+    async def top_queries(self, *, limit: int = 20, window_hours: float = 24) -> TopQueriesReport:
+        """Most frequent logged presentation searches with latency percentiles."""
+        if self._query_log is None:
+            raise DomainError("query_log_unavailable", "query log is disabled")
+        try:
+            stats = await asyncio.to_thread(self._query_log.top_queries, limit=limit, since=time.time() - window_hours * 3600)
+            logged = await asyncio.to_thread(self._query_log.count)
+        except sqlite3.Error as exc:
+            raise DomainError("query_log_unavailable", "query log unavailable", detail=str(exc)) from exc
+
+        items = []
+        for entry in stats:
+            fields = json.loads(entry.payload)
+            filters = {
+                key: value
+                for key, value in fields.items()
+                if key != "q" and value is not None and not (key == "index_name" and value == "telegram")
+            }
+            items.append(
+                TopQueryItem(
+                    q=str(fields.get("q", entry.q)),
+                    filters=filters,
+                    count=entry.count,
+                    cache_hits=entry.cache_hits,
+                    avg_total_hits=entry.avg_total_hits,
+                    p50_ms=entry.p50_ms,
+                    p95_ms=entry.p95_ms,
+                    max_ms=entry.max_ms,
+                    last_seen_at=datetime.fromtimestamp(entry.last_seen_at, timezone.utc),
+                )
+            )
+        return TopQueriesReport(
+            window_hours=window_hours,
+            logged=logged,
+            items=items,
+            last_warm_at=self._last_warm_at,
+            last_warmed=self._last_warmed,
+        )
+
+    @staticmethod
+    def is_page_callback(raw_data: str | bytes) -> bool:
+        data = raw_data if isinstance(raw_data, bytes) else raw_data.encode("utf-8")
+        return data.startswith((callback_codec.PREFIX, b"page:", b"pagek:", b"page_"))
 
-        packed = json.dumps(payload, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
-        token = base64.urlsafe_b64encode(packed).decode("ascii").rstrip("=")
-        encoded = f"page:{token}".encode("utf-8")
-        if len(encoded) <= 64:
+    async def encode_page_callback(self, query: SearchQuery, page: int, page_size: int = RESULTS_PER_PAGE) -> bytes:
+        self._cleanup_callback_query_cache()
+        callback = PageCallback(
+            page=page,
+            page_size=page_size,
+            q=query.q,
+            chat_id=query.chat_id,
+            chat_type=query.chat_type,
+            date_from_ts=self._to_epoch(query.date_from) if query.date_from is not None else None,
+            date_to_ts=self._to_epoch(query.date_to) if query.date_to is not None else None,
+            sender_username=query.sender_username,
+            index_name=query.index_name,
+        )
+        encoded = callback_codec.encode(callback)
+        if len(encoded) <= callback_codec.MAX_CALLBACK_BYTES:
             logger.info(
                 "[SearchService] encode_callback mode=inline page=%d page_size=%d payload_bytes=%d",
                 page,
@@ -288,6 +1243,22 @@ class SearchService:
             )
             return encoded
 
+        if self._callback_store is not None:
+            try:
+                # SQLite write (busy timeout up to seconds): keep it off the bot's event loop.
+                digest = await asyncio.to_thread(self._callback_store.put, self._presentation_cache_key(query))
+            except sqlite3.Error as exc:
+                logger.warning("[SearchService] callback_store_put_failed error=%s: %s", type(exc).__name__, exc)
+            else:
+                logger.info(
+                    "[SearchService] encode_callback mode=stored page=%d page_size=%d inline_payload_bytes=%d",
+                    page,
+                    page_size,
+                    len(encoded),
+                )
+                return callback_codec.encode(PageCallback(page=page, page_size=page_size, digest=digest))
+
+        # Without a persistent store, fall back to an in-memory token (lost on restart).
         short_token = uuid.uuid4().hex[:12]
         self._callback_query_cache[short_token] = _CallbackQueryEntry(
             query=query.model_copy(
@@ -307,9 +1278,74 @@ class SearchService:
         )
         return f"pagek:{short_token}:{page}:{page_size}".encode("utf-8")
 
-    def decode_page_callback(self, raw_data: str | bytes) -> tuple[SearchQuery, int, int]:
+    @staticmethod
+    def _query_from_fields(fields: dict[str, Any], **extra: Any) -> SearchQuery:
+        """Rebuild a query from `_presentation_cache_key` fields (dates as epoch seconds)."""
+        return SearchQuery(
+            q=str(fields["q"]),
+            chat_id=fields.get("chat_id"),
+            chat_type=fields.get("chat_type"),
+            date_from=PageCallback.to_datetime(fields.get("date_from")),
+            date_to=PageCallback.to_datetime(fields.get("date_to")),
+            sender_username=fields.get("sender_username"),
+            sender_id=fields.get("sender_id"),
+            index_name=str(fields.get("index_name") or "telegram"),
+            **extra,
+        )
+
+    async def _decode_compact_callback(self, data: bytes) -> tuple[SearchQuery, int, int]:
+        try:
+            callback = callback_codec.decode(data)
+        except (ValueError, UnicodeDecodeError) as exc:
+            raise DomainError("search_pagination_invalid", "invalid pagination payload", detail=str(exc)) from exc
+        fields: dict[str, Any] = {
+            "q": callback.q,
+            "chat_id": callback.chat_id,
+            "chat_type": callback.chat_type,
+            "date_from": callback.date_from_ts,
+            "date_to": callback.date_to_ts,
+            "sender_username": callback.sender_username,
+            "index_name": callback.index_name,
+        }
+        mode = "inline"
+        if callback.digest is not None:
+            mode = "stored"
+            try:
+                payload = (
+                    await asyncio.to_thread(self._callback_store.get, callback.digest)
+                    if self._callback_store is not None
+                    else None
+                )
+            except sqlite3.Error as exc:
+                raise DomainError("search_pagination_invalid", "pagination query unavailable", detail=str(exc)) from exc
+            if payload is None:
+                raise DomainError("search_pagination_invalid", "pagination query expired")
+            fields = json.loads(payload)
+        try:
+            query = self._query_from_fields(
+                fields,
+                limit=callback.page_size,
+                offset=callback.page * callback.page_size,
+            )
+        except Exception as exc:
+            raise DomainError("search_pagination_invalid", "invalid pagination payload", detail=str(exc)) from exc
+        logger.info(
+            "[SearchService] decode_callback mode=%s page=%d page_size=%d",
+            mode,
+            callback.page,
+            callback.page_size,
+        )
+        return query, callback.page, callback.page_size
+
+    async def decode_page_callback(self, raw_data: str | bytes) -> tuple[SearchQuery, int, int]:
         self._cleanup_callback_query_cache()
-        raw = raw_data.decode("utf-8") if isinstance(raw_data, bytes) else raw_data
+        data = raw_data if isinstance(raw_data, bytes) else raw_data.encode("utf-8")
+        if data.startswith(callback_codec.PREFIX):
+            return await self._decode_compact_callback(data)
+        try:
+            raw = data.decode("utf-8")
+        except UnicodeDecodeError as exc:
+            raise DomainError("search_pagination_invalid", "invalid pagination payload") from exc
         if raw.startswith("pagek:"):
             try:
                 _, token, page_text, page_size_text = raw.split(":", 3)
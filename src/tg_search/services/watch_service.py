@@ -0,0 +1,327 @@
+"""
+关键词订阅（watch）：规则持久化在 ConfigStore，实时消息入库时逐条匹配并推送通知
+
+- 所有启用的规则编译进同一个 Aho–Corasick 自动机，每条消息只扫描一遍文本
+- 规则变更（或用户名可能解析出新 id）时重新编译，按 `refresh_interval_sec` 周期检查
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import threading
+import time
+from collections import deque
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from typing import Any
+
+from tg_search.config import settings
+from tg_search.config.config_store import ConfigStore, GlobalConfig, SavedWatch
+from tg_search.config.metadata_store import MetadataStore
+from tg_search.core.logger import setup_logger
+from tg_search.core.sqlite_fts import highlight, is_cjk, split_segments
+from tg_search.services.contracts import DomainError, WatchItem, WatchStats
+from tg_search.utils.aho_corasick import AhoCorasick
+
+logger = setup_logger()
+
+WatchSubscriber = Callable[[WatchItem, dict[str, Any]], Awaitable[None] | None]
+
+_CHAT_TYPES = ("private", "group", "channel")
+_LATENCY_SAMPLES = 2048
+_STATS_LOG_EVERY = 1000
+
+
+@dataclass(slots=True)
+class ParsedWatch:
+    """`/watch` 查询解析结果：关键词 + chat:/type:/from: 过滤条件。"""
+
+    keywords: str
+    terms: list[str]
+    chat_id: int | None = None
+    chat_type: str | None = None
+    sender_username: str | None = None
+    sender_id: int | None = None
+
+
+def parse_watch_query(text: str) -> ParsedWatch:
+    """
+    解析 `<关键词> [chat:<id>] [type:<private|group|channel>] [from:@user|from:<id>]`。
+
+    关键词按搜索分词规则切分：每段 CJK 需连续出现，每个拉丁单词需出现在词首；所有词都要命中（AND）。
+    """
+    words: list[str] = []
+    parsed = ParsedWatch(keywords="", terms=[])
+    for token in text.split():
+        key, sep, value = token.partition(":")
+        key = key.lower()
+        if sep and value and key == "chat":
+            try:
+                parsed.chat_id = int(value)
+            except ValueError as exc:
+                raise DomainError("watch_invalid_query", "chat: expects an integer chat id", detail=value) from exc
+        elif sep and value and key == "type":
+            if value.lower() not in _CHAT_TYPES:
+                raise DomainError("watch_invalid_query", "type: expects private, group or channel", detail=value)
+            parsed.chat_type = value.lower()
+        elif sep and value and key == "from":
+            if value.lstrip("-").isdigit():
+                parsed.sender_id = int(value)
+            else:
+                parsed.sender_username = value.lstrip("@").lower()
+        else:
+            words.append(token)
+    parsed.keywords = " ".join(words)
+    parsed.terms = list(dict.fromkeys(segment.lower() for segment in split_segments(parsed.keywords)))
+    if not parsed.terms and parsed.chat_id is None and parsed.sender_id is None and parsed.sender_username is None:
+        raise DomainError("watch_invalid_query", "watch needs keywords or a chat:/from: filter")
+    return parsed
+
+
+@dataclass(slots=True)
+class _CompiledWatch:
+    item: WatchItem
+    terms: list[str]
+    sender_ids: frozenset[int] | None
+
+
+@dataclass(slots=True)
+class _Matcher:
+    version: int
+    watches: list[_CompiledWatch]
+    # 值 = (规则下标, 关键词下标, 是否要求词首边界)
+    automaton: AhoCorasick[tuple[int, int, bool]]
+    filter_only: list[int]
+    has_usernames: bool
+
+
+def _to_item(watch: SavedWatch) -> WatchItem:
+    return WatchItem.model_validate(watch.model_dump(exclude={"terms"}))
+
+
+class WatchService:
+    """
+    把所有启用的规则编译进一个 Aho–Corasick 自动机，
+    无论规则有多少条，每条实时消息都只需扫描一遍文本。
+    """
+
+    def __init__(
+        self,
+        config_store: ConfigStore,
+        *,
+        metadata_store: MetadataStore | None = None,
+        max_rules: int | None = None,
+        refresh_interval_sec: float = 30.0,
+    ) -> None:
+        self._store = config_store
+        self._metadata_store = metadata_store
+        self._max_rules = max_rules if max_rules is not None else settings.WATCH_MAX_RULES
+        self._refresh_interval_sec = refresh_interval_sec
+        self._lock = asyncio.Lock()
+        self._matcher: _Matcher | None = None
+        self._checked_at = 0.0
+        self._subscribers: set[WatchSubscriber] = set()
+        self._pending: set[asyncio.Task[None]] = set()
+        self._stats_lock = threading.Lock()
+        self._latency_ms: deque[float] = deque(maxlen=_LATENCY_SAMPLES)
+        self._evaluated = 0
+        self._matched = 0
+
+    # ---- persistence ----
+
+    async def _load_config(self, refresh: bool = False) -> GlobalConfig:
+        try:
+            return await asyncio.to_thread(self._store.load_config, refresh)
+        except Exception as exc:
+            raise DomainError("watch_store_unavailable", "watch store unavailable", detail=str(exc)) from exc
+
+    async def _save_watches(self, items: list[SavedWatch], next_id: int, expected_version: int) -> GlobalConfig:
+        patch = {"watches": {"items": [item.model_dump() for item in items], "next_id": next_id}}
+        try:
+            return await asyncio.to_thread(self._store.save_config, patch, expected_version)
+        except ValueError as exc:
+            raise DomainError("watch_version_conflict", "watch version conflict", detail=str(exc)) from exc
+        except Exception as exc:
+            raise DomainError("watch_store_unavailable", "watch store unavailable", detail=str(exc)) from exc
+
+    async def list_watches(self, owner_id: int | None = None) -> list[WatchItem]:
+        cfg = await self._load_config()
+        return [_to_item(w) for w in cfg.watches.items if owner_id is None or w.owner_id == owner_id]
+
+    async def add_watch(self, owner_id: int, text: str) -> WatchItem:
+        parsed = parse_watch_query(text)
+        async with self._lock:
+            cfg = await self._load_config(refresh=True)
+            if len(cfg.watches.items) >= self._max_rules:
+                raise DomainError("watch_limit_exceeded", "too many watches", detail=f"max={self._max_rules}")
+            watch = SavedWatch(
+                id=cfg.watches.next_id,
+                owner_id=owner_id,
+                query=text.strip(),
+                terms=parsed.terms,
+                chat_id=parsed.chat_id,
+                chat_type=parsed.chat_type,
+                sender_username=parsed.sender_username,
+                sender_id=parsed.sender_id,
+            )
+            next_cfg = await self._save_watches([*cfg.watches.items, watch], watch.id + 1, cfg.version)
+            await asyncio.to_thread(self._rebuild, next_cfg)
+        logger.info(f"[WatchService] watch added id={watch.id} owner={owner_id} terms={len(watch.terms)}")
+        return _to_item(watch)
+
+    async def remove_watch(self, owner_id: int, watch_id: int) -> bool:
+        async with self._lock:
+            cfg = await self._load_config(refresh=True)
+            remaining = [w for w in cfg.watches.items if not (w.id == watch_id and w.owner_id == owner_id)]
+            if len(remaining) == len(cfg.watches.items):
+                return False
+            next_cfg = await self._save_watches(remaining, cfg.watches.next_id, cfg.version)
+            await asyncio.to_thread(self._rebuild, next_cfg)
+        logger.info(f"[WatchService] watch removed id={watch_id} owner={owner_id}")
+        return True
+
+    # ---- compilation ----
+
+    def _rebuild(self, cfg: GlobalConfig) -> None:
+        automaton: AhoCorasick[tuple[int, int, bool]] = AhoCorasick()
+        compiled: list[_CompiledWatch] = []
+        filter_only: list[int] = []
+        has_usernames = False
+        for watch in cfg.watches.items:
+            if not watch.enabled:
+                continue
+            sender_ids: frozenset[int] | None = None
+            if watch.sender_id is not None:
+                sender_ids = frozenset({watch.sender_id})
+            elif watch.sender_username:
+                has_usernames = True
+                found = self._metadata_store.find_user_ids(watch.sender_username) if self._metadata_store else []
+                sender_ids = frozenset(found)
+            index = len(compiled)
+            compiled.append(_CompiledWatch(_to_item(watch), list(watch.terms), sender_ids))
+            if not watch.terms:
+                filter_only.append(index)
+            for term_index, term in enumerate(watch.terms):
+                automaton.add(term, (index, term_index, not is_cjk(term)))
+        self._matcher = _Matcher(cfg.version, compiled, automaton.build(), filter_only, has_usernames)
+        logger.info(
+            f"[WatchService] matcher rebuilt version={cfg.version} watches={len(compiled)} patterns={len(automaton)}"
+        )
+
+    async def refresh(self, *, force: bool = False) -> None:
+        """存储中的规则有变化（或用户名可能解析出新 id）时重新编译。"""
+        self._checked_at = time.monotonic()
+        try:
+            cfg = await self._load_config(refresh=force)
+        except DomainError as exc:
+            logger.warning(f"[WatchService] refresh failed: {exc}")
+            return
+        matcher = self._matcher
+        if force or matcher is None or matcher.version != cfg.version or matcher.has_usernames:
+            await asyncio.to_thread(self._rebuild, cfg)
+
+    # ---- matching ----
+
+    @staticmethod
+    def _passes_filters(watch: _CompiledWatch, doc: dict[str, Any]) -> bool:
+        item = watch.item
+        chat = doc.get("chat") or {}
+        sender = (doc.get("from_user") or {}).get("id")
+        if sender is not None and sender == item.owner_id:
+            return False  # 不通知规则所有者自己发的消息
+        if item.chat_id is not None and doc.get("chat_id", chat.get("id")) != item.chat_id:
+            return False
+        if item.chat_type is not None and chat.get("type") != item.chat_type:
+            return False
+        if watch.sender_ids is not None and sender not in watch.sender_ids:
+            return False
+        return True
+
+    def match(self, doc: dict[str, Any]) -> list[WatchItem]:
+        """返回文档命中的规则；文本只经过一次自动机扫描。"""
+        return [watch.item for watch in self._match(doc)]
+
+    def _match(self, doc: dict[str, Any]) -> list[_CompiledWatch]:
+        matcher = self._matcher
+        if matcher is None or not matcher.watches:
+            return []
+        started = time.perf_counter()
+        text = str(doc.get("text") or "").lower()
+        seen: dict[int, set[int]] = {}
+        for start, (watch_index, term_index, word_start) in matcher.automaton.iter_matches(text):
+            if word_start and start > 0 and text[start - 1].isascii() and text[start - 1].isalnum():
+                continue
+            seen.setdefault(watch_index, set()).add(term_index)
+        candidates = [i for i, terms in seen.items() if len(terms) == len(matcher.watches[i].terms)]
+        candidates.extend(matcher.filter_only)
+        matched = [matcher.watches[i] for i in sorted(candidates) if self._passes_filters(matcher.watches[i], doc)]
+        elapsed_ms = (time.perf_counter() - started) * 1000
+        with self._stats_lock:
+            self._latency_ms.append(elapsed_ms)
+            self._evaluated += 1
+            self._matched += 1 if matched else 0
+            evaluated = self._evaluated
+        if evaluated % _STATS_LOG_EVERY == 0:
+            stats = self.stats()
+            logger.info(
+                f"[WatchService] stats evaluated={stats.evaluated} matched={stats.matched} "
+                f"p50_ms={stats.p50_ms:.3f} p95_ms={stats.p95_ms:.3f} max_ms={stats.max_ms:.3f}"
+            )
+        return matched
+
+    async def evaluate(self, doc: dict[str, Any]) -> list[WatchItem]:
+        """匹配一条实时消息，并在后台向订阅者推送通知。"""
+        if self._matcher is None or time.monotonic() - self._checked_at > self._refresh_interval_sec:
+            await self.refresh()
+        matched = self._match(doc)
+        text = doc.get("text")
+        for watch in matched if self._subscribers else ():
+            formatted = highlight(text, " ".join(watch.terms), "<mark>", "</mark>") if text else text
+            task = asyncio.create_task(self._notify_subscribers(watch.item, {**doc, "_formatted": {"text": formatted}}))
+            self._pending.add(task)
+            task.add_done_callback(self._pending.discard)
+        return [watch.item for watch in matched]
+
+    def stats(self) -> WatchStats:
+        with self._stats_lock:
+            ordered = sorted(self._latency_ms)
+            evaluated, matched = self._evaluated, self._matched
+        pick = lambda q: round(ordered[min(int(len(ordered) * q), len(ordered) - 1)], 3) if ordered else 0.0  # noqa: E731
+        matcher = self._matcher
+        return WatchStats(
+            watches=len(matcher.watches) if matcher else 0,
+            evaluated=evaluated,
+            matched=matched,
+            p50_ms=pick(0.50),
+            p95_ms=pick(0.95),
+            max_ms=round(ordered[-1], 3) if ordered else 0.0,
+        )
+
+    # ---- notification ----
+
+    def subscribe(self, subscriber: WatchSubscriber) -> Callable[[], None]:
+        """注册通知回调，每次命中以 (watch, document) 调用。"""
+        self._subscribers.add(subscriber)
+
+        def _unsubscribe() -> None:
+            self._subscribers.discard(subscriber)
+
+        return _unsubscribe
+
+    async def _notify_subscribers(self, item: WatchItem, doc: dict[str, Any]) -> None:
+        coroutines: list[Awaitable[None]] = []
+        for subscriber in tuple(self._subscribers):
+            try:
+                maybe_awaitable = subscriber(item, doc)
+            except Exception as exc:
+                logger.warning(f"[WatchService] subscriber raised synchronously: {type(exc).__name__}: {exc}")
+                continue
+            if inspect.isawaitable(maybe_awaitable):
+                coroutines.append(maybe_awaitable)
+        if not coroutines:
+            return
+        results = await asyncio.gather(*coroutines, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                logger.warning(f"[WatchService] subscriber raised asynchronously: {type(result).__name__}: {result}")
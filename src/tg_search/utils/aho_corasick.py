@@ -0,0 +1,77 @@
+"""
+Aho–Corasick 多模式匹配自动机
+
+一次扫描文本即可找出所有模式的出现位置，耗时 O(文本长度 + 命中数)，与模式数量无关。
+用于实时消息的关注词（saved-search watch）匹配：CJK 词与拉丁词统一按字符匹配，调用方负责大小写归一。
+"""
+
+from __future__ import annotations
+
+from collections import deque
+from typing import Dict, Generic, Iterator, List, Tuple, TypeVar
+
+T = TypeVar("T")
+
+
+class AhoCorasick(Generic[T]):
+    """字符级 Aho–Corasick 自动机；`add` 完成后调用 `build`，之后只读、可跨线程共享。"""
+
+    def __init__(self) -> None:
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        # 每个状态上结束的模式：(模式长度, 值)；build 后包含沿失败链可达的输出
+        self._out: List[List[Tuple[int, T]]] = [[]]
+        self._count = 0
+        self._built = False
+
+    def __len__(self) -> int:
+        return self._count
+
+    def add(self, pattern: str, value: T) -> None:
+        if self._built:
+            raise RuntimeError("automaton already built")
+        if not pattern:
+            raise ValueError("pattern must not be empty")
+        state = 0
+        for char in pattern:
+            nxt = self._goto[state].get(char)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto[state][char] = nxt
+                self._goto.append({})
+                self._fail.append(0)
+                self._out.append([])
+            state = nxt
+        self._out[state].append((len(pattern), value))
+        self._count += 1
+
+    def build(self) -> "AhoCorasick[T]":
+        queue: deque[int] = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+        while queue:
+            state = queue.popleft()
+            for char, child in self._goto[state].items():
+                queue.append(child)
+                fallback = self._fail[state]
+                while fallback and char not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(char, 0)
+                self._fail[child] = target if target != child else 0
+                self._out[child] = self._out[child] + self._out[self._fail[child]]
+        self._built = True
+        return self
+
+    def iter_matches(self, text: str) -> Iterator[Tuple[int, T]]:
+        """产出 (起始下标, 值)，按结束位置递增。"""
+        if not self._built:
+            raise RuntimeError("automaton not built")
+        goto, fail, out = self._goto, self._fail, self._out
+        state = 0
+        for end, char in enumerate(text):
+            while state and char not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(char, 0)
+            for length, value in out[state]:
+                yield end - length + 1, value
@@ -0,0 +1,94 @@
+"""
+MinHash 文本指纹与 LSH 分桶
+
+近似重复（转发、广告、群发公告的轻微改写）检测：
+- 文本归一化：小写，去掉链接和数字（推广链接参数、编号常常是唯一差异），只保留字母数字与 CJK 字符
+- 3 字符 shingle 集合上计算 64 个 MinHash 值；两个签名相同位置取值相等的概率即 Jaccard 相似度
+- LSH：前 40 个值分成 10 段 × 4 行，每段哈希成一个桶号；相似度 0.75 的文本至少落入同一桶的概率约 93%，
+  0.3 的约 8%，因此只需按桶号精确查找候选
+- 每个 MinHash 值取最低位拼成 64 位 sketch（b-bit minwise hashing），用于对候选做相似度复核
+"""
+
+from __future__ import annotations
+
+import hashlib
+import re
+from dataclasses import dataclass
+from typing import List, Optional, Tuple
+
+NUM_PERM = 64
+LSH_BANDS = 10
+LSH_ROWS = 4
+_SHINGLE = 3
+_MAX_NORMALIZED_CHARS = 2000
+# 归一化后少于该长度的文本不计算指纹（"好的"、"收到"这类短消息重复是正常的）
+MIN_NORMALIZED_CHARS = 16
+
+_MERSENNE_PRIME = (1 << 61) - 1
+_NOISE_RE = re.compile(r"https?://\S+|www\.\S+|\d+")
+
+
+def _perm_params() -> List[Tuple[int, int]]:
+    params = []
+    for i in range(NUM_PERM):
+        seed = hashlib.blake2b(f"minhash-{i}".encode(), digest_size=16).digest()
+        a = int.from_bytes(seed[:8], "big") % (_MERSENNE_PRIME - 1) + 1
+        b = int.from_bytes(seed[8:], "big") % _MERSENNE_PRIME
+        params.append((a, b))
+    return params
+
+
+_PERMS = _perm_params()
+
+
+def _hash64(data: bytes) -> int:
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big", signed=True)
+
+
+def normalize(text: str) -> str:
+    return "".join(ch for ch in _NOISE_RE.sub("", text.lower()) if ch.isalnum())
+
+
+@dataclass(slots=True, frozen=True)
+class TextFingerprint:
+    """一条文本的指纹：精确摘要、LSH 桶号与复核用 sketch（均为有符号 64 位，可直接存入 SQLite）。"""
+
+    digest: int
+    buckets: Tuple[int, ...]
+    sketch: int
+
+
+def fingerprint(text: Optional[str]) -> Optional[TextFingerprint]:
+    """计算文本指纹；文本过短时返回 None。"""
+    if not text:
+        return None
+    normalized = normalize(text)
+    if len(normalized) < MIN_NORMALIZED_CHARS:
+        return None
+    normalized = normalized[:_MAX_NORMALIZED_CHARS]
+    hashes = [
+        _hash64(normalized[i : i + _SHINGLE].encode("utf-8")) & _MERSENNE_PRIME
+        for i in range(len(normalized) - _SHINGLE + 1)
+    ]
+    hashes = list(set(hashes))
+    signature = [min((a * h + b) % _MERSENNE_PRIME for h in hashes) for a, b in _PERMS]
+    buckets = tuple(
+        _hash64(f"{band}:{signature[band * LSH_ROWS : (band + 1) * LSH_ROWS]}".encode())
+        for band in range(LSH_BANDS)
+    )
+    sketch = 0
+    for value in signature:
+        sketch = (sketch << 1) | (value & 1)
+    if sketch >= 1 << 63:
+        sketch -= 1 << 64
+    return TextFingerprint(digest=_hash64(normalized.encode("utf-8")), buckets=buckets, sketch=sketch)
+
+
+def estimate_similarity(sketch_a: int, sketch_b: int) -> float:
+    """
+    由两个 1-bit sketch 估计 Jaccard 相似度
+
+    相同位置 bit 相等的概率为 J + (1 - J) / 2，反解得 J = 2 * 相等比例 - 1。
+    """
+    differing = ((sketch_a ^ sketch_b) & ((1 << NUM_PERM) - 1)).bit_count()
+    return max(0.0, 2 * (NUM_PERM - differing) / NUM_PERM - 1)
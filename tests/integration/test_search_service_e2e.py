@@ -194,6 +194,7 @@ def bot_harness(service_container: ServiceContainer):
     bot.logger = setup_logger()
     bot.services = service_container
     bot.search_service = service_container.search_service
+    bot.admission = None
     bot.policy_service = service_container.config_policy_service
     bot.meili = service_container.meili_client
     bot.search_results_cache = {}
@@ -0,0 +1,77 @@
+"""Unit tests for the pre-aggregated dashboard activity store."""
+
+from __future__ import annotations
+
+import time
+
+import pytest
+
+from tg_search.api.routes.dashboard import _window_activity_items
+from tg_search.config.activity_store import ActivityStore, _space_saving_add
+
+pytestmark = [pytest.mark.unit]
+
+
+def _doc(chat_id: int, msg_id: int, date_ts: int, text: str, chat_type: str = "group") -> dict:
+    return {
+        "id": f"{chat_id}-{msg_id}",
+        "chat": {"id": chat_id, "type": chat_type},
+        "chat_id": chat_id,
+        "msg_id": msg_id,
+        "date_ts": date_ts,
+        "text": text,
+    }
+
+
+def test_counts_are_exact_and_ignore_edits_and_redownloads(tmp_path):
+    store = ActivityStore(tmp_path / "activity.sqlite3")
+    now = int(time.time())
+    docs = [_doc(-1001, i, now - i * 600, f"telegram api {i}") for i in range(1, 13)]
+    docs.append(_doc(-1002, 1, now - 60, "dashboard", chat_type="channel"))
+    assert store.record(docs) == 13
+    # Re-downloaded history and edited versions carry the same (chat_id, msg_id).
+    assert store.record(docs[:5] + [{**docs[0], "id": "-1001-1-99", "text": "edited"}]) == 0
+
+    by_chat = {item.chat_id: item for item in store.window(now - 3 * 3600)}
+    assert by_chat[-1001].message_count == 12
+    assert by_chat[-1001].latest_ts == now - 600
+    assert by_chat[-1001].latest_text == "telegram api 1"
+    assert by_chat[-1001].top_keywords[:2] == ["api", "telegram"]
+    assert (by_chat[-1002].message_count, by_chat[-1002].chat_type) == (1, "channel")
+
+    # A window starting mid-hour counts only the messages after its start.
+    assert {item.chat_id: item.message_count for item in store.window(now - 3000)} == {-1001: 5, -1002: 1}
+
+
+def test_messages_older_than_retention_are_not_recorded(tmp_path):
+    store = ActivityStore(tmp_path / "activity.sqlite3", retention_hours=2)
+    now = int(time.time())
+    store._tracking_since = now - 7 * 24 * 3600
+    assert store.record([_doc(1, 1, now - 4 * 3600, "old"), _doc(1, 2, now, "new")]) == 1
+    assert not store.covers(now - 4 * 3600)
+    assert store.covers(now - 3600)
+
+
+def test_space_saving_keeps_heavy_hitters_within_capacity():
+    sketch: dict[str, list[int]] = {}
+    for i in range(200):
+        _space_saving_add(sketch, "hot", 4)
+        _space_saving_add(sketch, f"noise{i}", 4)
+    assert len(sketch) == 4
+    count, error = sketch["hot"]
+    assert count - error <= 200 <= count
+    assert max(sketch, key=lambda token: sketch[token][0]) == "hot"
+
+
+def test_dashboard_reads_buckets_and_falls_back_before_tracking(tmp_path):
+    store = ActivityStore(tmp_path / "activity.sqlite3")
+    now = int(time.time())
+    store.record([_doc(-1001, i, now - i, "release notes") for i in range(1, 4)])
+
+    # Windows starting before the store began recording cannot be answered exactly.
+    assert _window_activity_items(store, 24) is None
+
+    store._tracking_since = now - 7 * 24 * 3600
+    items = _window_activity_items(store, 24)
+    assert [(item.chat_id, item.message_count, item.chat_title) for item in items] == [(-1001, 3, "chat_-1001")]
+    assert items[0].top_keywords == ["notes", "release"]
@@ -0,0 +1,128 @@
+"""Unit tests for search admission control."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from tg_search.services.admission import AdmissionController, estimate_export_cost, estimate_search_cost
+from tg_search.services.contracts import DomainError, SearchQuery
+
+pytestmark = [pytest.mark.unit]
+
+
+def _controller(**overrides) -> AdmissionController:
+    options = {"rate_per_sec": 0.01, "burst": 3, "max_concurrent": 1, "max_queue": 4, "queue_timeout_sec": 1.0}
+    options.update(overrides)
+    return AdmissionController(**options)
+
+
+def test_estimate_search_cost_flags_expensive_shapes():
+    assert estimate_search_cost(SearchQuery(q="hello world")) == 1
+    assert estimate_search_cost(SearchQuery(q="的")) == 4
+    assert estimate_search_cost(SearchQuery(q="你 好")) == 4
+    assert estimate_search_cost(SearchQuery(q="你好")) == 1
+    assert estimate_search_cost(SearchQuery(q="*", offset=1000)) == 6
+    assert estimate_search_cost(SearchQuery(q="*", offset=1000, cursor="*")) == 1
+    assert estimate_search_cost(SearchQuery(q="*", offset=100_000)) == 8
+
+
+def test_estimate_export_cost_charges_unbounded_scans_the_most():
+    assert estimate_export_cost(SearchQuery(q="hello")) == 8
+    assert estimate_export_cost(SearchQuery(q="hello", chat_id=1)) == 3
+    assert estimate_export_cost(SearchQuery(q="的", chat_id=1)) == 6
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_limits_each_principal_separately():
+    admission = _controller(max_concurrent=4)
+
+    for _ in range(3):
+        async with admission.admit("bot:1"):
+            pass
+    with pytest.raises(DomainError) as exc_info:
+        async with admission.admit("bot:1"):
+            pass
+    assert exc_info.value.code == "search_rate_limited"
+    assert float(exc_info.value.detail) > 0
+
+    async with admission.admit("bot:2", cost=3):
+        pass
+    assert admission.stats().rejected_rate_limited == 1
+
+
+@pytest.mark.asyncio
+async def test_queue_prefers_pagination_then_least_busy_principal():
+    admission = _controller(burst=10)
+    order: list[str] = []
+    release = asyncio.Event()
+    positions: list[int] = []
+
+    async def hold() -> None:
+        async with admission.admit("api:busy"):
+            await release.wait()
+
+    async def search(principal: str, *, priority: bool = False) -> None:
+        async def on_queued(position: int) -> None:
+            positions.append(position)
+
+        async with admission.admit(principal, priority=priority, on_queued=on_queued):
+            order.append(principal)
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    waiters = [
+        asyncio.create_task(search("api:busy")),
+        asyncio.create_task(search("bot:1")),
+        asyncio.create_task(search("bot:2", priority=True)),
+    ]
+    await asyncio.sleep(0.01)
+    stats = admission.stats()
+    assert (stats.in_flight, stats.queued) == (1, 3)
+
+    release.set()
+    await asyncio.gather(holder, *waiters)
+
+    # Pagination first, then the user with nothing running, then the one hogging the pool.
+    assert order == ["bot:2", "bot:1", "api:busy"]
+    assert positions == [1, 2, 3]
+    stats = admission.stats()
+    assert (stats.in_flight, stats.queued, stats.admitted, stats.queued_total) == (0, 0, 4, 3)
+
+
+@pytest.mark.asyncio
+async def test_full_queue_and_queue_timeout_reject_as_overloaded():
+    admission = _controller(burst=10, max_queue=1, queue_timeout_sec=0.05)
+    release = asyncio.Event()
+
+    async def hold() -> None:
+        async with admission.admit("bot:1"):
+            await release.wait()
+
+    holder = asyncio.create_task(hold())
+    await asyncio.sleep(0)
+    queued = asyncio.create_task(admission.admit("bot:2").__aenter__())
+    await asyncio.sleep(0)
+
+    with pytest.raises(DomainError) as full:
+        async with admission.admit("bot:3"):
+            pass
+    with pytest.raises(DomainError) as timed_out:
+        await queued
+    assert full.value.code == timed_out.value.code == "search_overloaded"
+
+    release.set()
+    await holder
+    async with admission.admit("bot:4"):
+        assert admission.stats().in_flight == 1
+    assert admission.stats().rejected_overloaded == 2
+
+
+def test_api_maps_admission_rejections_to_429_with_retry_after():
+    from tg_search.api.routes.search import _to_http_error
+
+    error = _to_http_error(DomainError("search_rate_limited", "too many searches", detail="2.3"))
+    assert error.status_code == 429
+    assert error.headers == {"Retry-After": "3"}
+    assert error.detail["error_code"] == "search_rate_limited"
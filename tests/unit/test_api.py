@@ -4,6 +4,7 @@ API 测试模块
 使用 pytest + httpx 测试 FastAPI 端点
 """
 
+import json
 from dataclasses import dataclass
 from datetime import datetime
 from types import SimpleNamespace
@@ -161,6 +162,11 @@ def mock_meili_client():
                 "estimatedTotalHits": 1,
             }
 
+        def multi_search(self, queries, federation=None):
+            if federation is not None:
+                return self.search(queries[0]["q"])
+            return {"results": [self.search(item["q"], item["indexUid"]) for item in queries]}
+
         def get_index_stats(self, index_name="telegram"):
             return FakeIndexStats()
 
@@ -267,6 +273,99 @@ class TestSearchAPI:
         )
         assert response.status_code == 200
 
+    async def test_search_with_cursor(self, test_client):
+        """测试游标分页"""
+        response = await test_client.get("/api/v1/search", params={"q": "hello", "cursor": "*"})
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["offset"] == 0
+        assert "next_cursor" in data
+
+    async def test_search_with_facets(self, test_client):
+        """测试分面计数"""
+        response = await test_client.get(
+            "/api/v1/search", params={"q": "hello", "chat_id": 123, "facets": "chat.id,from_user.id"}
+        )
+        assert response.status_code == 200
+        assert response.json()["data"]["facet_distribution"] == {"chat.id": {}, "from_user.id": {}}
+
+    async def test_search_with_invalid_cursor(self, test_client):
+        """测试非法游标"""
+        response = await test_client.get("/api/v1/search", params={"q": "hello", "cursor": "bad!"})
+        assert response.status_code == 400
+        assert response.json()["detail"]["error_code"] == "search_cursor_invalid"
+
+    @pytest.fixture
+    def admission(self, test_client):
+        """导出独占一个满桶的代价：每个导出测试换用新的准入控制器"""
+        from tg_search.services.admission import AdmissionController
+
+        container = test_client._transport.app.state.app_state.service_container
+        shared = container.admission_controller
+        container.admission_controller = AdmissionController(
+            rate_per_sec=0.01, burst=8, max_concurrent=1, max_queue=0, queue_timeout_sec=1.0
+        )
+        yield container.admission_controller
+        container.admission_controller = shared
+
+    async def test_export_ndjson(self, test_client, admission):
+        """测试 NDJSON 流式导出"""
+        response = await test_client.get("/api/v1/search/export", params={"q": "hello"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("application/x-ndjson")
+        lines = [line for line in response.text.splitlines() if line]
+        assert len(lines) == 1
+        assert json.loads(lines[0])["id"] == "123-456"
+
+    async def test_export_sse(self, test_client, admission):
+        """测试 SSE 流式导出"""
+        response = await test_client.get("/api/v1/search/export", params={"q": "hello", "format": "sse"})
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/event-stream")
+        assert "event: message" in response.text
+        assert "event: end" in response.text
+
+    async def test_export_holds_admission_until_the_stream_ends(self, test_client, admission):
+        """测试导出经过准入控制：流结束后释放并发槽位，令牌不足时返回 429"""
+        response = await test_client.get("/api/v1/search/export", params={"q": "hello"})
+        assert response.status_code == 200
+        assert admission.stats().admitted == 1
+        assert admission.stats().in_flight == 0
+
+        rejected = await test_client.get("/api/v1/search/export", params={"q": "hello"})
+        assert rejected.status_code == 429
+        assert rejected.json()["detail"]["error_code"] == "search_rate_limited"
+
+    async def test_search_batch(self, test_client):
+        """测试批量搜索"""
+        response = await test_client.post(
+            "/api/v1/search/batch",
+            json={"queries": [{"q": "hello"}, {"q": "world", "chat_type": "group"}]},
+        )
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["federated"] is False
+        assert [item["query"] for item in data["results"]] == ["hello", "world"]
+
+    async def test_search_batch_federated(self, test_client):
+        """测试联邦批量搜索"""
+        response = await test_client.post(
+            "/api/v1/search/batch",
+            json={"queries": [{"q": "hello"}, {"q": "hello", "index_name": "telegram_202601"}], "federated": True},
+        )
+        assert response.status_code == 200
+        data = response.json()["data"]
+        assert data["federated"] is True
+        assert len(data["results"]) == 1
+
+    async def test_search_batch_rejects_foreign_index(self, test_client):
+        """测试批量搜索禁止访问非消息索引"""
+        response = await test_client.post(
+            "/api/v1/search/batch",
+            json={"queries": [{"q": "hello", "index_name": "system_config"}]},
+        )
+        assert response.status_code == 422
+
     async def test_search_stats(self, test_client):
         """测试搜索统计"""
         response = await test_client.get("/api/v1/search/stats")
@@ -274,6 +373,13 @@ class TestSearchAPI:
         data = response.json()
         assert data["success"] is True
 
+    async def test_top_queries(self, test_client):
+        """测试热门查询统计"""
+        response = await test_client.get("/api/v1/search/top-queries", params={"limit": 5, "window_hours": 1})
+        # 测试夹具中的 SearchService 未启用查询日志
+        assert response.status_code == 503
+        assert response.json()["detail"]["error_code"] == "query_log_unavailable"
+
 
 class TestConfigAPI:
     """配置 API 测试"""
@@ -474,6 +580,41 @@ class TestModels:
         assert msg.id == "123-456"
         assert msg.chat.type == "group"
 
+    def test_search_response_matches_api_schema(self):
+        """搜索路由直接序列化 SearchPage，输出须与 SearchResult/MessageModel 一致"""
+        from tg_search.api.models import ApiResponse, SearchBatchResult, SearchResult
+        from tg_search.api.routes.search import _search_response, _SearchBatchPages
+        from tg_search.services.contracts import SearchPage
+        from tg_search.services.search_service import SearchService
+
+        service = SearchService(object(), cache_enabled=False)
+        hits = [
+            service.to_hit(
+                {
+                    "id": "-100123-1",
+                    "chat": {"id": -100123, "type": "group", "title": "Test"},
+                    "date": "2026-01-01T08:00:00Z",
+                    "text": "hello world",
+                    "from_user": {"id": 789, "username": "user"},
+                    "reactions": {"👍": 2},
+                    "reactions_scores": 1.5,
+                    "_formatted": {"text": "<mark>hello</mark> world"},
+                }
+            ),
+            service.to_hit({"id": "1-2", "chat": {"id": 1, "type": "private"}, "date": "2026-01-02T00:00:00Z"}),
+        ]
+        page = SearchPage(hits=hits, query="hello", processing_time_ms=3, total_hits=2, limit=20, offset=0)
+
+        def _data(response):
+            return json.loads(response.body)["data"]
+
+        expected = SearchResult.model_validate(page.model_dump())
+        assert _data(_search_response(page)) == json.loads(ApiResponse(data=expected).model_dump_json())["data"]
+
+        batch = _search_response(_SearchBatchPages(results=[page], federated=True))
+        expected_batch = SearchBatchResult(results=[expected], federated=True)
+        assert _data(batch) == json.loads(ApiResponse(data=expected_batch).model_dump_json())["data"]
+
 
 class TestProgressRegistry:
     """进度注册表测试"""
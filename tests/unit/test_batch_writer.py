@@ -0,0 +1,182 @@
+"""Unit tests for the bisecting BatchWriter, its ingest buffer, AdaptiveBatchSizer and DeadLetterStore."""
+
+from __future__ import annotations
+
+from types import SimpleNamespace
+
+import pytest
+
+from tg_search.config.dead_letter_store import DeadLetterStore
+from tg_search.core.batch_writer import AdaptiveBatchSizer, BatchWriter
+from tg_search.core.meilisearch import MeiliSearchAPIError, MeiliSearchCircuitOpenError, MeiliSearchTimeoutError
+
+pytestmark = [pytest.mark.unit]
+
+
+class _FakeMeili:
+    """Fails a whole task when it contains a bad id, and rejects oversized payloads up front."""
+
+    def __init__(self, *, bad_ids=(), max_payload=None, error_code="invalid_document_id"):
+        self.bad_ids = set(bad_ids)
+        self.max_payload = max_payload
+        self.error_code = error_code
+        self.indexed: dict[str, dict] = {}
+        self.submitted: list[int] = []
+        self.events: list[str] = []
+        self._tasks: dict[int, dict] = {}
+
+    def add_documents(self, documents, index_name="telegram"):
+        self.submitted.append(len(documents))
+        self.events.append(f"submit {len(self.submitted)}")
+        if self.max_payload is not None and len(documents) > self.max_payload:
+            raise MeiliSearchAPIError("payload too large", status_code=413, error_code="payload_too_large")
+        uid = len(self.submitted)
+        if any(doc["id"] in self.bad_ids for doc in documents):
+            self._tasks[uid] = {"status": "failed", "error": {"code": self.error_code, "message": "bad id"}}
+        else:
+            self.indexed.update({doc["id"]: doc for doc in documents})
+            self._tasks[uid] = {"status": "succeeded", "error": None}
+        return SimpleNamespace(task_uid=uid)
+
+    def wait_for_task(self, task_uid, timeout_ms=60_000):
+        self.events.append(f"wait {task_uid}")
+        return {"uid": task_uid, **self._tasks[task_uid]}
+
+
+def _docs(n):
+    return [{"id": f"1-{i}", "text": f"m{i}"} for i in range(n)]
+
+
+def test_bisect_isolates_bad_documents_into_dead_letters(tmp_path):
+    fake = _FakeMeili(bad_ids={"1-3", "1-6"})
+    store = DeadLetterStore(tmp_path / "dl.sqlite3")
+    writer = BatchWriter(fake, dead_letters=store)
+
+    result = writer.write(_docs(8))
+
+    assert result.indexed == 6
+    assert result.dead_lettered == 2
+    assert sorted(result.rejected_ids) == ["1-3", "1-6"]
+    assert set(fake.indexed) == {f"1-{i}" for i in (0, 1, 2, 4, 5, 7)}
+    entries = store.list_entries()
+    assert {entry.doc_id for entry in entries} == {"1-3", "1-6"}
+    assert all(entry.error_code == "invalid_document_id" for entry in entries)
+
+
+def test_chunks_stay_in_flight_and_only_failed_tasks_are_bisected():
+    fake = _FakeMeili(bad_ids={"1-2"})
+    writer = BatchWriter(fake, sizer=AdaptiveBatchSizer(2, step=1), max_in_flight=3)
+
+    result = writer.write(_docs(6))
+
+    assert fake.events[:4] == ["submit 1", "submit 2", "submit 3", "wait 1"]
+    # Only the failed second chunk is re-submitted, split in halves.
+    assert fake.submitted == [2, 2, 2, 1, 1]
+    assert (result.indexed, result.rejected_ids) == (5, ["1-2"])
+
+
+def test_timed_out_task_is_unconfirmed_until_a_later_write_rechecks_it():
+    fake = _FakeMeili()
+    slow = {1}
+    wait = fake.wait_for_task
+
+    def _wait_for_task(task_uid, timeout_ms=60_000):
+        if task_uid in slow:
+            raise MeiliSearchTimeoutError("still enqueued")
+        return wait(task_uid, timeout_ms)
+
+    fake.wait_for_task = _wait_for_task
+    writer = BatchWriter(fake)
+
+    first = writer.write(_docs(3))
+    assert (first.indexed, first.unconfirmed, first.indexed_ids) == (0, 3, [])
+    assert writer.unconfirmed == 3
+
+    slow.clear()
+    second = writer.write([{"id": "2-1", "text": "later"}])
+
+    assert second.indexed == 4
+    assert sorted(second.indexed_ids) == ["1-0", "1-1", "1-2", "2-1"]
+    assert writer.unconfirmed == 0
+    # The timed-out task was re-checked, not re-submitted.
+    assert fake.submitted == [3, 1]
+
+
+def test_payload_too_large_shrinks_sizer_and_later_recovers():
+    fake = _FakeMeili(max_payload=3)
+    sizer = AdaptiveBatchSizer(8, step=2)
+    writer = BatchWriter(fake, sizer=sizer)
+
+    result = writer.write(_docs(8))
+
+    assert result.indexed == 8
+    assert result.dead_lettered == 0
+    assert sizer.current < 8
+    shrunk = sizer.current
+    fake.max_payload = None
+    writer.write(_docs(shrunk))
+    assert sizer.current == min(8, shrunk + 2)
+
+
+def test_non_document_errors_are_not_bisected():
+    fake = _FakeMeili(bad_ids={"1-0"}, error_code="index_not_found")
+    writer = BatchWriter(fake)
+
+    with pytest.raises(MeiliSearchAPIError):
+        writer.write(_docs(4))
+    assert fake.submitted == [4]
+
+
+def test_dead_letter_store_counts_attempts_and_removes(tmp_path):
+    store = DeadLetterStore(tmp_path / "dl.sqlite3")
+    doc = {"id": "1-1", "text": "x"}
+
+    store.add([doc], index_name="telegram", error_code="invalid_document_id", error_message="first")
+    store.add([doc], index_name="telegram", error_code="invalid_document_id", error_message="second")
+
+    (entry,) = DeadLetterStore(tmp_path / "dl.sqlite3").get_many(["1-1"])
+    assert entry.attempts == 2
+    assert entry.error_message == "second"
+    assert entry.document == doc
+    assert store.remove([entry]) == 1
+    assert store.count() == 0
+
+
+def test_unavailable_meili_buffers_then_drains_and_overflows_to_dead_letters(tmp_path):
+    fake = _FakeMeili()
+    store = DeadLetterStore(tmp_path / "dl.sqlite3")
+    writer = BatchWriter(fake, dead_letters=store, buffer_max_docs=5)
+    real_add = fake.add_documents
+
+    def _down(documents, index_name="telegram"):
+        raise MeiliSearchCircuitOpenError("circuit open", retry_after=5)
+
+    fake.add_documents = _down
+    result = writer.write(_docs(8))
+
+    assert result.buffered == 5
+    assert writer.buffered == 5
+    assert {entry.error_code for entry in store.list_entries()} == {"meili_unavailable"}
+    assert store.count() == 3
+
+    fake.add_documents = real_add
+    result = writer.write([{"id": "2-0", "text": "new"}])
+
+    assert writer.buffered == 0
+    assert result.indexed == 1
+    assert set(fake.indexed) == {f"1-{i}" for i in range(5)} | {"2-0"}
+
+
+def test_failed_drain_keeps_buffered_docs_ahead_of_newer_ones():
+    fake = _FakeMeili()
+    writer = BatchWriter(fake, sizer=AdaptiveBatchSizer(2))
+
+    def _down(documents, index_name="telegram"):
+        raise MeiliSearchCircuitOpenError("circuit open", retry_after=5)
+
+    fake.add_documents = _down
+    writer.buffer(_docs(4))
+    writer.buffer([{"id": "2-0", "text": "new"}])
+    writer.drain()
+
+    assert [doc["id"] for _, doc in writer._buffer] == ["1-0", "1-1", "1-2", "1-3", "2-0"]
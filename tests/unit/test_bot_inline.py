@@ -0,0 +1,99 @@
+"""Unit tests for the bot's inline-query mode."""
+
+from __future__ import annotations
+
+import asyncio
+from typing import Any
+
+import pytest
+
+import tg_search.core.bot as bot_module
+from tg_search.core.bot import BotHandler
+from tg_search.core.logger import setup_logger
+from tg_search.core.sqlite_fts import SqliteFtsIndex
+from tg_search.services.search_service import SearchService
+
+pytestmark = [pytest.mark.unit]
+
+
+class _FakeBuilder:
+    async def article(self, title, description=None, *, id=None, text=None, link_preview=True):
+        return {"id": id, "title": title, "description": description, "text": text}
+
+
+class _FakeInlineEvent:
+    def __init__(self, text: str, offset: str = "", sender_id: int = 1) -> None:
+        self.text = text
+        self.offset = offset
+        self.sender_id = sender_id
+        self.builder = _FakeBuilder()
+        self.answers: list[dict[str, Any]] = []
+
+    async def answer(self, results=None, cache_time=0, *, next_offset=None, private=False):
+        self.answers.append({"results": results, "cache_time": cache_time, "next_offset": next_offset})
+
+
+class _CountingIndex(SqliteFtsIndex):
+    def __init__(self, path) -> None:
+        super().__init__(path)
+        self.search_calls = 0
+
+    def search(self, query, index_name="telegram", **kwargs):
+        self.search_calls += 1
+        return super().search(query, index_name, **kwargs)
+
+
+@pytest.fixture
+def inline_bot(tmp_path, monkeypatch):
+    monkeypatch.setattr(bot_module, "OWNER_IDS", [])
+    monkeypatch.setattr(bot_module, "INLINE_RESULTS_PER_PAGE", 3)
+    monkeypatch.setattr(bot_module, "INLINE_DEBOUNCE_MS", 20)
+    index = _CountingIndex(tmp_path / "fts.sqlite3")
+    index.add_documents(
+        [
+            {
+                "id": f"-100-{i}",
+                "chat": {"id": -100, "type": "channel", "title": "news"},
+                "date": "2026-01-01T00:00:00+00:00",
+                "date_ts": 1_767_225_600 + i,
+                "msg_id": i,
+                "text": f"inline keyword {i}",
+            }
+            for i in range(5)
+        ]
+    )
+    bot = BotHandler.__new__(BotHandler)
+    bot.logger = setup_logger()
+    bot.search_service = SearchService(index, cache_enabled=True, max_presentation_hits=20)
+    bot._inline_query_seq = {}
+    bot.admission = None
+    return bot, index
+
+
+@pytest.mark.asyncio
+async def test_inline_query_pages_through_presentation_cache(inline_bot):
+    bot, index = inline_bot
+
+    first = _FakeInlineEvent("keyword")
+    await bot.inline_query_handler(first)
+    second = _FakeInlineEvent("keyword", offset=first.answers[0]["next_offset"])
+    await bot.inline_query_handler(second)
+
+    assert [item["id"] for item in first.answers[0]["results"]] == ["-100-4", "-100-3", "-100-2"]
+    assert first.answers[0]["next_offset"] == "1"
+    assert first.answers[0]["cache_time"] == bot_module.INLINE_CACHE_TIME_SEC
+    assert first.answers[0]["results"][0]["title"] == "Channel: news"
+    assert len(second.answers[0]["results"]) == 2
+    assert second.answers[0]["next_offset"] is None
+    assert index.search_calls == 1
+
+
+@pytest.mark.asyncio
+async def test_inline_query_debounces_rapid_keystrokes_per_user(inline_bot):
+    bot, index = inline_bot
+    events = [_FakeInlineEvent("k"), _FakeInlineEvent("key"), _FakeInlineEvent("keyword"), _FakeInlineEvent("k", sender_id=2)]
+
+    await asyncio.gather(*(bot.inline_query_handler(event) for event in events))
+
+    assert [len(event.answers) for event in events] == [0, 0, 1, 1]
+    assert index.search_calls == 2
@@ -0,0 +1,101 @@
+"""Unit tests for chunked indexing of long messages."""
+
+from __future__ import annotations
+
+import sqlite3
+
+import pytest
+
+from tg_search.core.chunking import chunk_counts, chunk_documents, collapse_chunks, split_text
+from tg_search.core.sqlite_fts import SqliteFtsIndex
+from tg_search.services.contracts import SearchQuery
+from tg_search.services.search_service import SearchService
+
+pytestmark = [pytest.mark.unit]
+
+
+def _doc(msg_id: int, text: str) -> dict:
+    return {
+        "id": f"1-{msg_id}",
+        "chat": {"id": 1, "type": "channel"},
+        "chat_id": 1,
+        "msg_id": msg_id,
+        "date_ts": 1_700_000_000 + msg_id,
+        "date": "2023-11-14T22:13:20+00:00",
+        "text": text,
+        "text_len": len(text),
+    }
+
+
+def test_split_text_overlaps_and_prefers_sentence_breaks():
+    text = "甲" * 85 + "。" + "乙" * 60
+    chunks = split_text(text, 100, 10)
+
+    assert chunks[0] == "甲" * 85 + "。"  # cut after the full stop, not mid-sentence
+    assert chunks[1].startswith("甲" * 9 + "。")  # 10-char overlap carried over
+    assert chunks[0] + chunks[1][10:] == text
+    assert all(len(chunk) <= 100 for chunk in split_text("x" * 1000, 100, 30))
+
+
+def test_chunk_documents_only_splits_long_messages():
+    long_doc = _doc(2, "长" * 250)
+    docs = chunk_documents([_doc(1, "short"), long_doc], max_chars=200, chunk_chars=100, overlap=20)
+
+    assert [doc["id"] for doc in docs] == ["1-1", "1-2_0", "1-2_1", "1-2_2"]
+    assert {doc["parent_id"] for doc in docs[1:]} == {"1-2"}
+    assert all(doc["msg_id"] == 2 and doc["date_ts"] == long_doc["date_ts"] for doc in docs[1:])
+    assert chunk_documents([long_doc], max_chars=0, chunk_chars=100, overlap=20) == [long_doc]
+
+
+def test_collapse_chunks_keeps_best_chunk_and_dedupes_whole_copies():
+    hits = [
+        {"id": "1-2_3", "parent_id": "1-2", "text": "best"},
+        {"id": "1-5", "text": "other"},
+        {"id": "1-2_0", "parent_id": "1-2", "text": "worse"},
+        {"id": "1-2", "text": "whole copy from the hot tier"},
+    ]
+    assert collapse_chunks(hits) == [{"id": "1-2", "parent_id": "1-2", "text": "best"}, {"id": "1-5", "text": "other"}]
+
+
+@pytest.mark.asyncio
+async def test_search_returns_one_hit_per_long_message_with_matching_chunk(tmp_path):
+    novel = "第一章 开头平平无奇。" + "铺垫" * 600 + "。主角终于拔出了屠龙宝刀。" + "后续" * 600
+    index = SqliteFtsIndex(tmp_path / "fts.sqlite3")
+    index.add_documents(chunk_documents([_doc(1, novel), _doc(2, "宝刀未老")], max_chars=2000, chunk_chars=1000, overlap=100))
+    service = SearchService(index, cache_enabled=False)
+
+    page = await service.search(SearchQuery(q="宝刀"))
+
+    assert sorted(hit.id for hit in page.hits) == ["1-1", "1-2"]
+    novel_hit = next(hit for hit in page.hits if hit.id == "1-1")
+    assert "<mark>宝刀</mark>" in novel_hit.formatted_text
+    assert len(novel_hit.text) <= 1000
+
+
+@pytest.mark.asyncio
+async def test_pages_and_totals_count_messages_not_chunks(tmp_path):
+    index = SqliteFtsIndex(tmp_path / "fts.sqlite3")
+    long_docs = [_doc(msg_id, "宝刀" * 1500) for msg_id in (1, 2, 3)]
+    index.add_documents(chunk_documents(long_docs, max_chars=2000, chunk_chars=1000, overlap=100))
+    service = SearchService(index, cache_enabled=False, collapse_chunked_messages=True)
+
+    first = await service.search(SearchQuery(q="宝刀", limit=2))
+    second = await service.search(SearchQuery(q="宝刀", limit=2, offset=2))
+
+    assert (len(first.hits), first.total_hits) == (2, 3)
+    assert sorted(hit.id for hit in first.hits + second.hits) == ["1-1", "1-2", "1-3"]
+
+
+def test_stale_chunks_of_a_shortened_edit_are_deleted(tmp_path):
+    index = SqliteFtsIndex(tmp_path / "fts.sqlite3")
+    original = chunk_documents([_doc(1, "长" * 3000), _doc(12, "长" * 3000)], max_chars=2000, chunk_chars=1000, overlap=100)
+    index.add_documents(original)
+    neighbour = {doc["id"] for doc in original if doc["parent_id"] == "1-12"}
+
+    for text in ("短" * 2500, "短"):
+        edited = chunk_documents([_doc(1, text)], max_chars=2000, chunk_chars=1000, overlap=100)
+        index.add_documents(edited)
+        index.delete_stale_chunks(chunk_counts(edited))
+        with sqlite3.connect(index.db_path) as conn:
+            ids = {doc_id for (doc_id,) in conn.execute("SELECT doc_id FROM fts_docs")}
+        assert ids == {doc["id"] for doc in edited} | neighbour
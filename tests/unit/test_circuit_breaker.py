@@ -0,0 +1,65 @@
+"""Unit tests for the Meili circuit breaker."""
+
+from __future__ import annotations
+
+from unittest.mock import patch
+
+import pytest
+
+from tg_search.core.circuit_breaker import CircuitBreaker
+from tg_search.core.meilisearch import MeiliSearchCircuitOpenError, MeiliSearchClient, MeiliSearchConnectionError
+
+pytestmark = [pytest.mark.unit]
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_opens_probes_once_and_backs_off():
+    clock = _Clock()
+    breaker = CircuitBreaker("test", failure_threshold=2, reset_timeout_sec=10, clock=clock)
+
+    breaker.record_failure()
+    assert breaker.state == "closed"
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert not breaker.allow()
+
+    clock.now = 10
+    assert breaker.state == "half_open"
+    assert breaker.allow()
+    assert not breaker.allow()  # only one probe in flight
+
+    breaker.record_failure()
+    assert breaker.state == "open"
+    assert breaker.retry_after() == pytest.approx(20)
+
+    clock.now = 30
+    assert breaker.allow()
+    breaker.record_success()
+    assert breaker.state == "closed"
+    assert breaker.snapshot()["opened_count"] == 2
+
+
+def test_client_fails_fast_once_read_circuit_opens(mock_meilisearch_client):
+    mock_meilisearch_client.index.return_value.search.side_effect = ConnectionError("down")
+    with patch("tg_search.core.meilisearch.Client", return_value=mock_meilisearch_client):
+        client = MeiliSearchClient("http://localhost:7700", "test_key", auto_create_index=False)
+
+    for _ in range(3):
+        with pytest.raises(MeiliSearchConnectionError):
+            client.search("q")
+    calls = mock_meilisearch_client.index.return_value.search.call_count
+    assert calls == 3
+
+    with pytest.raises(MeiliSearchCircuitOpenError) as exc_info:
+        client.search("q")
+    assert exc_info.value.retry_after > 0
+    assert mock_meilisearch_client.index.return_value.search.call_count == calls
+    assert client.circuit_states()["read"]["state"] == "open"
+    assert client.circuit_states()["write"]["state"] == "closed"
@@ -0,0 +1,134 @@
+"""Unit tests for MinHash near-duplicate detection at ingest."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from tg_search.config.fingerprint_store import DedupDecision, FingerprintStore
+from tg_search.core.telegram import serialize_message
+from tg_search.services.contracts import SearchQuery
+from tg_search.services.observability_service import ObservabilityService
+from tg_search.services.search_service import SearchService
+from tg_search.utils.minhash import TextFingerprint, estimate_similarity, fingerprint
+
+pytestmark = [pytest.mark.unit]
+
+AD = "限时优惠！全场商品五折起，点击链接 https://example.com/a?ref=1 立即抢购，先到先得，更多优惠请关注我们的频道每日更新"
+OTHER = "今天天气不错，我们一起去公园散步吧，顺便买点水果回来，晚上再一起吃饭看电影好不好呀"
+
+
+def test_fingerprint_ignores_links_and_digits_and_separates_unrelated_text():
+    base = fingerprint(AD)
+    assert fingerprint(AD.replace("ref=1", "ref=2")).digest == base.digest
+    assert estimate_similarity(base.sketch, fingerprint(AD.replace("五折", "六折")).sketch) >= 0.6
+    assert estimate_similarity(base.sketch, fingerprint(OTHER).sketch) < 0.3
+    assert fingerprint("收到，谢谢") is None
+
+
+def test_store_clusters_near_duplicates_and_skips_exact_copies(tmp_path):
+    store = FingerprintStore(tmp_path / "config.sqlite3", skip_exact_after=2)
+
+    assert store.assign("1-1", AD).cluster == "1-1"
+    assert store.assign("1-1", AD).cluster == "1-1"  # re-sync of the first copy is not a duplicate
+    near = store.assign("2-5", AD.replace("五折", "六折") + " 转发自某某群")
+    assert (near.cluster, near.near) == ("1-1", True)
+    assert store.assign("3-1", OTHER).cluster == "3-1"
+    assert store.assign("4-1", AD.replace("ref=1", "ref=9")).skip is False  # second stored copy
+    skipped = store.assign("5-1", AD)
+    assert (skipped.cluster, skipped.skip) == ("1-1", True)
+    assert store.assign("6-1", "ok") is None
+    # Re-syncing a stored copy returns its first decision without counting it again.
+    assert store.assign("4-1", AD.replace("ref=1", "ref=9")) == DedupDecision(cluster="1-1", exact=True)
+
+    stats = store.stats()
+    assert stats == {
+        "messages": 5,
+        "duplicates": 2,
+        "skipped": 1,
+        "skipped_bytes": len(AD.encode("utf-8")),
+        "clusters": 2,
+    }
+
+
+def test_clusters_sharing_a_bucket_are_all_candidates(tmp_path, monkeypatch):
+    prints = {
+        "a": TextFingerprint(digest=1, buckets=(7,), sketch=0),
+        "b": TextFingerprint(digest=2, buckets=(7,), sketch=-1),
+        "b2": TextFingerprint(digest=3, buckets=(7,), sketch=-1),
+    }
+    monkeypatch.setattr("tg_search.config.fingerprint_store.fingerprint", prints.get)
+    store = FingerprintStore(tmp_path / "config.sqlite3")
+
+    assert [store.assign(doc_id, doc_id).cluster for doc_id in ("a", "b")] == ["a", "b"]
+    assert store.assign("b2", "b2") == DedupDecision(cluster="b", near=True)
+
+
+def _message(chat_id: int, msg_id: int, text: str) -> SimpleNamespace:
+    async def _get_chat():
+        return SimpleNamespace(id=chat_id)
+
+    async def _get_sender():
+        return None
+
+    return SimpleNamespace(
+        id=msg_id,
+        date=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        text=text,
+        reactions=None,
+        get_chat=_get_chat,
+        get_sender=_get_sender,
+    )
+
+
+@pytest.mark.asyncio
+async def test_serialize_message_attaches_dup_cluster_and_drops_skipped_copies(tmp_path):
+    store = FingerprintStore(tmp_path / "config.sqlite3", skip_exact_after=1)
+
+    first = await serialize_message(_message(1, 1, AD), fingerprint_store=store)
+    short = await serialize_message(_message(1, 2, "好的"), fingerprint_store=store)
+    copy = await serialize_message(_message(2, 7, AD), fingerprint_store=store)
+
+    assert first["dup_cluster"] == "1-1"
+    assert short["dup_cluster"] == "1-2"
+    assert copy is None
+    assert "dup_cluster" not in await serialize_message(_message(3, 1, AD))
+
+
+class _RecordingMeili:
+    write_generation = 0
+
+    def __init__(self):
+        self.calls: list[dict] = []
+
+    def search(self, query, index_name="telegram", **kwargs):
+        self.calls.append(kwargs)
+        return {"hits": [], "processingTimeMs": 1, "estimatedTotalHits": 0}
+
+
+@pytest.mark.asyncio
+async def test_search_collapses_duplicate_clusters_when_enabled():
+    meili = _RecordingMeili()
+    await SearchService(meili, cache_enabled=False, collapse_duplicates=True).search(SearchQuery(q="优惠"))
+    await SearchService(meili, cache_enabled=False, collapse_duplicates=False).search(SearchQuery(q="优惠"))
+
+    assert meili.calls[0]["distinct"] == "dup_cluster"
+    assert "distinct" not in meili.calls[1]
+
+
+@pytest.mark.asyncio
+async def test_storage_snapshot_reports_dedup_savings(tmp_path):
+    store = FingerprintStore(tmp_path / "config.sqlite3", skip_exact_after=1)
+    store.assign("1-1", AD)
+    store.assign("1-2", AD)
+    meili = SimpleNamespace(
+        client=SimpleNamespace(get_all_stats=lambda: {"databaseSize": 10, "indexes": {}}),
+        get_index_stats=lambda *_: SimpleNamespace(number_of_documents=1, is_indexing=False),
+    )
+
+    snapshot = await ObservabilityService(meili, fingerprint_store=store).storage_snapshot()
+
+    assert (snapshot.dedup_messages, snapshot.dedup_skipped) == (2, 1)
+    assert snapshot.dedup_saved_bytes == len(AD.encode("utf-8"))
@@ -0,0 +1,137 @@
+"""Unit tests for the in-memory HotTier and its merge into SearchService."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from tg_search.core.hot_tier import HotTier
+from tg_search.services.contracts import SearchQuery
+from tg_search.services.search_service import SearchService
+
+pytestmark = [pytest.mark.unit]
+
+NOW = 1_800_000_000
+
+
+def _doc(chat_id: int, msg_id: int, text: str, date_ts: int) -> dict:
+    return {
+        "id": f"{chat_id}-{msg_id}",
+        "chat": {"id": chat_id, "type": "group"},
+        "chat_id": chat_id,
+        "msg_id": msg_id,
+        "date_ts": date_ts,
+        "date": datetime.fromtimestamp(date_ts, timezone.utc).isoformat(),
+        "text": text,
+    }
+
+
+class _FakeMeili:
+    write_generation = 0
+
+    def __init__(self, hits: list[dict]):
+        self.hits = hits
+        self.calls: list[dict] = []
+
+    def search(self, query, index_name="telegram", **kwargs):
+        self.calls.append(kwargs)
+        return {"hits": self.hits, "processingTimeMs": 4, "estimatedTotalHits": len(self.hits)}
+
+
+def test_hot_tier_matches_contiguous_cjk_and_evicts_by_age_and_capacity():
+    clock = [float(NOW)]
+    tier = HotTier(max_age_sec=3600, max_docs=3, sole_writer=True, clock=lambda: clock[0])
+    tier._started_at = NOW - 3000
+    tier.add(
+        [
+            _doc(1, 1, "刚才说的北京烤鸭", NOW - 7200),
+            _doc(1, 2, "北京天安门", NOW - 60),
+            _doc(1, 3, "京北方向 hello world", NOW - 30),
+        ]
+    )
+
+    assert len(tier) == 2  # the two-hour-old message is already out of range
+    assert [hit["id"] for hit in tier.search("北京")] == ["1-2"]
+    assert [hit["id"] for hit in tier.search("京")] == ["1-3", "1-2"]
+    assert [hit["id"] for hit in tier.search("hello wor")] == ["1-3"]
+    assert tier.search("天安门")[0]["_formatted"]["text"] == "北京<mark>天安门</mark>"
+    assert tier.covers(NOW - 100) is True
+    assert tier.covers(NOW - 3100) is False  # before the tier started listening
+
+    clock[0] += 600
+    tier.add([_doc(1, 4, "新消息", NOW + 500), _doc(1, 5, "更新的消息", NOW + 550)])
+    assert len(tier) == 3
+    assert "1-2" not in {hit["id"] for hit in tier.search("")}
+    assert tier.covers(NOW - 100) is False  # 1-2 was pushed out by capacity, not age
+    assert tier.covers(NOW - 59) is True
+    tier.sole_writer = False
+    assert tier.covers(NOW - 59) is False  # other writers may have indexed messages the tier never saw
+
+
+@pytest.mark.asyncio
+async def test_search_merges_fresh_hot_hits_ahead_of_meili_and_dedupes():
+    tier = HotTier(clock=lambda: float(NOW))
+    tier.add([_doc(1, 9, "部署完成了", NOW - 5), _doc(1, 8, "部署开始", NOW - 50)])
+    meili = _FakeMeili([_doc(1, 8, "部署开始", NOW - 50), _doc(1, 1, "上次部署", NOW - 9000)])
+    service = SearchService(meili, cache_enabled=False, hot_tier=tier)
+
+    page = await service.search(SearchQuery(q="部署"))
+
+    assert [hit.id for hit in page.hits] == ["1-9", "1-8", "1-1"]
+    assert page.total_hits == 3
+    assert page.hits[0].formatted_text == "<mark>部署</mark>完成了"
+
+
+@pytest.mark.asyncio
+async def test_recent_range_is_answered_from_hot_tier_without_meili():
+    tier = HotTier(max_age_sec=3600, sole_writer=True, clock=lambda: float(NOW))
+    tier._started_at = NOW - 7200  # running for longer than the window
+    tier.add([_doc(1, 1, "hello there", NOW - 100), _doc(2, 1, "hello again", NOW - 50)])
+    meili = _FakeMeili([])
+    service = SearchService(meili, cache_enabled=False, hot_tier=tier)
+
+    page = await service.search(
+        SearchQuery(q="hello", chat_id=1, date_from=datetime.fromtimestamp(NOW - 600, timezone.utc))
+    )
+
+    assert [hit.id for hit in page.hits] == ["1-1"]
+    assert meili.calls == []
+
+
+@pytest.mark.asyncio
+async def test_cursor_pages_merge_hot_hits_in_keyset_order():
+    tier = HotTier(clock=lambda: float(NOW))
+    tier.add([_doc(1, 5, "msg five", NOW - 10), _doc(1, 3, "msg three", NOW - 30)])
+    meili = _FakeMeili([_doc(1, 4, "msg four", NOW - 20), _doc(1, 2, "msg two", NOW - 40)])
+    service = SearchService(meili, cache_enabled=False, hot_tier=tier)
+
+    page = await service.search(SearchQuery(q="msg", cursor="*", limit=3))
+    assert [hit.id for hit in page.hits] == ["1-5", "1-4", "1-3"]
+
+    meili.hits = [_doc(1, 2, "msg two", NOW - 40)]
+    next_page = await service.search(SearchQuery(q="msg", cursor=page.next_cursor, limit=3))
+    assert [hit.id for hit in next_page.hits] == ["1-2"]
+
+
+class _PagingMeili(_FakeMeili):
+    def search(self, query, index_name="telegram", **kwargs):
+        self.calls.append(kwargs)
+        offset, limit = kwargs.get("offset", 0), kwargs.get("limit", 20)
+        hits = self.hits if "filter" in kwargs else self.hits[offset : offset + limit]
+        return {"hits": hits, "processingTimeMs": 1, "estimatedTotalHits": len(self.hits)}
+
+
+@pytest.mark.asyncio
+async def test_offset_pages_shift_meili_past_unindexed_hot_hits():
+    tier = HotTier(clock=lambda: float(NOW))
+    # 1-8 is already indexed; 1-9 and 1-7 are still queued.
+    tier.add([_doc(1, 9, "deploy done", NOW - 5), _doc(1, 8, "deploy start", NOW - 50), _doc(1, 7, "deploy", NOW - 60)])
+    meili = _PagingMeili([_doc(1, i, f"deploy {i}", NOW - 9000 - i) for i in (8, 1, 2, 3)])
+    service = SearchService(meili, cache_enabled=False, hot_tier=tier)
+
+    pages = [await service.search(SearchQuery(q="deploy", limit=3, offset=offset)) for offset in (0, 3)]
+
+    assert [[hit.id for hit in page.hits] for page in pages] == [["1-9", "1-7", "1-8"], ["1-1", "1-2", "1-3"]]
+    assert {page.total_hits for page in pages} == {6}
+    assert [page.offset for page in pages] == [0, 3]
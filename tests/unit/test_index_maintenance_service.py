@@ -0,0 +1,289 @@
+"""Unit tests for IndexMaintenanceService numeric field backfill and shadow rebuild."""
+
+from __future__ import annotations
+
+from contextlib import contextmanager
+from types import SimpleNamespace
+
+import pytest
+
+from tg_search.services.contracts import DomainError
+from tg_search.services.index_maintenance_service import IndexMaintenanceService
+
+pytestmark = [pytest.mark.unit]
+
+
+class _FakeMeili:
+    """In-memory index that honours the backfill's NOT EXISTS filter and partial merges."""
+
+    def __init__(self, docs: list[dict]):
+        self.docs = {doc["id"]: dict(doc) for doc in docs}
+        self.fetch_calls: list[dict] = []
+        self.merged: list[list[dict]] = []
+
+    def get_documents(self, index_name="telegram", *, filter=None, fields=None, limit=1000, offset=0):
+        self.fetch_calls.append({"filter": filter, "limit": limit, "offset": offset})
+        missing = [
+            doc
+            for doc in self.docs.values()
+            if any(key not in doc for key in ("date_ts", "chat_id", "msg_id"))
+        ]
+        return [{k: doc[k] for k in fields if k in doc} for doc in missing[offset : offset + limit]]
+
+    def merge_documents(self, documents, index_name="telegram"):
+        self.merged.append(documents)
+        for patch in documents:
+            self.docs[patch["id"]].update(patch)
+        return SimpleNamespace(task_uid=len(self.merged))
+
+    def wait_for_task(self, task_uid, timeout_ms=60_000):
+        return {"uid": task_uid, "status": "succeeded", "error": None}
+
+    def settings_task(self, index_name="telegram"):
+        return None
+
+
+def test_derive_numeric_fields_handles_plain_and_edited_ids():
+    plain = IndexMaintenanceService.derive_numeric_fields(
+        {"id": "-1001-42", "date": "2026-01-01T08:00:00+08:00", "chat": {"id": -1001}}
+    )
+    edited = IndexMaintenanceService.derive_numeric_fields(
+        {"id": "5-7-1767225600", "date": "2026-01-01T00:00:00Z", "chat": {}}
+    )
+
+    assert plain == {"id": "-1001-42", "date_ts": 1767225600, "chat_id": -1001, "msg_id": 42}
+    assert edited == {"id": "5-7-1767225600", "date_ts": 1767225600, "chat_id": 5, "msg_id": 7}
+    assert IndexMaintenanceService.derive_numeric_fields({"id": "bad", "date": "2026-01-01"}) is None
+
+
+@pytest.mark.asyncio
+async def test_numeric_backfill_patches_legacy_docs_and_skips_unparseable():
+    docs = [{"id": f"1-{i}", "date": "2026-01-01T00:00:00+00:00", "chat": {"id": 1}} for i in range(5)]
+    docs.append({"id": "legacy", "date": "2026-01-01T00:00:00+00:00", "chat": {"id": 1}})
+    docs.append({"id": "1-99", "date": "x", "date_ts": 1, "chat_id": 1, "msg_id": 99})
+    fake = _FakeMeili(docs)
+    service = IndexMaintenanceService(fake, batch_size=2)
+
+    snapshot = await service.run_numeric_backfill()
+
+    assert snapshot.state == "completed"
+    assert snapshot.updated == 5
+    assert snapshot.skipped == 1
+    assert all(fake.docs[f"1-{i}"]["msg_id"] == i for i in range(5))
+    assert "date_ts" not in fake.docs["legacy"]
+    assert all(call["filter"] == "date_ts NOT EXISTS OR chat_id NOT EXISTS OR msg_id NOT EXISTS" for call in fake.fetch_calls)
+    assert service.backfill_status().state == "completed"
+
+
+class _RebuildMeili:
+    """Index registry that applies add/swap/delete immediately and records the call order."""
+
+    def __init__(self, docs: list[dict], *, pending: dict | None = None):
+        self.indexes: dict[str, dict[str, dict]] = {"telegram": {doc["id"]: doc for doc in docs}, "telegram__next": {}}
+        self.pending = dict(pending or {})
+        self.calls: list[str] = []
+        self.generation = 0
+        self.journals: dict[str, list] = {}
+        # Simulated writes from the live ingest path, applied when the copy reads a page.
+        self.on_copy_read = None
+
+    def start_write_journal(self, index_name):
+        self.journals[index_name] = []
+        return None
+
+    def take_write_journal(self, index_name, *, stop=False):
+        entries = self.journals.pop(index_name, []) if stop else self.journals.get(index_name, [])
+        if not stop and index_name in self.journals:
+            self.journals[index_name] = []
+        return entries
+
+    def journaled_deletions(self, index_name):
+        return sum(len(payload) for operation, payload in self.journals.get(index_name, []) if operation == "delete")
+
+    @contextmanager
+    def holding_writes(self):
+        yield
+
+    def _journal(self, index_name, operation, payload):
+        if index_name in self.journals:
+            self.journals[index_name].append((operation, list(payload)))
+
+    def pending_reindex(self, index_name="telegram"):
+        return dict(self.pending)
+
+    def clear_pending_reindex(self, index_name="telegram"):
+        self.pending.clear()
+
+    def bump_write_generation(self):
+        self.generation += 1
+        return self.generation
+
+    def list_index_names(self):
+        return list(self.indexes)
+
+    def _task(self, name):
+        self.calls.append(name)
+        return SimpleNamespace(task_uid=len(self.calls))
+
+    def get_index_stats(self, index_name):
+        return SimpleNamespace(number_of_documents=len(self.indexes[index_name]))
+
+    def create_index(self, index_name="telegram", primary_key="id", *, allow_reindex=True):
+        self.indexes[index_name] = {}
+        return self._task(f"create:{index_name}")
+
+    def delete_index(self, index_name):
+        self.indexes.pop(index_name)
+        return self._task(f"delete:{index_name}")
+
+    def get_documents(self, index_name="telegram", *, filter=None, fields=None, limit=1000, offset=0):
+        docs = list(self.indexes[index_name].values())
+        page = [dict(doc) for doc in docs[offset : offset + limit]]
+        if self.on_copy_read is not None:
+            hook, self.on_copy_read = self.on_copy_read, None
+            hook()
+        return page
+
+    def add_documents(self, documents, index_name="telegram"):
+        self.indexes[index_name].update({doc["id"]: doc for doc in documents})
+        self._journal(index_name, "add", documents)
+        return self._task(f"add:{index_name}")
+
+    def merge_documents(self, documents, index_name="telegram"):
+        for doc in documents:
+            self.indexes[index_name].setdefault(doc["id"], {}).update(doc)
+        self._journal(index_name, "merge", documents)
+        return self._task(f"merge:{index_name}")
+
+    def delete_documents(self, document_ids, index_name="telegram"):
+        for doc_id in document_ids:
+            self.indexes[index_name].pop(doc_id, None)
+        self._journal(index_name, "delete", document_ids)
+        return self._task(f"delete_docs:{index_name}")
+
+    def swap_indexes(self, index_a, index_b):
+        self.indexes[index_a], self.indexes[index_b] = self.indexes[index_b], self.indexes[index_a]
+        return self._task(f"swap:{index_a}:{index_b}")
+
+    def wait_for_task(self, task_uid, timeout_ms=60_000):
+        return {"uid": task_uid, "status": "succeeded", "error": None}
+
+
+@pytest.mark.asyncio
+async def test_rebuild_copies_into_shadow_swaps_and_drops_old_index():
+    docs = [{"id": f"1-{i}", "date_ts": 1_000 + i, "text": f"m{i}"} for i in range(5)]
+    fake = _RebuildMeili(docs, pending={"searchableAttributes": ["text", "id"]})
+    service = IndexMaintenanceService(fake, batch_size=2)
+
+    assert service.rebuild_status().pending_settings == ["searchableAttributes"]
+    snapshot = await service.run_rebuild()
+
+    assert snapshot.state == "completed"
+    assert snapshot.total == 5
+    assert snapshot.copied == 5
+    assert snapshot.pending_settings == []
+    assert set(fake.indexes) == {"telegram"}
+    assert set(fake.indexes["telegram"]) == {f"1-{i}" for i in range(5)}
+    # Stale shadow dropped first; the old data is only deleted after the swap.
+    assert fake.calls[:2] == ["delete:telegram__next", "create:telegram__next"]
+    assert fake.calls[-2:] == ["swap:telegram:telegram__next", "delete:telegram__next"]
+    assert fake.generation == 1
+
+
+@pytest.mark.asyncio
+async def test_rebuild_derives_numeric_fields_for_legacy_docs():
+    docs = [
+        {"id": "-1001-7", "date": "2026-01-01T08:00:00+08:00", "chat": {"id": -1001}, "text": "old"},
+        {"id": "-1001-8", "date": "x", "date_ts": 5, "chat_id": -1001, "msg_id": 8, "text": "new"},
+    ]
+    fake = _RebuildMeili(docs, pending={"filterableAttributes": ["date_ts", "chat_id"]})
+    service = IndexMaintenanceService(fake)
+
+    with pytest.raises(DomainError) as exc_info:
+        service.start_numeric_backfill()
+    assert exc_info.value.code == "index_rebuild_pending"
+
+    snapshot = await service.run_rebuild()
+
+    assert snapshot.state == "completed"
+    live = fake.indexes["telegram"]
+    assert {key: live["-1001-7"][key] for key in ("date_ts", "chat_id", "msg_id")} == {
+        "date_ts": 1767225600,
+        "chat_id": -1001,
+        "msg_id": 7,
+    }
+    assert live["-1001-8"]["date_ts"] == 5
+
+
+@pytest.mark.asyncio
+async def test_rebuild_carries_over_writes_made_during_the_copy():
+    docs = [{"id": f"1-{i}", "date_ts": 1_000 + i, "text": f"m{i}"} for i in range(4)]
+    fake = _RebuildMeili(docs)
+
+    def _ingest_during_copy():
+        # An old-dated history message, an edit of an already copied message and a deletion.
+        fake.add_documents([{"id": "9-1", "date_ts": 5, "text": "history"}])
+        fake.merge_documents([{"id": "1-0", "text": "edited"}])
+        fake.delete_documents(["1-1"])
+
+    fake.on_copy_read = _ingest_during_copy
+    service = IndexMaintenanceService(fake, batch_size=2)
+
+    snapshot = await service.run_rebuild()
+
+    assert snapshot.state == "completed"
+    live = fake.indexes["telegram"]
+    assert set(live) == {"1-0", "1-2", "1-3", "9-1"}
+    assert live["1-0"]["text"] == "edited"
+    assert fake.journals == {}
+
+
+@pytest.mark.asyncio
+async def test_rebuild_failure_keeps_live_index():
+    fake = _RebuildMeili([{"id": "1-1", "date_ts": 1}])
+
+    def _failing_swap(index_a, index_b):
+        raise RuntimeError("swap rejected")
+
+    fake.swap_indexes = _failing_swap
+    service = IndexMaintenanceService(fake)
+
+    snapshot = await service.run_rebuild()
+
+    assert snapshot.state == "failed"
+    assert snapshot.phase == "swap"
+    assert "swap rejected" in (snapshot.last_error or "")
+    assert set(fake.indexes["telegram"]) == {"1-1"}
+    assert not service.start_rebuild_if_pending()
+
+
+@pytest.mark.asyncio
+async def test_replay_dead_letters_removes_only_accepted_documents(tmp_path):
+    from tg_search.config.dead_letter_store import DeadLetterStore
+    from tg_search.core.batch_writer import BatchWriteResult
+
+    class _Writer:
+        def __init__(self):
+            self.calls = []
+
+        def write(self, documents, index_name=None):
+            self.calls.append((index_name, [doc["id"] for doc in documents]))
+            # 1-3 only reached the ingest buffer: it must stay in the store.
+            return BatchWriteResult(indexed=1, dead_lettered=1, buffered=1, indexed_ids=["1-1"], rejected_ids=["1-2"])
+
+    store = DeadLetterStore(tmp_path / "dl.sqlite3")
+    store.add(
+        [{"id": "1-1"}, {"id": "1-2"}, {"id": "1-3"}],
+        index_name="telegram_202601",
+        error_code="invalid_document_id",
+        error_message="x",
+    )
+    writer = _Writer()
+    service = IndexMaintenanceService(_FakeMeili([]), batch_writer=writer, dead_letters=store)
+
+    result = await service.replay_dead_letters()
+
+    assert [(index, sorted(ids)) for index, ids in writer.calls] == [("telegram_202601", ["1-1", "1-2", "1-3"])]
+    assert (result.requested, result.replayed, result.failed, result.remaining) == (3, 1, 2, 2)
+    assert sorted(entry.doc_id for entry in store.list_entries()) == ["1-2", "1-3"]
+    assert service.list_dead_letters().total == 2
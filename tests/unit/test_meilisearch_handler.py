@@ -15,6 +15,8 @@ from tg_search.core.meilisearch import (
     MeiliSearchClient,
     MeiliSearchConnectionError,
     MeiliSearchTimeoutError,
+    diff_index_settings,
+    settings_require_reindex,
 )
 
 pytestmark = [pytest.mark.unit]
@@ -62,6 +64,10 @@ class TestMeiliSearchClientCRUD:
         """测试创建索引"""
         meili_client.create_index("test_index")
         mock_meilisearch_client.create_index.assert_called_once()
+        # 新索引同样经由设置差异提交：先等创建任务完成再读取当前设置
+        mock_meilisearch_client.wait_for_task.assert_called_once_with(1)
+        mock_meilisearch_client.index.return_value.get_settings.assert_called_once()
+        mock_meilisearch_client.index.return_value.update_settings.assert_called_once()
 
     def test_create_index_already_exists(self, meili_client, mock_meilisearch_client):
         """测试索引已存在的情况"""
@@ -76,6 +82,25 @@ class TestMeiliSearchClientCRUD:
         # 验证尝试更新设置
         mock_meilisearch_client.index.return_value.update_settings.assert_called()
 
+    def test_create_index_existing_defers_reindex_settings(self, meili_client, mock_meilisearch_client):
+        """已存在的非空索引：只提交在线设置，需要重建的设置项留给影子索引"""
+        mock_response = MagicMock()
+        mock_response.status_code = 400
+        mock_response.text = '{"message": "Index telegram already exists", "code": "index_already_exists"}'
+        mock_meilisearch_client.create_index.side_effect = meilisearch.errors.MeilisearchApiError(
+            "index_already_exists", mock_response
+        )
+        mock_index = mock_meilisearch_client.index.return_value
+        mock_index.get_settings.return_value = {"filterableAttributes": ["chat.id"], "rankingRules": ["words"]}
+        mock_index.get_stats.return_value = MagicMock(number_of_documents=10)
+        desired = {"filterableAttributes": ["chat.id", "date_ts"], "rankingRules": ["sort", "words"]}
+
+        with patch("tg_search.core.meilisearch.INDEX_CONFIG", desired):
+            meili_client.create_index("telegram", allow_reindex=False)
+
+        mock_index.update_settings.assert_called_once_with({"rankingRules": ["sort", "words"]})
+        assert meili_client.pending_reindex("telegram") == {"filterableAttributes": ["chat.id", "date_ts"]}
+
     def test_add_documents(self, meili_client, sample_documents, mock_meilisearch_client):
         """测试添加文档"""
         meili_client.add_documents(sample_documents)
@@ -168,6 +193,33 @@ class TestMeiliSearchExceptionHandling:
             meili_client.search("test")
 
 
+class TestIndexSettingsDiff:
+    """测试索引设置差异计算"""
+
+    def test_unordered_lists_and_nested_subsets_match(self):
+        current = {
+            "filterableAttributes": ["date_ts", "chat_id"],
+            "typoTolerance": {"enabled": True, "disableOnWords": [], "minWordSizeForTypos": {"oneTypo": 5, "twoTypos": 9}},
+            "rankingRules": ["words", "sort"],
+        }
+        desired = {
+            "filterableAttributes": ["chat_id", "date_ts"],
+            "typoTolerance": {"enabled": True},
+            "rankingRules": ["sort", "words"],
+        }
+
+        diff = diff_index_settings(current, desired)
+
+        assert diff == {"rankingRules": ["sort", "words"]}
+        assert not settings_require_reindex(diff)
+
+    def test_reindex_keys_detected(self):
+        diff = diff_index_settings({"searchableAttributes": ["text"]}, {"searchableAttributes": ["text", "id"]})
+
+        assert diff == {"searchableAttributes": ["text", "id"]}
+        assert settings_require_reindex(diff)
+
+
 class TestMeiliSearchAPIErrorDetails:
     """测试自定义异常的详细信息"""
 
@@ -0,0 +1,46 @@
+"""Unit tests for the SQLite chat/sender MetadataStore."""
+
+from __future__ import annotations
+
+import pytest
+
+from tg_search.config.metadata_store import ChatMeta, MetadataStore, UserMeta
+
+pytestmark = [pytest.mark.unit]
+
+
+def test_upsert_persists_and_reloads(tmp_path):
+    db_path = tmp_path / "meta.sqlite3"
+    store = MetadataStore(db_path)
+
+    assert store.upsert_chats([ChatMeta(id=1, type="group", title="Old")]) == 1
+    assert store.upsert_users([UserMeta(id=7, username="Alice")]) == 1
+
+    reloaded = MetadataStore(db_path)
+    assert reloaded.get_chat(1) == ChatMeta(id=1, type="group", title="Old")
+    assert reloaded.get_user(7) == UserMeta(id=7, username="Alice")
+    assert reloaded.counts() == {"chats": 1, "users": 1}
+
+
+def test_unchanged_rows_do_not_bump_version(tmp_path):
+    store = MetadataStore(tmp_path / "meta.sqlite3")
+    store.record_chat({"id": 1, "type": "group", "title": "A", "username": None})
+    version = store.version
+
+    store.record_chat({"id": 1, "type": "group", "title": "A", "username": None})
+    assert store.version == version
+
+    store.record_chat({"id": 1, "type": "group", "title": "Renamed", "username": None})
+    assert store.version == version + 1
+    assert store.get_chat(1).title == "Renamed"
+
+
+def test_find_user_ids_tracks_username_changes(tmp_path):
+    store = MetadataStore(tmp_path / "meta.sqlite3")
+    store.upsert_users([UserMeta(id=1, username="Bob"), UserMeta(id=2, username="bob")])
+
+    assert store.find_user_ids("@BOB") == [1, 2]
+
+    store.record_user({"id": 2, "username": "robert"})
+    assert store.find_user_ids("bob") == [1]
+    assert store.find_user_ids("robert") == [2]
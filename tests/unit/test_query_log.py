@@ -0,0 +1,98 @@
+"""Unit tests for the search query log and presentation cache warming."""
+
+from __future__ import annotations
+
+import json
+
+import pytest
+
+from tg_search.config.query_log_store import QueryLogStore
+from tg_search.services.cache_warmer import CacheWarmer
+from tg_search.services.contracts import SearchQuery
+from tg_search.services.search_service import SearchService
+
+pytestmark = [pytest.mark.unit]
+
+
+class _CountingMeili:
+    def __init__(self):
+        self.calls: list[str] = []
+        self.write_generation = 0
+
+    def search(self, query: str, index_name: str = "telegram", **kwargs):
+        self.calls.append(query)
+        return {"hits": [], "processingTimeMs": 1, "estimatedTotalHits": 0}
+
+
+class _Writer:
+    buffered = 0
+
+
+def test_query_log_aggregates_counts_and_latency_percentiles(tmp_path):
+    store = QueryLogStore(tmp_path / "log.sqlite3")
+    for latency in range(1, 21):
+        store.record('{"q":"docker"}', "docker", latency_ms=latency, total_hits=3, cached=latency > 10)
+    store.record('{"q":"python"}', "python", latency_ms=50, total_hits=1, cached=False)
+
+    top = store.top_queries(limit=1)
+    assert [stats.q for stats in top] == ["docker"]
+    assert (top[0].count, top[0].cache_hits, top[0].avg_total_hits) == (20, 10, 3.0)
+    assert (top[0].p50_ms, top[0].p95_ms, top[0].max_ms) == (10.0, 19.0, 20.0)
+    assert store.top_queries(since=top[0].last_seen_at + 1) == []
+
+
+def test_query_log_prunes_to_max_rows(tmp_path, monkeypatch):
+    monkeypatch.setattr("tg_search.config.query_log_store._PRUNE_EVERY", 5)
+    store = QueryLogStore(tmp_path / "log.sqlite3", max_rows=3)
+    for i in range(5):
+        store.record(f'{{"q":"q{i}"}}', f"q{i}", latency_ms=1, total_hits=0, cached=False)
+    assert store.count() == 3
+
+
+@pytest.mark.asyncio
+async def test_presentation_searches_are_logged_and_warmed_after_restart(tmp_path):
+    log = QueryLogStore(tmp_path / "log.sqlite3")
+    first = SearchService(_CountingMeili(), cache_enabled=True, query_log=log)
+    for _ in range(3):
+        await first.search_for_presentation(SearchQuery(q="Docker", chat_id=7), page=0, page_size=5)
+    # Page turns do not count as new searches.
+    await first.search_for_presentation(SearchQuery(q="docker", chat_id=7), page=1, page_size=5)
+    await first.search_for_presentation(SearchQuery(q="python"), page=0, page_size=5)
+
+    report = await first.top_queries(limit=5)
+    assert [(item.q, item.count, item.cache_hits) for item in report.items] == [("docker", 3, 2), ("python", 1, 0)]
+    assert report.items[0].filters == {"chat_id": 7}
+    assert report.logged == 4
+
+    # A fresh process starts cold; warming loads the logged queries once.
+    meili = _CountingMeili()
+    restarted = SearchService(meili, cache_enabled=True, query_log=log)
+    assert await restarted.warm_cache(10) == 2
+    assert await restarted.warm_cache(10) == 0
+    await restarted.search_for_presentation(SearchQuery(q="docker", chat_id=7), page=0, page_size=5)
+    assert sorted(meili.calls) == ["docker", "python"]
+    assert (await restarted.top_queries()).last_warmed == 0
+
+
+@pytest.mark.asyncio
+async def test_cache_warmer_reruns_on_generation_change_and_defers_to_ingest(tmp_path):
+    log = QueryLogStore(tmp_path / "log.sqlite3")
+    log.record(json.dumps({"q": "docker"}), "docker", latency_ms=5, total_hits=0, cached=False)
+    meili = _CountingMeili()
+    writer = _Writer()
+    warmer = CacheWarmer(
+        SearchService(meili, cache_enabled=True, query_log=log),
+        top_n=5,
+        interval_sec=60,
+        batch_writer=writer,
+    )
+
+    assert await warmer.warm_once() == 1
+    assert await warmer.warm_once() is None
+
+    meili.write_generation += 1
+    writer.buffered = 10
+    assert await warmer.warm_once() is None
+    writer.buffered = 0
+    assert await warmer.warm_once() == 1
+    assert meili.calls == ["docker", "docker"]
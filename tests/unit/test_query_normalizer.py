@@ -0,0 +1,60 @@
+"""Unit tests for search query normalization."""
+
+from __future__ import annotations
+
+import pytest
+
+from tg_search.services.contracts import SearchQuery
+from tg_search.services.query_normalizer import QueryNormalizer, load_t2s_table
+from tg_search.services.search_service import SearchService
+
+pytestmark = [pytest.mark.unit]
+
+
+def test_normalize_text_folds_width_case_and_whitespace():
+    normalizer = QueryNormalizer()
+
+    assert normalizer.normalize_text("Hello") == "hello"
+    assert normalizer.normalize_text("  hello \t World ") == "hello world"
+    assert normalizer.normalize_text("ｈｅｌｌｏ　ＷＯＲＬＤ") == "hello world"
+    assert normalizer.normalize_text("電影") == "電影"
+    assert QueryNormalizer(enabled=False).normalize_text(" Hello ") == " Hello "
+
+
+def test_traditional_fold_is_opt_in_and_accepts_extra_table(tmp_path):
+    table = tmp_path / "TSCharacters.txt"
+    table.write_text("麵\t面 麪\n乾燥\t干燥\n", encoding="utf-8")
+    assert load_t2s_table(table) == {ord("麵"): "面"}
+
+    normalizer = QueryNormalizer(fold_traditional=True, t2s_table_path=table)
+    assert normalizer.normalize_text("東京 電影 牛肉麵") == "东京 电影 牛肉面"
+
+
+def test_normalize_query_canonicalizes_sender_and_keeps_blank_queries():
+    normalizer = QueryNormalizer()
+
+    query = normalizer.normalize(SearchQuery(q="  Docker ", sender_username=" @Alice "))
+    assert (query.q, query.sender_username) == ("docker", "Alice")
+
+    blank = SearchQuery(q="   ")
+    assert normalizer.normalize(blank) is blank
+
+
+class _CountingMeili:
+    def __init__(self):
+        self.calls: list[str] = []
+
+    def search(self, query: str, index_name: str = "telegram", **kwargs):
+        self.calls.append(query)
+        return {"hits": [], "processingTimeMs": 1, "estimatedTotalHits": 0}
+
+
+@pytest.mark.asyncio
+async def test_query_variants_share_one_presentation_cache_entry():
+    fake = _CountingMeili()
+    service = SearchService(fake, cache_enabled=True, query_normalizer=QueryNormalizer())
+
+    for variant in ("Hello", "hello ", "ｈｅｌｌｏ"):
+        await service.search_for_presentation(SearchQuery(q=variant), page=0, page_size=5)
+
+    assert fake.calls == ["hello"]
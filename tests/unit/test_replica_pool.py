@@ -0,0 +1,123 @@
+"""Unit tests for multi-host read/write split (ReplicaPool + MeiliSearchClient routing)."""
+
+from __future__ import annotations
+
+import random
+import threading
+from unittest.mock import MagicMock, patch
+
+import pytest
+
+from tg_search.core.meilisearch import MeiliSearchClient
+from tg_search.core.replica_pool import MeiliNode, ReplicaPool, parse_hosts
+
+pytestmark = [pytest.mark.unit]
+
+
+class _StatsClient:
+    def __init__(self, last_update=None, error=None):
+        self.last_update = last_update
+        self.error = error
+
+    def get_all_stats(self):
+        if self.error is not None:
+            raise self.error
+        return {"lastUpdate": self.last_update}
+
+
+def test_parse_hosts_requires_single_primary():
+    assert parse_hosts("http://a:7700|primary, http://b:7700/ ,http://c:7700|writer") == [
+        ("http://a:7700", "primary"),
+        ("http://b:7700", "replica"),
+        ("http://c:7700", "writer"),
+    ]
+    with pytest.raises(ValueError):
+        parse_hosts("http://a:7700|replica")
+    with pytest.raises(ValueError):
+        parse_hosts("http://a:7700|primary,http://b:7700|leader")
+
+
+def test_probe_takes_lagging_and_unreachable_replicas_out_of_rotation():
+    primary = MeiliNode("p", "primary", _StatsClient("2026-01-01T01:00:00Z"))
+    fresh = MeiliNode("fresh", "replica", _StatsClient("2026-01-01T00:59:00Z"))
+    stale = MeiliNode("stale", "replica", _StatsClient("2026-01-01T00:00:00Z"))
+    down = MeiliNode("down", "replica", _StatsClient(error=ConnectionError("refused")))
+    pool = ReplicaPool([primary, fresh, stale, down], max_lag_sec=300, probe_interval_sec=3600)
+
+    pool.probe()
+
+    assert (fresh.healthy, fresh.lag_sec) == (True, 60.0)
+    assert (stale.healthy, stale.lag_sec) == (False, 3600.0)
+    assert down.healthy is False
+    pool._probed_at = 0.0  # skip background probing in pick_reader
+    pool._clock = lambda: 1.0
+    assert {pool.pick_reader().host for _ in range(20)} == {"fresh"}
+
+    pool.mark_down(fresh, ConnectionError("reset"))
+    assert pool.pick_reader() is primary
+
+
+def test_pick_reader_prefers_lower_latency():
+    primary = MeiliNode("p", "primary", _StatsClient())
+    fast = MeiliNode("fast", "replica", _StatsClient(), ewma_ms=5.0)
+    slow = MeiliNode("slow", "replica", _StatsClient(), ewma_ms=50.0)
+    pool = ReplicaPool([primary, fast, slow], probe_interval_sec=3600, rng=random.Random(0))
+    pool._probed_at = 0.0
+    pool._clock = lambda: 1.0
+
+    assert {pool.pick_reader().host for _ in range(10)} == {"fast"}
+    pool.record(fast, 500.0)
+    assert fast.ewma_ms == pytest.approx(0.3 * 500 + 0.7 * 5)
+
+
+def test_client_routes_search_to_replica_and_fans_out_writes():
+    clients = {"http://p:7700": MagicMock(), "http://r:7700": MagicMock(), "http://w:7700": MagicMock()}
+    for client in clients.values():
+        client.get_all_stats.return_value = {"lastUpdate": "2026-01-01T00:00:00Z"}
+    clients["http://r:7700"].index.return_value.search.side_effect = ConnectionError("replica down")
+
+    with patch("tg_search.core.meilisearch.Client", side_effect=lambda url, key: clients[url]):
+        meili = MeiliSearchClient(
+            "http://ignored:7700",
+            "key",
+            auto_create_index=False,
+            hosts="http://p:7700|primary,http://r:7700|replica,http://w:7700|writer",
+        )
+    pool = meili._replica_pool
+    pool._rng = random.Random(1)
+    pool._probed_at = 0.0
+    pool._clock = lambda: 1.0
+    pool._nodes[2].healthy = False  # keep the writer out of the read rotation
+
+    meili.search("hello")
+    meili.add_documents([{"id": "1-1"}])
+    pool.join_writes()
+
+    assert meili.host == "http://p:7700"
+    clients["http://r:7700"].index.return_value.search.assert_called_once()
+    clients["http://p:7700"].index.return_value.search.assert_called_once()  # failover after replica error
+    assert [node["healthy"] for node in meili.node_states()] == [True, False, False]
+    clients["http://w:7700"].index.return_value.add_documents.assert_called_once_with([{"id": "1-1"}])
+    clients["http://r:7700"].index.return_value.add_documents.assert_not_called()
+
+
+def test_fan_out_runs_writes_per_node_in_order_without_blocking_the_caller():
+    release = threading.Event()
+    applied: list[str] = []
+
+    class _SlowClient:
+        def apply(self, name):
+            release.wait(5)
+            applied.append(name)
+
+    primary = MeiliNode("p", "primary", MagicMock())
+    writer = MeiliNode("w", "writer", _SlowClient())
+    pool = ReplicaPool([primary, writer], probe_interval_sec=3600)
+
+    for name in ("add", "delete", "swap"):
+        pool.fan_out(name, lambda client, name=name: client.apply(name))
+    assert applied == []
+
+    release.set()
+    pool.join_writes()
+    assert applied == ["add", "delete", "swap"]
@@ -2,11 +2,14 @@
 
 from __future__ import annotations
 
-from datetime import datetime
+import asyncio
+import base64
+from datetime import datetime, timezone
 
 import pytest
 
-from tg_search.services.contracts import SearchQuery
+from tg_search.config.callback_store import CallbackQueryStore
+from tg_search.services.contracts import DomainError, SearchPage, SearchQuery
 from tg_search.services.search_service import SearchService
 
 pytestmark = [pytest.mark.unit]
@@ -51,10 +54,75 @@ async def test_search_builds_unified_filter_and_pagination_params():
     assert call[1] == "telegram"
     assert call[2]["limit"] == 15
     assert call[2]["offset"] == 5
-    assert "chat.id = 123" in call[2]["filter"]
+    assert "chat_id = 123" in call[2]["filter"]
     assert 'chat.type = "group"' in call[2]["filter"]
-    assert 'date >=' in call[2]["filter"]
-    assert 'date <=' in call[2]["filter"]
+    assert "date_ts >= " in call[2]["filter"]
+    assert "date_ts <= " in call[2]["filter"]
+
+
+@pytest.mark.asyncio
+async def test_search_falls_back_to_legacy_filters_while_reindex_is_pending():
+    fake = _FakeMeili({"hits": [], "processingTimeMs": 1, "estimatedTotalHits": 0})
+    fake.pending_reindex = lambda index_name="telegram": {"filterableAttributes": ["date_ts", "chat_id"]}
+    service = SearchService(fake, cache_enabled=False)
+
+    await service.search(
+        SearchQuery(
+            q="hello",
+            chat_id=123,
+            date_from=datetime(2026, 1, 1, 0, 0, 0, tzinfo=timezone.utc),
+        )
+    )
+
+    filter_str = fake.calls[0][2]["filter"]
+    assert filter_str.startswith("chat.id = 123 AND date >= ")
+    assert "date_ts" not in filter_str
+    with pytest.raises(DomainError) as exc_info:
+        await service.search(SearchQuery(q="hello", cursor="*"))
+    assert exc_info.value.code == "search_index_rebuilding"
+
+
+@pytest.mark.asyncio
+async def test_search_profiles_trim_retrieved_attributes_and_crop_text():
+    fake = _FakeMeili(
+        {
+            "hits": [
+                {
+                    "id": "100-1",
+                    "chat": {"id": 100, "type": "group"},
+                    "date": "2026-01-01T00:00:00Z",
+                    "text_len": 5000,
+                    "_formatted": {"text": "…said <mark>hello</mark> there…"},
+                }
+            ],
+            "processingTimeMs": 1,
+            "estimatedTotalHits": 1,
+        }
+    )
+    service = SearchService(fake, cache_enabled=False)
+
+    page = await service.search(SearchQuery(q="hello", profile="list"))
+    params = fake.calls[0][2]
+    assert "text" not in params["attributesToRetrieve"]
+    assert {"id", "date_ts", "msg_id", "parent_id"} <= set(params["attributesToRetrieve"])
+    assert (params["attributesToCrop"], params["cropMarker"]) == (["text"], "…")
+    # The snippet stands in for the raw text; text_len still reports the full message.
+    assert (page.hits[0].text, page.hits[0].text_len) == ("…said hello there…", 5000)
+
+    await service.search(SearchQuery(q="hello", fields=["id", "date", "from_user"]))
+    params = fake.calls[1][2]
+    assert params["attributesToHighlight"] == []
+    assert "from_user" in params["attributesToRetrieve"] and "attributesToCrop" not in params
+
+    await service.search(SearchQuery(q="hello"))
+    assert "attributesToRetrieve" not in fake.calls[2][2]
+
+    await service.search_for_presentation(SearchQuery(q="hello"), page=0, page_size=5)
+    assert fake.calls[3][2]["attributesToCrop"] == ["text"]
+
+    with pytest.raises(DomainError) as exc_info:
+        await service.search(SearchQuery(q="hello", fields=["id", "secret"]))
+    assert (exc_info.value.code, exc_info.value.detail) == ("search_fields_invalid", "secret")
 
 
 @pytest.mark.asyncio
@@ -116,32 +184,87 @@ async def test_search_for_presentation_uses_service_cache_for_multi_page_navigat
     assert len(fake.calls) == 1
 
 
-def test_decode_legacy_callback_payload_preserves_underscore_query():
+@pytest.mark.asyncio
+async def test_decode_legacy_callback_payload_preserves_underscore_query():
     service = SearchService(_FakeMeili({"hits": [], "processingTimeMs": 0, "estimatedTotalHits": 0}))
 
-    query, page, page_size = service.decode_page_callback("page_foo_bar_2")
+    query, page, page_size = await service.decode_page_callback("page_foo_bar_2")
 
     assert query.q == "foo_bar"
     assert page == 2
     assert page_size > 0
 
 
-def test_encode_callback_falls_back_to_short_token_when_payload_too_long():
+@pytest.mark.asyncio
+async def test_encode_callback_falls_back_to_short_token_when_payload_too_long():
     service = SearchService(
         _FakeMeili({"hits": [], "processingTimeMs": 0, "estimatedTotalHits": 0}),
         cache_ttl_sec=300,
     )
     long_query = "q_" + ("x" * 300)
 
-    payload = service.encode_page_callback(SearchQuery(q=long_query), page=2, page_size=5)
+    payload = await service.encode_page_callback(SearchQuery(q=long_query), page=2, page_size=5)
 
     assert payload.startswith(b"pagek:")
     assert len(payload) <= 64
-    decoded_query, page, page_size = service.decode_page_callback(payload)
+    decoded_query, page, page_size = await service.decode_page_callback(payload)
     assert decoded_query.q == long_query
     assert page == 2
     assert page_size == 5
 
+@pytest.mark.asyncio
+async def test_compact_callback_fits_cjk_queries_with_filters_inline():
+    service = SearchService(_FakeMeili({"hits": [], "processingTimeMs": 0, "estimatedTotalHits": 0}))
+    query = SearchQuery(
+        q="周末一起去爬山看日出",
+        chat_id=-1001234567890,
+        chat_type="channel",
+        date_from=datetime(2026, 1, 1, tzinfo=timezone.utc),
+        sender_username="alice",
+    )
+
+    payload = await service.encode_page_callback(query, page=3, page_size=5)
+
+    assert payload.startswith(b"pb:") and len(payload) <= 64
+    assert service.is_page_callback(payload)
+    decoded, page, page_size = await service.decode_page_callback(payload)
+    assert (page, page_size, decoded.offset) == (3, 5, 15)
+    assert decoded.model_dump(include={"q", "chat_id", "chat_type", "date_from", "sender_username"}) == query.model_dump(
+        include={"q", "chat_id", "chat_type", "date_from", "sender_username"}
+    )
+
+
+@pytest.mark.asyncio
+async def test_compact_callback_stores_long_queries_and_survives_restart(tmp_path):
+    store = CallbackQueryStore(tmp_path / "config.sqlite3")
+    empty = {"hits": [], "processingTimeMs": 0, "estimatedTotalHits": 0}
+    long_query = SearchQuery(q="很长的查询" * 30, chat_type="group")
+
+    payload = await SearchService(_FakeMeili(empty), callback_store=store).encode_page_callback(long_query, 1, 5)
+    again = await SearchService(_FakeMeili(empty), callback_store=store).encode_page_callback(long_query, 1, 5)
+
+    assert payload.startswith(b"pb:") and len(payload) <= 64
+    assert payload == again and store.count() == 1
+    restarted = SearchService(_FakeMeili(empty), callback_store=CallbackQueryStore(tmp_path / "config.sqlite3"))
+    decoded, page, _ = await restarted.decode_page_callback(payload)
+    assert (decoded.q, decoded.chat_type, page) == (long_query.q, "group", 1)
+
+    with pytest.raises(DomainError):
+        await SearchService(_FakeMeili(empty)).decode_page_callback(payload)
+    with pytest.raises(DomainError):
+        await restarted.decode_page_callback(b"pb:\x00\xff")
+
+
+@pytest.mark.asyncio
+async def test_decode_json_page_callback_from_older_buttons():
+    service = SearchService(_FakeMeili({"hits": [], "processingTimeMs": 0, "estimatedTotalHits": 0}))
+    token = base64.urlsafe_b64encode(b'{"q":"hello","p":2,"s":5,"index":"telegram"}').decode("ascii").rstrip("=")
+
+    query, page, page_size = await service.decode_page_callback(f"page:{token}".encode())
+
+    assert (query.q, page, page_size) == ("hello", 2, 5)
+
+
 @pytest.mark.asyncio
 async def test_search_builds_filter_with_sender_username():
     fake = _FakeMeili({"hits": [], "processingTimeMs": 3, "estimatedTotalHits": 0})
@@ -158,12 +281,406 @@ async def test_search_builds_filter_with_sender_username():
     call = fake.calls[0]
     assert 'from_user.username = "alice\\"bob"' in call[2]["filter"]
 
-def test_encode_callback_includes_sender_username():
+@pytest.mark.asyncio
+async def test_encode_callback_includes_sender_username():
     service = SearchService(_FakeMeili({"hits": [], "processingTimeMs": 0, "estimatedTotalHits": 0}))
 
     query = SearchQuery(q="hello", sender_username="alice")
-    payload = service.encode_page_callback(query, page=1, page_size=5)
+    payload = await service.encode_page_callback(query, page=1, page_size=5)
 
-    decoded_query, page, page_size = service.decode_page_callback(payload)
+    decoded_query, page, page_size = await service.decode_page_callback(payload)
     assert decoded_query.q == "hello"
     assert decoded_query.sender_username == "alice"
+
+
+class _GenerationalMeili(_FakeMeili):
+    def __init__(self, result: dict):
+        super().__init__(result)
+        self.write_generation = 0
+        self.last_update: str | None = "2026-01-01T00:00:00Z"
+
+    def get_last_update(self):
+        return self.last_update
+
+
+def _hits_result(prefix: str, count: int = 3) -> dict:
+    return {
+        "hits": [
+            {
+                "id": f"{prefix}-{i}",
+                "chat": {"id": 100, "type": "group", "title": "g1"},
+                "date": "2026-01-01T00:00:00Z",
+                "text": f"hello {i}",
+            }
+            for i in range(count)
+        ],
+        "processingTimeMs": 1,
+        "estimatedTotalHits": count,
+    }
+
+
+@pytest.mark.asyncio
+async def test_presentation_cache_stays_valid_until_write_generation_changes():
+    fake = _GenerationalMeili(_hits_result("100"))
+    service = SearchService(
+        fake,
+        cache_enabled=True,
+        cache_ttl_sec=3600,
+        cache_stale_grace_sec=0,
+        generation_check_interval_sec=0,
+    )
+    query = SearchQuery(q="hello")
+
+    await service.search_for_presentation(query, page=0, page_size=5)
+    await service.search_for_presentation(query, page=0, page_size=5)
+    assert len(fake.calls) == 1
+
+    fake.write_generation += 1
+    await service.search_for_presentation(query, page=0, page_size=5)
+    assert len(fake.calls) == 2
+
+    fake.last_update = "2026-01-01T00:00:05Z"
+    await service.search_for_presentation(query, page=0, page_size=5)
+    assert len(fake.calls) == 3
+
+
+@pytest.mark.asyncio
+async def test_rendered_pages_are_cached_with_presentation_entry_and_invalidated_with_it():
+    fake = _GenerationalMeili(_hits_result("100"))
+    service = SearchService(fake, cache_enabled=True, cache_ttl_sec=3600, generation_check_interval_sec=0)
+    query = SearchQuery(q="hello")
+
+    await service.store_rendered_page(query, 0, 5, ("not cached yet", None))
+    assert await service.get_rendered_page(query, 0, 5) is None
+
+    await service.search_for_presentation(query, page=1, page_size=5)
+    await service.store_rendered_page(query, 1, 5, ("page 2", ["buttons"]))
+    assert await service.get_rendered_page(query, 1, 5) == ("page 2", ["buttons"])
+    assert await service.get_rendered_page(query, 1, 10) is None
+
+    fake.write_generation += 1
+    assert await service.get_rendered_page(query, 1, 5) is None
+
+    disabled = SearchService(fake, cache_enabled=False)
+    await disabled.search_for_presentation(query, page=0, page_size=5)
+    await disabled.store_rendered_page(query, 0, 5, ("page 1", None))
+    assert await disabled.get_rendered_page(query, 0, 5) is None
+
+
+@pytest.mark.asyncio
+async def test_presentation_cache_serves_stale_within_grace_and_refreshes_in_background():
+    fake = _GenerationalMeili(_hits_result("old"))
+    service = SearchService(
+        fake,
+        cache_enabled=True,
+        cache_ttl_sec=3600,
+        cache_stale_grace_sec=60,
+        generation_check_interval_sec=0,
+    )
+    query = SearchQuery(q="hello")
+
+    first = await service.search_for_presentation(query, page=0, page_size=5)
+    assert first.hits[0].id == "old-0"
+
+    fake.result = _hits_result("new")
+    fake.write_generation += 1
+    stale = await service.search_for_presentation(query, page=0, page_size=5)
+    assert stale.hits[0].id == "old-0"
+
+    await asyncio.gather(*list(service._refresh_tasks))
+    fresh = await service.search_for_presentation(query, page=0, page_size=5)
+    assert fresh.hits[0].id == "new-0"
+    assert len(fake.calls) == 2
+
+
+@pytest.mark.asyncio
+async def test_presentation_cache_falls_back_to_stale_entry_while_meili_unreachable():
+    from tg_search.core.meilisearch import MeiliSearchCircuitOpenError
+
+    fake = _GenerationalMeili(_hits_result("old"))
+    service = SearchService(
+        fake,
+        cache_enabled=True,
+        cache_ttl_sec=3600,
+        cache_stale_grace_sec=0,
+        generation_check_interval_sec=0,
+    )
+    query = SearchQuery(q="hello")
+    await service.search_for_presentation(query, page=0, page_size=5)
+
+    def _open_circuit(*args, **kwargs):
+        raise MeiliSearchCircuitOpenError("circuit open", retry_after=5)
+
+    fake.search = _open_circuit
+    fake.write_generation += 1
+    page = await service.search_for_presentation(query, page=0, page_size=5)
+    assert page.hits[0].id == "old-0"
+
+    with pytest.raises(MeiliSearchCircuitOpenError):
+        await service.search_for_presentation(SearchQuery(q="uncached"), page=0, page_size=5)
+
+
+class _PagedMeili:
+    """Serves a fixed corpus honoring the keyset filter produced by cursor mode."""
+
+    def __init__(self, docs: list[dict]):
+        self.docs = sorted(docs, key=lambda d: (d["date_ts"], d["msg_id"]), reverse=True)
+        self.calls: list[dict] = []
+
+    def search(self, query: str, index_name: str = "telegram", **kwargs):
+        self.calls.append(kwargs)
+        docs = self.docs
+        filter_str = kwargs.get("filter", "")
+        if "date_ts <" in filter_str:
+            tail = filter_str.split("date_ts < ", 1)[1]
+            date_ts = int(tail.split(" ", 1)[0])
+            msg_id = int(tail.split("msg_id < ", 1)[1].split(")", 1)[0])
+            docs = [d for d in docs if (d["date_ts"], d["msg_id"]) < (date_ts, msg_id)]
+        limit = kwargs["limit"]
+        return {"hits": docs[:limit], "processingTimeMs": 1, "estimatedTotalHits": len(docs)}
+
+
+def _cursor_doc(date_ts: int, msg_id: int) -> dict:
+    return {
+        "id": f"1-{msg_id}",
+        "chat": {"id": 1, "type": "group"},
+        "date": "2026-01-01T00:00:00+00:00",
+        "date_ts": date_ts,
+        "msg_id": msg_id,
+        "text": f"hit {msg_id}",
+    }
+
+
+@pytest.mark.asyncio
+async def test_search_cursor_mode_uses_keyset_filter_and_sort():
+    fake = _PagedMeili([_cursor_doc(100, 1), _cursor_doc(200, 2), _cursor_doc(200, 3)])
+    service = SearchService(fake, cache_enabled=False)
+
+    first = await service.search(SearchQuery(q="hit", chat_id=1, limit=2, offset=40, cursor="*"))
+
+    assert fake.calls[0]["offset"] == 0
+    assert fake.calls[0]["sort"] == ["date_ts:desc", "msg_id:desc"]
+    assert fake.calls[0]["filter"] == "chat_id = 1 AND date_ts EXISTS"
+    assert [hit.id for hit in first.hits] == ["1-3", "1-2"]
+    assert first.next_cursor == SearchService.encode_cursor(200, 2)
+
+    second = await service.search(SearchQuery(q="hit", limit=2, cursor=first.next_cursor))
+
+    assert fake.calls[1]["filter"] == "(date_ts < 200 OR (date_ts = 200 AND msg_id < 2))"
+    assert [hit.id for hit in second.hits] == ["1-1"]
+    assert second.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_search_rejects_malformed_cursor():
+    from tg_search.services.contracts import DomainError
+
+    service = SearchService(_PagedMeili([]), cache_enabled=False)
+
+    with pytest.raises(DomainError) as exc_info:
+        await service.search(SearchQuery(q="hit", cursor="not-a-cursor"))
+    assert exc_info.value.code == "search_cursor_invalid"
+
+
+@pytest.mark.asyncio
+async def test_iter_hits_walks_all_pages_without_offsets():
+    fake = _PagedMeili([_cursor_doc(1000 + i, i) for i in range(7)])
+    service = SearchService(fake, cache_enabled=False)
+
+    ids = [hit.id async for hit in service.iter_hits(SearchQuery(q="hit"), batch_size=3)]
+
+    assert ids == [f"1-{i}" for i in range(6, -1, -1)]
+    assert len(fake.calls) == 3
+    assert all(call["offset"] == 0 for call in fake.calls)
+
+
+@pytest.mark.asyncio
+async def test_search_joins_metadata_and_resolves_sender_ids(tmp_path):
+    from tg_search.config.metadata_store import ChatMeta, MetadataStore, UserMeta
+
+    store = MetadataStore(tmp_path / "meta.sqlite3")
+    store.upsert_chats([ChatMeta(id=10, type="group", title="Current Title")])
+    store.upsert_users([UserMeta(id=5, username="alice")])
+    fake = _FakeMeili(
+        {
+            "hits": [
+                {
+                    "id": "10-1",
+                    "chat": {"id": 10, "type": "group"},
+                    "date": "2026-01-01T00:00:00+00:00",
+                    "text": "hello",
+                    "from_user": {"id": 5},
+                }
+            ],
+            "processingTimeMs": 1,
+            "estimatedTotalHits": 1,
+        }
+    )
+    service = SearchService(fake, cache_enabled=False, metadata_store=store)
+
+    page = await service.search(SearchQuery(q="hello", sender_username="alice"))
+
+    assert fake.calls[0][2]["filter"] == '(from_user.username = "alice" OR from_user.id IN [5])'
+    assert page.hits[0].chat.title == "Current Title"
+    assert page.hits[0].from_user.username == "alice"
+
+
+class _MultiSearchMeili(_FakeMeili):
+    def __init__(self, result: dict):
+        super().__init__(result)
+        self.multi_calls: list[tuple[list[dict], dict | None]] = []
+
+    def multi_search(self, queries, federation=None):
+        self.multi_calls.append((queries, federation))
+        if federation is not None:
+            return self.result
+        return {"results": [self.result for _ in queries]}
+
+
+@pytest.mark.asyncio
+async def test_search_many_issues_one_multi_search_round_trip():
+    fake = _MultiSearchMeili(_hits_result("m", count=2))
+    service = SearchService(fake, cache_enabled=False)
+
+    pages = await service.search_many(
+        [SearchQuery(q="a", chat_id=1), SearchQuery(q="b", limit=5, offset=10)]
+    )
+
+    assert fake.calls == []
+    assert len(fake.multi_calls) == 1
+    queries, federation = fake.multi_calls[0]
+    assert federation is None
+    assert queries[0]["indexUid"] == "telegram"
+    assert queries[0]["filter"] == "chat_id = 1"
+    assert (queries[1]["q"], queries[1]["limit"], queries[1]["offset"]) == ("b", 5, 10)
+    assert [page.query for page in pages] == ["a", "b"]
+    assert [page.offset for page in pages] == [0, 10]
+
+
+@pytest.mark.asyncio
+async def test_search_federated_moves_pagination_to_federation():
+    from tg_search.services.contracts import DomainError
+
+    fake = _MultiSearchMeili(_hits_result("f", count=3))
+    service = SearchService(fake, cache_enabled=False)
+
+    page = await service.search_federated(
+        [SearchQuery(q="x"), SearchQuery(q="x", index_name="telegram_202601")],
+        limit=3,
+        offset=6,
+    )
+
+    queries, federation = fake.multi_calls[0]
+    assert federation == {"limit": 3, "offset": 6}
+    assert all("limit" not in item and "offset" not in item for item in queries)
+    assert [item["indexUid"] for item in queries] == ["telegram", "telegram_202601"]
+    assert (page.limit, page.offset, len(page.hits)) == (3, 6, 3)
+
+    with pytest.raises(DomainError):
+        await service.search_federated([SearchQuery(q="x", cursor="*")])
+
+
+class _ShardedMeili(_MultiSearchMeili):
+    def __init__(self, per_index: dict[str, list[dict]]):
+        super().__init__({})
+        self.per_index = per_index
+
+    def list_index_names(self):
+        return list(self.per_index)
+
+    def search(self, query: str, index_name: str = "telegram", **kwargs):
+        self.calls.append((query, index_name, kwargs))
+        hits = self.per_index[index_name][: kwargs["limit"]]
+        return {"hits": hits, "processingTimeMs": 1, "estimatedTotalHits": len(self.per_index[index_name])}
+
+    def multi_search(self, queries, federation=None):
+        self.multi_calls.append((queries, federation))
+        hits = [hit for item in queries for hit in self.per_index[item["indexUid"]]]
+        return {"hits": hits[: federation["limit"]], "processingTimeMs": 1, "estimatedTotalHits": len(hits)}
+
+
+@pytest.mark.asyncio
+async def test_sharded_search_prunes_by_date_and_federates_across_shards():
+    from tg_search.core.sharding import ShardRouter
+
+    fake = _ShardedMeili(
+        {
+            "telegram": [],
+            "telegram_202512": [_cursor_doc(1765000000, 1)],
+            "telegram_202601": [_cursor_doc(1768000000, 2)],
+            "telegram_202602": [_cursor_doc(1770500000, 3)],
+        }
+    )
+    service = SearchService(fake, cache_enabled=False, shard_router=ShardRouter(fake))
+
+    page = await service.search(
+        SearchQuery(q="hit", date_from=datetime(2026, 1, 10, 12), date_to=datetime(2026, 2, 20, 12), limit=5)
+    )
+
+    queries, federation = fake.multi_calls[0]
+    assert [item["indexUid"] for item in queries] == ["telegram_202602", "telegram_202601", "telegram"]
+    assert federation == {"limit": 5, "offset": 0}
+    assert {hit.id for hit in page.hits} == {"1-2", "1-3"}
+
+
+@pytest.mark.asyncio
+async def test_sharded_cursor_search_walks_shards_newest_first():
+    from tg_search.core.sharding import ShardRouter
+
+    fake = _ShardedMeili(
+        {
+            "telegram_202601": [_cursor_doc(1768000000 - i, 10 - i) for i in range(3)],
+            "telegram_202602": [_cursor_doc(1770500000 - i, 20 - i) for i in range(2)],
+        }
+    )
+    service = SearchService(fake, cache_enabled=False, shard_router=ShardRouter(fake))
+
+    page = await service.search(SearchQuery(q="hit", limit=3, cursor="*"))
+
+    assert fake.multi_calls == []
+    assert [(call[1], call[2]["limit"]) for call in fake.calls] == [("telegram_202602", 3), ("telegram_202601", 1)]
+    assert [hit.id for hit in page.hits] == ["1-20", "1-19", "1-10"]
+    assert page.next_cursor == SearchService.encode_cursor(1768000000, 10)
+
+
+class _FacetMeili:
+    def __init__(self):
+        self.calls: list[tuple[str, dict]] = []
+
+    def search(self, query: str, index_name: str = "telegram", **kwargs):
+        self.calls.append((query, kwargs))
+        distribution = {
+            "chat.id": {"100": 3, "200": 5},
+            "chat.type": {"group": 8},
+            "from_user.id": {"7": 8},
+        }
+        return {
+            "hits": [],
+            "processingTimeMs": 1,
+            "estimatedTotalHits": 8,
+            "facetDistribution": {attribute: distribution[attribute] for attribute in kwargs.get("facets", [])},
+        }
+
+
+@pytest.mark.asyncio
+async def test_facet_distribution_is_cached_and_reused_when_refining():
+    fake = _FacetMeili()
+    service = SearchService(fake, cache_enabled=True)
+
+    page = await service.search(SearchQuery(q="hello", facets=["chat.id", "chat.type"]))
+    assert page.facet_distribution == {"chat.id": {"200": 5, "100": 3}, "chat.type": {"group": 8}}
+    facet_calls = [kwargs for _, kwargs in fake.calls if "facets" in kwargs]
+    assert facet_calls == [{"limit": 0, "facets": ["chat.id", "chat.type"]}]
+
+    # Next page and facet -> filter refinement: chat.id is counted on the cached base query.
+    await service.search(SearchQuery(q="hello", offset=20, facets=["chat.id", "chat.type"]))
+    refined = await service.search(SearchQuery(q="hello", chat_id=200, facets=["chat.id", "chat.type"]))
+    assert refined.facet_distribution["chat.id"] == {"200": 5, "100": 3}
+    facet_calls = [kwargs for _, kwargs in fake.calls if "facets" in kwargs]
+    assert facet_calls[1:] == [{"limit": 0, "facets": ["chat.type"], "filter": "chat_id = 200"}]
+    # Hit searches never carry facets.
+    assert all("facets" not in kwargs for _, kwargs in fake.calls if kwargs.get("limit") != 0)
+
+    with pytest.raises(DomainError) as exc_info:
+        await service.search(SearchQuery(q="hello", facets=["text"]))
+    assert exc_info.value.code == "search_facets_invalid"
@@ -0,0 +1,85 @@
+"""Unit tests for month-sharded index routing."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+
+from tg_search.core.sharding import ShardRouter, shard_name
+
+pytestmark = [pytest.mark.unit]
+
+
+def _ts(year: int, month: int, day: int = 15) -> int:
+    return int(datetime(year, month, day, tzinfo=timezone.utc).timestamp())
+
+
+class _FakeMeili:
+    def __init__(self, indexes: list[str]):
+        self.indexes = list(indexes)
+        self.created: list[str] = []
+        self.added: list[tuple[str, list[dict]]] = []
+
+    def list_index_names(self):
+        return list(self.indexes)
+
+    def create_index(self, index_name="telegram", primary_key="id", *, allow_reindex=True):
+        self.created.append(index_name)
+        if index_name not in self.indexes:
+            self.indexes.append(index_name)
+        return SimpleNamespace(task_uid=len(self.created))
+
+    def add_documents(self, documents, index_name="telegram"):
+        self.added.append((index_name, documents))
+        return SimpleNamespace(task_uid=len(self.added))
+
+
+def test_shard_name_uses_utc_month():
+    assert shard_name("telegram", _ts(2026, 1, 31)) == "telegram_202601"
+    assert shard_name("telegram", _ts(2026, 2, 1)) == "telegram_202602"
+
+
+def test_route_writes_by_month_and_creates_missing_shards_once():
+    fake = _FakeMeili(["telegram", "telegram_202601"])
+    router = ShardRouter(fake)
+    router.all_indexes(refresh=True)
+
+    router.add_documents(
+        [
+            {"id": "1-1", "date_ts": _ts(2026, 1)},
+            {"id": "1-2", "date_ts": _ts(2026, 2)},
+            {"id": "1-3", "date_ts": _ts(2026, 2)},
+            {"id": "1-4"},
+        ]
+    )
+    router.add_documents([{"id": "1-5", "date_ts": _ts(2026, 2)}])
+
+    assert fake.created == ["telegram_202602"]
+    assert [(name, [d["id"] for d in docs]) for name, docs in fake.added] == [
+        ("telegram_202601", ["1-1"]),
+        ("telegram_202602", ["1-2", "1-3"]),
+        ("telegram", ["1-4"]),
+        ("telegram_202602", ["1-5"]),
+    ]
+
+
+def test_indexes_for_range_prunes_shards_but_keeps_base_index():
+    fake = _FakeMeili(["telegram", "telegram_202511", "telegram_202512", "telegram_202601", "system_config"])
+    router = ShardRouter(fake)
+
+    assert router.all_indexes() == ["telegram_202601", "telegram_202512", "telegram_202511", "telegram"]
+    assert router.indexes_for_range(_ts(2025, 12, 1), None) == ["telegram_202601", "telegram_202512", "telegram"]
+    assert router.indexes_for_range(None, _ts(2025, 11, 20)) == ["telegram_202511", "telegram"]
+
+
+def test_frozen_shards_are_skipped_by_settings_updates():
+    fake = _FakeMeili(["telegram", "telegram_202501", "telegram_202601"])
+    router = ShardRouter(fake, frozen_after_months=3)
+    now = datetime(2026, 2, 1, tzinfo=timezone.utc)
+
+    assert router.is_frozen("telegram_202501", now=now)
+    assert not router.is_frozen("telegram_202601", now=now)
+    assert not router.is_frozen("telegram", now=now)
+    assert "telegram_202501" not in router.apply_settings_to_hot_shards()
@@ -0,0 +1,216 @@
+"""Unit tests for the SQLite FTS5 search backend and its standby wiring."""
+
+from __future__ import annotations
+
+from datetime import datetime, timezone
+
+import pytest
+
+from tg_search.core.batch_writer import BatchWriter
+from tg_search.core.meilisearch import MeiliSearchAPIError, MeiliSearchCircuitOpenError, MeiliSearchTimeoutError
+from tg_search.core.sqlite_fts import SqliteFtsIndex, build_match_query, compile_filter, crop, tokenize
+from tg_search.services.contracts import SearchQuery
+from tg_search.services.search_service import SearchService
+
+pytestmark = [pytest.mark.unit]
+
+
+def _doc(chat_id: int, msg_id: int, text: str, *, date_ts: int, user_id: int | None = None) -> dict:
+    return {
+        "id": f"{chat_id}-{msg_id}",
+        "chat": {"id": chat_id, "type": "group"},
+        "chat_id": chat_id,
+        "msg_id": msg_id,
+        "date_ts": date_ts,
+        "date": datetime.fromtimestamp(date_ts, timezone.utc).isoformat(),
+        "text": text,
+        "from_user": {"id": user_id} if user_id is not None else None,
+    }
+
+
+@pytest.fixture
+def index(tmp_path):
+    fts = SqliteFtsIndex(tmp_path / "fts.sqlite3")
+    fts.add_documents(
+        [
+            _doc(1, 1, "我爱北京天安门", date_ts=100, user_id=7),
+            _doc(1, 2, "Release notes for MeiliSearch", date_ts=200),
+            _doc(2, 1, "北京烤鸭真好吃", date_ts=300),
+            _doc(2, 2, "東京タワーに行きました", date_ts=400),
+            _doc(2, 3, "한국어 검색 테스트", date_ts=500),
+        ]
+    )
+    return fts
+
+
+def test_cjk_bigram_tokens_and_match_query():
+    assert tokenize("北京天安门 Hello") == ["北京", "京天", "天安", "安门", "门", "hello"]
+    assert build_match_query("天安门 rel") == '"天安 安门" AND "rel"*'
+    assert build_match_query("门") == '"门"*'
+    assert build_match_query("  ，。") is None
+
+
+def test_search_matches_cjk_substrings_with_highlight(index):
+    result = index.search("北京", attributesToHighlight=["text"], highlightPreTag="<b>", highlightPostTag="</b>")
+    assert {hit["id"] for hit in result["hits"]} == {"1-1", "2-1"}
+    assert result["estimatedTotalHits"] == 2
+    assert {hit["_formatted"]["text"] for hit in result["hits"]} == {"我爱<b>北京</b>天安门", "<b>北京</b>烤鸭真好吃"}
+
+    # Substring must be contiguous: 京烤 appears, 京门 does not.
+    assert [hit["id"] for hit in index.search("京烤")["hits"]] == ["2-1"]
+    assert index.search("京门")["hits"] == []
+    assert [hit["id"] for hit in index.search("タワー")["hits"]] == ["2-2"]
+    assert [hit["id"] for hit in index.search("검색")["hits"]] == ["2-3"]
+    assert [hit["id"] for hit in index.search("门")["hits"]] == ["1-1"]
+    assert [hit["id"] for hit in index.search("meili")["hits"]] == ["1-2"]
+
+
+def test_crop_keeps_words_around_first_match():
+    text = "前面" * 20 + "北京烤鸭" + "后面" * 20
+    assert crop(text, "烤鸭", 6) == "…面北京烤鸭后…"
+    assert crop("alpha beta gamma delta epsilon", "delta", 2) == "…gamma delta…"
+    assert crop("short text", "text", 10) == "short text"
+    # No match: crop from the start.
+    assert crop("one two three four", "zzz", 2) == "one two…"
+
+
+def test_search_crops_formatted_text_without_retrieving_raw_text(index):
+    result = index.search(
+        "北京",
+        attributesToRetrieve=["id", "chat"],
+        attributesToHighlight=["text"],
+        attributesToCrop=["text"],
+        cropLength=3,
+        highlightPreTag="<b>",
+        highlightPostTag="</b>",
+    )
+    hit = next(hit for hit in result["hits"] if hit["id"] == "1-1")
+    assert "text" not in hit
+    assert hit["_formatted"]["text"] == "…爱<b>北京</b>…"
+
+
+def test_upsert_and_delete_keep_full_text_in_sync(index):
+    index.add_documents([_doc(2, 1, "上海小笼包", date_ts=300)])
+    assert [hit["id"] for hit in index.search("北京")["hits"]] == ["1-1"]
+    assert [hit["id"] for hit in index.search("小笼")["hits"]] == ["2-1"]
+
+    index.delete_documents(["1-1"])
+    assert index.search("北京")["hits"] == []
+    assert index.count() == 4
+    assert index.write_generation == 3
+
+
+def test_filter_compiler_covers_search_service_grammar():
+    sql, args = compile_filter('chat_id = 1 AND (from_user.username = "a\\"b" OR from_user.id IN [1, 2]) AND date_ts 1 TO 9')
+    assert sql == "(d.chat_id = ? AND (d.from_username = ? OR d.from_user_id IN (?, ?)) AND d.date_ts BETWEEN ? AND ?)"
+    assert args == [1, 'a"b', 1, 2, 1, 9]
+    assert compile_filter(["chat_id = 1", ["msg_id > 3", "date_ts NOT EXISTS"]])[0] == (
+        "d.chat_id = ? AND (d.msg_id > ? OR d.date_ts IS NULL)"
+    )
+    with pytest.raises(MeiliSearchAPIError) as exc_info:
+        compile_filter("text = hello")
+    assert exc_info.value.error_code == "invalid_search_filter"
+
+
+@pytest.mark.asyncio
+async def test_search_service_filters_and_cursor_pages_on_sqlite_backend(index):
+    service = SearchService(index, cache_enabled=False)
+
+    page = await service.search(SearchQuery(q="北京", chat_id=1))
+    assert [hit.id for hit in page.hits] == ["1-1"]
+    assert page.hits[0].formatted_text == "我爱<mark>北京</mark>天安门"
+
+    ids = [hit.id async for hit in service.iter_hits(SearchQuery(q="京"), batch_size=2)]
+    assert ids == ["2-2", "2-1", "1-1"]
+
+
+@pytest.mark.asyncio
+async def test_facets_count_by_value_and_survive_refinement_on_sqlite_backend(index):
+    service = SearchService(index, cache_enabled=False)
+
+    page = await service.search(SearchQuery(q="京", limit=1, facets=["chat.id", "from_user.id"]))
+    assert len(page.hits) == 1
+    assert page.facet_distribution == {"chat.id": {"2": 2, "1": 1}, "from_user.id": {"7": 1}}
+
+    # Refining to one chat keeps the other chat selectable; other facets follow the filter.
+    refined = await service.search(SearchQuery(q="京", chat_id=2, facets=["chat.id", "from_user.id"]))
+    assert {hit.id for hit in refined.hits} == {"2-1", "2-2"}
+    assert refined.facet_distribution == {"chat.id": {"2": 2, "1": 1}, "from_user.id": {}}
+
+    with pytest.raises(MeiliSearchAPIError) as exc_info:
+        index.search("京", facets=["text"])
+    assert exc_info.value.error_code == "invalid_search_facets"
+
+
+class _DownMeili:
+    write_generation = 0
+
+    def search(self, *args, **kwargs):
+        raise MeiliSearchCircuitOpenError("circuit open", retry_after=5)
+
+    def multi_search(self, *args, **kwargs):
+        raise MeiliSearchCircuitOpenError("circuit open", retry_after=5)
+
+    def add_documents(self, documents, index_name="telegram"):
+        raise MeiliSearchCircuitOpenError("circuit open", retry_after=5)
+
+
+@pytest.mark.asyncio
+async def test_standby_receives_ingest_and_serves_search_while_meili_is_down(tmp_path):
+    standby = SqliteFtsIndex(tmp_path / "fts.sqlite3")
+    meili = _DownMeili()
+    writer = BatchWriter(meili, mirror=standby)
+    service = SearchService(meili, cache_enabled=False, standby=standby)
+
+    result = writer.write([_doc(1, 1, "停机期间的新消息", date_ts=100)])
+    assert result.buffered == 1
+
+    page = await service.search(SearchQuery(q="新消息"))
+    assert [hit.id for hit in page.hits] == ["1-1"]
+    (batch_page,) = await service.search_many([SearchQuery(q="停机")])
+    assert [hit.id for hit in batch_page.hits] == ["1-1"]
+
+
+class _HangingMeili(_DownMeili):
+    def search(self, *args, **kwargs):
+        raise MeiliSearchTimeoutError("read timed out")
+
+    multi_search = search
+
+
+@pytest.mark.asyncio
+async def test_standby_serves_search_when_meili_times_out(tmp_path):
+    standby = SqliteFtsIndex(tmp_path / "fts.sqlite3")
+    standby.add_documents([_doc(1, 1, "主节点挂起时的消息", date_ts=100)])
+    service = SearchService(_HangingMeili(), cache_enabled=False, standby=standby)
+
+    page = await service.search(SearchQuery(q="挂起"))
+    assert [hit.id for hit in page.hits] == ["1-1"]
+    (batch_page,) = await service.search_many([SearchQuery(q="挂起")])
+    assert [hit.id for hit in batch_page.hits] == ["1-1"]
+
+
+def test_federated_search_merges_by_the_requested_sort(tmp_path):
+    fts = SqliteFtsIndex(tmp_path / "fts.sqlite3")
+    fts.add_documents([_doc(1, 1, "a", date_ts=300), _doc(1, 2, "b", date_ts=100)], "left")
+    fts.add_documents([_doc(2, 1, "c", date_ts=200), _doc(2, 2, "d", date_ts=400)], "right")
+    queries = [{"indexUid": name, "q": "", "sort": ["date_ts:asc"]} for name in ("left", "right")]
+
+    ascending = fts.multi_search(queries, {"limit": 3})
+    by_chat = fts.multi_search(
+        [{**query, "sort": ["chat_id:desc", "msg_id:asc"]} for query in queries], {"limit": 10, "offset": 1}
+    )
+
+    assert [hit["id"] for hit in ascending["hits"]] == ["1-2", "2-1", "1-1"]
+    assert [hit["id"] for hit in by_chat["hits"]] == ["2-2", "1-1", "1-2"]
+    assert by_chat["estimatedTotalHits"] == 4
+
+
+def test_batch_writer_bisects_rejected_documents_on_sqlite_backend(tmp_path):
+    fts = SqliteFtsIndex(tmp_path / "fts.sqlite3")
+    writer = BatchWriter(fts)
+
+    result = writer.write([_doc(1, 1, "好", date_ts=1), {"text": "no id"}, _doc(1, 2, "的", date_ts=2)])
+
+    assert (result.indexed, result.dead_lettered) == (2, 1)
+    assert fts.count() == 2
@@ -0,0 +1,113 @@
+"""Unit tests for saved-search watches and the Aho–Corasick matcher."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from tg_search.config.config_store import ConfigStore
+from tg_search.config.metadata_store import MetadataStore, UserMeta
+from tg_search.services.contracts import DomainError
+from tg_search.services.watch_service import WatchService, parse_watch_query
+from tg_search.utils.aho_corasick import AhoCorasick
+
+pytestmark = [pytest.mark.unit]
+
+
+def _doc(chat_id: int, msg_id: int, text: str, *, user_id: int | None = None, chat_type: str = "group") -> dict:
+    return {
+        "id": f"{chat_id}-{msg_id}",
+        "chat": {"id": chat_id, "type": chat_type},
+        "chat_id": chat_id,
+        "msg_id": msg_id,
+        "date": "2026-01-01T00:00:00+00:00",
+        "text": text,
+        "from_user": {"id": user_id} if user_id is not None else None,
+    }
+
+
+def test_aho_corasick_reports_overlapping_matches_with_start_offsets():
+    automaton: AhoCorasick[str] = AhoCorasick()
+    for pattern in ("he", "she", "his", "hers", "北京", "京天"):
+        automaton.add(pattern, pattern)
+    automaton.build()
+
+    assert sorted(automaton.iter_matches("ushers")) == [(1, "she"), (2, "he"), (2, "hers")]
+    assert list(automaton.iter_matches("北京天安门")) == [(0, "北京"), (1, "京天")]
+    assert len(automaton) == 6
+
+
+def test_parse_watch_query_splits_terms_and_filters():
+    parsed = parse_watch_query("Deploy 发布 chat:-100 type:Group from:@Alice")
+    assert parsed.terms == ["deploy", "发布"]
+    assert (parsed.chat_id, parsed.chat_type, parsed.sender_username) == (-100, "group", "alice")
+
+    with pytest.raises(DomainError) as exc_info:
+        parse_watch_query("type:forum hello")
+    assert exc_info.value.code == "watch_invalid_query"
+    with pytest.raises(DomainError):
+        parse_watch_query("，。")
+
+
+@pytest.fixture
+def store(tmp_path):
+    return ConfigStore(None, db_path=str(tmp_path / "config.sqlite3"))
+
+
+@pytest.mark.asyncio
+async def test_watches_persist_and_match_live_messages(store, tmp_path):
+    metadata = MetadataStore(tmp_path / "config.sqlite3")
+    metadata.upsert_users([UserMeta(id=42, username="alice")])
+    service = WatchService(store, metadata_store=metadata)
+
+    release = await service.add_watch(1, "release 上线")
+    from_alice = await service.add_watch(2, "from:@alice")
+    chat_only = await service.add_watch(1, "bug chat:7")
+
+    assert [w.id for w in service.match(_doc(3, 1, "Release 今天上线了"))] == [release.id]
+    # Latin terms must start a word; CJK runs are substrings.
+    assert service.match(_doc(3, 2, "prerelease 上线")) == []
+    assert service.match(_doc(3, 3, "release 下线")) == []
+    assert [w.id for w in service.match(_doc(9, 1, "hi", user_id=42))] == [from_alice.id]
+    assert [w.id for w in service.match(_doc(7, 1, "found a bug"))] == [chat_only.id]
+    assert service.match(_doc(8, 1, "found a bug")) == []
+    # The owner's own messages never notify them.
+    assert service.match(_doc(3, 4, "release 上线", user_id=1)) == []
+
+    reloaded = WatchService(ConfigStore(None, db_path=str(tmp_path / "config.sqlite3")))
+    assert [w.id for w in await reloaded.list_watches(1)] == [release.id, chat_only.id]
+    assert await reloaded.remove_watch(2, release.id) is False  # not the owner
+    assert await reloaded.remove_watch(1, release.id) is True
+    assert await reloaded.evaluate(_doc(3, 5, "release 上线")) == []
+
+    stats = service.stats()
+    assert (stats.watches, stats.evaluated, stats.matched) == (3, 7, 3)
+    assert stats.p95_ms >= stats.p50_ms >= 0
+
+
+@pytest.mark.asyncio
+async def test_evaluate_notifies_subscribers_with_highlighted_text(store):
+    service = WatchService(store)
+    watch = await service.add_watch(5, "部署")
+    received: list[tuple[int, str]] = []
+
+    async def _notify(item, document):
+        received.append((item.id, document["_formatted"]["text"]))
+
+    service.subscribe(_notify)
+    matched = await service.evaluate(_doc(1, 1, "部署完成"))
+    await asyncio.sleep(0.01)
+
+    assert [w.id for w in matched] == [watch.id]
+    assert received == [(watch.id, "<mark>部署</mark>完成")]
+
+
+@pytest.mark.asyncio
+async def test_add_watch_respects_rule_limit(store):
+    service = WatchService(store, max_rules=1)
+    await service.add_watch(1, "one")
+
+    with pytest.raises(DomainError) as exc_info:
+        await service.add_watch(1, "two")
+    assert exc_info.value.code == "watch_limit_exceeded"
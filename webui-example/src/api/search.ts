@@ -8,8 +8,13 @@ export interface SearchRequest {
   date_from?: string;
   date_to?: string;
   sender_username?: string;
+  sender_id?: number;
+  /** Comma-separated facet attributes, e.g. `chat.id,from_user.id`. */
+  facets?: string;
 }
 
+export type FacetAttribute = 'chat.id' | 'chat.type' | 'from_user.id';
+
 interface ChatInfo {
   id: number;
   type: string;
@@ -38,6 +43,8 @@ export interface SearchResponse {
   limit: number;
   offset: number;
   processing_time_ms: number;
+  /** attribute -> value -> hits, most hits first; counted without the attribute's own filter. */
+  facet_distribution?: Partial<Record<FacetAttribute, Record<string, number>>> | null;
 }
 
 export interface SearchStatsResponse {
@@ -9,6 +9,10 @@ export interface StorageStatsData {
     cache_bytes: number | null;
     media_supported: boolean;
     cache_supported: boolean;
+    dedup_messages: number | null;
+    dedup_duplicates: number | null;
+    dedup_skipped: number | null;
+    dedup_saved_bytes: number | null;
     notes: string[];
 }
 